@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Daemon End-to-End Benchmark
+Drives a real chat daemon against the local stub server (fully offline)
+
+Usage:
+    python3 benchmarks/bench_daemon.py [--clients N] [--requests N] [--output FILE] [--compare FILE]
+
+Setup per run (nothing touches ~/.aichat):
+- benchmarks/stub_server.py in-process: OpenAI + Ollama with seeded latency
+- temp HOME with lang/*.conf, .env (dummy key) and config pointing at the stub
+- chat_daemon.py as a subprocess on its own socket, AI_CHAT_TRACE_FILE enabled
+
+Workload: seeded mix of SAVE / RETRIEVE / DELETE (+ cancel) / general questions
+built from the KEYWORDS_* sets of lang/en, de and es.conf; one session per client.
+
+Reports p50/p95/p99 per route (client-side and daemon trace) and per phase
+(trace spans: keyword_detection, rule_parse, qwen_generate, openai_call, ...).
+--output writes the JSON result; --compare prints deltas against an earlier one.
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / 'benchmarks'))
+
+from daemon_protocol import FrameReader, ProtocolError, connect, send_frame
+from daemon_protocol import request as daemon_request
+from metrics import route_for
+from stub_server import StubServer, load_canned_sql
+
+SCHEMA_VERSION = 1
+LANGS = ('en', 'de', 'es')
+
+# (label, value) pairs and general questions per language
+LABELS = {
+    'en': [("email", "anna@example.com"), ("phone", "5551234"), ("wifi password", "Blue42!"),
+           ("birthday", "1990-03-15"), ("address", "12 Baker Street")],
+    'de': [("Email", "max@beispiel.de"), ("Telefon", "0301234567"), ("Passwort", "Sonne99"),
+           ("Geburtstag", "15.03.1990"), ("Adresse", "Hauptstraße 5")],
+    'es': [("correo", "lucia@ejemplo.es"), ("teléfono", "669686832"), ("contraseña", "Luna77"),
+           ("cumpleaños", "15/03/1990"), ("dirección", "Calle Mayor 3")],
+}
+QUESTIONS = {
+    'en': ["Explain the difference between TCP and UDP in simple terms",
+           "Write a haiku about autumn leaves on a quiet lake",
+           "How do I reverse a linked list in Python without recursion?"],
+    'de': ["Wie funktioniert eine Wärmepumpe?",
+           "Erkläre mir bitte den Unterschied zwischen Hashing und Verschlüsselung",
+           "Was ist die Hauptstadt von Kanada?"],
+    'es': ["¿Cuál es la capital de Australia y por qué no es Sídney?",
+           "Escribe una receta de paella para cuatro personas",
+           "¿Cómo funciona la fotosíntesis?"],
+}
+CANCEL = "n"  # Same answer in every language
+
+DEFAULT_MIX = "chat=0.5,save=0.2,retrieve=0.2,delete=0.1"
+
+
+def load_keywords(lang_dir: Path, lang: str) -> Dict[str, List[str]]:
+    """KEYWORDS_SAVE / _RETRIEVE / _DELETE of one lang/<lang>.conf"""
+    keywords = {}
+    pattern = re.compile(r'^KEYWORDS_(SAVE|RETRIEVE|DELETE)="(.*)"')
+    for line in (lang_dir / f"{lang}.conf").read_text(encoding='utf-8').splitlines():
+        match = pattern.match(line.strip())
+        if match:
+            words = [w.strip() for w in match.group(2).split(',') if w.strip() and '{' not in w]
+            keywords[match.group(1).lower()] = words
+    return keywords
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for part in spec.split(','):
+        kind, _, weight = part.partition('=')
+        if kind.strip() not in ('chat', 'save', 'retrieve', 'delete'):
+            raise ValueError(f"Unknown workload kind: {kind}")
+        mix[kind.strip()] = float(weight)
+    return mix
+
+
+def build_workload(rng: random.Random, count: int, mix: Dict[str, float], langs, keywords,
+                   stream_ratio: float) -> List[Dict[str, Any]]:
+    """Seeded message list for one client session"""
+    kinds, weights = zip(*mix.items())
+    messages = []
+    while len(messages) < count:
+        kind = rng.choices(kinds, weights)[0]
+        lang = rng.choice(langs)
+        label, value = rng.choice(LABELS[lang])
+        if kind == 'chat':
+            text = rng.choice(QUESTIONS[lang])
+        else:
+            verb = rng.choice(keywords[lang][kind][:6])  # Common verbs first in the conf files
+            text = f"{verb} {label} {value}" if kind == 'save' else f"{verb} {label}"
+        messages.append({'kind': kind, 'lang': lang, 'text': text,
+                         'stream': kind == 'chat' and rng.random() < stream_ratio})
+    return messages
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    """Nearest-rank p50/p95/p99 (exact - comparable between runs)"""
+    if not values:
+        return {'count': 0}
+    ordered = sorted(values)
+
+    def rank(p):
+        return ordered[min(len(ordered) - 1, max(0, math.ceil(p / 100 * len(ordered)) - 1))]
+
+    return {
+        'count': len(ordered),
+        'mean_ms': round(sum(ordered) / len(ordered), 3),
+        'p50_ms': round(rank(50), 3),
+        'p95_ms': round(rank(95), 3),
+        'p99_ms': round(rank(99), 3),
+        'max_ms': round(ordered[-1], 3),
+    }
+
+
+class DaemonProcess:
+    """chat_daemon.py in a throwaway HOME, wired to the stub server"""
+
+    def __init__(self, stub: StubServer, workers: int, extra_config: Dict[str, str] = None):
+        self.home = Path(tempfile.mkdtemp(prefix="aichat_bench_"))
+        self.config_dir = self.home / ".aichat"
+        self.config_dir.mkdir()
+        shutil.copytree(ROOT / "lang", self.config_dir / "lang")
+        (self.config_dir / ".env").write_text("OPENAI_API_KEY=sk-bench\n")
+        self.trace_file = self.config_dir / "traces.jsonl"
+        config = {
+            'AI_CHAT_OPENAI_BASE_URL': stub.openai_base_url,
+            'AI_CHAT_TRACE_FILE': str(self.trace_file),
+            'AI_CHAT_DAEMON_WORKERS': str(workers),
+            'AI_CHAT_MARKDOWN_RENDER': 'false',
+        }
+        config.update(extra_config or {})
+        (self.config_dir / "config").write_text(
+            "".join(f'{key}="{value}"\n' for key, value in config.items()))
+        self.socket_path = str(self.config_dir / "bench.sock")
+        self.log_path = self.home / "daemon.log"
+
+        env = dict(os.environ, HOME=str(self.home), TMPDIR=str(self.home),
+                   OLLAMA_HOST=stub.ollama_host, PYTHONDONTWRITEBYTECODE='1')
+        self._log = open(self.log_path, 'wb')
+        self.process = subprocess.Popen([sys.executable, str(ROOT / "chat_daemon.py"), self.socket_path],
+                                        cwd=str(ROOT), env=env, stdout=self._log, stderr=subprocess.STDOUT)
+
+    def wait_ready(self, timeout: float = 60.0) -> float:
+        """Block until the daemon answers ping, return startup time in ms"""
+        start = time.perf_counter()
+        while time.perf_counter() - start < timeout:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Daemon exited early - see {self.log_path}")
+            try:
+                if daemon_request(self.socket_path, {'action': 'ping'}, timeout=1.0):
+                    return (time.perf_counter() - start) * 1000
+            except (OSError, ProtocolError):
+                pass
+            time.sleep(0.05)
+        raise RuntimeError(f"Daemon not ready after {timeout:.0f}s - see {self.log_path}")
+
+    def request(self, message: Dict, timeout: float = 10.0):
+        return daemon_request(self.socket_path, message, timeout=timeout)
+
+    def traces(self) -> List[Dict[str, Any]]:
+        if not self.trace_file.exists():
+            return []
+        with open(self.trace_file, 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def stop(self, keep_home: bool = False):
+        try:
+            self.request({'action': 'shutdown'}, timeout=2.0)
+        except (OSError, ProtocolError):
+            pass
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        self._log.close()
+        if not keep_home:
+            shutil.rmtree(self.home, ignore_errors=True)
+
+
+def run_client(socket_path: str, session_id: str, workload: List[Dict], results: List[Dict], timeout: float):
+    """Send one session's messages over a persistent connection"""
+    sock = connect(socket_path, timeout)
+    reader = FrameReader(sock)
+    pending = list(reversed(workload))
+    try:
+        while pending:
+            item = pending.pop()
+            start = time.perf_counter()
+            first_chunk = None
+            send_frame(sock, {'action': 'send_message', 'session_id': session_id,
+                              'message': item['text'], 'stream': item['stream']})
+            while True:
+                frame = reader.read_frame()
+                if frame is None:
+                    raise ProtocolError("Daemon closed the connection")
+                if frame.get('type') == 'chunk':
+                    if first_chunk is None:
+                        first_chunk = time.perf_counter()
+                    continue
+                break
+            end = time.perf_counter()
+            metadata = frame.get('metadata') or {}
+            results.append({
+                'kind': item['kind'], 'lang': item['lang'], 'stream': item['stream'],
+                'ok': bool(frame.get('success')) and not metadata.get('error'),
+                'latency_ms': (end - start) * 1000,
+                'first_chunk_ms': (first_chunk - start) * 1000 if first_chunk else None,
+                'source': metadata.get('source'), 'action': metadata.get('action'),
+            })
+            if metadata.get('action') == 'DELETE_PENDING':
+                # Answer the confirmation prompt (cancel) so the data set stays the same
+                pending.append({'kind': 'delete_confirm', 'lang': item['lang'], 'text': CANCEL, 'stream': False})
+    finally:
+        sock.close()
+
+
+def summarize(client_results: List[Dict], traces: List[Dict]) -> Dict[str, Any]:
+    by_kind: Dict[str, List[float]] = {}
+    for r in client_results:
+        by_kind.setdefault(r['kind'], []).append(r['latency_ms'])
+    first_chunks = [r['first_chunk_ms'] for r in client_results if r['first_chunk_ms'] is not None]
+
+    routes: Dict[str, List[float]] = {}
+    phases: Dict[str, List[float]] = {}
+    for trace in traces:
+        if trace.get('name') != 'send_message':
+            continue
+        routes.setdefault(route_for(trace.get('attrs') or {}), []).append(trace['duration_ms'])
+        for span in trace.get('spans', []):
+            if span.get('duration_ms') is not None:
+                phases.setdefault(span['name'], []).append(span['duration_ms'])
+
+    return {
+        'client': {
+            'total': percentiles([r['latency_ms'] for r in client_results]),
+            'kinds': {kind: percentiles(values) for kind, values in sorted(by_kind.items())},
+            'first_chunk': percentiles(first_chunks),
+            'errors': sum(1 for r in client_results if not r['ok']),
+        },
+        'routes': {route: percentiles(values) for route, values in sorted(routes.items())},
+        'phases': {name: percentiles(values) for name, values in sorted(phases.items())},
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=str(ROOT), capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_benchmark(args) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+    langs = [lang.strip() for lang in args.langs.split(',') if lang.strip()]
+    keywords = {lang: load_keywords(ROOT / "lang", lang) for lang in langs}
+    mix = parse_mix(args.mix)
+    workloads = [build_workload(rng, args.requests, mix, langs, keywords, args.stream_ratio)
+                 for _ in range(args.clients)]
+
+    stub = StubServer(openai_latency=args.openai_latency, qwen_latency=args.qwen_latency,
+                      ollama_latency=args.ollama_latency, chunk_latency=args.chunk_latency,
+                      canned_sql=load_canned_sql(args.sql_file), seed=args.seed).start()
+    daemon = DaemonProcess(stub, workers=max(args.clients, 1))
+    try:
+        startup_ms = daemon.wait_ready()
+        client_results: List[Dict] = []
+        threads = [threading.Thread(target=run_client,
+                                    args=(daemon.socket_path, f"bench-{i}", workload, client_results, args.timeout))
+                   for i, workload in enumerate(workloads)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - start
+
+        metrics = daemon.request({'action': 'metrics'}) or {}
+        # Traces are appended as requests finish - all clients are done here
+        traces = daemon.traces()
+    finally:
+        daemon.stop(keep_home=args.keep_home)
+        stub.stop()
+
+    result = {
+        'benchmark': 'daemon',
+        'schema': SCHEMA_VERSION,
+        'version': (ROOT / "VERSION").read_text().strip() if (ROOT / "VERSION").exists() else None,
+        'commit': git_commit(),
+        'timestamp': int(time.time()),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'params': {key: value for key, value in vars(args).items() if key not in ('output', 'compare', 'keep_home')},
+        'startup_ms': round(startup_ms, 1),
+        'wall_seconds': round(wall, 3),
+        'throughput_rps': round(len(client_results) / wall, 2) if wall else 0.0,
+        'stub_requests': dict(sorted(stub.counts.items())),
+        'qwen_prefill_tokens': {
+            'count': len(stub.prefill_tokens),
+            'mean': round(sum(stub.prefill_tokens) / len(stub.prefill_tokens), 1) if stub.prefill_tokens else None,
+        },
+        'caches': (metrics.get('response') or {}).get('caches', {}),
+    }
+    result.update(summarize(client_results, traces))
+    return result
+
+
+def print_report(result: Dict[str, Any], baseline: Dict[str, Any] = None):
+    def row(name, stats, base=None):
+        if not stats.get('count'):
+            return
+        line = (f"  {name:<22} {stats['count']:>6} {stats['p50_ms']:>9.1f} "
+                f"{stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f}")
+        if base and base.get('count'):
+            deltas = []
+            for key in ('p50_ms', 'p95_ms', 'p99_ms'):
+                delta = (stats[key] - base[key]) / base[key] * 100 if base[key] else 0.0
+                deltas.append(f"{delta:+6.1f}%")
+            line += "   " + " ".join(deltas)
+        print(line)
+
+    print(f"🧪 Daemon benchmark {result.get('version')} ({result.get('commit')}): "
+          f"{result['client']['total'].get('count', 0)} requests, {result['params']['clients']} clients, "
+          f"{result['throughput_rps']} req/s, errors {result['client']['errors']}")
+    header = f"  {'':<22} {'n':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    if baseline:
+        header += f"   {'Δp50':>7} {'Δp95':>7} {'Δp99':>7}  (vs {baseline.get('commit') or baseline.get('version')})"
+
+    for title, key in (("Client latency by kind", 'kinds'), ("Daemon latency by route", 'routes'),
+                       ("Phases (trace spans)", 'phases')):
+        section = result['client'][key] if key == 'kinds' else result[key]
+        base_section = {}
+        if baseline:
+            base_section = baseline['client'].get(key, {}) if key == 'kinds' else baseline.get(key, {})
+        print(f"\n{title}\n{header}")
+        for name, stats in section.items():
+            row(name, stats, base_section.get(name))
+    if result['client']['first_chunk'].get('count'):
+        print()
+        row("first chunk (stream)", result['client']['first_chunk'],
+            (baseline or {}).get('client', {}).get('first_chunk'))
+    prefill = result.get('qwen_prefill_tokens') or {}
+    if prefill.get('count'):
+        print(f"\nQwen prefill: {prefill['mean']} tokens/request over {prefill['count']} SQL requests")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end daemon benchmark against the local stub server")
+    parser.add_argument('--clients', type=int, default=4, help="Concurrent sessions")
+    parser.add_argument('--requests', type=int, default=25, help="Messages per session")
+    parser.add_argument('--mix', default=DEFAULT_MIX, help="Workload weights (chat, save, retrieve, delete)")
+    parser.add_argument('--langs', default=",".join(LANGS), help="Languages from lang/*.conf")
+    parser.add_argument('--stream-ratio', type=float, default=0.5, help="Share of chat messages streamed")
+    parser.add_argument('--openai-latency', default="lognormal:400:0.3", help="Stub latency SPEC")
+    parser.add_argument('--chunk-latency', default="fixed:5", help="Stub SSE chunk delay SPEC")
+    parser.add_argument('--qwen-latency', default="lognormal:300:0.25", help="Stub latency SPEC")
+    parser.add_argument('--ollama-latency', default="lognormal:200:0.3", help="Stub latency SPEC")
+    parser.add_argument('--sql-file', default=None, help="Canned SQL JSON for the stub")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--timeout', type=float, default=30.0, help="Per-request socket timeout")
+    parser.add_argument('--output', default=None, help="Write JSON result here")
+    parser.add_argument('--compare', default=None, help="Earlier JSON result to diff against")
+    parser.add_argument('--keep-home', action='store_true', help="Keep temp HOME (daemon.log, traces.jsonl)")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    result = run_benchmark(args)
+    print_report(result, baseline)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+        print(f"\n📄 Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Database Profile Benchmark
+Insert/select throughput of memory.db under each AI_CHAT_DB_PROFILE
+
+Usage:
+    python3 benchmarks/bench_db_profiles.py [--rows N] [--threads N] [--key HEX]
+
+Per profile (fresh temp database each):
+- insert:     one INSERT + commit per row (like execute_sql / save_message_to_db)
+- select:     indexed SELECT by meta on the reader pool
+- concurrent: one writer thread + N reader threads for a fixed duration
+"""
+
+import argparse
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from db_repository import DB_PROFILES, DatabaseRepository
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS mydata (
+        id INTEGER PRIMARY KEY,
+        content TEXT NOT NULL,
+        meta TEXT,
+        lang TEXT DEFAULT 'en',
+        timestamp INTEGER DEFAULT (strftime('%s','now')),
+        UNIQUE(content, meta)
+    );
+    CREATE INDEX IF NOT EXISTS idx_mydata_meta ON mydata(meta);
+"""
+METAS = ['email', 'phone', 'birthday', 'address', 'password', 'note', 'geburtstag', 'correo']
+
+
+def bench_profile(profile, rows, threads, key, duration):
+    """Run all phases for one profile, return dict of ops/s"""
+    tmp_dir = tempfile.mkdtemp(prefix="aichat_bench_")
+    repo = DatabaseRepository(Path(tmp_dir) / "memory.db", encryption_key=key,
+                              read_pool_size=threads, profile=profile)
+    try:
+        repo.executescript(SCHEMA)
+        results = {}
+
+        start = time.perf_counter()
+        for i in range(rows):
+            repo.execute("INSERT INTO mydata (content, meta) VALUES (?, ?)",
+                         (f"value {i}", random.choice(METAS)))
+        results['insert'] = rows / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for _ in range(rows):
+            repo.query("SELECT id, content FROM mydata WHERE meta = ? ORDER BY id DESC LIMIT 5",
+                       (random.choice(METAS),))
+        results['select'] = rows / (time.perf_counter() - start)
+
+        stop = threading.Event()
+        counts = {'write': 0, 'read': 0}
+        lock = threading.Lock()
+
+        def writer():
+            i = 0
+            while not stop.is_set():
+                repo.execute("INSERT INTO mydata (content, meta) VALUES (?, ?)",
+                             (f"concurrent {i}", random.choice(METAS)))
+                i += 1
+            with lock:
+                counts['write'] += i
+
+        def reader():
+            n = 0
+            while not stop.is_set():
+                repo.query("SELECT COUNT(*) FROM mydata WHERE meta = ?", (random.choice(METAS),))
+                n += 1
+            with lock:
+                counts['read'] += n
+
+        workers = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(threads)]
+        for w in workers:
+            w.start()
+        time.sleep(duration)
+        stop.set()
+        for w in workers:
+            w.join()
+
+        results['concurrent_write'] = counts['write'] / duration
+        results['concurrent_read'] = counts['read'] / duration
+        return results
+    finally:
+        repo.close()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="memory.db profile benchmark")
+    parser.add_argument('--rows', type=int, default=2000, help="Rows for insert/select phases")
+    parser.add_argument('--threads', type=int, default=4, help="Reader threads in concurrent phase")
+    parser.add_argument('--duration', type=float, default=2.0, help="Seconds for concurrent phase")
+    parser.add_argument('--key', default=None, help="Hex SQLCipher key (benchmark encrypted path)")
+    args = parser.parse_args()
+
+    random.seed(42)
+    print(f"🧪 memory.db profiles: {args.rows} rows, 1 writer + {args.threads} readers"
+          f"{' (SQLCipher)' if args.key else ''}\n")
+    print(f"  {'profile':<12} {'insert/s':>10} {'select/s':>10} {'conc. w/s':>10} {'conc. r/s':>10}")
+
+    for profile in DB_PROFILES:
+        r = bench_profile(profile, args.rows, args.threads, args.key, args.duration)
+        print(f"  {profile:<12} {r['insert']:>10.0f} {r['select']:>10.0f} "
+              f"{r['concurrent_write']:>10.0f} {r['concurrent_read']:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Keyword Detector Micro-Benchmark
+Compares the compiled single-pass matcher with the old per-keyword re.search loop
+
+Usage:
+    python3 benchmarks/bench_keyword_detector.py [--messages N] [--config-dir DIR]
+
+Measures per-message latency over a multilingual corpus (en/de/es):
+- legacy:          new detector per message + one re.search per keyword
+- legacy (reused): detector built once, one re.search per keyword
+- compiled:        detector built once, one pass over the message
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from local_storage_detector import LocalStorageDetector
+
+CORPUS = [
+    # English
+    "save my email is test@example.com",
+    "what is my phone number?",
+    "delete my old address from the database",
+    "show me everything stored locally",
+    "Explain the difference between TCP and UDP in simple terms",
+    "Write a haiku about autumn leaves falling on a quiet lake",
+    "How do I reverse a linked list in Python without recursion?",
+    # German
+    "merke dir meine Email ist test@test.com",
+    "zeig mir was in der db gespeichert ist",
+    "lösche meine Telefonnummer",
+    "Wie ist das Wetter heute in Berlin und morgen in München?",
+    "Erkläre mir bitte den Unterschied zwischen Hashing und Verschlüsselung",
+    # Spanish
+    "guarda mi correo test@test.es",
+    "muestra mis datos de la base de datos",
+    "borra mi dirección antigua",
+    "¿Cuál es la capital de Australia y por qué no es Sídney?",
+    "Escribe una receta de paella para cuatro personas con mariscos",
+]
+
+
+def legacy_detect(keywords, text):
+    """Previous detect_db_intent: build and search one pattern per keyword"""
+    text_lower = text.lower()
+    matched = []
+    for keyword in keywords:
+        if '{x}' in keyword or '{*}' in keyword:
+            pattern = re.escape(keyword).replace(r'\{x\}', r'\w+').replace(r'\{\*\}', r'.+?')
+            if re.search(r'\b' + pattern + r'\b', text_lower):
+                matched.append(keyword)
+        elif ' ' in keyword:
+            if keyword in text_lower:
+                matched.append(keyword)
+        elif re.search(rf'\b{re.escape(keyword)}\b', text_lower):
+            matched.append(keyword)
+    return (len(matched) > 0, matched)
+
+
+def run(label, messages, detect):
+    """Time detect() over all messages, return per-message microseconds"""
+    start = time.perf_counter()
+    for text in messages:
+        detect(text)
+    elapsed = time.perf_counter() - start
+    per_message_us = elapsed / len(messages) * 1e6
+    print(f"  {label:<18} {per_message_us:9.1f} µs/message")
+    return per_message_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keyword detector micro-benchmark")
+    parser.add_argument('--messages', type=int, default=5000, help="Messages per run")
+    parser.add_argument('--config-dir', default=str(Path(__file__).resolve().parent.parent),
+                        help="Directory containing lang/*.conf (default: repository)")
+    args = parser.parse_args()
+
+    random.seed(42)
+    messages = [random.choice(CORPUS) for _ in range(args.messages)]
+    detector = LocalStorageDetector(args.config_dir)
+    keywords = detector.keywords
+
+    # Sanity check: both implementations agree on the corpus
+    for text in CORPUS:
+        if set(legacy_detect(keywords, text)[1]) != set(detector.detect_db_intent(text)[1]):
+            print(f"❌ Mismatch on: {text}")
+            sys.exit(1)
+
+    print(f"🧪 Keyword detector: {len(keywords)} keywords, {len(messages)} messages "
+          f"({len(CORPUS)} distinct, en/de/es)\n")
+
+    legacy_full = run("legacy", messages[:max(1, len(messages) // 10)],
+                      lambda text: legacy_detect(LocalStorageDetector(args.config_dir).keywords, text))
+    legacy = run("legacy (reused)", messages, lambda text: legacy_detect(keywords, text))
+    compiled = run("compiled", messages, detector.detect_db_intent)
+
+    print(f"\n🚀 Speedup: {legacy / compiled:.1f}× vs per-keyword loop, "
+          f"{legacy_full / compiled:.1f}× vs detector-per-message")
+
+
+if __name__ == '__main__':
+    main()
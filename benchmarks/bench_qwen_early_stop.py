@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Qwen Early-Stop Benchmark
+Latency of SQL generation: blocking decode until EOS vs streamed early stop
+
+Usage:
+    python3 benchmarks/bench_qwen_early_stop.py [--requests N] [--qwen-tail N] [--ollama-host HOST]
+
+Modes (per output format, json and sql):
+- blocking: one non-streamed /api/chat call, Qwen decodes until EOS / num_predict
+  (pre-v11.9 behaviour)
+- stream:   QwenSQLGenerator.generate_sql() - streamed, closed after the first
+  complete answer
+
+Without --ollama-host the stub server is used: every answer is followed by
+--qwen-tail tokens of rambling (verbose completions), each token takes
+--token-latency. Decoded tokens are counted server-side until the client
+disconnects.
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / 'benchmarks'))
+
+from bench_daemon import percentiles
+from bench_qwen_prefill import build_workload
+from ollama_client import OllamaClient
+from qwen_sql_generator import OUTPUT_JSON, OUTPUT_SQL, QwenSQLGenerator, num_predict_for
+from stub_server import StubServer
+
+MODES = ('blocking', 'stream')
+
+
+def run_mode(mode: str, output: str, client: OllamaClient, workload: List[Dict[str, str]],
+             timeout: float) -> Dict[str, Any]:
+    generator = QwenSQLGenerator(client=client, output=output)
+    latencies, early = [], 0
+    for item in workload:
+        start = time.perf_counter()
+        if mode == 'blocking':
+            client.chat(generator.model, generator.build_messages(item['input'], item['action']),
+                        options={'num_predict': num_predict_for(output, item['input'])}, timeout=timeout,
+                        **generator._format_for(item['action']))
+        else:
+            result = generator.generate_sql(item['input'], item['action'], deadline=time.monotonic() + timeout)
+            early += bool(result.get('early_stop'))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {'latency': percentiles(latencies), 'early_stops': early if mode == 'stream' else None}
+
+
+def run_benchmark(args) -> Dict[str, Any]:
+    workload = build_workload(random.Random(args.seed), args.requests)
+    results: Dict[str, Any] = {}
+    for output in (OUTPUT_JSON, OUTPUT_SQL):
+        for mode in MODES:
+            stub = None
+            host = args.ollama_host
+            if not host:
+                stub = StubServer(token_latency=args.token_latency, qwen_tail=args.qwen_tail,
+                                  seed=args.seed).start()
+                host = stub.ollama_host
+            client = OllamaClient(host=host)
+            try:
+                data = run_mode(mode, output, client, workload, args.timeout)
+            finally:
+                client.close()
+                if stub:
+                    stub.stop()
+            if stub:
+                decoded = stub.decoded_tokens
+                data['decoded_tokens'] = round(sum(decoded) / len(decoded), 1) if decoded else None
+            results[f"{output}/{mode}"] = data
+    return {'requests': args.requests, 'server': args.ollama_host or 'stub', 'qwen_tail': args.qwen_tail,
+            'modes': results}
+
+
+def print_report(result: Dict[str, Any]):
+    print(f"\n📊 Qwen SQL generation ({result['requests']} requests, server: {result['server']}, "
+          f"tail: {result['qwen_tail']} tokens)")
+    for name, data in result['modes'].items():
+        latency = data['latency']
+        decoded = f" decoded={data['decoded_tokens']}" if data.get('decoded_tokens') is not None else ""
+        early = f" early_stops={data['early_stops']}" if data['early_stops'] is not None else ""
+        print(f"  {name:<14} p50={latency.get('p50_ms')}ms p95={latency.get('p95_ms')}ms "
+              f"p99={latency.get('p99_ms')}ms{decoded}{early}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Qwen SQL: blocking decode vs streamed early stop")
+    parser.add_argument('--requests', type=int, default=40)
+    parser.add_argument('--ollama-host', default=None, help="Real Ollama (default: local stub)")
+    parser.add_argument('--qwen-tail', type=int, default=80, help="Stub rambling tokens after each answer")
+    parser.add_argument('--token-latency', default="fixed:5", help="Stub decode time per token (SPEC)")
+    parser.add_argument('--timeout', type=float, default=60.0)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=None, help="Write JSON result")
+    args = parser.parse_args()
+
+    result = run_benchmark(args)
+    print_report(result)
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
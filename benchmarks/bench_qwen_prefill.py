@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Qwen Prefill Benchmark
+Prompt tokens Ollama has to evaluate per SQL request: old vs new prompt layout
+
+Usage:
+    python3 benchmarks/bench_qwen_prefill.py [--requests N] [--ollama-host HOST] [--output FILE]
+
+Layouts:
+- generate: pre-v11.7 single /api/generate prompt, user input in the middle
+  (specialist body, "Now analyze this input", answer steps)
+- chat:      /api/chat, static system prompt per action + one-line user message
+- chat_warm: chat after QwenSQLGenerator.warm_prompts() (what the daemon does)
+
+Prefill = prompt_eval_count of each response (tokens not served from the
+prompt cache). Without --ollama-host the stub server is used: it simulates
+Ollama's prompt cache with word-level tokens (--prompt-slots, default 4), so
+absolute numbers are approximate but the before/after ratio holds.
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / 'benchmarks'))
+
+from bench_daemon import percentiles
+from ollama_client import OllamaClient
+from qwen_sql_generator import ACTIONS, INPUT_TEMPLATE, QwenSQLGenerator
+from stub_server import StubServer
+
+INPUTS = {
+    'SAVE': ["save my email anna@example.com", "speichere meine Telefonnummer 0301234567",
+             "guarda mi contraseña wifi: Luna77", "note my passport number A12345678",
+             "merke dir die email meines chefs chef@firma.de", "anota mi cumpleaños 15/03/1990"],
+    'RETRIEVE': ["show my email", "zeig meine Telefonnummer", "muestra el correo de mi jefe",
+                 "get wifi password", "hole das WLAN-Passwort", "busca mi dirección"],
+    'DELETE': ["delete my phone", "lösche meine Kontonummer", "borra test@test.com",
+               "remove my wifi password", "elimina el teléfono", "delete 669686832"],
+}
+
+LAYOUTS = ('generate', 'chat', 'chat_warm')
+
+
+def legacy_prompt(generator: QwenSQLGenerator, user_input: str, action: str) -> str:
+    """Pre-v11.7 layout: input embedded before the answer steps"""
+    builders = {'SAVE': generator._build_prompt_save, 'RETRIEVE': generator._build_prompt_retrieve,
+                'DELETE': generator._build_prompt_delete}
+    steps = generator._get_answer_steps(action).replace("\nThe user message contains the input to analyze.\n", "")
+    return f"{builders[action]()}\n{INPUT_TEMPLATE.format(user_input=user_input)}\n{steps}"
+
+
+def build_workload(rng: random.Random, count: int) -> List[Dict[str, str]]:
+    """Seeded mix of actions → consecutive requests switch prompts like real traffic"""
+    workload = []
+    for _ in range(count):
+        action = rng.choice(ACTIONS)
+        workload.append({'action': action, 'input': rng.choice(INPUTS[action])})
+    return workload
+
+
+def run_layout(layout: str, client: OllamaClient, workload: List[Dict[str, str]],
+               timeout: float) -> Dict[str, Any]:
+    generator = QwenSQLGenerator(client=client)
+    warm_tokens = None
+    if layout == 'chat_warm':
+        warm_tokens = sum(count or 0 for count in generator.warm_prompts(timeout=timeout).values())
+
+    prefill, latencies = [], []
+    for item in workload:
+        start = time.perf_counter()
+        if layout == 'generate':
+            response = client.generate(generator.model, legacy_prompt(generator, item['input'], item['action']),
+                                       timeout=timeout)
+        else:
+            response = client.chat(generator.model, generator.build_messages(item['input'], item['action']),
+                                   timeout=timeout)
+        latencies.append((time.perf_counter() - start) * 1000)
+        if response.get('prompt_eval_count') is not None:
+            prefill.append(response['prompt_eval_count'])
+
+    return {
+        'prefill_tokens': {
+            'count': len(prefill),
+            'mean': round(sum(prefill) / len(prefill), 1) if prefill else None,
+            'p50': percentiles(prefill).get('p50_ms'),
+            'p95': percentiles(prefill).get('p95_ms'),
+            'total': sum(prefill),
+        },
+        'warmup_prefill_tokens': warm_tokens,
+        'latency': percentiles(latencies),
+    }
+
+
+def run_benchmark(args) -> Dict[str, Any]:
+    workload = build_workload(random.Random(args.seed), args.requests)
+    results = {}
+    for layout in LAYOUTS:
+        # Fresh prompt cache per layout → layouts don't warm each other
+        stub = None
+        host = args.ollama_host
+        if not host:
+            stub = StubServer(qwen_latency=args.qwen_latency, prompt_slots=args.prompt_slots,
+                              prefill_latency=args.prefill_latency, seed=args.seed).start()
+            host = stub.ollama_host
+        client = OllamaClient(host=host)
+        try:
+            results[layout] = run_layout(layout, client, workload, args.timeout)
+        finally:
+            client.close()
+            if stub:
+                stub.stop()
+
+    return {'requests': args.requests, 'server': args.ollama_host or 'stub', 'layouts': results}
+
+
+def print_report(result: Dict[str, Any]):
+    print(f"\n📊 Qwen prefill per request ({result['requests']} requests, server: {result['server']})")
+    base = result['layouts']['generate']['prefill_tokens']['mean'] or 0
+    for layout, data in result['layouts'].items():
+        tokens, latency = data['prefill_tokens'], data['latency']
+        ratio = f" ({tokens['mean'] / base * 100:.1f}% of generate)" if base and tokens['mean'] is not None else ""
+        warm = f", warm-up {data['warmup_prefill_tokens']}" if data['warmup_prefill_tokens'] is not None else ""
+        print(f"  {layout:<10} prefill mean={tokens['mean']} p50={tokens['p50']} p95={tokens['p95']} "
+              f"total={tokens['total']}{warm}{ratio} | latency p50={latency.get('p50_ms')}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Qwen prompt prefill: old vs new layout")
+    parser.add_argument('--requests', type=int, default=60)
+    parser.add_argument('--ollama-host', default=None, help="Real Ollama (default: local stub)")
+    parser.add_argument('--prompt-slots', type=int, default=4, help="Stub prompt cache slots")
+    parser.add_argument('--prefill-latency', type=float, default=0.0, help="Stub ms per prefilled token")
+    parser.add_argument('--qwen-latency', default="0", help="Stub generation latency (SPEC)")
+    parser.add_argument('--timeout', type=float, default=60.0)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=None, help="Write JSON result")
+    args = parser.parse_args()
+
+    result = run_benchmark(args)
+    print_report(result)
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,486 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Local OpenAI + Ollama Stub Server
+Offline stand-in for api.openai.com and Ollama, for benchmarks and CI
+
+Usage:
+    python3 benchmarks/stub_server.py [--port N] [--openai-latency SPEC] [--qwen-latency SPEC] ...
+
+Point the daemon at it:
+    ~/.aichat/config:  AI_CHAT_OPENAI_BASE_URL="http://127.0.0.1:<port>/v1"
+    environment:       OLLAMA_HOST=127.0.0.1:<port>
+
+Endpoints:
+- POST /v1/chat/completions  JSON or SSE (stream=true), canned multi-sentence reply
+- HEAD/GET /v1/models        connection warm-up (openai_client.py)
+- POST /api/generate         Qwen SQL prompts → canned SQL, other models → canned text
+- POST /api/chat             Qwen SQL messages → canned SQL, otherwise canned text (summaries);
+                             with a JSON-schema `format` the SQL is answered as the intent object
+- GET /api/tags, /api/ps, /api/version
+
+Qwen SQL answers are decoded token by token (--token-latency ms each, capped
+by options.num_predict); --qwen-tail N appends N tokens of rambling after the
+answer (an explanation for SQL, whitespace after JSON) like a verbose model.
+Streams are written chunk by chunk and end when the client disconnects, so
+early-stopping consumers only pay for the tokens they read.
+
+Ollama responses carry prompt_eval_count like a real server with a prompt
+cache: the rendered prompt (ChatML) is split into word/punctuation tokens and
+only the tokens after the longest common prefix with one of --prompt-slots
+cached prompts count as prefill (+ --prefill-latency ms per token).
+
+Latency SPEC (milliseconds, sampled per request from a seeded RNG):
+    0 | fixed:50 | uniform:20:80 | normal:300:50 | lognormal:300:0.4 (median, sigma)
+
+Canned SQL (--sql-file): JSON list of {"pattern": regex, "sql": "..."} matched
+against the user input quoted in the Qwen prompt; the first match wins.
+Without a match the stub derives SQL from the input (last word = value/keyword).
+Structured-output requests (v11.8.0) get the same SQL converted to its intent
+JSON (qwen_sql_generator.sql_example_to_intent) → one canned file for both modes.
+"""
+
+import argparse
+import json
+import math
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from qwen_sql_generator import sql_example_to_intent
+
+REPLY_TEXT = (
+    "Here is a short answer from the local stub server. "
+    "It has a few sentences so streaming produces several chunks. "
+    "Nothing here comes from a real model, which keeps benchmark runs repeatable.\n\n"
+    "- point one\n- point two\n"
+)
+
+OLLAMA_MODELS = ["qwen2.5-coder:7b", "phi3:latest"]
+
+# Which Qwen prompt (qwen_sql_generator.py) is asking
+_PROMPT_KINDS = (
+    ("SQL INSERT specialist", "SAVE"),
+    ("SQL SELECT specialist", "RETRIEVE"),
+    ("SQL DELETE specialist", "DELETE"),
+)
+_PROMPT_INPUT = re.compile(r'Now analyze this input:\s*"(.*)"')
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+_PIECE = re.compile(r"\S+\s?|\s")  # Streamed output pieces ("tokens"), joined back losslessly
+_TAIL_WORDS = ("This statement stores the value with its label and uses the mydata table as "
+               "requested, so running it again replaces the existing row instead of adding").split()
+
+
+def render_prompt(payload: Dict) -> str:
+    """Prompt text the model would see (ChatML, as in Qwen's template)"""
+    messages = payload.get('messages')
+    if messages is None:
+        messages = [{'role': 'system', 'content': payload['system']}] if payload.get('system') else []
+        messages.append({'role': 'user', 'content': payload.get('prompt', '')})
+    turns = [f"<|im_start|>{m.get('role')}\n{m.get('content', '')}<|im_end|>\n" for m in messages]
+    return "".join(turns) + "<|im_start|>assistant\n"
+
+
+class PromptCache:
+    """
+    Ollama-like prompt cache: N slots, a request reuses the slot with the longest common prefix
+
+    A slot whose prompt diverges from the request is kept (its prefix is
+    copied into the least recently used slot), as Ollama's multi-user cache does.
+    """
+
+    def __init__(self, slots: int = 4):
+        self.slots: List[List[str]] = []
+        self.max_slots = max(1, slots)
+        self._lock = threading.Lock()
+
+    def prefill(self, prompt: str) -> int:
+        """Tokens that must be evaluated for prompt (≥ 1, like llama.cpp)"""
+        tokens = _TOKEN.findall(prompt)
+        with self._lock:
+            best, best_len = None, 0
+            for index, cached in enumerate(self.slots):
+                common = 0
+                for a, b in zip(cached, tokens):
+                    if a != b:
+                        break
+                    common += 1
+                if common > best_len:
+                    best, best_len = index, common
+            if best is not None and best_len == len(self.slots[best]):
+                self.slots.pop(best)  # Request extends the cached prompt
+            elif len(self.slots) >= self.max_slots:
+                self.slots.pop(0)  # Least recently used
+            self.slots.append(tokens)
+        return max(1, len(tokens) - best_len)
+
+
+class LatencyModel:
+    """Latency distribution parsed from a SPEC string, sampled in milliseconds"""
+
+    def __init__(self, spec: str = "0", rng: random.Random = None):
+        self.spec = spec or "0"
+        self.rng = rng or random.Random()
+        kind, *args = self.spec.split(':')
+        try:
+            values = [float(a) for a in args]
+        except ValueError:
+            raise ValueError(f"Invalid latency spec: {spec}")
+
+        if not args:
+            self.kind, self.args = 'fixed', (float(kind),)
+        elif kind in ('fixed', 'uniform', 'normal', 'lognormal'):
+            self.kind, self.args = kind, tuple(values)
+        else:
+            raise ValueError(f"Unknown latency distribution: {kind}")
+        expected = {'fixed': 1, 'uniform': 2, 'normal': 2, 'lognormal': 2}[self.kind]
+        if len(self.args) != expected:
+            raise ValueError(f"{self.kind} latency needs {expected} value(s): {spec}")
+
+    def sample(self) -> float:
+        if self.kind == 'fixed':
+            value = self.args[0]
+        elif self.kind == 'uniform':
+            value = self.rng.uniform(*self.args)
+        elif self.kind == 'normal':
+            value = self.rng.gauss(*self.args)
+        else:
+            median, sigma = self.args
+            value = self.rng.lognormvariate(math.log(max(median, 1e-3)), sigma)
+        return max(0.0, value)
+
+    def sleep(self):
+        delay = self.sample()
+        if delay:
+            time.sleep(delay / 1000)
+
+
+def _quote(value: str) -> str:
+    return value.replace("'", "''")
+
+
+def qwen_tail(answer: str, count: int) -> str:
+    """Rambling after a complete answer: runaway whitespace after JSON, an explanation after SQL"""
+    if count <= 0:
+        return ""
+    if answer.lstrip().startswith('{'):
+        return "\n" * count
+    return "\n\n" + " ".join(_TAIL_WORDS[i % len(_TAIL_WORDS)] for i in range(count))
+
+
+def derive_sql(action: str, user_input: str) -> str:
+    """Plausible SQL for a Qwen prompt: last word = value (SAVE) or search keyword"""
+    words = re.findall(r"[\w@.\-+/']+", user_input)
+    if not words:
+        return "NO_ACTION"
+    last = _quote(words[-1].rstrip('.?!'))
+    if action == 'SAVE':
+        label = _quote(words[-2]) if len(words) > 2 else 'note'
+        return f"INSERT OR REPLACE INTO mydata (content, meta, lang) VALUES ('{last}', '{label}', 'en');"
+    if action == 'DELETE':
+        return f"DELETE FROM mydata WHERE meta LIKE '%{last}%' OR content LIKE '%{last}%';"
+    return (f"SELECT id, content, meta, timestamp FROM mydata "
+            f"WHERE meta LIKE '%{last}%' OR content LIKE '%{last}%' ORDER BY timestamp DESC;")
+
+
+class StubServer:
+    """Threaded HTTP server answering OpenAI + Ollama requests with canned data"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, openai_latency: str = "0",
+                 qwen_latency: str = "0", ollama_latency: str = "0", chunk_latency: str = "0",
+                 canned_sql: List[Dict[str, str]] = None, reply_text: str = REPLY_TEXT, seed: int = 42,
+                 prompt_slots: int = 4, prefill_latency: float = 0.0, token_latency: str = "0",
+                 qwen_tail: int = 0):
+        """
+        Args:
+            openai_latency: Time to first byte of /v1/chat/completions
+            qwen_latency: /api/generate latency for SQL prompts
+            ollama_latency: Other /api/generate and /api/chat calls
+            chunk_latency: Delay between SSE chunks when streaming
+            canned_sql: [{"pattern": regex, "sql": "..."}] checked before derive_sql
+            seed: RNG seed → same latency sequence per run
+            prompt_slots: Cached prompts kept for prefix reuse (Ollama: OLLAMA_NUM_PARALLEL)
+            prefill_latency: Extra milliseconds per prefilled token on Ollama calls
+            token_latency: Decode time per output token of Qwen SQL answers
+            qwen_tail: Tokens of rambling appended after each Qwen SQL answer
+        """
+        rng = random.Random(seed)
+        self.openai_latency = LatencyModel(openai_latency, rng)
+        self.qwen_latency = LatencyModel(qwen_latency, rng)
+        self.ollama_latency = LatencyModel(ollama_latency, rng)
+        self.chunk_latency = LatencyModel(chunk_latency, rng)
+        self.token_latency = LatencyModel(token_latency, rng)
+        self.qwen_tail = qwen_tail
+        self.canned_sql = [(re.compile(c['pattern'], re.IGNORECASE), c['sql']) for c in canned_sql or []]
+        self.reply_text = reply_text
+        self.prompt_cache = PromptCache(prompt_slots)
+        self.prefill_latency = prefill_latency
+        self.prefill_tokens: List[int] = []  # Per Qwen SQL request
+        self.decoded_tokens: List[int] = []  # Per Qwen SQL request, until done or client disconnect
+
+        self.counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), _StubHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.stub = self
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def openai_base_url(self) -> str:
+        return self.url + "/v1"
+
+    @property
+    def ollama_host(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"{host}:{port}"
+
+    def count(self, endpoint: str):
+        with self._lock:
+            self.counts[endpoint] = self.counts.get(endpoint, 0) + 1
+
+    def sql_for(self, prompt: str) -> str:
+        """Canned SQL for a Qwen prompt"""
+        match = _PROMPT_INPUT.search(prompt)
+        user_input = match.group(1) if match else prompt
+        for pattern, sql in self.canned_sql:
+            if pattern.search(user_input):
+                return sql
+        action = next((a for marker, a in _PROMPT_KINDS if marker in prompt), 'RETRIEVE')
+        return derive_sql(action, user_input)
+
+    def start(self) -> 'StubServer':
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="stub-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real servers
+    disable_nagle_algorithm = True  # Headers and body are separate writes → no 40ms delayed-ACK stall
+
+    @property
+    def stub(self) -> StubServer:
+        return self.server.stub
+
+    def log_message(self, *args):
+        pass
+
+    def _body(self) -> Dict:
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return {}
+        try:
+            return json.loads(self.rfile.read(length))
+        except ValueError:
+            return {}
+
+    def _send_json(self, data, status: int = 200):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_HEAD(self):
+        self.stub.count('HEAD ' + self.path)
+        self.send_response(200 if self.path in ('/v1/models', '/') else 404)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        self.stub.count('GET ' + self.path)
+        if self.path == '/v1/models':
+            self._send_json({'object': 'list', 'data': [{'id': 'gpt-4o-mini', 'object': 'model'}]})
+        elif self.path == '/api/version':
+            self._send_json({'version': '0.0.0-stub'})
+        elif self.path == '/api/tags':
+            self._send_json({'models': [{'name': name, 'model': name} for name in OLLAMA_MODELS]})
+        elif self.path == '/api/ps':
+            self._send_json({'models': [{'name': name, 'model': name, 'expires_at': '2099-01-01T00:00:00Z'}
+                                        for name in OLLAMA_MODELS]})
+        elif self.path == '/':
+            self.send_response(200)
+            body = b"Ollama is running"
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self._send_json({'error': 'not found'}, 404)
+
+    def do_POST(self):
+        self.stub.count('POST ' + self.path)
+        payload = self._body()
+        if self.path == '/v1/chat/completions':
+            self._chat_completions(payload)
+        elif self.path == '/api/generate':
+            self._ollama(payload, 'response')
+        elif self.path == '/api/chat':
+            self._ollama(payload, 'message')
+        else:
+            self._send_json({'error': 'not found'}, 404)
+
+    def _chat_completions(self, payload: Dict):
+        if not (self.headers.get('Authorization') or '').startswith('Bearer '):
+            self._send_json({'error': {'message': 'missing api key'}}, 401)
+            return
+
+        self.stub.openai_latency.sleep()
+        model = payload.get('model', 'gpt-4o-mini')
+        text = self.stub.reply_text
+
+        if not payload.get('stream'):
+            self._send_json({
+                'id': 'chatcmpl-stub', 'object': 'chat.completion', 'model': model,
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': text},
+                             'finish_reason': 'stop'}],
+                'usage': {'prompt_tokens': 0, 'completion_tokens': len(text.split()), 'total_tokens': 0}
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def event(data: str):
+            raw = f"data: {data}\n\n".encode('utf-8')
+            self.wfile.write(f"{len(raw):x}\r\n".encode() + raw + b"\r\n")
+            self.wfile.flush()
+
+        event(json.dumps({'choices': [{'index': 0, 'delta': {'role': 'assistant'}}]}))
+        for piece in re.findall(r'\S+\s*', text):
+            self.stub.chunk_latency.sleep()
+            event(json.dumps({'choices': [{'index': 0, 'delta': {'content': piece}}]}))
+        event("[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _ollama(self, payload: Dict, field: str):
+        model = payload.get('model', '')
+        prompt = render_prompt(payload)
+        prefill = self.stub.prompt_cache.prefill(prompt)
+        time.sleep(prefill * self.stub.prefill_latency / 1000)
+
+        num_predict = (payload.get('options') or {}).get('num_predict')
+        sql_request = 'qwen' in model and any(marker in prompt for marker, _ in _PROMPT_KINDS)
+        if sql_request:
+            self.stub.qwen_latency.sleep()
+            text = self.stub.sql_for(prompt)
+            if isinstance(payload.get('format'), dict):
+                text = json.dumps(sql_example_to_intent(text), ensure_ascii=False)
+            pieces = _PIECE.findall(text + qwen_tail(text, self.stub.qwen_tail))
+            if num_predict:
+                pieces = pieces[:max(1, num_predict)]
+            sql_request = num_predict != 1  # Warm-ups don't count
+            if sql_request:
+                with self.stub._lock:
+                    self.stub.prefill_tokens.append(prefill)
+        else:
+            self.stub.ollama_latency.sleep()
+            pieces = ["Stub summary of the conversation." if field == 'message' else "✅ Done."]
+
+        def message(text):
+            return {'role': 'assistant', 'content': text} if field == 'message' else text
+
+        base = {'model': model, 'created_at': '2024-01-01T00:00:00Z'}
+        done = dict(base, **{field: message(''), 'done': True, 'done_reason': 'stop',
+                             'prompt_eval_count': prefill, 'eval_count': len(pieces)})
+        if not payload.get('stream'):
+            for _ in pieces[1:] if sql_request else ():
+                self.stub.token_latency.sleep()
+            if sql_request:
+                with self.stub._lock:
+                    self.stub.decoded_tokens.append(len(pieces))
+            self._send_json(dict(done, **{field: message("".join(pieces))}))
+            return
+
+        # NDJSON over chunked encoding: one line per token, then the final done chunk
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def line(data: Dict):
+            raw = json.dumps(data).encode('utf-8') + b"\n"
+            self.wfile.write(f"{len(raw):x}\r\n".encode() + raw + b"\r\n")
+            self.wfile.flush()
+
+        decoded = 0
+        try:
+            for index, piece in enumerate(pieces):
+                if index and sql_request:
+                    self.stub.token_latency.sleep()
+                line(dict(base, **{field: message(piece), 'done': False}))
+                decoded += 1
+            line(done)
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True  # Client closed the stream → generation aborted
+        finally:
+            if sql_request:
+                with self.stub._lock:
+                    self.stub.decoded_tokens.append(decoded)
+
+
+def load_canned_sql(path: Optional[str]) -> List[Dict[str, str]]:
+    if not path:
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenAI + Ollama stub server")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=11435)
+    parser.add_argument('--openai-latency', default="lognormal:400:0.3", help="Time to first byte (SPEC)")
+    parser.add_argument('--chunk-latency', default="fixed:15", help="Delay between SSE chunks (SPEC)")
+    parser.add_argument('--qwen-latency', default="lognormal:900:0.25", help="Qwen SQL generation (SPEC)")
+    parser.add_argument('--ollama-latency', default="lognormal:600:0.3", help="Other Ollama calls (SPEC)")
+    parser.add_argument('--sql-file', default=None, help="JSON list of {pattern, sql}")
+    parser.add_argument('--prompt-slots', type=int, default=4, help="Cached prompts for prefix reuse")
+    parser.add_argument('--prefill-latency', type=float, default=0.0, help="Milliseconds per prefilled token")
+    parser.add_argument('--token-latency', default="fixed:25", help="Qwen decode time per token (SPEC)")
+    parser.add_argument('--qwen-tail', type=int, default=0, help="Rambling tokens after each Qwen answer")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    server = StubServer(args.host, args.port, openai_latency=args.openai_latency,
+                        qwen_latency=args.qwen_latency, ollama_latency=args.ollama_latency,
+                        chunk_latency=args.chunk_latency, canned_sql=load_canned_sql(args.sql_file),
+                        seed=args.seed, prompt_slots=args.prompt_slots, prefill_latency=args.prefill_latency,
+                        token_latency=args.token_latency, qwen_tail=args.qwen_tail)
+    print(f"🧪 Stub server on {server.url}", file=sys.stderr)
+    print(f"   AI_CHAT_OPENAI_BASE_URL=\"{server.openai_base_url}\"  OLLAMA_HOST={server.ollama_host}", file=sys.stderr)
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Thin Chat Client
+Per-message entry point for the chat daemon - imports only os/sys/socket/json
+
+daemon_manager.py message ... pulled in DaemonManager, OllamaManager,
+subprocess, signal and the liveness cache before opening a socket.
+This client only speaks the frame protocol (daemon_protocol.py) and
+streams the reply. Run with `python3 -S` (no site-packages needed).
+
+Modes:
+    chat_client.py message <session_id> <message> [system_prompt]
+        One-shot send, reply streamed to stdout (prefix: $AICHAT_STREAM_PREFIX)
+
+    chat_client.py serve
+        Persistent coprocess for a whole zsh chat session. Each turn zsh writes
+        four NUL-terminated fields to stdin:
+            session_id \\0 message \\0 system_prompt \\0 stream_prefix \\0
+        The reply streams to stderr (the terminal - stdout is the pipe back to
+        zsh), then one status line "0" (ok) or "1" (failed) goes to stdout.
+
+Daemon not reachable → falls back to `daemon_manager.py ensure` once
+(only then is subprocess imported) and retries.
+"""
+
+import os
+import sys
+import socket
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from daemon_protocol import FrameReader, connect, default_socket_path, send_frame
+
+REQUEST_FIELDS = 4
+READ_SIZE = 64 * 1024
+RESPONSE_TIMEOUT = 60.0  # Per frame (streamed replies may take longer overall)
+
+
+class FdPrinter:
+    """Writes a streamed reply to a file descriptor, prefix before the first chunk"""
+
+    def __init__(self, fd: int, prefix: str = ""):
+        self.fd = fd
+        self.prefix = prefix
+        self.started = False
+
+    def _write(self, text: str):
+        data = text.encode('utf-8', 'replace')
+        while data:
+            written = os.write(self.fd, data)
+            data = data[written:]
+
+    def write(self, text: str):
+        if not self.started:
+            self._write(self.prefix)
+            self.started = True
+        self._write(text)
+
+    def finish(self):
+        if self.started:
+            self._write("\n")
+
+
+def _connect_or_start(socket_path: str) -> socket.socket:
+    """Connect to the daemon; start it via daemon_manager.py once if that fails"""
+    try:
+        return connect(socket_path, timeout=RESPONSE_TIMEOUT)
+    except (ConnectionRefusedError, FileNotFoundError):
+        import subprocess  # Slow path only
+
+        manager = os.path.join(os.path.dirname(os.path.abspath(__file__)), "daemon_manager.py")
+        subprocess.run([sys.executable, manager, "ensure"],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return connect(socket_path, timeout=RESPONSE_TIMEOUT)
+
+
+def send_message(socket_path: str, session_id: str, message: str, system_prompt: str,
+                 printer: FdPrinter, error_fd: int = 2) -> bool:
+    """
+    Send one message and stream the reply through printer
+
+    Returns:
+        True if the daemon answered successfully
+    """
+    def error(text: str):
+        os.write(error_fd, (text + "\n").encode('utf-8', 'replace'))
+
+    try:
+        sock = _connect_or_start(socket_path)
+        try:
+            send_frame(sock, {
+                'action': 'send_message',
+                'session_id': session_id,
+                'message': message,
+                'system_prompt': system_prompt,
+                'stream': True
+            })
+            reader = FrameReader(sock)
+
+            while True:
+                response = reader.read_frame()
+                if response is None:
+                    raise ConnectionError("Chat daemon closed connection without response")
+                if response.get('type') == 'chunk':
+                    printer.write(response.get('text', ''))
+                    continue
+                break
+        finally:
+            sock.close()
+
+    except socket.timeout:
+        error("⚠️  Chat daemon timeout - response took too long")
+        return False
+    except Exception as e:
+        error(f"❌ Failed to communicate with chat daemon: {e}")
+        return False
+
+    if response.get('success'):
+        if not printer.started:
+            printer.write(response.get('response', ''))  # Local replies arrive in one piece
+        printer.finish()
+        return True
+
+    if response.get('busy'):
+        error("⏳ Chat daemon busy - too many requests queued, try again")
+    else:
+        error(f"❌ Chat daemon error: {response.get('error')}")
+    return False
+
+
+def iter_requests(fd: int = 0):
+    """Yield NUL-separated request field lists from fd until EOF"""
+    buffer = b""
+    fields = []
+    while True:
+        data = os.read(fd, READ_SIZE)
+        if not data:
+            return
+        buffer += data
+        *complete, buffer = buffer.split(b"\0")
+        for field in complete:
+            fields.append(field.decode('utf-8', 'replace'))
+            if len(fields) == REQUEST_FIELDS:
+                yield fields
+                fields = []
+
+
+def serve(socket_path: str) -> int:
+    """Coprocess loop: one request per turn on stdin, reply on stderr, status on stdout"""
+    for session_id, message, system_prompt, prefix in iter_requests(0):
+        printer = FdPrinter(2, prefix)
+        ok = send_message(socket_path, session_id, message, system_prompt, printer)
+        os.write(1, b"0\n" if ok else b"1\n")
+    return 0
+
+
+def main() -> int:
+    if len(sys.argv) < 2:
+        print("Usage: chat_client.py [message <session_id> <message> [system_prompt] | serve]")
+        return 1
+
+    socket_path = os.environ.get('AICHAT_DAEMON_SOCKET') or default_socket_path()
+    command = sys.argv[1]
+
+    if command == "serve":
+        return serve(socket_path)
+
+    if command == "message":
+        if len(sys.argv) < 4:
+            print("Usage: chat_client.py message <session_id> <message> [system_prompt]")
+            return 1
+        system_prompt = sys.argv[4] if len(sys.argv) > 4 else ""
+        printer = FdPrinter(1, os.environ.get('AICHAT_STREAM_PREFIX', ''))
+        ok = send_message(socket_path, sys.argv[2], sys.argv[3], system_prompt, printer)
+        if not ok:
+            printer.finish()
+        return 0 if ok else 1
+
+    print(f"Unknown command: {command}")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
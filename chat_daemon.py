@@ -2,35 +2,127 @@
 # -*- coding: utf-8 -*-
 """
 Chat Daemon Server
-Keeps ChatSystem loaded in RAM and serves requests via socket
+Keeps ChatSystem loaded in RAM and serves requests via Unix domain socket
 Dramatically reduces response time by avoiding Python restart overhead
+
+Protocol: length-prefixed JSON frames (see daemon_protocol.py)
+
+Concurrency:
+- Fixed pool of worker threads serves accepted connections from a bounded queue
+- Queue full → connection answered at once with {"success": false, "busy": true}
+- Messages of one session run one at a time, in arrival order (per-session lock)
+- Queue depth / wait times reported by the "status" action
+- Per-phase request traces returned by the "trace" action (limit, name, min_ms)
+- Latency histograms / hit ratios / gauges returned by the "metrics" action
+  (format: "json" or "prometheus"), optionally dumped to AI_CHAT_METRICS_FILE
 """
 
 import socket
-import json
 import sys
 import os
+import queue
 import threading
 import time
 import signal
-from typing import Dict, Any
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
 
 # Add current directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from chat_system import ChatSystem
+from daemon_protocol import FrameReader, ProtocolError, default_socket_path, send_frame
+from metrics import Metrics, db_size_bytes, process_rss_bytes
+
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_QUEUE = 32
+SLOW_WAIT_MS = 250  # Log connections that waited longer than this for a worker
+BUSY_REPLY_THREADS = 4  # Concurrent "busy" replies - beyond that rejected connections are just closed
+BUSY_DRAIN_TIMEOUT = 0.5  # Seconds a rejected client gets to send its request frame
+
+
+class FifoLock:
+    """
+    Ticket lock - waiters get the lock strictly in the order they asked for it
+
+    threading.Lock makes no ordering promise, so two queued messages of the
+    same session could otherwise run out of order.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._next_ticket = 0
+        self._serving = 0
+        self.users = 0  # Holders + waiters, counted by ChatDaemon under its guard
+
+    def __enter__(self):
+        with self._cond:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            while self._serving != ticket:
+                self._cond.wait()
+        return self
+
+    def __exit__(self, *exc):
+        with self._cond:
+            self._serving += 1
+            self._cond.notify_all()
+        return False
+
+
+class QueueStats:
+    """Thread-safe queue wait / rejection counters for the worker pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.served = 0
+        self.rejected = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.last_wait_ms = 0.0
+
+    def record_wait(self, wait_ms: float):
+        with self._lock:
+            self.served += 1
+            self.total_wait_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+            self.last_wait_ms = wait_ms
+
+    def record_rejection(self):
+        with self._lock:
+            self.rejected += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'served': self.served,
+                'rejected_busy': self.rejected,
+                'avg_wait_ms': round(self.total_wait_ms / self.served, 2) if self.served else 0.0,
+                'max_wait_ms': round(self.max_wait_ms, 2),
+                'last_wait_ms': round(self.last_wait_ms, 2)
+            }
 
 class ChatDaemon:
     """Socket-based daemon server for ChatSystem"""
 
-    def __init__(self, host='127.0.0.1', port=5555):
-        """Initialize daemon server"""
-        self.host = host
-        self.port = port
+    def __init__(self, socket_path: str = None, workers: int = None, max_queue: int = None):
+        """
+        Initialize daemon server
+
+        Args:
+            socket_path: Unix socket path (defaults to ~/.aichat/chat_daemon.sock)
+            workers: Worker threads (default: AI_CHAT_DAEMON_WORKERS or 4)
+            max_queue: Connections allowed to wait for a worker
+                       (default: AI_CHAT_DAEMON_QUEUE or 32)
+        """
+        self.socket_path = socket_path or default_socket_path()
         self.socket = None
         self.running = False
+        self.started_at = time.time()
         self.last_request_time = time.time()
         self.idle_timeout = 600  # 10 minutes in seconds
+        self.checkpoint_interval = 60  # WAL checkpoint at most once per minute while idle
+        self.last_checkpoint_time = time.time()
 
         # Load ChatSystem ONCE - this is the whole point!
         print("🔄 Loading ChatSystem into RAM...", file=sys.stderr)
@@ -39,36 +131,124 @@ class ChatDaemon:
         load_time = (time.time() - start_time) * 1000
         print(f"✅ ChatSystem loaded in {load_time:.0f}ms", file=sys.stderr)
 
+        # Bounded worker pool (replaces one unbounded thread per connection)
+        config = getattr(self.chat_system, 'config', None) or {}
+        self.workers = workers or int(config.get('AI_CHAT_DAEMON_WORKERS', DEFAULT_WORKERS))
+        self.max_queue = max_queue or int(config.get('AI_CHAT_DAEMON_QUEUE', DEFAULT_MAX_QUEUE))
+        self.connection_queue = queue.Queue(maxsize=self.max_queue)
+        self.queue_stats = QueueStats()
+        self._busy_repliers = threading.BoundedSemaphore(BUSY_REPLY_THREADS)
+        self.worker_threads = []
+        self.active_workers = 0
+        self._active_lock = threading.Lock()
+
+        # One lock per session → same-session messages never interleave
+        # (refcounted: dropped when the last holder/waiter releases it)
+        self._session_locks: Dict[str, FifoLock] = {}
+        self._session_locks_guard = threading.Lock()
+
+        # Metrics: fed by finished request traces, gauges read on demand
+        self.in_flight = 0
+        self.metrics_file = config.get('AI_CHAT_METRICS_FILE') or None
+        self.metrics = Metrics()
+        tracer = getattr(self.chat_system, 'tracer', None)
+        if tracer is not None:
+            tracer.add_listener(self.metrics.record_trace)
+        self._register_gauges()
+
+    def _register_gauges(self):
+        db_file = getattr(self.chat_system, 'db_file', None)
+        gauge = self.metrics.gauge
+        gauge('uptime_seconds', lambda: round(time.time() - self.started_at, 1), 'Daemon uptime')
+        gauge('in_flight', lambda: self.in_flight, 'send_message requests being processed')
+        gauge('active_workers', lambda: self.active_workers, 'Busy worker threads')
+        gauge('queue_depth', lambda: self.connection_queue.qsize(), 'Connections waiting for a worker')
+        gauge('rejected_busy', lambda: self.queue_stats.rejected, 'Connections rejected as busy')
+        gauge('rss_bytes', process_rss_bytes, 'Resident set size')
+        history_writer = getattr(self.chat_system, 'history_writer', None)
+        if history_writer is not None:
+            gauge('history_queue_depth', history_writer.pending, 'chat_history rows waiting for the writer')
+        if db_file:
+            gauge('db_size_bytes', lambda: db_size_bytes(db_file), 'memory.db + WAL size')
+        pending_actions = getattr(self.chat_system, 'pending_actions', None)
+        if pending_actions is not None:
+            gauge('pending_confirmations', lambda: len(pending_actions), 'DELETE previews awaiting "yes"')
+        sql_cache = getattr(self.chat_system, 'sql_cache', None)
+        if sql_cache is not None:
+            gauge('sql_cache_entries', lambda: len(sql_cache), 'Cached Qwen SQL templates')
+        example_index = getattr(getattr(self.chat_system, 'qwen', None), 'example_index', None)
+        if example_index is not None:
+            gauge('qwen_examples_learned', lambda: example_index.learned, 'Confirmed requests kept as Qwen examples')
+        openai_client = getattr(self.chat_system, 'openai_client', None)
+        if openai_client is not None:
+            gauge('openai_requests', lambda: openai_client.stats()['requests'], 'HTTP requests sent to OpenAI')
+            gauge('openai_connections', lambda: openai_client.stats()['connections'], 'OpenAI connections opened')
+            gauge('openai_reuse_ratio', lambda: openai_client.stats()['reuse_ratio'],
+                  'Share of OpenAI requests sent on a reused connection')
+
+    def _remove_stale_socket(self):
+        """
+        Remove leftover socket file from a crashed daemon
+
+        Raises:
+            RuntimeError: If another daemon is still listening on it
+        """
+        if not os.path.exists(self.socket_path):
+            return
+
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.settimeout(0.5)
+            probe.connect(self.socket_path)
+            raise RuntimeError(f"Another chat daemon is already listening on {self.socket_path}")
+        except (ConnectionRefusedError, FileNotFoundError, socket.timeout):
+            os.unlink(self.socket_path)
+        finally:
+            probe.close()
+
     def start(self):
         """Start the daemon server"""
         try:
-            # Create socket
-            self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            self.socket.bind((self.host, self.port))
-            self.socket.listen(5)
+            # Create Unix domain socket (per-user, no port collisions)
+            self._remove_stale_socket()
+            self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            old_umask = os.umask(0o177)  # Socket file readable by owner only
+            try:
+                self.socket.bind(self.socket_path)
+            finally:
+                os.umask(old_umask)
+            self.socket.listen(16)
             self.socket.settimeout(1.0)  # Allow periodic timeout checks
 
             self.running = True
-            print(f"🚀 Chat daemon listening on {self.host}:{self.port}", file=sys.stderr)
+            print(f"🚀 Chat daemon listening on {self.socket_path}", file=sys.stderr)
+
+            # Open the OpenAI connection now → first turn skips the TLS handshake
+            self._warm_openai()
+            # Prefill the static Qwen prompts → first SQL request per action only prefills its input
+            self._warm_qwen_prompts()
 
             # Start idle timeout monitor in background
             timeout_thread = threading.Thread(target=self._monitor_idle_timeout, daemon=True)
             timeout_thread.start()
 
+            # Fixed worker pool
+            for i in range(self.workers):
+                worker = threading.Thread(target=self._worker_loop, name=f"chat-worker-{i}", daemon=True)
+                worker.start()
+                self.worker_threads.append(worker)
+
             # Main server loop
             while self.running:
                 try:
-                    client_socket, client_address = self.socket.accept()
+                    client_socket, _ = self.socket.accept()
                     self.last_request_time = time.time()
 
-                    # Handle request in separate thread for concurrency
-                    thread = threading.Thread(
-                        target=self._handle_client,
-                        args=(client_socket,),
-                        daemon=True
-                    )
-                    thread.start()
+                    # Queue for the worker pool - reject at once if it is full
+                    try:
+                        self.connection_queue.put_nowait((client_socket, time.time()))
+                    except queue.Full:
+                        self._reject_busy(client_socket)
 
                 except socket.timeout:
                     # Normal timeout - just continue loop
@@ -83,6 +263,99 @@ class ChatDaemon:
         finally:
             self.cleanup()
 
+    def _worker_loop(self):
+        """Serve queued connections until the daemon stops"""
+        while self.running:
+            try:
+                client_socket, queued_at = self.connection_queue.get(timeout=1.0)
+            except queue.Empty:
+                continue
+
+            wait_ms = (time.time() - queued_at) * 1000
+            self.queue_stats.record_wait(wait_ms)
+            if wait_ms > SLOW_WAIT_MS:
+                print(f"⏳ Connection waited {wait_ms:.0f}ms for a worker "
+                      f"(queue depth {self.connection_queue.qsize()})", file=sys.stderr)
+
+            with self._active_lock:
+                self.active_workers += 1
+            try:
+                self._handle_client(client_socket, wait_ms)
+            finally:
+                with self._active_lock:
+                    self.active_workers -= 1
+
+    def _reject_busy(self, client_socket):
+        """
+        Reject a connection the queue has no room for - never blocks accept()
+
+        The busy frame goes out from a short-lived helper thread (at most
+        BUSY_REPLY_THREADS at once); when all are taken the connection is
+        closed without a reply (the client sees a reset and retries).
+        """
+        self.queue_stats.record_rejection()
+        if not self._busy_repliers.acquire(blocking=False):
+            client_socket.close()
+            return
+        try:
+            threading.Thread(target=self._send_busy, args=(client_socket,), name="busy-reply", daemon=True).start()
+        except RuntimeError:
+            self._busy_repliers.release()
+            client_socket.close()
+
+    def _send_busy(self, client_socket):
+        """
+        Answer a rejected connection with a "busy" frame (helper thread)
+
+        The request frame is drained first (short timeout) - closing a socket
+        with unread data resets it, and the client would never see the answer.
+        """
+        try:
+            client_socket.settimeout(BUSY_DRAIN_TIMEOUT)
+            try:
+                FrameReader(client_socket, initial_size=4096).read_frame()
+            except (ProtocolError, ConnectionError, socket.timeout):
+                pass
+            send_frame(client_socket, {
+                'success': False,
+                'busy': True,
+                'error': 'Chat daemon busy - too many queued requests, try again',
+                'queue_depth': self.connection_queue.qsize()
+            })
+        except OSError:
+            pass
+        finally:
+            client_socket.close()
+            self._busy_repliers.release()
+
+    @contextmanager
+    def _session_lock(self, session_id: str):
+        """Hold the session's FifoLock; the entry is removed once nobody holds or waits for it"""
+        with self._session_locks_guard:
+            lock = self._session_locks.get(session_id)
+            if lock is None:
+                lock = self._session_locks[session_id] = FifoLock()
+            lock.users += 1
+        try:
+            with lock:
+                yield lock
+        finally:
+            with self._session_locks_guard:
+                lock.users -= 1
+                if lock.users == 0 and self._session_locks.get(session_id) is lock:
+                    del self._session_locks[session_id]
+
+    def pool_status(self) -> Dict[str, Any]:
+        """Worker pool snapshot: configured size, busy workers, queue depth, wait times"""
+        status = {
+            'workers': self.workers,
+            'active_workers': self.active_workers,
+            'queue_depth': self.connection_queue.qsize(),
+            'max_queue': self.max_queue
+        }
+        status.update(self.queue_stats.snapshot())
+        return status
+
     def _monitor_idle_timeout(self):
         """Monitor idle time and shutdown if exceeded"""
         while self.running:
@@ -94,62 +367,139 @@ class ChatDaemon:
                 self.running = False
                 break
 
-    def _handle_client(self, client_socket):
-        """Handle a single client request"""
+            self._checkpoint_if_due(idle_time)
+            self._write_metrics_file()
+            self._warm_openai(if_idle=True)
+            self._save_sql_cache()
+            self._save_qwen_examples()
+
+    def _save_sql_cache(self):
+        """Persist new Qwen SQL templates so a restart starts warm"""
+        sql_cache = getattr(getattr(self, 'chat_system', None), 'sql_cache', None)
+        if sql_cache is not None:
+            sql_cache.save()
+
+    def _save_qwen_examples(self):
+        """Persist newly learned few-shot examples"""
+        example_index = getattr(getattr(getattr(self, 'chat_system', None), 'qwen', None), 'example_index', None)
+        if example_index is not None:
+            example_index.save()
+
+    def _warm_openai(self, if_idle: bool = False):
+        """Open/refresh the pooled OpenAI connection in the background"""
+        openai_client = getattr(self.chat_system, 'openai_client', None)
+        if openai_client is None or not getattr(openai_client, 'api_key', None):
+            return
+        if if_idle:
+            openai_client.warm_if_idle()
+        else:
+            openai_client.warm_async()
+
+    def _warm_qwen_prompts(self):
+        """Load Qwen's SAVE/RETRIEVE/DELETE prompt prefixes into Ollama's prompt cache (background)"""
+        qwen = getattr(self.chat_system, 'qwen', None)
+        if qwen is None:
+            return
+
+        def warm():
+            prefilled = qwen.warm_prompts()
+            tokens = sum(count for count in prefilled.values() if count)
+            print(f"🔥 Qwen prompts warmed ({tokens} prefill tokens)", file=sys.stderr)
+
+        threading.Thread(target=warm, name="qwen-warmup", daemon=True).start()
+
+    def _write_metrics_file(self):
+        """Dump Prometheus metrics to AI_CHAT_METRICS_FILE (if configured)"""
+        if not self.metrics_file:
+            return
+        try:
+            self.metrics.write_prometheus(self.metrics_file)
+        except OSError as e:
+            print(f"⚠️  Could not write metrics file: {e}", file=sys.stderr)
+
+    def _checkpoint_if_due(self, idle_time: float):
+        """
+        Run PRAGMA wal_checkpoint(PASSIVE) between requests
+
+        Only while idle (no request in the last 10s) and at most once per
+        checkpoint_interval, so chat turns never pay for it.
+        """
+        if idle_time < 10 or time.time() - self.last_checkpoint_time < self.checkpoint_interval:
+            return
+
+        self.last_checkpoint_time = time.time()
+        db = getattr(self.chat_system, 'db', None)
+        if db is None:
+            return
+        try:
+            db.checkpoint('PASSIVE')
+        except Exception as e:
+            print(f"⚠️  WAL checkpoint failed: {e}", file=sys.stderr)
+
+    def _handle_client(self, client_socket, queue_wait_ms: Optional[float] = None):
+        """
+        Handle one client connection (runs on a pool worker)
+
+        Reads length-prefixed frames until the client closes the connection,
+        answering each request with exactly one response frame.
+
+        Args:
+            queue_wait_ms: Time the connection waited for a worker (reported
+                           with the first send_message response)
+        """
         try:
-            # Receive request data
-            data = b''
+            client_socket.settimeout(None)  # Accepted sockets inherit the accept timeout
+            reader = FrameReader(client_socket)
+
             while True:
-                chunk = client_socket.recv(4096)
-                if not chunk:
-                    break
-                data += chunk
-                if b'\n\n' in data:  # End marker
-                    break
+                try:
+                    request = reader.read_frame()
+                except ProtocolError as e:
+                    send_frame(client_socket, {
+                        'success': False,
+                        'error': f'Invalid request: {e}'
+                    })
+                    return
 
-            if not data:
-                return
+                if request is None:
+                    return  # Client closed connection
 
-            # Parse JSON request
-            try:
-                request = json.loads(data.decode('utf-8'))
-            except json.JSONDecodeError as e:
-                error_response = {
-                    'success': False,
-                    'error': f'Invalid JSON: {e}'
-                }
-                client_socket.sendall(json.dumps(error_response).encode('utf-8'))
-                return
+                self.last_request_time = time.time()
 
-            # Validate request
-            if 'action' not in request:
-                error_response = {
-                    'success': False,
-                    'error': 'Missing "action" field'
-                }
-                client_socket.sendall(json.dumps(error_response).encode('utf-8'))
-                return
+                # Validate request
+                if not isinstance(request, dict) or 'action' not in request:
+                    send_frame(client_socket, {
+                        'success': False,
+                        'error': 'Missing "action" field'
+                    })
+                    continue
 
-            # Process request
-            response = self._process_request(request)
+                # Process request (streaming replies send chunk frames first)
+                def send_chunk(text: str):
+                    send_frame(client_socket, {'type': 'chunk', 'text': text})
 
-            # Send response
-            response_json = json.dumps(response) + '\n'
-            client_socket.sendall(response_json.encode('utf-8'))
+                response = self._process_request(request, send_chunk=send_chunk)
+                if queue_wait_ms is not None and request['action'] == 'send_message':
+                    response['queue_wait_ms'] = round(queue_wait_ms, 2)
+                    queue_wait_ms = None
+                send_frame(client_socket, response)
 
+        except (ConnectionError, BrokenPipeError):
+            pass  # Client went away - nothing to answer
         except Exception as e:
             error_response = {
                 'success': False,
                 'error': f'Server error: {e}'
             }
             try:
-                client_socket.sendall(json.dumps(error_response).encode('utf-8'))
+                send_frame(client_socket, error_response)
             except:
                 pass
         finally:
             client_socket.close()
 
-    def _process_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
+    def _process_request(self, request: Dict[str, Any],
+                         send_chunk: Callable[[str], None] = None) -> Dict[str, Any]:
         """
         Process a client request
 
@@ -158,9 +508,13 @@ class ChatDaemon:
             "action": "send_message",
             "session_id": "chat_session",
             "message": "user input",
-            "system_prompt": "optional"
+            "system_prompt": "optional",
+            "stream": false            (optional - true = chunk frames)
         }
 
+        Streaming: with "stream": true, zero or more chunk frames
+        {"type": "chunk", "text": "..."} are sent before the final response.
+
         Response format:
         {
             "success": true/false,
@@ -184,11 +538,20 @@ class ChatDaemon:
 
                 # Call ChatSystem (already loaded in RAM!)
                 # Returns: Tuple[str, Dict] = (response_text, metadata)
-                response_text, metadata = self.chat_system.send_message(
-                    session_id=session_id,
-                    user_input=message,
-                    system_prompt=system_prompt
-                )
+                # Per-session lock: one message per session at a time, in order
+                with self._active_lock:
+                    self.in_flight += 1
+                try:
+                    with self._session_lock(session_id):
+                        response_text, metadata = self.chat_system.send_message(
+                            session_id=session_id,
+                            user_input=message,
+                            system_prompt=system_prompt,
+                            on_chunk=send_chunk if request.get('stream') else None
+                        )
+                finally:
+                    with self._active_lock:
+                        self.in_flight -= 1
 
                 return {
                     'success': True,
@@ -209,6 +572,49 @@ class ChatDaemon:
                 'response': 'pong'
             }
 
+        elif action == 'status':
+            # Worker pool / queue health
+            return {
+                'success': True,
+                'response': self.pool_status()
+            }
+
+        elif action == 'trace':
+            # Recent per-phase request traces (newest first)
+            tracer = getattr(self.chat_system, 'tracer', None)
+            if tracer is None:
+                return {
+                    'success': False,
+                    'error': 'Tracing not available'
+                }
+            try:
+                traces = tracer.recent(
+                    limit=int(request.get('limit', 20)),
+                    name=request.get('name'),
+                    min_duration_ms=float(request.get('min_ms', 0.0))
+                )
+            except (TypeError, ValueError) as e:
+                return {
+                    'success': False,
+                    'error': f'Invalid trace query: {e}'
+                }
+            return {
+                'success': True,
+                'response': traces
+            }
+
+        elif action == 'metrics':
+            # Latency histograms, hit ratios, gauges (JSON or Prometheus text)
+            if request.get('format') == 'prometheus':
+                return {
+                    'success': True,
+                    'response': self.metrics.prometheus()
+                }
+            return {
+                'success': True,
+                'response': self.metrics.snapshot()
+            }
+
         elif action == 'cleanup_history':
             # v11.6.0: Delete chat history (called on user exit)
             # WHY: Privacy First - delete history when user exits chat
@@ -256,11 +662,42 @@ class ChatDaemon:
         except Exception as e:
             print(f"Warning: Could not delete chat history: {e}", file=sys.stderr)
 
+        # Stop the chat_history writer (flushes anything still queued)
+        history_writer = getattr(getattr(self, 'chat_system', None), 'history_writer', None)
+        if history_writer is not None:
+            history_writer.close()
+
+        openai_client = getattr(getattr(self, 'chat_system', None), 'openai_client', None)
+        if openai_client is not None:
+            openai_client.close()
+
+        pending_actions = getattr(getattr(self, 'chat_system', None), 'pending_actions', None)
+        if pending_actions is not None:
+            pending_actions.close()
+
+        self._save_sql_cache()
+        self._save_qwen_examples()
+
+        # Close connections still waiting for a worker
+        while True:
+            try:
+                client_socket, _ = self.connection_queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                client_socket.close()
+            except OSError:
+                pass
+
         if self.socket:
             try:
                 self.socket.close()
             except:
                 pass
+            try:
+                os.unlink(self.socket_path)
+            except OSError:
+                pass
         print("👋 Chat daemon stopped", file=sys.stderr)
 
     def handle_signal(self, signum, frame):
@@ -271,17 +708,11 @@ class ChatDaemon:
 
 def main():
     """Main entry point"""
-    # Parse command line args
-    port = 5555
-    if len(sys.argv) > 1:
-        try:
-            port = int(sys.argv[1])
-        except ValueError:
-            print(f"Invalid port: {sys.argv[1]}", file=sys.stderr)
-            sys.exit(1)
+    # Parse command line args (optional socket path)
+    socket_path = sys.argv[1] if len(sys.argv) > 1 else None
 
     # Create and start daemon
-    daemon = ChatDaemon(port=port)
+    daemon = ChatDaemon(socket_path=socket_path)
 
     # Register signal handlers
     signal.signal(signal.SIGTERM, daemon.handle_signal)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Context Budget
+Packs the OpenAI request under a token budget instead of a fixed message count
+
+Before: system prompt + last 20 pairs + user message, whatever their size
+- one pasted log → request far too large (cost, latency, 400 errors)
+- short chats → most of the allowed context unused
+
+Now the budget (AI_CHAT_CONTEXT_TOKENS) covers everything the model sees or
+produces: system messages, history, user message, per-message framing and
+the max_tokens reserved for the reply. History is filled newest first and
+stops at the first message that does not fit (no gaps in the conversation).
+
+The history candidates are loaded by budget too (history_rows): as many rows
+as could possibly fit, not a fixed pair count. A user message that alone
+exceeds the budget is cut to fit (marked as truncated) instead of being sent
+as-is and rejected by the API.
+"""
+
+from typing import Dict, List, Tuple
+
+DEFAULT_CONTEXT_TOKENS = 8000
+
+# Chat format framing per message (<|start|>role ... <|end|>) and reply priming
+MESSAGE_OVERHEAD = 3
+REPLY_PRIMING = 3
+
+# Smallest possible history message: framing + role + one content token
+MIN_MESSAGE_TOKENS = MESSAGE_OVERHEAD + 2
+MAX_HISTORY_ROWS = 400  # Row cap for loading history, however large the budget
+
+TRUNCATION_MARKER = "\n[…truncated]"
+MIN_USER_TOKENS = 16  # Less room than this for the user message → reject, don't send a stub
+
+
+class ContextAssembler:
+    """Builds the messages list for one OpenAI request within a token budget"""
+
+    def __init__(self, tokenizer, budget: int = DEFAULT_CONTEXT_TOKENS, max_tokens: int = 500):
+        """
+        Args:
+            tokenizer: tokenizer.Tokenizer (exact or estimating)
+            budget: Total tokens per request (prompt + reserved reply)
+            max_tokens: Reply tokens requested from OpenAI
+        """
+        self.tokenizer = tokenizer
+        self.budget = budget
+        self.max_tokens = max_tokens
+
+    def message_tokens(self, message: Dict[str, str]) -> int:
+        return MESSAGE_OVERHEAD + self.tokenizer.count(message['role']) + self.tokenizer.count(message['content'])
+
+    def history_rows(self, cap: int = MAX_HISTORY_ROWS) -> int:
+        """Most history messages that could fit the budget (LIMIT for loading the window)"""
+        return max(1, min(cap, self.budget // MIN_MESSAGE_TOKENS))
+
+    def truncate(self, text: str, limit: int) -> str:
+        """Longest prefix of text that fits limit tokens together with TRUNCATION_MARKER"""
+        if self.tokenizer.count(text) <= limit:
+            return text
+        room = limit - self.tokenizer.count(TRUNCATION_MARKER)
+        low, high = 0, len(text)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self.tokenizer.count(text[:middle]) <= room:
+                low = middle
+            else:
+                high = middle - 1
+        return text[:low] + TRUNCATION_MARKER
+
+    def assemble(self, system_messages: List[Dict[str, str]], history: List[Dict[str, str]],
+                 user_message: Dict[str, str]) -> Tuple[List[Dict[str, str]], Dict[str, int]]:
+        """
+        Args:
+            system_messages: Always sent (system prompt, language instruction)
+            history: Chronological candidates, oldest first
+            user_message: Current turn - always sent, truncated if it alone exceeds the budget
+
+        Returns:
+            (messages, stats) - stats: prompt_tokens, history_kept, history_dropped, user_truncated
+
+        Raises:
+            ValueError: If system messages and reply leave no room for the user message
+        """
+        used = REPLY_PRIMING + self.max_tokens
+        used += sum(self.message_tokens(message) for message in system_messages)
+        used += MESSAGE_OVERHEAD + self.tokenizer.count(user_message['role'])
+
+        room = self.budget - used
+        truncated = self.tokenizer.count(user_message['content']) > room
+        if truncated:
+            if room < MIN_USER_TOKENS:
+                raise ValueError(f"Token budget {self.budget} leaves no room for the message")
+            user_message = dict(user_message, content=self.truncate(user_message['content'], room))
+        used += self.tokenizer.count(user_message['content'])
+
+        kept = 0
+        for message in reversed(history):
+            cost = self.message_tokens(message)
+            if used + cost > self.budget:
+                break
+            used += cost
+            kept += 1
+
+        included = history[len(history) - kept:] if kept else []
+        messages = list(system_messages) + included + [user_message]
+        return messages, {
+            'prompt_tokens': used - self.max_tokens,
+            'history_kept': kept,
+            'history_dropped': len(history) - kept,
+            'user_truncated': truncated
+        }
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Session Context Cache
+Per-session window of chat_history kept in daemon RAM (write-through)
+
+Every OpenAI turn used to:
+- SELECT the last history_rows chat_history rows of the session
+- json.loads() each row's metadata to drop privacy_category messages
+
+Now:
+- First turn of a session loads the window from chat_history once
+- save_message_to_db appends to the cached window as it writes the row
+- Later turns read the deque - no query, no JSON parsing
+- delete_all_chat_history / inactivity timeout → invalidate()
+
+The window mirrors the SQL (LIMIT before PII filter): private rows occupy a
+slot as None, so the same messages drop out as with the query.
+
+Each window knows the session row index of its first entry (start), so the
+rolling summary (conversation_summary.py) can fold rows away by position.
+"""
+
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+MAX_SESSIONS = 32  # Least recently used sessions beyond this are dropped
+
+
+class _Window:
+    __slots__ = ('messages', 'start')
+
+    def __init__(self, messages: deque, start: int):
+        self.messages = messages
+        self.start = start
+
+
+class SessionContextCache:
+    """Thread-safe LRU of per-session message deques"""
+
+    def __init__(self, window: int, max_sessions: int = MAX_SESSIONS):
+        """
+        Args:
+            window: Rows kept per session (same as the history query LIMIT)
+            max_sessions: Sessions cached at once
+        """
+        self.window = max(1, window)
+        self.max_sessions = max(1, max_sessions)
+        self._sessions: 'OrderedDict[str, _Window]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, session_id: str) -> Optional[List[Dict]]:
+        """
+        Cached context of a session (chronological, PII filtered)
+
+        Returns:
+            List of {"role", "content"} dicts, or None if not cached
+        """
+        with self._lock:
+            window = self._sessions.get(session_id)
+            if window is None:
+                self.misses += 1
+                return None
+            self._sessions.move_to_end(session_id)
+            self.hits += 1
+            return [dict(message) for message in window.messages if message is not None]
+
+    def snapshot(self, session_id: str) -> Optional[Tuple[int, List[Optional[Dict]]]]:
+        """
+        (start, entries) of a cached window without touching hit counters or LRU order
+
+        start = session row index of entries[0]; entries include None for private rows
+        """
+        with self._lock:
+            window = self._sessions.get(session_id)
+            if window is None:
+                return None
+            return window.start, [dict(m) if m is not None else None for m in window.messages]
+
+    def fill(self, session_id: str, messages: Iterable[Optional[Dict]], start: int = 0):
+        """
+        Store a session window loaded from the DB (None = filtered private row)
+
+        Args:
+            start: Session row index of the first message
+        """
+        with self._lock:
+            self._sessions[session_id] = _Window(deque(messages, maxlen=self.window), start)
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def append(self, session_id: str, message: Optional[Dict]):
+        """
+        Write-through for a saved row (None for a private one)
+
+        Uncached sessions are left alone - their first get() misses and
+        loads the complete window from the DB.
+        """
+        with self._lock:
+            window = self._sessions.get(session_id)
+            if window is not None:
+                if len(window.messages) == self.window:
+                    window.start += 1  # Oldest entry falls out
+                window.messages.append(message)
+
+    def fold(self, session_id: str, upto: int):
+        """Drop entries before session row index upto (now covered by the summary)"""
+        with self._lock:
+            window = self._sessions.get(session_id)
+            if window is None:
+                return
+            while window.messages and window.start < upto:
+                window.messages.popleft()
+                window.start += 1
+
+    def invalidate(self, session_id: str = None):
+        """Drop one session, or every session if none given"""
+        with self._lock:
+            if session_id is None:
+                self._sessions.clear()
+            else:
+                self._sessions.pop(session_id, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
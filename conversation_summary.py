@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Rolling Conversation Summary
+Folds the oldest turns of a long session into one running summary
+
+Long sessions used to resend up to 40 full messages on every OpenAI turn.
+Now, after a reply has been sent:
+- the session's cached context window (context_cache.py) is measured in tokens
+- above AI_CHAT_SUMMARY_THRESHOLD, everything but the newest KEEP_RECENT
+  messages is merged into the session summary by the local Ollama model
+- the folded rows leave the window; the summary goes out as one system message
+
+Runs on a background thread - never on the reply path. Private messages
+(privacy_category) are never in the window, so they never reach the summary.
+
+The default summary model is the SQL generator's qwen2.5-coder:7b: a ~2k
+token summary prefill would compete with a foreground Qwen call and can
+evict one of its cached prompt prefixes. Compaction is skipped while Qwen
+is busy (busy callable, ChatSystem's in-flight counter) - the next turn
+schedules it again. A separate AI_CHAT_SUMMARY_MODEL or OLLAMA_NUM_PARALLEL
+≥ 2 (≥ 4 keeps all three SQL prefixes plus a summary slot) avoids it.
+
+Summaries live in daemon RAM, like chat_history itself they do not outlive
+delete_all_chat_history (exit, inactivity, shutdown) → clear().
+"""
+
+import queue
+import sys
+import threading
+from typing import Callable, Dict, List, Optional
+
+DEFAULT_MODEL = "qwen2.5-coder:7b"
+DEFAULT_THRESHOLD_TOKENS = 2000
+KEEP_RECENT = 6            # Newest messages always sent verbatim (3 turns)
+SUMMARY_MAX_TOKENS = 400   # num_predict for the summary
+SUMMARY_TIMEOUT = 60.0
+
+SUMMARY_SYSTEM_PROMPT = (
+    "You keep a running summary of a chat between a user and an assistant. "
+    "Merge the previous summary and the new messages into one concise summary of at most 150 words. "
+    "Keep facts, decisions, names, numbers and open questions the user may refer back to. "
+    "Write in the language of the conversation. Output only the summary."
+)
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+
+class ConversationSummarizer:
+    """Per-session rolling summaries, compacted asynchronously"""
+
+    def __init__(self, context_cache, tokenizer, client=None, model: str = DEFAULT_MODEL,
+                 threshold_tokens: int = DEFAULT_THRESHOLD_TOKENS, keep_recent: int = KEEP_RECENT,
+                 busy: Optional[Callable[[], bool]] = None):
+        """
+        Args:
+            context_cache: SessionContextCache the windows are read from and folded in
+            tokenizer: tokenizer.Tokenizer (threshold measurement)
+            client: OllamaClient (defaults to the shared keep-alive client, created lazily)
+            model: Ollama model that writes the summaries
+            threshold_tokens: Window size that triggers compaction
+            keep_recent: Newest messages never folded
+            busy: Optional callable → True while a foreground Qwen request runs (compaction skipped)
+        """
+        self.context_cache = context_cache
+        self.tokenizer = tokenizer
+        self._client = client
+        self.model = model
+        self.threshold_tokens = threshold_tokens
+        self.keep_recent = max(0, keep_recent)
+        self.busy = busy
+
+        self._lock = threading.Lock()
+        self._summaries: Dict[str, str] = {}
+        self._folded: Dict[str, int] = {}
+        self._generation = 0  # Bumped by clear() → in-flight results are dropped
+
+        self._queue = queue.Queue()
+        self._pending = set()
+        self._thread = None
+        self.compactions = 0
+        self.failures = 0
+        self.skipped_busy = 0
+
+    @property
+    def client(self):
+        if self._client is None:
+            from ollama_client import get_shared_client
+            self._client = get_shared_client()
+        return self._client
+
+    def summary(self, session_id: str) -> Optional[str]:
+        with self._lock:
+            return self._summaries.get(session_id)
+
+    def summary_message(self, session_id: str) -> Optional[Dict[str, str]]:
+        """System message carrying the session summary (None if there is none yet)"""
+        summary = self.summary(session_id)
+        if not summary:
+            return None
+        return {"role": "system", "content": SUMMARY_PREFIX + summary}
+
+    def folded(self, session_id: str) -> int:
+        """Session rows covered by the summary (skipped when the window is reloaded)"""
+        with self._lock:
+            return self._folded.get(session_id, 0)
+
+    def clear(self):
+        """Forget all summaries (chat history deleted)"""
+        with self._lock:
+            self._summaries.clear()
+            self._folded.clear()
+            self._generation += 1
+
+    def schedule(self, session_id: str):
+        """Queue a compaction check for a session (returns at once)"""
+        with self._lock:
+            if session_id in self._pending:
+                return  # Already queued - one check covers both turns
+            self._pending.add(session_id)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="summarizer", daemon=True)
+                self._thread.start()
+        self._queue.put(session_id)
+
+    def wait_idle(self, timeout: float = SUMMARY_TIMEOUT) -> bool:
+        """Block until every scheduled check ran (tests, shutdown)"""
+        done = threading.Event()
+        with self._lock:
+            if self._thread is None:
+                return True
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if isinstance(item, threading.Event):
+                item.set()
+                continue
+            with self._lock:
+                self._pending.discard(item)
+            try:
+                self.compact(item)
+            except Exception as e:
+                self.failures += 1
+                print(f"⚠️  Conversation summary failed: {e}", file=sys.stderr)
+
+    def compact(self, session_id: str) -> bool:
+        """
+        Fold the oldest messages of a session into its summary if the window is too large
+
+        Returns:
+            True if the summary was updated
+        """
+        snapshot = self.context_cache.snapshot(session_id)
+        if snapshot is None:
+            return False
+        start, entries = snapshot
+
+        messages = [m for m in entries if m is not None]
+        tokens = sum(self.tokenizer.count(m['content']) for m in messages)
+        if tokens < self.threshold_tokens or len(entries) <= self.keep_recent:
+            return False
+
+        fold_count = len(entries) - self.keep_recent
+        to_fold = [m for m in entries[:fold_count] if m is not None]
+
+        if to_fold and self.busy is not None and self.busy():
+            self.skipped_busy += 1
+            return False  # Foreground Qwen call owns the model - retried after the next turn
+
+        with self._lock:
+            generation = self._generation
+            previous = self._summaries.get(session_id)
+
+        summary = self._summarize(previous, to_fold) if to_fold else previous
+        if to_fold and not summary:
+            return False
+
+        upto = start + fold_count
+        with self._lock:
+            if generation != self._generation:
+                return False  # History deleted meanwhile
+            if summary:
+                self._summaries[session_id] = summary
+            self._folded[session_id] = max(self._folded.get(session_id, 0), upto)
+        self.context_cache.fold(session_id, upto)
+        self.compactions += 1
+        return True
+
+    def _summarize(self, previous: Optional[str], messages: List[Dict[str, str]]) -> Optional[str]:
+        """Merge previous summary + messages via Ollama (None on failure)"""
+        lines = []
+        for message in messages:
+            speaker = "User" if message['role'] == 'user' else "Assistant"
+            lines.append(f"{speaker}: {message['content']}")
+
+        prompt = f"Previous summary:\n{previous or '(none)'}\n\nNew messages:\n" + "\n".join(lines)
+        try:
+            response = self.client.chat(
+                self.model,
+                [{"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+                 {"role": "user", "content": prompt}],
+                options={'temperature': 0.2, 'num_predict': SUMMARY_MAX_TOKENS},
+                timeout=SUMMARY_TIMEOUT
+            )
+        except Exception as e:
+            self.failures += 1
+            print(f"⚠️  Conversation summary failed: {e}", file=sys.stderr)
+            return None
+
+        return (response.get('message') or {}).get('content', '').strip() or None
@@ -3,6 +3,10 @@
 """
 Daemon Manager
 Manages both Chat and Ollama daemon lifecycle
+
+Health checks are cached (liveness.py): a healthy system sends messages
+without pinging the daemon or probing Ollama first. A failed connection
+invalidates the cache, restarts what is down and retries once.
 """
 
 import subprocess
@@ -11,13 +15,16 @@ import os
 import time
 import socket
 import signal
-import json
-from typing import Optional
+from typing import Callable, Optional
 
 # Add current directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+from liveness import CHAT_DAEMON, OLLAMA, LivenessCache
+from metrics import format_summary
 from ollama_manager import OllamaManager
+from daemon_protocol import FrameReader, connect, default_socket_path, send_frame
+from daemon_protocol import request as daemon_request
 
 class DaemonManager:
     """Manages Chat and Ollama daemons together"""
@@ -26,11 +33,27 @@ class DaemonManager:
         """Initialize daemon manager"""
         self.config_dir = config_dir or os.path.expanduser("~/.aichat")
         self.chat_pid_file = os.path.join(self.config_dir, "chat_daemon.pid")
-        self.chat_port = 5555
+        self.chat_socket_path = default_socket_path(self.config_dir)
         self.script_dir = config_dir or os.path.expanduser("~/.aichat")
 
+        # Shared health state (TTL cache in ~/.aichat/liveness.json)
+        self.liveness = LivenessCache(self.config_dir)
+
         # Ollama manager
-        self.ollama_manager = OllamaManager(config_dir=self.config_dir)
+        self.ollama_manager = OllamaManager(config_dir=self.config_dir, liveness=self.liveness)
+
+    def _request(self, request: dict, timeout: float) -> dict:
+        """
+        Send one request frame to the chat daemon and return its response frame
+
+        Raises:
+            OSError: If the daemon socket is missing or not accepting
+            socket.timeout: If the daemon does not answer in time
+        """
+        response = daemon_request(self.chat_socket_path, request, timeout=timeout)
+        if response is None:
+            raise ConnectionError("Chat daemon closed connection without response")
+        return response
 
     def is_chat_daemon_running(self) -> bool:
         """
@@ -40,27 +63,14 @@ class DaemonManager:
             True if chat daemon is running and responding
         """
         try:
-            # Try to connect to the socket
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(1.0)
-            sock.connect(('127.0.0.1', self.chat_port))
-
-            # Send ping request
-            request = {
-                'action': 'ping'
-            }
-            sock.sendall(json.dumps(request).encode('utf-8') + b'\n\n')
-
-            # Receive response
-            response = sock.recv(4096).decode('utf-8').strip()
-            sock.close()
-
-            # Parse response
-            response_data = json.loads(response)
-            return response_data.get('success', False)
+            response_data = self._request({'action': 'ping'}, timeout=1.0)
+            running = response_data.get('success', False)
 
         except (socket.error, socket.timeout, Exception):
-            return False
+            running = False
+
+        self.liveness.mark(CHAT_DAEMON, running)
+        return running
 
     def start_daemons(self, show_loading: bool = True) -> bool:
         """
@@ -99,7 +109,7 @@ class DaemonManager:
 
             # Start daemon in background
             process = subprocess.Popen(
-                ['python3', daemon_script, str(self.chat_port)],
+                ['python3', daemon_script, self.chat_socket_path],
                 stdout=subprocess.DEVNULL,
                 stderr=subprocess.DEVNULL,
                 start_new_session=True
@@ -139,18 +149,8 @@ class DaemonManager:
         # Step 1: Stop chat daemon
         if graceful and self.is_chat_daemon_running():
             try:
-                # Send shutdown request
-                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                sock.settimeout(2.0)
-                sock.connect(('127.0.0.1', self.chat_port))
-
-                import json
-                request = {
-                    'action': 'shutdown'
-                }
-                sock.sendall(json.dumps(request).encode('utf-8') + b'\n\n')
-                sock.recv(4096)  # Wait for response
-                sock.close()
+                # Send shutdown request (waits for response)
+                self._request({'action': 'shutdown'}, timeout=2.0)
 
                 print("🛑 Chat daemon shutdown requested", file=sys.stderr)
 
@@ -163,6 +163,8 @@ class DaemonManager:
             except Exception as e:
                 print(f"⚠️  Graceful shutdown failed: {e}", file=sys.stderr)
 
+        self.liveness.invalidate(CHAT_DAEMON)
+
         # Force kill if still running
         if os.path.exists(self.chat_pid_file):
             try:
@@ -210,38 +212,47 @@ class DaemonManager:
             True if cleanup successful
         """
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(2.0)
-            sock.connect(('127.0.0.1', self.chat_port))
-
-            request = {
-                'action': 'cleanup_history'
-            }
-            sock.sendall(json.dumps(request).encode('utf-8') + b'\n\n')
-
-            response = sock.recv(4096).decode('utf-8').strip()
-            sock.close()
-
-            response_data = json.loads(response)
+            response_data = self._request({'action': 'cleanup_history'}, timeout=2.0)
             return response_data.get('success', False)
 
         except Exception as e:
             # Daemon might not be running - that's OK
             return False
 
+    def get_metrics(self) -> Optional[dict]:
+        """
+        Metrics snapshot from the chat daemon (see metrics.py)
+
+        Returns:
+            Snapshot dict, or None if the daemon is not reachable
+        """
+        try:
+            response_data = self._request({'action': 'metrics'}, timeout=2.0)
+        except Exception:
+            return None
+        if not response_data.get('success'):
+            return None
+        return response_data.get('response')
+
     def ensure_daemons_running(self) -> bool:
         """
         Ensure both daemons are running, start if needed
 
+        Services seen healthy within the liveness TTL are not probed again,
+        so on a healthy system this costs one small file read.
+
         Returns:
             True if both daemons are running
         """
-        if self.is_chat_daemon_running() and self.ollama_manager.is_ollama_running():
+        chat_ok = self.liveness.is_healthy(CHAT_DAEMON) or self.is_chat_daemon_running()
+        ollama_ok = chat_ok and (self.liveness.is_healthy(OLLAMA) or self.ollama_manager.is_ollama_running())
+        if chat_ok and ollama_ok:
             return True
 
         return self.start_daemons(show_loading=False)
 
-    def send_message(self, session_id: str, message: str, system_prompt: str = "") -> Optional[str]:
+    def send_message(self, session_id: str, message: str, system_prompt: str = "",
+                     on_chunk: Callable[[str], None] = None) -> Optional[str]:
         """
         Send message to chat daemon
 
@@ -249,47 +260,58 @@ class DaemonManager:
             session_id: Chat session ID
             message: User message
             system_prompt: Optional system prompt
+            on_chunk: Optional callback - request a streamed reply and receive
+                      each text chunk as soon as the daemon forwards it
 
         Returns:
-            AI response or None if failed
+            AI response (full text, also when streamed) or None if failed
         """
         # Ensure daemons running
         if not self.ensure_daemons_running():
             return None
 
         try:
-            # Connect to chat daemon
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(60.0)  # 60 second timeout for AI response
-            sock.connect(('127.0.0.1', self.chat_port))
-
-            # Send request
-            import json
             request = {
                 'action': 'send_message',
                 'session_id': session_id,
                 'message': message,
-                'system_prompt': system_prompt
+                'system_prompt': system_prompt,
+                'stream': on_chunk is not None
             }
-            sock.sendall(json.dumps(request).encode('utf-8') + b'\n\n')
 
-            # Receive response
-            response_data = b''
-            while True:
-                chunk = sock.recv(4096)
-                if not chunk:
-                    break
-                response_data += chunk
-                if b'\n' in response_data:
-                    break
+            # 60 second timeout for AI response (applies per frame when streaming)
+            try:
+                sock = connect(self.chat_socket_path, timeout=60.0)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Cached "healthy" was stale (daemon exited) → re-probe, restart, retry once
+                self.liveness.invalidate()
+                if not self.ensure_daemons_running():
+                    return None
+                sock = connect(self.chat_socket_path, timeout=60.0)
 
-            sock.close()
+            try:
+                send_frame(sock, request)
+                reader = FrameReader(sock)
+
+                while True:
+                    response = reader.read_frame()
+                    if response is None:
+                        raise ConnectionError("Chat daemon closed connection without response")
+                    if response.get('type') == 'chunk':
+                        on_chunk(response.get('text', ''))
+                        continue
+                    break
+            finally:
+                sock.close()
 
-            # Parse response
-            response = json.loads(response_data.decode('utf-8'))
+            # Daemon answered → keep trusting it without pings
+            self.liveness.mark(CHAT_DAEMON, True)
 
             if response.get('success'):
                 return response.get('response', '')
+            elif response.get('busy'):
+                print("⏳ Chat daemon busy - too many requests queued, try again", file=sys.stderr)
+                return None
             else:
                 print(f"❌ Chat daemon error: {response.get('error')}", file=sys.stderr)
                 return None
@@ -302,10 +324,33 @@ class DaemonManager:
             return None
 
 
+class StreamPrinter:
+    """
+    Writes a reply to stdout as it streams in
+
+    The prefix (e.g. "\\r🤖 AI ▶ " from zsh via $AICHAT_STREAM_PREFIX)
+    is written once before the first chunk, overwriting the thinking indicator.
+    """
+
+    def __init__(self, prefix: str = ""):
+        self.prefix = prefix
+        self.started = False
+
+    def write(self, text: str):
+        if not self.started:
+            sys.stdout.write(self.prefix)
+            self.started = True
+        sys.stdout.write(text)
+        sys.stdout.flush()
+
+    def finish(self):
+        if self.started:
+            sys.stdout.write("\n")
+            sys.stdout.flush()
+
+
 # CLI interface
 if __name__ == '__main__':
-    import json
-
     manager = DaemonManager()
 
     if len(sys.argv) < 2:
@@ -330,6 +375,11 @@ if __name__ == '__main__':
         print(f"Ollama daemon: {'running' if ollama_running else 'stopped'}")
         print(f"Ollama mode: {'always-on' if manager.ollama_manager.always_on else 'managed'}")
 
+        snapshot = manager.get_metrics() if chat_running else None
+        if snapshot:
+            for line in format_summary(snapshot):
+                print(f"  {line}")
+
         sys.exit(0 if (chat_running and ollama_running) else 1)
 
     elif command == "ensure":
@@ -345,11 +395,16 @@ if __name__ == '__main__':
         message = sys.argv[3]
         system_prompt = sys.argv[4] if len(sys.argv) > 4 else ""
 
-        response = manager.send_message(session_id, message, system_prompt)
+        # Stream reply to the terminal as it arrives
+        printer = StreamPrinter(os.environ.get('AICHAT_STREAM_PREFIX', ''))
+        response = manager.send_message(session_id, message, system_prompt, on_chunk=printer.write)
         if response:
-            print(response)
+            if not printer.started:
+                printer.write(response)  # Local replies arrive in one piece
+            printer.finish()
             sys.exit(0)
         else:
+            printer.finish()
             sys.exit(1)
 
     else:
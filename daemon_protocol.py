@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Daemon Wire Protocol
+Length-prefixed JSON frames over a Unix domain socket (~/.aichat/chat_daemon.sock)
+
+Frame layout:
+    [4 bytes: payload length, big-endian unsigned] [payload: UTF-8 JSON]
+
+Why not "JSON + blank line" anymore?
+- Messages/system prompts containing a blank line were cut off early
+- Scanning a growing buffer for b'\\n\\n' with data += chunk was quadratic
+- Length prefix → reader knows exactly how many bytes to expect
+
+Only imports os/socket/json so thin clients stay fast to start.
+"""
+
+import os
+import json
+import socket
+
+HEADER_SIZE = 4
+MAX_FRAME_SIZE = 16 * 1024 * 1024  # 16 MiB - far above any chat payload
+SOCKET_NAME = "chat_daemon.sock"
+
+
+class ProtocolError(Exception):
+    """Malformed or oversized frame"""
+
+
+def default_socket_path(config_dir: str = None) -> str:
+    """Path of the chat daemon socket inside the config directory"""
+    return os.path.join(config_dir or os.path.expanduser("~/.aichat"), SOCKET_NAME)
+
+
+def encode_frame(message: dict) -> bytes:
+    """Serialize message to a single length-prefixed frame"""
+    payload = json.dumps(message, ensure_ascii=False).encode('utf-8')
+    if len(payload) > MAX_FRAME_SIZE:
+        raise ProtocolError(f"Frame too large: {len(payload)} bytes")
+    return len(payload).to_bytes(HEADER_SIZE, 'big') + payload
+
+
+def send_frame(sock: socket.socket, message: dict):
+    """Send one frame (header + payload in a single sendall)"""
+    sock.sendall(encode_frame(message))
+
+
+class FrameReader:
+    """
+    Reads frames from a socket into a preallocated buffer
+
+    Uses recv_into() on a memoryview → no per-chunk bytes objects,
+    no quadratic concatenation. Buffer grows (doubling) only for
+    frames larger than anything seen before on this connection.
+    """
+
+    def __init__(self, sock: socket.socket, initial_size: int = 64 * 1024):
+        self.sock = sock
+        self._buffer = bytearray(initial_size)
+        self._view = memoryview(self._buffer)
+
+    def _ensure_capacity(self, size: int):
+        """Grow buffer to hold at least size bytes"""
+        if size > len(self._buffer):
+            new_size = len(self._buffer)
+            while new_size < size:
+                new_size *= 2
+            self._buffer = bytearray(new_size)
+            self._view = memoryview(self._buffer)
+
+    def _recv_exactly(self, size: int, allow_eof: bool = False):
+        """
+        Receive exactly size bytes into the buffer
+
+        Returns:
+            memoryview over the received bytes, or None on clean EOF
+            (only when allow_eof and nothing was read yet)
+        """
+        self._ensure_capacity(size)
+        view = self._view
+        received = 0
+        while received < size:
+            count = self.sock.recv_into(view[received:size], size - received)
+            if count == 0:
+                if allow_eof and received == 0:
+                    return None
+                raise ConnectionError("Connection closed mid-frame")
+            received += count
+        return view[:size]
+
+    def read_frame(self):
+        """
+        Read the next frame
+
+        Returns:
+            Decoded JSON object, or None if the peer closed the connection
+        """
+        header = self._recv_exactly(HEADER_SIZE, allow_eof=True)
+        if header is None:
+            return None
+
+        length = int.from_bytes(header, 'big')
+        if length > MAX_FRAME_SIZE:
+            raise ProtocolError(f"Frame too large: {length} bytes")
+
+        payload = self._recv_exactly(length)
+        try:
+            return json.loads(str(payload, 'utf-8'))
+        except (UnicodeDecodeError, ValueError) as e:
+            raise ProtocolError(f"Invalid frame payload: {e}")
+
+
+def connect(path: str, timeout: float = None) -> socket.socket:
+    """Open a client connection to the daemon socket"""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(path)
+    except Exception:
+        sock.close()
+        raise
+    return sock
+
+
+def request(path: str, message: dict, timeout: float = None):
+    """
+    One-shot request: connect, send frame, read one response frame
+
+    Returns:
+        Decoded response dict (None if daemon closed without answering)
+    """
+    sock = connect(path, timeout)
+    try:
+        send_frame(sock, message)
+        return FrameReader(sock, initial_size=4096).read_frame()
+    finally:
+        sock.close()
@@ -0,0 +1,466 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Database Repository
+Single access layer for memory.db (mydata + chat_history)
+
+Before, every chat turn opened fresh sqlite3 connections (history load,
+two message saves, cleanup, search) - each paying schema parsing and,
+under SQLCipher, key setup - and ChatSystem always used plain sqlite3
+even when ChatMemorySystem had opened the same file encrypted.
+
+Now:
+- One long-lived writer connection (serialized by a lock)
+- A small pool of long-lived reader connections
+- Statement cache per connection → prepared statements are reused
+- ONE driver/encryption path: SQLCipher (with key) → APSW → sqlite3
+- get_repository() shares one instance per database file in a process;
+  each caller gives its reference back with release_repository()
+
+Performance profiles (AI_CHAT_DB_PROFILE) are applied to every connection at open:
+- legacy:      SQLite defaults (rollback journal, synchronous=FULL)
+- balanced:    WAL, synchronous=NORMAL, temp_store=MEMORY, 16 MiB page cache
+- performance: balanced + 256 MiB mmap + 64 MiB page cache (default)
+WAL lets pooled readers run while the writer commits; the daemon calls
+checkpoint() from its idle loop so the -wal file does not keep growing.
+"""
+
+import os
+import sys
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+# Try SQLCipher first (encrypted), then APSW, then sqlite3
+try:
+    import sqlcipher3
+    USE_SQLCIPHER = True
+except ImportError:
+    sqlcipher3 = None
+    USE_SQLCIPHER = False
+
+try:
+    import apsw
+    USE_APSW = not USE_SQLCIPHER
+except ImportError:
+    apsw = None
+    USE_APSW = False
+
+STATEMENT_CACHE_SIZE = 256   # prepared statements kept per connection
+READ_POOL_SIZE = 4           # matches OllamaClient pool / daemon concurrency
+
+# PRAGMA name → value, applied in this order after keying
+DB_PROFILES = {
+    'legacy': {},
+    'balanced': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'temp_store': 'MEMORY',
+        'cache_size': -16 * 1024,          # negative = KiB → 16 MiB
+    },
+    'performance': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'temp_store': 'MEMORY',
+        'cache_size': -64 * 1024,          # 64 MiB
+        'mmap_size': 256 * 1024 * 1024,    # ignored by SQLCipher (pages are encrypted)
+    },
+}
+DEFAULT_PROFILE = 'performance'
+
+# Always set, independent of profile (correctness, not speed):
+# recursive_triggers → INSERT OR REPLACE fires DELETE triggers for replaced rows
+# (keeps trigger-maintained indexes like mydata_fts in sync)
+BASE_PRAGMAS = {
+    'recursive_triggers': 'ON',
+}
+
+
+class QueryResult:
+    """Fully fetched statement result (rows are read while the connection is held)"""
+
+    __slots__ = ('rows', 'lastrowid', 'rowcount')
+
+    def __init__(self, rows: List[tuple], lastrowid: Optional[int], rowcount: int):
+        self.rows = rows
+        self.lastrowid = lastrowid
+        self.rowcount = rowcount
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return self.rows
+
+
+class _APSWCursor:
+    """Make an APSW cursor look like a sqlite3 cursor"""
+
+    def __init__(self, cursor, conn):
+        self._cursor = cursor
+        self._conn = conn
+
+    def execute(self, sql, params=()):
+        self._cursor.execute(sql, params)
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        self._cursor.executemany(sql, seq_of_params)
+        return self
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    @property
+    def lastrowid(self):
+        return self._conn.last_insert_rowid()
+
+    @property
+    def rowcount(self):
+        return self._conn.changes()
+
+
+class _APSWConnection:
+    """Make an APSW connection look like a sqlite3 connection (autocommit)"""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self):
+        return _APSWCursor(self._conn.cursor(), self._conn)
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self.cursor().executemany(sql, seq_of_params)
+
+    def executescript(self, script):
+        cursor = self._conn.cursor()
+        cursor.execute(script)  # APSW runs every statement in the string
+        return _APSWCursor(cursor, self._conn)
+
+    def commit(self):
+        pass  # APSW auto-commits
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self._conn.close()
+
+
+def resolve_profile(name: str = None) -> str:
+    """Return a valid profile name (unknown names fall back to the default)"""
+    name = (name or DEFAULT_PROFILE).strip().lower()
+    if name not in DB_PROFILES:
+        print(f"Warning: Unknown AI_CHAT_DB_PROFILE '{name}' - using '{DEFAULT_PROFILE}'", file=sys.stderr)
+        return DEFAULT_PROFILE
+    return name
+
+
+def apply_profile(conn, profile: str):
+    """Set base + profile PRAGMAs on an open connection"""
+    for pragma, value in {**BASE_PRAGMAS, **DB_PROFILES[profile]}.items():
+        conn.execute(f"PRAGMA {pragma} = {value}").fetchall()
+
+
+def connect(db_path, encryption_key: str = None, profile: str = DEFAULT_PROFILE):
+    """
+    Open one connection using the configured driver
+
+    This is the only place where memory.db is opened and keyed.
+
+    Args:
+        db_path: Database file path
+        encryption_key: Hex key for SQLCipher (ignored if SQLCipher unavailable)
+        profile: Name in DB_PROFILES
+
+    Returns:
+        sqlite3-compatible connection
+    """
+    conn = _open(db_path, encryption_key)
+    apply_profile(conn, profile)
+    return conn
+
+
+def _open(db_path, encryption_key: str = None):
+    """Open and key a connection with the best available driver"""
+    if USE_SQLCIPHER and encryption_key:
+        conn = sqlcipher3.connect(str(db_path), check_same_thread=False,
+                                  cached_statements=STATEMENT_CACHE_SIZE)
+        # Key must be the first statement on the connection
+        conn.execute(f"PRAGMA key = \"x'{encryption_key}'\"")
+        conn.execute("PRAGMA cipher_page_size = 4096")
+        conn.execute("PRAGMA kdf_iter = 64000")
+        conn.execute("PRAGMA cipher_hmac_algorithm = HMAC_SHA512")
+        conn.execute("PRAGMA cipher_kdf_algorithm = PBKDF2_HMAC_SHA512")
+        return conn
+
+    if USE_APSW:
+        conn = apsw.Connection(str(db_path))
+        conn.setbusytimeout(5000)
+        return _APSWConnection(conn)
+
+    return sqlite3.connect(str(db_path), check_same_thread=False,
+                           cached_statements=STATEMENT_CACHE_SIZE)
+
+
+class DatabaseRepository:
+    """
+    Long-lived connections to one database file
+
+    Writes (and anything that must see its own uncommitted changes) go through
+    the single writer connection; plain SELECTs use the reader pool.
+    """
+
+    def __init__(self, db_path, encryption_key: str = None, read_pool_size: int = READ_POOL_SIZE,
+                 profile: str = None):
+        """
+        Open writer connection (readers are opened lazily)
+
+        Args:
+            db_path: Database file path
+            encryption_key: Hex SQLCipher key (empty/None = unencrypted)
+            read_pool_size: Max reader connections
+            profile: Performance profile name (see DB_PROFILES)
+        """
+        self.db_path = str(db_path)
+        self.encryption_key = encryption_key or None
+        self.profile = resolve_profile(profile)
+        # ':memory:' databases are per-connection → readers must use the writer
+        self.read_pool_size = 0 if self.db_path == ':memory:' else read_pool_size
+
+        self._writer = connect(self.db_path, self.encryption_key, self.profile)
+        self._write_lock = threading.RLock()
+        self._readers = queue.LifoQueue()
+        self._readers_opened = 0
+        self._readers_lock = threading.Lock()
+        self._closed = False
+        self._users = 0  # get_repository() references not yet released
+
+    # ------------------------------------------------------------------
+    # Writer
+    # ------------------------------------------------------------------
+
+    def execute(self, sql: str, params: Sequence = (), commit: bool = True) -> QueryResult:
+        """
+        Run one statement on the writer connection
+
+        Args:
+            sql: SQL statement
+            params: Bound parameters
+            commit: Commit after the statement (False = leave open for more statements)
+
+        Returns:
+            QueryResult with rows (if any), lastrowid and rowcount
+        """
+        with self._write_lock:
+            cursor = self._writer.execute(sql, params)
+            result = QueryResult(cursor.fetchall(), cursor.lastrowid, cursor.rowcount)
+            if commit:
+                self._writer.commit()
+            return result
+
+    def executemany(self, sql: str, seq_of_params: Iterable[Sequence], commit: bool = True) -> int:
+        """Run one statement for many parameter sets, return affected row count"""
+        with self._write_lock:
+            cursor = self._writer.executemany(sql, seq_of_params)
+            if commit:
+                self._writer.commit()
+            return cursor.rowcount
+
+    def executescript(self, script: str):
+        """Run a multi-statement script (schema setup) on the writer"""
+        with self._write_lock:
+            self._writer.executescript(script)
+            self._writer.commit()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Hold the writer for several statements, commit once at the end
+
+        Usage:
+            with repo.transaction() as conn:
+                conn.execute(...)
+                conn.execute(...)
+        """
+        with self._write_lock:
+            try:
+                yield self._writer
+                self._writer.commit()
+            except Exception:
+                self._writer.rollback()
+                raise
+
+    # ------------------------------------------------------------------
+    # Readers
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def reader(self):
+        """Borrow a reader connection from the pool"""
+        if self.read_pool_size == 0:
+            with self._write_lock:
+                yield self._writer
+            return
+
+        conn = self._acquire_reader()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
+    def _acquire_reader(self):
+        """Reuse an idle reader, open a new one below the limit, else wait"""
+        try:
+            return self._readers.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._readers_lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError("Repository is closed")
+            if self._readers_opened < self.read_pool_size:
+                self._readers_opened += 1
+                try:
+                    return connect(self.db_path, self.encryption_key, self.profile)
+                except Exception:
+                    self._readers_opened -= 1
+                    raise
+
+        return self._readers.get()
+
+    def query(self, sql: str, params: Sequence = ()) -> List[tuple]:
+        """Run a SELECT on a pooled reader, return all rows"""
+        with self.reader() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def query_one(self, sql: str, params: Sequence = ()) -> Optional[tuple]:
+        """Run a SELECT on a pooled reader, return first row or None"""
+        with self.reader() as conn:
+            return conn.execute(sql, params).fetchone()
+
+    def table_exists(self, name: str) -> bool:
+        """Check sqlite_master for a table"""
+        return self.query_one(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name=?", (name,)
+        ) is not None
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    @property
+    def wal_enabled(self) -> bool:
+        return DB_PROFILES[self.profile].get('journal_mode') == 'WAL'
+
+    def checkpoint(self, mode: str = 'PASSIVE') -> Optional[tuple]:
+        """
+        Copy WAL frames back into the database file
+
+        PASSIVE never blocks readers or the writer - frames still in use
+        are simply left for the next checkpoint.
+
+        Returns:
+            (busy, wal_frames, checkpointed_frames) or None without WAL
+        """
+        if not self.wal_enabled or self._closed:
+            return None
+        with self._write_lock:
+            return self._writer.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def close(self):
+        """Close writer and all idle readers, drop from shared registry"""
+        with self._readers_lock:
+            if self._closed:
+                return
+            self._closed = True
+
+        _forget_repository(self)
+
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+            except Exception:
+                pass
+
+        with self._write_lock:
+            try:
+                self._writer.close()
+            except Exception:
+                pass
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+
+_repositories: Dict[str, DatabaseRepository] = {}
+_repositories_lock = threading.Lock()
+
+
+def _registry_key(db_path) -> str:
+    return os.path.realpath(os.path.expanduser(str(db_path)))
+
+
+def get_repository(db_path=None, encryption_key: str = None, profile: str = None) -> DatabaseRepository:
+    """
+    Return the process-wide repository for a database file (created on first call)
+
+    ChatSystem and ChatMemorySystem both call this for memory.db and
+    therefore share connections and the encryption setup.
+
+    Args:
+        db_path: Database file path (defaults to ~/.aichat/memory.db)
+        encryption_key, profile: Only applied when the repository is created
+    """
+    if db_path is None:
+        config_dir = Path.home() / '.aichat'
+        config_dir.mkdir(exist_ok=True)
+        db_path = config_dir / 'memory.db'
+
+    key = _registry_key(db_path)
+    with _repositories_lock:
+        repo = _repositories.get(key)
+        if repo is None or repo.closed:
+            repo = DatabaseRepository(db_path, encryption_key, profile=profile)
+            _repositories[key] = repo
+        elif encryption_key and repo.encryption_key != encryption_key:
+            print("Warning: memory.db already open with a different encryption key", file=sys.stderr)
+        repo._users += 1
+        return repo
+
+
+def release_repository(repo: DatabaseRepository):
+    """
+    Give back one get_repository() reference; the last one closes the repository
+
+    close() still closes it at once for every user.
+    """
+    with _repositories_lock:
+        repo._users = max(0, repo._users - 1)
+        last = repo._users == 0
+    if last:
+        repo.close()
+
+
+def _forget_repository(repo: DatabaseRepository):
+    """Remove a closed repository from the registry"""
+    key = _registry_key(repo.db_path)
+    with _repositories_lock:
+        if _repositories.get(key) is repo:
+            del _repositories[key]
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Few-Shot Example Index
+Picks the prompt examples closest to the input instead of sending all of them
+
+Every Qwen call carried the full wall of EN/DE/ES examples (~30 per action),
+whatever the input looked like. Now:
+- examples (input → expected SQL) are parsed out of the specialist prompts
+  once, and learned from confirmed requests (SAVE stored, RETRIEVE found rows,
+  DELETE confirmed)
+- char n-gram TF-IDF (2-4 chars per word, data values reduced to their shape:
+  "anna@x.com" → "aaaa@a.aaa") + cosine similarity, pure Python sparse vectors
+  (a few hundred examples → well under a millisecond per lookup)
+- nearest(): k examples of the action in the detected language (other
+  languages fill up if there are fewer), plus the closest false positive
+- learned examples have every data value masked ("669686832" → "123456789")
+  and are persisted to ~/.aichat/qwen_examples.json (mode 0600)
+"""
+
+import json
+import math
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional
+
+from sql_cache import normalize
+
+DEFAULT_K = 6
+MAX_LEARNED = 300
+NGRAM_MIN = 2
+NGRAM_MAX = 4
+
+# Prompt example block: Input line, optional Analysis/Note/Reason line, SQL line
+_BLOCK_RE = re.compile(r'^Input: "(?P<input>.*)"\n(?:(?P<note>(?:Analysis|Note|Reason): .*)\n)?SQL: (?P<sql>.+)$',
+                       re.MULTILINE)
+# "- English verbs: save, note, ..." / "- German: lösche, entferne, ..."
+_VERBS_RE = re.compile(r"^- (English|German|Spanish)(?: verbs)?: (.+)$", re.MULTILINE)
+_LANG_CODES = {'English': 'en', 'German': 'de', 'Spanish': 'es'}
+_NOTE_LANG_RE = re.compile(r"\((EN|DE|ES)\b")
+_SAVE_LANG_RE = re.compile(r"'(en|de|es)'\)\s*;?\s*$")
+_VALUE_RE = re.compile(r"[^\s'\"]*[\d@][^\s'\"]*")
+_LITERAL_RE = re.compile(r"'((?:[^']|'')*)'")
+_CONTENT_RE = re.compile(r"(?:VALUES\s*\(\s*|content\s*=\s*)'((?:[^']|'')*)'", re.IGNORECASE)
+
+
+def value_shape(token: str) -> str:
+    """Data token → its shape (digits → 0, letters → a), keeps @ . - / as they are"""
+    return re.sub(r"[^\W\d_]", "a", re.sub(r"\d", "0", token))
+
+
+def char_ngrams(text: str) -> Counter:
+    """2-4 char n-grams per word (padded with spaces), values reduced to their shape"""
+    grams: Counter = Counter()
+    for word in normalize(text).split():
+        if _VALUE_RE.fullmatch(word):
+            word = value_shape(word)
+        padded = f" {word} "
+        for n in range(NGRAM_MIN, NGRAM_MAX + 1):
+            for start in range(len(padded) - n + 1):
+                grams[padded[start:start + n]] += 1
+    return grams
+
+
+def mask_value(value: str) -> str:
+    """Same-shape stand-in for user data: digits and letters replaced in sequence"""
+    digits = letters = 0
+    masked = []
+    for ch in value:
+        if ch.isdigit():
+            digits += 1
+            masked.append(str(digits % 10))
+        elif ch.isalpha():
+            letter = "abcdefghijklmnopqrstuvwxyz"[letters % 26]
+            letters += 1
+            masked.append(letter.upper() if ch.isupper() else letter)
+        else:
+            masked.append(ch)
+    return "".join(masked)
+
+
+def _verb_langs(prompt: str) -> Dict[str, str]:
+    verbs = {}
+    for language, words in _VERBS_RE.findall(prompt):
+        for verb in words.split(','):
+            verbs.setdefault(normalize(verb), _LANG_CODES[language])
+    return verbs
+
+
+def parse_prompt_examples(prompt: str, action: str) -> List[Dict[str, Any]]:
+    """
+    Example blocks of a specialist prompt
+
+    Language: "(EN)" in the Analysis line, else the lang literal of an INSERT,
+    else the first word found in the prompt's verb lists, else en.
+    """
+    verbs = _verb_langs(prompt)
+    examples = []
+    for match in _BLOCK_RE.finditer(prompt):
+        text, note, sql = match.group('input'), match.group('note'), match.group('sql').strip()
+        lang = None
+        if note and _NOTE_LANG_RE.search(note):
+            lang = _NOTE_LANG_RE.search(note).group(1).lower()
+        elif _SAVE_LANG_RE.search(sql):
+            lang = _SAVE_LANG_RE.search(sql).group(1)
+        else:
+            lang = next((verbs[w] for w in normalize(text).split() if w in verbs), 'en')
+        examples.append({'input': text, 'sql': sql, 'note': note, 'action': action, 'lang': lang,
+                         'source': 'prompt'})
+    return examples
+
+
+def inline_params(sql: str, params: Iterable[Any]) -> str:
+    """Parameterized statement → literal SQL (example text only, never executed)"""
+    values = iter(params)
+
+    def literal(_match):
+        value = next(values, '')
+        return "'" + str(value).replace("'", "''") + "'"
+
+    return re.sub(r"\?", literal, sql)
+
+
+def render_example(example: Dict[str, Any]) -> str:
+    """Prompt block in the same layout as the specialist prompts"""
+    lines = [f'Input: "{example["input"]}"']
+    if example.get('note'):
+        lines.append(example['note'])
+    lines.append(f"SQL: {example['sql']}")
+    return "\n".join(lines)
+
+
+class ExampleIndex:
+    """Thread-safe char n-gram TF-IDF index over few-shot examples"""
+
+    def __init__(self, examples: Iterable[Dict[str, Any]] = (), path: str = None,
+                 max_learned: int = MAX_LEARNED):
+        """
+        Args:
+            examples: Seed examples (parsed from the prompts) - never evicted, never saved
+            path: Optional JSON file learned examples are persisted to / loaded from
+            max_learned: Learned examples kept (oldest dropped first)
+        """
+        self.path = os.path.expanduser(path) if path else None
+        self.max_learned = max(0, max_learned)
+        self._seed: List[Dict[str, Any]] = list(examples)
+        self._learned: Dict[str, Dict[str, Any]] = {}  # key → example, insertion order = age
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._vectors: Optional[List[Dict[str, float]]] = None
+        self._idf: Dict[str, float] = {}
+        self._all: List[Dict[str, Any]] = []
+
+        if self.path:
+            self._load()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._seed) + len(self._learned)
+
+    @property
+    def learned(self) -> int:
+        with self._lock:
+            return len(self._learned)
+
+    def add(self, example: Dict[str, Any]):
+        """Add a seed example (prompt-defined)"""
+        with self._lock:
+            self._seed.append(example)
+            self._vectors = None
+
+    def learn(self, user_input: str, action: str, lang: str, sql: str, params: Iterable[Any] = ()) -> bool:
+        """
+        Remember a confirmed request as an example
+
+        User data never reaches the example file: the content value (INSERT
+        value, DELETE content = ...), every value-shaped token of the input
+        and every value-shaped SQL literal (bound params, LIKE '%...%') are
+        replaced by a same-shape mask in input and SQL. Returns False when a
+        SQL value can't be found verbatim in the input (nothing safe to learn).
+        """
+        if action not in ('SAVE', 'RETRIEVE', 'DELETE') or not self.max_learned:
+            return False
+        params = tuple(params)
+        sql = (inline_params(sql, params) if params else sql).rstrip().rstrip(';') + ';'
+        text = user_input.strip()
+
+        values = set()
+        content = _CONTENT_RE.search(sql)
+        if content:
+            values.add(content.group(1).replace("''", "'"))
+        elif action == 'SAVE':
+            return False
+        for literal in _LITERAL_RE.findall(sql):
+            literal = literal.replace("''", "'").strip('%')
+            if _VALUE_RE.search(literal):
+                values.add(literal)
+        if any(not value or value not in text for value in values):
+            return False
+        values.update(_VALUE_RE.findall(text))
+
+        for value in sorted(values, key=len, reverse=True):  # "a@b.com" before "b.com"
+            masked = mask_value(value)
+            text = text.replace(value, masked)
+            sql = sql.replace(value.replace("'", "''"), masked.replace("'", "''"))
+
+        key = self._key(action, text)
+        with self._lock:
+            self._learned.pop(key, None)
+            self._learned[key] = {'input': text, 'sql': sql, 'note': None, 'action': action,
+                                  'lang': lang or 'en', 'source': 'confirmed', 'created': time.time()}
+            while len(self._learned) > self.max_learned:
+                self._learned.pop(next(iter(self._learned)))
+            self._vectors = None
+            self._dirty = True
+        return True
+
+    @staticmethod
+    def _key(action: str, text: str) -> str:
+        """One learned example per action + input shape ("delete 5551234" ≡ "delete 6660000")"""
+        return f"{action}|{normalize(_VALUE_RE.sub(lambda m: value_shape(m.group(0)), text))}"
+
+    def nearest(self, text: str, action: str, lang: str = None, k: int = DEFAULT_K,
+                false_positives: int = 1) -> List[Dict[str, Any]]:
+        """
+        k most similar examples of an action (+ closest NO_ACTION examples)
+
+        Examples in `lang` come first; other languages only fill up missing
+        slots. Returned least similar first → the closest example sits right
+        before the input.
+        """
+        with self._lock:
+            if self._vectors is None:
+                self._rebuild()
+            examples, vectors, idf = self._all, self._vectors, self._idf
+
+        query = self._vector(char_ngrams(text), idf)
+        scored = []
+        for example, vector in zip(examples, vectors):
+            if example['action'] != action:
+                continue
+            score = sum(weight * vector.get(gram, 0.0) for gram, weight in query.items())
+            scored.append((score, example))
+        scored.sort(key=lambda item: item[0], reverse=True)
+
+        positives = [item for item in scored if item[1]['sql'] != 'NO_ACTION']
+        chosen = [item for item in positives if item[1]['lang'] == lang][:k] if lang else positives[:k]
+        if len(chosen) < k:
+            chosen += [item for item in positives if item not in chosen][:k - len(chosen)]
+        chosen.sort(key=lambda item: item[0], reverse=True)
+        negatives = [item for item in scored if item[1]['sql'] == 'NO_ACTION'][:false_positives]
+        return [example for _, example in reversed(chosen)] + [example for _, example in negatives]
+
+    def _rebuild(self):
+        """IDF + normalized TF-IDF vectors for all examples (lock held)"""
+        self._all = self._seed + list(self._learned.values())
+        counts = [char_ngrams(example['input']) for example in self._all]
+        df: Counter = Counter()
+        for grams in counts:
+            df.update(grams.keys())
+        total = len(counts)
+        self._idf = {gram: math.log((1 + total) / (1 + freq)) + 1.0 for gram, freq in df.items()}
+        self._vectors = [self._vector(grams, self._idf) for grams in counts]
+
+    @staticmethod
+    def _vector(grams: Counter, idf: Dict[str, float]) -> Dict[str, float]:
+        vector = {gram: (1.0 + math.log(count)) * idf[gram] for gram, count in grams.items() if gram in idf}
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        return {gram: weight / norm for gram, weight in vector.items()} if norm else {}
+
+    def save(self) -> bool:
+        """Write learned examples if anything changed (daemon idle loop, shutdown)"""
+        if not self.path:
+            return False
+        with self._lock:
+            if not self._dirty:
+                return False
+            data = {'examples': list(self._learned.values())}
+            self._dirty = False
+
+        tmp_path = f"{self.path}.tmp"
+        try:
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            return True
+        except OSError as e:
+            print(f"⚠️  Could not save Qwen examples: {e}", file=sys.stderr)
+            with self._lock:
+                self._dirty = True
+            return False
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Could not load Qwen examples: {e}", file=sys.stderr)
+            return
+
+        examples = (data.get('examples') or [])[-self.max_learned:] if self.max_learned else []
+        for example in examples:
+            if not isinstance(example, dict) or not all(example.get(f) for f in ('input', 'sql', 'action')):
+                continue
+            example.setdefault('lang', 'en')
+            self._learned[self._key(example['action'], example['input'])] = example
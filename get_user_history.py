@@ -5,7 +5,6 @@ AI Chat Terminal - User History Loader
 Loads last N user inputs from database for arrow key navigation
 """
 
-import sqlite3
 import sys
 import os
 
@@ -26,20 +25,21 @@ def get_user_history(session_id=None, limit=50):
         return []
 
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
+        # Same repository + encryption path as ChatSystem/ChatMemorySystem
+        # (plain sqlite3 cannot read an SQLCipher-encrypted memory.db)
+        from db_repository import get_repository
+        from memory_system import get_encryption_key_auto
+        repo = get_repository(db_path, get_encryption_key_auto())
 
         # Check if chat_history table exists
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='chat_history'")
-        if not cursor.fetchone():
-            conn.close()
+        if not repo.table_exists('chat_history'):
             return []
 
         # Get last N user messages from chat_history table
         # We only want user messages (role='user'), not assistant responses
         # Filter by session_id if provided (current chat only)
         if session_id:
-            cursor.execute("""
+            rows = repo.query("""
                 SELECT DISTINCT content
                 FROM chat_history
                 WHERE role = 'user' AND session_id = ?
@@ -47,7 +47,7 @@ def get_user_history(session_id=None, limit=50):
                 LIMIT ?
             """, (session_id, limit))
         else:
-            cursor.execute("""
+            rows = repo.query("""
                 SELECT DISTINCT content
                 FROM chat_history
                 WHERE role = 'user'
@@ -55,8 +55,7 @@ def get_user_history(session_id=None, limit=50):
                 LIMIT ?
             """, (limit,))
 
-        results = [row[0] for row in cursor.fetchall()]
-        conn.close()
+        results = [row[0] for row in rows]
 
         # SQL gives DESC order (newest first)
         # But we need to reverse so arrow UP shows newest (at index 0)
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+History Writer
+Write-behind queue for chat_history inserts
+
+After an OpenAI reply, send_message used to INSERT + COMMIT the user and the
+assistant message one by one before answering - two fsyncs on the reply path.
+
+Now:
+- save_message_to_db only enqueues the row (bounded queue, blocks when full)
+- One background thread drains the queue and writes each batch with
+  executemany in a single transaction
+- flush() waits until everything submitted so far is on disk; ChatSystem
+  calls it before reading or deleting chat_history (read-your-writes, and
+  no row can land after a privacy delete)
+- close() flushes and stops the thread (daemon shutdown, interpreter exit)
+"""
+
+import atexit
+import queue
+import sys
+import threading
+from typing import Callable, List, Optional, Sequence
+
+INSERT_SQL = "INSERT INTO chat_history (session_id, role, content, timestamp, metadata) VALUES (?, ?, ?, ?, ?)"
+
+DEFAULT_MAX_QUEUE = 256
+DEFAULT_BATCH_SIZE = 64
+FLUSH_TIMEOUT = 5.0
+
+_STOP = object()
+
+
+class HistoryWriter:
+    """Background batch writer for chat_history rows"""
+
+    def __init__(self, db, max_queue: int = DEFAULT_MAX_QUEUE, batch_size: int = DEFAULT_BATCH_SIZE,
+                 on_error: Optional[Callable[[Exception], None]] = None):
+        """
+        Args:
+            db: DatabaseRepository (executemany on its writer connection)
+            max_queue: Rows allowed to wait - submit() blocks beyond this
+            batch_size: Most rows written in one transaction
+            on_error: Called with the exception when a batch could not be written
+        """
+        self.db = db
+        self.batch_size = max(1, batch_size)
+        self.on_error = on_error
+        self._queue = queue.Queue(maxsize=max(1, max_queue))
+        self._cond = threading.Condition()
+        self._submitted = 0
+        self._done = 0  # Rows written (or given up on)
+        self.batches = 0
+        self.failed = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, row: Sequence):
+        """Queue one (session_id, role, content, timestamp, metadata) row"""
+        if self._closed:
+            self._write([row])  # Late writes after close() still reach the DB
+            return
+        with self._cond:
+            self._submitted += 1
+        self._queue.put(row)
+
+    def pending(self) -> int:
+        """Rows submitted but not yet written"""
+        with self._cond:
+            return self._submitted - self._done
+
+    def flush(self, timeout: float = FLUSH_TIMEOUT) -> bool:
+        """
+        Wait until every row submitted before this call is written
+
+        Returns:
+            False if the writer did not catch up within timeout
+        """
+        with self._cond:
+            target = self._submitted
+            return self._cond.wait_for(lambda: self._done >= target, timeout=timeout)
+
+    def close(self, timeout: float = FLUSH_TIMEOUT):
+        """Flush and stop the writer thread (idempotent)"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout=timeout)
+
+        # Rows that raced in behind the stop marker
+        late = []
+        while True:
+            try:
+                row = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if row is not _STOP:
+                late.append(row)
+        if late:
+            self._write(late)
+            with self._cond:
+                self._done += len(late)
+                self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            row = self._queue.get()
+            stop = row is _STOP
+            batch: List[Sequence] = [] if stop else [row]
+
+            # Drain what is already waiting → one transaction
+            while not stop and len(batch) < self.batch_size:
+                try:
+                    row = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if row is _STOP:
+                    stop = True
+                else:
+                    batch.append(row)
+
+            if batch:
+                self._write(batch)
+                with self._cond:
+                    self._done += len(batch)
+                    self._cond.notify_all()
+            if stop:
+                return
+
+    def _write(self, batch: List[Sequence]):
+        try:
+            self.db.executemany(INSERT_SQL, batch)
+            self.batches += 1
+        except Exception as e:
+            self.failed += len(batch)
+            print(f"⚠️  Failed to save {len(batch)} message(s) to chat_history: {e}", file=sys.stderr)
+            if self.on_error:
+                self.on_error(e)
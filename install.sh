@@ -458,12 +458,29 @@ curl -sL "$BASE_URL/modules/functions.zsh" -o "$INSTALL_DIR/modules/functions.zs
 curl -sL "$BASE_URL/modules/config-menu.zsh" -o "$INSTALL_DIR/modules/config-menu.zsh" && \
 curl -sL "$BASE_URL/modules/language-utils.zsh" -o "$INSTALL_DIR/modules/language-utils.zsh" && \
 curl -sL "$BASE_URL/memory_system.py" -o "$INSTALL_DIR/memory_system.py" && \
+curl -sL "$BASE_URL/db_repository.py" -o "$INSTALL_DIR/db_repository.py" && \
 curl -sL "$BASE_URL/chat_system.py" -o "$INSTALL_DIR/chat_system.py" && \
+curl -sL "$BASE_URL/context_cache.py" -o "$INSTALL_DIR/context_cache.py" && \
+curl -sL "$BASE_URL/history_writer.py" -o "$INSTALL_DIR/history_writer.py" && \
+curl -sL "$BASE_URL/tokenizer.py" -o "$INSTALL_DIR/tokenizer.py" && \
+curl -sL "$BASE_URL/context_budget.py" -o "$INSTALL_DIR/context_budget.py" && \
+curl -sL "$BASE_URL/conversation_summary.py" -o "$INSTALL_DIR/conversation_summary.py" && \
+curl -sL "$BASE_URL/openai_client.py" -o "$INSTALL_DIR/openai_client.py" && \
+curl -sL "$BASE_URL/pending_actions.py" -o "$INSTALL_DIR/pending_actions.py" && \
+curl -sL "$BASE_URL/sql_cache.py" -o "$INSTALL_DIR/sql_cache.py" && \
+curl -sL "$BASE_URL/example_index.py" -o "$INSTALL_DIR/example_index.py" && \
+curl -sL "$BASE_URL/tracing.py" -o "$INSTALL_DIR/tracing.py" && \
+curl -sL "$BASE_URL/metrics.py" -o "$INSTALL_DIR/metrics.py" && \
 curl -sL "$BASE_URL/chat_daemon.py" -o "$INSTALL_DIR/chat_daemon.py" && \
 curl -sL "$BASE_URL/daemon_manager.py" -o "$INSTALL_DIR/daemon_manager.py" && \
+curl -sL "$BASE_URL/daemon_protocol.py" -o "$INSTALL_DIR/daemon_protocol.py" && \
+curl -sL "$BASE_URL/chat_client.py" -o "$INSTALL_DIR/chat_client.py" && \
 curl -sL "$BASE_URL/ollama_manager.py" -o "$INSTALL_DIR/ollama_manager.py" && \
 curl -sL "$BASE_URL/local_storage_detector.py" -o "$INSTALL_DIR/local_storage_detector.py" && \
 curl -sL "$BASE_URL/qwen_sql_generator.py" -o "$INSTALL_DIR/qwen_sql_generator.py" && \
+curl -sL "$BASE_URL/rule_sql_parser.py" -o "$INSTALL_DIR/rule_sql_parser.py" && \
+curl -sL "$BASE_URL/ollama_client.py" -o "$INSTALL_DIR/ollama_client.py" && \
+curl -sL "$BASE_URL/liveness.py" -o "$INSTALL_DIR/liveness.py" && \
 curl -sL "$BASE_URL/action_detector.py" -o "$INSTALL_DIR/action_detector.py" && \
 curl -sL "$BASE_URL/response_generator.py" -o "$INSTALL_DIR/response_generator.py" && \
 curl -sL "$BASE_URL/encryption_manager.py" -o "$INSTALL_DIR/encryption_manager.py" && \
@@ -503,6 +520,26 @@ fi
 # Install OpenAI SDK and rich (for markdown rendering)
 pip3 install --user --quiet openai requests rich 2>/dev/null || pip3 install --user openai requests rich
 
+# Tokenizer vocabularies for offline token counting (compiled to memory-mapped .bpe, see tokenizer.py)
+mkdir -p "$INSTALL_DIR/tokenizers"
+echo -n "  • Tokenizer vocabularies (o200k_base, cl100k_base)... "
+TOKENIZER_FAILED=()
+for encoding in o200k_base cl100k_base; do
+    if curl -fsSL "https://openaipublic.blob.core.windows.net/encoders/${encoding}.tiktoken" \
+            -o "$INSTALL_DIR/tokenizers/${encoding}.tiktoken" 2>/dev/null && \
+        python3 "$INSTALL_DIR/tokenizer.py" compile "$INSTALL_DIR/tokenizers/${encoding}.tiktoken" >/dev/null 2>&1; then
+        rm -f "$INSTALL_DIR/tokenizers/${encoding}.tiktoken"
+    else
+        rm -f "$INSTALL_DIR/tokenizers/${encoding}.tiktoken"
+        TOKENIZER_FAILED+=("$encoding")
+    fi
+done
+if [ ${#TOKENIZER_FAILED[@]} -eq 0 ]; then
+    echo -e "${GREEN}✓${RESET}"
+else
+    echo -e "${YELLOW}⚠️  failed: ${TOKENIZER_FAILED[*]} - token counts are estimated (re-run the installer to retry)${RESET}"
+fi
+
 # ═══════════════════════════════════════════════════════════════════
 # MANDATORY: Qwen 2.5 Coder Requirement Check (v11.0.0)
 # ═══════════════════════════════════════════════════════════════════
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Liveness Cache
+Remembers that the chat daemon and Ollama are up, so per-message sends skip health checks
+
+Every message used to start with:
+- a ping round trip to the chat daemon
+- `ollama list` (subprocess, tens to hundreds of ms)
+
+Now:
+- Ollama is probed with GET /api/version (plain http.client, ~1ms)
+- Healthy results are cached with a TTL in ~/.aichat/liveness.json
+- The state file is shared → the next `daemon_manager.py message` process trusts it
+- A failed send invalidates the cache → only then are the services re-probed
+- The file is only rewritten when a state changes or its TTL ran out - a
+  healthy turn does no filesystem write
+
+Only stdlib imports (no requests) - this runs in every thin client process.
+"""
+
+import os
+import json
+import time
+import http.client
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+STATE_FILE = "liveness.json"
+DEFAULT_TTL = 60.0  # Seconds a healthy probe result is trusted
+DEFAULT_OLLAMA_HOST = "http://127.0.0.1:11434"
+
+CHAT_DAEMON = 'chat_daemon'
+OLLAMA = 'ollama'
+
+
+def normalize_ollama_host(host: str = None) -> str:
+    """
+    Ollama base URL from OLLAMA_HOST forms like '127.0.0.1:11434' or '0.0.0.0'
+
+    Defaults to $OLLAMA_HOST or http://127.0.0.1:11434
+    """
+    host = (host or os.environ.get('OLLAMA_HOST') or DEFAULT_OLLAMA_HOST).strip().rstrip('/')
+    if not host.startswith(('http://', 'https://')):
+        host = f"http://{host}"
+    # Listening on all interfaces → talk to loopback
+    host = host.replace('://0.0.0.0', '://127.0.0.1')
+    if host.count(':') == 1:
+        host = f"{host}:11434"
+    return host
+
+
+def probe_ollama(host: str = None, timeout: float = 1.0) -> Optional[str]:
+    """
+    GET /api/version
+
+    Returns:
+        Ollama server version, or None if unreachable
+    """
+    url = urlsplit(normalize_ollama_host(host))
+    connection_cls = http.client.HTTPSConnection if url.scheme == 'https' else http.client.HTTPConnection
+    connection = connection_cls(url.hostname, url.port, timeout=timeout)
+    try:
+        connection.request('GET', '/api/version')
+        response = connection.getresponse()
+        if response.status != 200:
+            return None
+        return json.loads(response.read().decode('utf-8')).get('version') or 'unknown'
+    except (OSError, http.client.HTTPException, ValueError):
+        return None
+    finally:
+        connection.close()
+
+
+class LivenessCache:
+    """
+    TTL cache of service health, persisted in a small JSON state file
+
+    File layout:
+        {"chat_daemon": {"ok": true, "checked_at": 1760000000.0}, "ollama": {...}}
+    """
+
+    def __init__(self, config_dir: str = None, ttl: float = DEFAULT_TTL):
+        self.config_dir = config_dir or os.path.expanduser("~/.aichat")
+        self.state_file = os.path.join(self.config_dir, STATE_FILE)
+        self.ttl = ttl
+        self._state: Optional[Dict[str, Dict]] = None
+
+    def _load(self) -> Dict[str, Dict]:
+        """Read the state file once per process"""
+        if self._state is None:
+            try:
+                with open(self.state_file, 'r') as f:
+                    state = json.load(f)
+                self._state = state if isinstance(state, dict) else {}
+            except (OSError, ValueError):
+                self._state = {}
+        return self._state
+
+    def _save(self):
+        """Atomic write (tmp + rename) - concurrent clients never see half a file"""
+        tmp_file = f"{self.state_file}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_file, 'w') as f:
+                json.dump(self._state, f)
+            os.replace(tmp_file, self.state_file)
+        except OSError:
+            try:
+                os.unlink(tmp_file)
+            except OSError:
+                pass
+
+    def is_healthy(self, service: str) -> bool:
+        """True if service was seen healthy less than ttl seconds ago"""
+        entry = self._load().get(service)
+        if not isinstance(entry, dict) or not entry.get('ok'):
+            return False
+        age = time.time() - entry.get('checked_at', 0)
+        return 0 <= age < self.ttl
+
+    def mark(self, service: str, ok: bool):
+        """Record a probe/request result (no write if the same result is still fresh)"""
+        state = self._load()
+        entry = state.get(service)
+        now = time.time()
+        if (isinstance(entry, dict) and entry.get('ok') == bool(ok)
+                and 0 <= now - entry.get('checked_at', 0) < self.ttl):
+            return
+        state[service] = {'ok': bool(ok), 'checked_at': now}
+        self._save()
+
+    def invalidate(self, *services: str):
+        """Forget results (all services if none given) → next check probes again"""
+        state = self._load()
+        removed = [service for service in services or list(state) if state.pop(service, None) is not None]
+        if removed:
+            self._save()
@@ -10,125 +10,194 @@ v11.0.9 Changes:
 - Solves ambiguity: "what is my email?" vs "my email is test@test.com"
 - Future-proof: New data types automatically supported without keyword updates
 - Maintains good generic single words (save, show, delete) + adds flexible patterns
+
+Compiled matcher:
+- All keywords (words, phrases, {x}/{*} patterns) compiled once into a word trie
+- One pass over the message returns every matched keyword
+- Lang files read once per detector - ChatSystem keeps a single instance
 """
 
-import os
 import re
 from pathlib import Path
 from typing import Tuple, List, Dict, Set
 
+# Word tokens (unicode-aware: ä, ñ, ß are word characters)
+_TOKEN_RE = re.compile(r'\w+')
+# Keyword placeholders
+_PLACEHOLDER_RE = re.compile(r'(\{x\}|\{\*\})')
+WORD_PLACEHOLDER = '{x}'   # exactly one word
+TEXT_PLACEHOLDER = '{*}'   # one or more words
+# Trie key holding the keywords that end at a node (never a \w+ token)
+_END = ''
+
+KEYWORD_VARS = {
+    'SAVE': 'KEYWORDS_SAVE',
+    'RETRIEVE': 'KEYWORDS_RETRIEVE',
+    'DELETE': 'KEYWORDS_DELETE',
+    'LIST': 'KEYWORDS_LIST',
+}
+
+# Common trigger words (possessives, DB words, local, data)
+COMMON_WORDS = ['my', 'mein', 'mi', 'mon', 'mio', 'meu',
+                'db', 'database', 'datenbank', 'base de datos',
+                'local', 'lokal', 'locally', 'localmente',
+                'data', 'daten', 'datos', 'données']
+
+# Fallback when no lang/*.conf files are installed
+FALLBACK_KEYWORDS = {
+    'SAVE': {'save', 'store', 'remember'},
+    'RETRIEVE': {'show', 'get', 'list', 'retrieve', 'what'},
+    'DELETE': {'delete', 'remove', 'forget'},
+    'LIST': set(),
+}
+
+
+class KeywordMatcher:
+    """
+    Compiled keyword set - finds every matching keyword in one pass
+
+    Keywords are tokenized once into a word-level trie:
+        "save"          → save
+        "base de datos" → base → de → datos
+        "my {x} is"     → my → {x} → is
+
+    Matching tokenizes the text once and walks the trie from each token.
+    Cost is O(tokens × keyword length), independent of the number of
+    keywords (old detector: one re.search per keyword per message).
+    Overlapping matches are all reported ("my email is" → "my {x} is" + "my").
+    """
+
+    def __init__(self, keywords):
+        self._root: Dict = {}
+        for keyword in keywords:
+            tokens = self._tokenize_keyword(keyword)
+            if not tokens:
+                continue
+            node = self._root
+            for token in tokens:
+                node = node.setdefault(token, {})
+            node.setdefault(_END, []).append(keyword)
+
+    @staticmethod
+    def _tokenize_keyword(keyword: str) -> List[str]:
+        """Split keyword into word tokens, keeping {x}/{*} as single tokens"""
+        tokens = []
+        for part in _PLACEHOLDER_RE.split(keyword.lower()):
+            if part in (WORD_PLACEHOLDER, TEXT_PLACEHOLDER):
+                tokens.append(part)
+            else:
+                tokens.extend(_TOKEN_RE.findall(part))
+        return tokens
+
+    def find_all(self, text: str) -> List[str]:
+        """
+        Return all keywords found in text (order of first occurrence, no duplicates)
+        """
+        tokens = _TOKEN_RE.findall(text.lower())
+        count = len(tokens)
+        root = self._root
+        wildcard_start = WORD_PLACEHOLDER in root or TEXT_PLACEHOLDER in root
+        matched = []
+        seen = set()
+
+        for start in range(count):
+            if not wildcard_start and tokens[start] not in root:
+                continue
+
+            stack = [(root, start)]
+            while stack:
+                node, pos = stack.pop()
+                for keyword in node.get(_END, ()):
+                    if keyword not in seen:
+                        seen.add(keyword)
+                        matched.append(keyword)
+                if pos >= count:
+                    continue
+
+                child = node.get(tokens[pos])
+                if child is not None:
+                    stack.append((child, pos + 1))
+                child = node.get(WORD_PLACEHOLDER)
+                if child is not None:
+                    stack.append((child, pos + 1))
+                child = node.get(TEXT_PLACEHOLDER)
+                if child is not None:
+                    stack.extend((child, end) for end in range(pos + 1, count + 1))
+
+        return matched
+
 
 class LocalStorageDetector:
-    """Fast keyword detector to trigger Llama 3.2 classification"""
+    """Fast keyword detector to trigger local SQL generation"""
 
     def __init__(self, config_dir: str = None):
         """
         Initialize detector with keywords from lang/*.conf files
 
+        Lang files are read once here - keep one instance for the
+        lifetime of the process (ChatSystem / daemon).
+
         Args:
             config_dir: Path to .aichat config directory (defaults to ~/.aichat)
         """
         self.config_dir = config_dir or str(Path.home() / '.aichat')
-        self.keywords = self._load_keywords_from_lang_files()
+        # keyword → language codes of the lang files defining it (en, de, es)
+        self.keyword_langs: Dict[str, List[str]] = {}
+        self.categories = self._load_keywords_from_lang_files()
+        self.keywords = set(COMMON_WORDS).union(*self.categories.values())
+        self._matcher = KeywordMatcher(self.keywords)
 
-    def _load_keywords_from_lang_files(self) -> Set[str]:
+    def _load_keywords_from_lang_files(self) -> Dict[str, Set[str]]:
         """
         Load DB intent keywords from all lang/*.conf files
 
         Returns:
-            Set of all keywords from all languages combined
+            Dict of category (SAVE, RETRIEVE, DELETE, LIST) → keywords of all languages
         """
-        all_keywords = set()
         lang_dir = Path(self.config_dir) / 'lang'
 
         if not lang_dir.exists():
-            # Fallback to basic English keywords
-            return {'save', 'store', 'remember', 'show', 'get', 'delete', 'remove',
-                    'list', 'what', 'my', 'database', 'db', 'local', 'data'}
-
-        # Keywords to load from each lang file
-        keyword_vars = [
-            'KEYWORDS_SAVE',
-            'KEYWORDS_RETRIEVE',
-            'KEYWORDS_DELETE',
-            'KEYWORDS_LIST'
-        ]
-
-        # Common trigger words (add these too)
-        common_words = ['my', 'mein', 'mi', 'mon', 'mio', 'meu',  # possessive
-                       'db', 'database', 'datenbank', 'base de datos',  # DB words
-                       'local', 'lokal', 'locally', 'localmente',  # local
-                       'data', 'daten', 'datos', 'données']  # data
-
-        for lang_file in lang_dir.glob('*.conf'):
+            return {category: set(words) for category, words in FALLBACK_KEYWORDS.items()}
+
+        categories = {category: set() for category in KEYWORD_VARS}
+
+        for lang_file in sorted(lang_dir.glob('*.conf')):
             try:
                 with open(lang_file, 'r', encoding='utf-8') as f:
                     content = f.read()
-
-                # Extract keywords from each KEYWORDS_* variable
-                # v11.0.2: Use ^{var_name}= to match at line start only
-                # Prevents matching LANG_KEYWORDS_SAVE when looking for KEYWORDS_SAVE
-                for var_name in keyword_vars:
-                    pattern = rf'^{var_name}="([^"]+)"'  # ^ = line start
-                    match = re.search(pattern, content, re.MULTILINE)
-                    if match:
-                        keywords_str = match.group(1)
-                        # Split by comma and clean
-                        keywords = [kw.strip().lower() for kw in keywords_str.split(',') if kw.strip()]
-                        all_keywords.update(keywords)
-
-            except Exception as e:
+            except OSError:
                 # Skip this lang file if error
                 continue
 
-        # Add common trigger words
-        all_keywords.update(common_words)
-
-        return all_keywords
-
-    def _keyword_to_regex(self, keyword: str) -> str:
-        """
-        Convert keyword pattern to regex (v11.0.9)
-
-        Pattern syntax:
-            {x} → \w+ (any single word: email, phone, name, etc.)
-            {*} → .+? (any text, non-greedy - future use)
-
-        Examples:
-            "my {x} is"      → r'\bmy \w+ is\b'  (matches "my email is", "my phone is")
-            "what is my {x}" → r'\bwhat is my \w+\b' (matches "what is my email")
-            "save"           → r'\bsave\b' (no pattern, just word boundary)
-
-        Args:
-            keyword: Keyword with optional {x} or {*} placeholders
-
-        Returns:
-            Regex pattern string
-        """
-        # Escape special regex chars first
-        pattern = re.escape(keyword)
-
-        # Replace escaped placeholders with regex patterns
-        pattern = pattern.replace(r'\{x\}', r'\w+')  # {x} → any word
-        pattern = pattern.replace(r'\{\*\}', r'.+?')  # {*} → any text (non-greedy)
-
-        # Add word boundaries for clean matching
-        return r'\b' + pattern + r'\b'
+            # ^KEYWORDS_ = line start only, avoids matching LANG_KEYWORDS_SAVE
+            for category, var_name in KEYWORD_VARS.items():
+                match = re.search(rf'^{var_name}="([^"]+)"', content, re.MULTILINE)
+                if match:
+                    for kw in match.group(1).split(','):
+                        kw = kw.strip().lower()
+                        if not kw:
+                            continue
+                        categories[category].add(kw)
+                        langs = self.keyword_langs.setdefault(kw, [])
+                        if lang_file.stem not in langs:
+                            langs.append(lang_file.stem)
+
+        return categories
 
     def detect_db_intent(self, text: str) -> Tuple[bool, List[str]]:
         """
         Quick check: Does text contain ANY database-related keyword?
 
-        v11.0.9: Pattern-aware matching with {x} placeholder support
-        - Pattern keywords (e.g., "my {x} is") match flexibly (highest priority)
-        - Multi-word phrases get exact substring matching (medium priority)
-        - Single words use word boundary matching (lowest priority)
+        Pattern-aware matching with {x} placeholder support:
+        - Pattern keywords: "my {x} is" matches "my email is", "my phone is"
+        - Multi-word phrases: "base de datos" matches as whole words
+        - Single words: word boundary match ("save" does not match "saved")
 
         Examples:
             "my email is test@test.com" → matches pattern "my {x} is" ✅
             "what is my email?" → matches pattern "what is my {x}" ✅
             "save this" → matches single word "save" ✅
-            "guarda mi correo test@test.es" → matches pattern "guarda mi {x}" ✅
+            "guarda mi correo test@test.es" → matches "guarda", "mi" ✅
 
         Args:
             text: User input message
@@ -138,29 +207,39 @@ class LocalStorageDetector:
             - detected: True if any keyword found
             - matched_keywords: List of keywords that matched (with original patterns)
         """
-        text_lower = text.lower()
-        matched = []
+        matched = self._matcher.find_all(text)
+        return (len(matched) > 0, matched)
 
-        # v11.0.9: Pattern-aware keyword matching
-        for keyword in self.keywords:
-            if '{x}' in keyword or '{*}' in keyword:
-                # 1. Pattern keyword - convert to regex (HIGHEST PRIORITY)
-                regex_pattern = self._keyword_to_regex(keyword)
-                if re.search(regex_pattern, text_lower):
-                    matched.append(keyword)
-            elif ' ' in keyword:
-                # 2. Multi-word phrase - exact substring match (MEDIUM PRIORITY)
-                if keyword in text_lower:
-                    matched.append(keyword)
-            else:
-                # 3. Single word - word boundary match (LOWEST PRIORITY)
-                # Use word boundary to avoid false positives
-                pattern = rf'\b{re.escape(keyword)}\b'
-                if re.search(pattern, text_lower):
-                    matched.append(keyword)
+    def language_of(self, matched_keywords: List[str], default: str = 'en') -> str:
+        """
+        Input language from the matched keywords' lang files (majority vote)
 
-        return (len(matched) > 0, matched)
+        Keywords defined in several languages count for each; ties and no
+        match → default (the configured language).
+        """
+        votes: Dict[str, int] = {}
+        for keyword in matched_keywords:
+            for lang in self.keyword_langs.get(keyword, []):
+                votes[lang] = votes.get(lang, 0) + 1
+        if not votes:
+            return default
+        best = max(votes.values())
+        winners = [lang for lang, count in votes.items() if count == best]
+        return default if default in winners else winners[0]
+
+    def action_hint(self, matched_keywords: List[str]) -> str:
+        """
+        Action by simple priority: DELETE > SAVE > RETRIEVE
 
+        DELETE first (destructive, must be explicit), SAVE before RETRIEVE
+        (explicit intent vs. question), RETRIEVE as fallback.
+        """
+        matched = set(matched_keywords)
+        if matched & self.categories['DELETE']:
+            return 'DELETE'
+        if matched & self.categories['SAVE']:
+            return 'SAVE'
+        return 'RETRIEVE'
 
 
 # For testing
@@ -202,6 +281,4 @@ if __name__ == '__main__':
         print()
 
     # Count total keywords
-    total = sum(len(kw) for kw in DB_INTENT_KEYWORDS.values())
-    print(f"\n📊 Total keywords: {total} ({len(DB_INTENT_KEYWORDS)} languages × ~8 keywords)")
-    print(f"🚀 Speedup vs v8.x: ~7.5× faster ({total} checks vs 1140 checks)")
+    print(f"\n📊 Total keywords: {len(detector.keywords)} (compiled into one matcher)")
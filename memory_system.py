@@ -7,6 +7,12 @@ Simple SQLite database with mydata table - NO vector embeddings, NO complex PII
 v11.0.3: Added UNIQUE(content, meta) constraint to prevent duplicates
 - Same meta+content → INSERT OR REPLACE updates timestamp instead of creating duplicate
 - Example: "my name is Martin" twice → only ONE entry in DB
+
+Full-text index:
+- mydata_fts = FTS5 shadow table (trigram tokenizer → substring semantics like LIKE '%q%')
+- Kept in sync by triggers on mydata (INSERT, DELETE, UPDATE, INSERT OR REPLACE)
+- search_data/delete_data query it; execute_sql rewrites generated LIKE predicates to MATCH
+- Falls back to LIKE if the SQLite build has no FTS5/trigram (< 3.34)
 """
 
 import os
@@ -17,24 +23,156 @@ import warnings
 warnings.filterwarnings("ignore")
 os.environ['PYTHONWARNINGS'] = 'ignore'
 
+import re
 import json
 import time
+from bisect import bisect_left
 from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+from db_repository import get_repository, release_repository
+
+# Trigram index needs at least 3 characters per search term
+FTS_MIN_TERM_LENGTH = 3
+
+# Subquery that replaces one LIKE predicate (param = FTS5 query string)
+FTS_PREDICATE = "id IN (SELECT rowid FROM mydata_fts WHERE mydata_fts MATCH ?)"
+
+FTS_SCHEMA = """
+    -- External-content FTS5 index over mydata (trigram = substring search)
+    CREATE VIRTUAL TABLE IF NOT EXISTS mydata_fts USING fts5(
+        content, meta,
+        content='mydata', content_rowid='id',
+        tokenize='trigram'
+    );
+
+    CREATE TRIGGER IF NOT EXISTS mydata_fts_ai AFTER INSERT ON mydata BEGIN
+        INSERT INTO mydata_fts(rowid, content, meta) VALUES (new.id, new.content, new.meta);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS mydata_fts_ad AFTER DELETE ON mydata BEGIN
+        INSERT INTO mydata_fts(mydata_fts, rowid, content, meta) VALUES ('delete', old.id, old.content, old.meta);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS mydata_fts_au AFTER UPDATE ON mydata BEGIN
+        INSERT INTO mydata_fts(mydata_fts, rowid, content, meta) VALUES ('delete', old.id, old.content, old.meta);
+        INSERT INTO mydata_fts(rowid, content, meta) VALUES (new.id, new.content, new.meta);
+    END;
+"""
+
+_LIKE_PREDICATE_RE = re.compile(
+    r"(?<![\w.])(?:mydata\.)?(content|meta)\s+LIKE\s+('(?:[^']|'')*'|\?)(?!\s*ESCAPE)",
+    re.IGNORECASE
+)
+_NOT_BEFORE_RE = re.compile(r"\bNOT\s*$", re.IGNORECASE)
+_FROM_MYDATA_RE = re.compile(r"\bFROM\s+mydata\b(?!_)", re.IGNORECASE)
+
+
+def fts_phrase(term: str) -> Optional[str]:
+    """
+    Quote a search term as an FTS5 phrase
+
+    Returns:
+        '"term"' or None if the trigram index cannot answer it (too short)
+    """
+    if term is None or len(term) < FTS_MIN_TERM_LENGTH:
+        return None
+    return '"' + term.replace('"', '""') + '"'
+
+
+def _like_term(pattern) -> Optional[str]:
+    """'%term%' → 'term' if the LIKE pattern is a plain substring search, else None"""
+    if not isinstance(pattern, str) or len(pattern) < 2:
+        return None
+    if not (pattern.startswith('%') and pattern.endswith('%')):
+        return None
+    term = pattern[1:-1]
+    if '%' in term or '_' in term:
+        return None  # other wildcards → keep LIKE semantics
+    return term
+
+
+def _literal_spans(sql: str) -> List[Tuple[int, int]]:
+    """(start, end) of every single-quoted string literal"""
+    spans = []
+    i = 0
+    while i < len(sql):
+        if sql[i] == "'":
+            start = i
+            i += 1
+            while i < len(sql):
+                if sql[i] == "'":
+                    if i + 1 < len(sql) and sql[i + 1] == "'":
+                        i += 2
+                        continue
+                    break
+                i += 1
+            spans.append((start, i + 1))
+        i += 1
+    return spans
+
+
+def _in_spans(pos: int, spans: List[Tuple[int, int]]) -> bool:
+    return any(start <= pos < end for start, end in spans)
+
+
+def rewrite_like_to_match(sql: str, params: Sequence = ()) -> Tuple[str, list]:
+    """
+    Rewrite LIKE substring predicates on mydata into FTS5 MATCH lookups
+
+    Handles literal and parameterized forms:
+        meta LIKE '%email%'          → id IN (SELECT rowid FROM mydata_fts WHERE mydata_fts MATCH ?)
+        content LIKE ?  ('%email%')    with param 'content : "email"'
+
+    Left unchanged: NOT LIKE, ESCAPE, other wildcards, terms < 3 chars,
+    statements not reading FROM mydata or using JOINs.
+
+    Returns:
+        (sql, params) - params as a new list
+    """
+    params = list(params)
+    if not _FROM_MYDATA_RE.search(sql) or re.search(r"\bJOIN\b", sql, re.IGNORECASE):
+        return sql, params
+
+    spans = _literal_spans(sql)
+    placeholders = [i for i, ch in enumerate(sql) if ch == '?' and not _in_spans(i, spans)]
+
+    out = []
+    new_params = []
+    last = 0
+    used = 0  # original params copied so far
+
+    for match in _LIKE_PREDICATE_RE.finditer(sql):
+        if _in_spans(match.start(), spans) or _NOT_BEFORE_RE.search(sql[:match.start()]):
+            continue
+
+        before = bisect_left(placeholders, match.start())
+        column, operand = match.group(1).lower(), match.group(2)
+        if operand == '?':
+            if before >= len(params):
+                continue
+            pattern, consumed = params[before], 1
+        else:
+            pattern, consumed = operand[1:-1].replace("''", "'"), 0
+
+        phrase = fts_phrase(_like_term(pattern))
+        if phrase is None:
+            continue
+
+        new_params.extend(params[used:before])
+        used = before + consumed
+        out.append(sql[last:match.start()])
+        out.append(FTS_PREDICATE)
+        new_params.append(f"{column} : {phrase}")
+        last = match.end()
+
+    if not out:
+        return sql, params
+
+    out.append(sql[last:])
+    new_params.extend(params[used:])
+    return ''.join(out), new_params
 
-# Try SQLCipher first (encrypted), fallback to APSW, then sqlite3
-try:
-    import sqlcipher3
-    USE_SQLCIPHER = True
-    USE_APSW = False
-except ImportError:
-    USE_SQLCIPHER = False
-    # Try APSW (has extension support)
-    try:
-        import apsw
-        USE_APSW = True
-    except ImportError:
-        import sqlite3
-        USE_APSW = False
 
 class ChatMemorySystem:
     """
@@ -55,94 +193,18 @@ class ChatMemorySystem:
     """
 
     def __init__(self, db_path=None, encryption_key=None):
-        if db_path is None:
-            # Default to ~/.aichat/memory.db
-            config_dir = Path.home() / '.aichat'
-            config_dir.mkdir(exist_ok=True)
-            db_path = config_dir / 'memory.db'
-
-        self.db_path = db_path
+        # Shared pooled connections (same instance as ChatSystem for the same file)
+        # Driver + encryption (SQLCipher → APSW → sqlite3) are chosen in db_repository
+        self.repo = get_repository(db_path, encryption_key)
+        self._released = False
+        self.db_path = self.repo.db_path
         self.encryption_key = encryption_key
 
-        # Connect using SQLCipher, APSW, or sqlite3
-        if USE_SQLCIPHER and encryption_key:
-            # Use SQLCipher with encryption
-            self.db = sqlcipher3.connect(str(db_path))
-            # Set encryption key
-            self.db.execute(f"PRAGMA key = \"x'{encryption_key}'\"")
-            # Optimize performance
-            self.db.execute("PRAGMA cipher_page_size = 4096")
-            self.db.execute("PRAGMA kdf_iter = 64000")
-            self.db.execute("PRAGMA cipher_hmac_algorithm = HMAC_SHA512")
-            self.db.execute("PRAGMA cipher_kdf_algorithm = PBKDF2_HMAC_SHA512")
-        elif USE_APSW:
-            # Use APSW (no encryption)
-            self.db = apsw.Connection(str(db_path))
-        else:
-            # Use sqlite3 (no encryption)
-            self.db = sqlite3.connect(str(db_path))
-
-        # Create compatibility wrapper for APSW
-        if USE_APSW:
-            self._setup_apsw_compatibility()
+        # sqlite3-like facade: self.db.execute(sql, params).fetchall()
+        self.db = self.repo
 
         self._create_tables()
 
-    def _setup_apsw_compatibility(self):
-        """Make APSW behave like sqlite3 for common operations"""
-        original_db = self.db
-
-        class APSWCursorWrapper:
-            """Wrapper to make APSW cursor compatible with sqlite3"""
-            def __init__(self, cursor, conn):
-                self._cursor = cursor
-                self._conn = conn
-
-            def execute(self, sql, params=()):
-                return self._cursor.execute(sql, params)
-
-            def fetchone(self):
-                return self._cursor.fetchone()
-
-            def fetchall(self):
-                return self._cursor.fetchall()
-
-            @property
-            def lastrowid(self):
-                return self._conn.last_insert_rowid()
-
-            def __getattr__(self, name):
-                return getattr(self._cursor, name)
-
-        class APSWWrapper:
-            def __init__(self, conn):
-                self._conn = conn
-
-            def execute(self, sql, params=()):
-                cursor = self._conn.cursor()
-                cursor.execute(sql, params)
-                return APSWCursorWrapper(cursor, self._conn)
-
-            def executescript(self, script):
-                cursor = self._conn.cursor()
-                for statement in script.split(';'):
-                    statement = statement.strip()
-                    if statement:
-                        cursor.execute(statement)
-                return APSWCursorWrapper(cursor, self._conn)
-
-            def commit(self):
-                pass  # APSW auto-commits
-
-            def close(self):
-                self._conn.close()
-
-            def cursor(self):
-                cursor = self._conn.cursor()
-                return APSWCursorWrapper(cursor, self._conn)
-
-        self.db = APSWWrapper(original_db)
-
     def _create_tables(self):
         """Create simple mydata table - NO vector embeddings, NO complex metadata!"""
         try:
@@ -162,12 +224,36 @@ class ChatMemorySystem:
                 CREATE INDEX IF NOT EXISTS idx_mydata_timestamp ON mydata(timestamp);
                 CREATE INDEX IF NOT EXISTS idx_mydata_lang ON mydata(lang);
             """)
-
-            self.db.commit()
         except Exception as e:
             print(f"Error creating tables: {e}")
             sys.exit(1)
 
+        self.fts_enabled = self._create_fts_index()
+
+    def _create_fts_index(self) -> bool:
+        """
+        Create mydata_fts + sync triggers, backfill existing rows once
+
+        Returns:
+            True if FTS5 trigram search is available
+        """
+        try:
+            existed = self.repo.table_exists('mydata_fts')
+            self.db.executescript(FTS_SCHEMA)
+            if not existed:
+                # Index rows saved before the FTS table existed
+                self.repo.execute("INSERT INTO mydata_fts(mydata_fts) VALUES ('rebuild')")
+            return True
+        except Exception as e:
+            print(f"Warning: FTS5 index unavailable, using LIKE search: {e}", file=sys.stderr)
+            return False
+
+    def _match_query(self, term: str) -> Optional[str]:
+        """FTS5 query for a substring search, or None if LIKE must be used"""
+        if not self.fts_enabled:
+            return None
+        return fts_phrase(term)
+
     def execute_sql(self, sql: str, params: tuple = (), fetch: bool = False):
         """
         Execute SQL directly on database (v11.0.3 - SQL from Qwen with duplicate prevention!)
@@ -178,22 +264,35 @@ class ChatMemorySystem:
             fetch: If True, return results; otherwise return None
 
         Returns:
-            Query results if fetch=True, None otherwise
+            fetch=True: rows (None on error)
+            DELETE/UPDATE: number of changed rows
+            INSERT: id of the inserted row (None if no row was written)
+            None if the statement failed
 
         Note: INSERT OR REPLACE prevents duplicates with same content+meta
         """
         try:
-            cursor = self.db.execute(sql, params)
-            self.db.commit()
+            # Generated LIKE '%x%' predicates → indexed FTS5 MATCH lookups
+            if self.fts_enabled:
+                sql, params = rewrite_like_to_match(sql, params)
+
+            # Plain reads → reader pool, everything else → writer
+            if fetch and sql.lstrip()[:6].upper() == 'SELECT':
+                return self.repo.query(sql, params)
+
+            result = self.repo.execute(sql, params)
 
             if fetch:
-                return cursor.fetchall()
+                return result.fetchall()
 
-            return cursor.lastrowid if hasattr(cursor, 'lastrowid') else None
+            # lastrowid is the connection's last insert - meaningless for a DELETE that hit 0 rows
+            if sql.lstrip()[:6].upper() in ('DELETE', 'UPDATE'):
+                return result.rowcount
+            return result.lastrowid if result.rowcount else None
 
         except Exception as e:
             print(f"SQL execution error: {e}", file=sys.stderr)
-            return None if fetch else 0
+            return None
 
     def save_data(self, content: str, meta: str = None, lang: str = 'en') -> int:
         """
@@ -208,19 +307,21 @@ class ChatMemorySystem:
             ID of inserted row
         """
         try:
-            cursor = self.db.execute(
+            result = self.repo.execute(
                 "INSERT INTO mydata (content, meta, lang) VALUES (?, ?, ?)",
                 (content, meta, lang)
             )
-            self.db.commit()
-            return cursor.lastrowid
+            return result.lastrowid
         except Exception as e:
             print(f"Error saving data: {e}", file=sys.stderr)
             return 0
 
     def search_data(self, query: str, limit: int = 10):
         """
-        Search mydata table with LIKE query
+        Search mydata table (substring match on content or meta)
+
+        Uses the FTS5 trigram index; terms shorter than 3 characters
+        fall back to LIKE.
 
         Args:
             query: Search term
@@ -230,16 +331,26 @@ class ChatMemorySystem:
             List of dicts with id, content, meta, lang, timestamp
         """
         try:
-            cursor = self.db.execute("""
-                SELECT id, content, meta, lang, timestamp
-                FROM mydata
-                WHERE content LIKE ? OR meta LIKE ?
-                ORDER BY timestamp DESC
-                LIMIT ?
-            """, (f"%{query}%", f"%{query}%", limit))
+            match_query = self._match_query(query)
+            if match_query:
+                rows = self.repo.query("""
+                    SELECT id, content, meta, lang, timestamp
+                    FROM mydata
+                    WHERE id IN (SELECT rowid FROM mydata_fts WHERE mydata_fts MATCH ?)
+                    ORDER BY timestamp DESC, id DESC
+                    LIMIT ?
+                """, (match_query, limit))
+            else:
+                rows = self.repo.query("""
+                    SELECT id, content, meta, lang, timestamp
+                    FROM mydata
+                    WHERE content LIKE ? OR meta LIKE ?
+                    ORDER BY timestamp DESC, id DESC
+                    LIMIT ?
+                """, (f"%{query}%", f"%{query}%", limit))
 
             results = []
-            for row in cursor.fetchall():
+            for row in rows:
                 results.append({
                     'id': row[0],
                     'content': row[1],
@@ -265,18 +376,24 @@ class ChatMemorySystem:
             Number of deleted rows
         """
         try:
-            # Find matching items first
-            cursor = self.db.execute("""
-                SELECT id FROM mydata
-                WHERE content LIKE ? OR meta LIKE ?
-            """, (f"%{pattern}%", f"%{pattern}%"))
-
-            ids = [row[0] for row in cursor.fetchall()]
-
-            if ids:
-                placeholders = ','.join('?' * len(ids))
-                self.db.execute(f"DELETE FROM mydata WHERE id IN ({placeholders})", ids)
-                self.db.commit()
+            match_query = self._match_query(pattern)
+
+            # Find + delete in one writer transaction (no row can slip in between)
+            with self.repo.transaction() as conn:
+                if match_query:
+                    rows = conn.execute(
+                        "SELECT rowid FROM mydata_fts WHERE mydata_fts MATCH ?", (match_query,)
+                    ).fetchall()
+                else:
+                    rows = conn.execute("""
+                        SELECT id FROM mydata
+                        WHERE content LIKE ? OR meta LIKE ?
+                    """, (f"%{pattern}%", f"%{pattern}%")).fetchall()
+                ids = [row[0] for row in rows]
+
+                if ids:
+                    placeholders = ','.join('?' * len(ids))
+                    conn.execute(f"DELETE FROM mydata WHERE id IN ({placeholders})", ids)
 
             return len(ids)
 
@@ -299,8 +416,7 @@ class ChatMemorySystem:
                 return 0
 
             placeholders = ','.join('?' * len(ids))
-            self.db.execute(f"DELETE FROM mydata WHERE id IN ({placeholders})", ids)
-            self.db.commit()
+            self.repo.execute(f"DELETE FROM mydata WHERE id IN ({placeholders})", ids)
 
             return len(ids)
 
@@ -319,7 +435,7 @@ class ChatMemorySystem:
             List of dicts
         """
         try:
-            cursor = self.db.execute("""
+            rows = self.repo.query("""
                 SELECT id, content, meta, lang, timestamp
                 FROM mydata
                 ORDER BY timestamp DESC
@@ -327,7 +443,7 @@ class ChatMemorySystem:
             """, (limit,))
 
             results = []
-            for row in cursor.fetchall():
+            for row in rows:
                 results.append({
                     'id': row[0],
                     'content': row[1],
@@ -348,15 +464,15 @@ class ChatMemorySystem:
             stats = {}
 
             # Item count
-            stats['total_items'] = self.db.execute("SELECT COUNT(*) FROM mydata").fetchone()[0]
+            stats['total_items'] = self.repo.query_one("SELECT COUNT(*) FROM mydata")[0]
 
             # Database size
             stats['db_size_mb'] = os.path.getsize(self.db_path) / (1024 * 1024)
 
             # Date range
-            date_range = self.db.execute(
+            date_range = self.repo.query_one(
                 "SELECT MIN(timestamp), MAX(timestamp) FROM mydata"
-            ).fetchone()
+            )
 
             if date_range[0]:
                 stats['oldest_item'] = time.strftime('%Y-%m-%d', time.localtime(date_range[0]))
@@ -368,9 +484,10 @@ class ChatMemorySystem:
             return {}
 
     def close(self):
-        """Close database connection"""
-        if self.db:
-            self.db.close()
+        """Release this instance's reference to the shared repository (closed by its last user)"""
+        if self.repo and not self._released:
+            self._released = True
+            release_repository(self.repo)
 
 
 def get_encryption_key_auto() -> str:
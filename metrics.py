@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Daemon Metrics
+Latency histograms, counters and gauges for the chat daemon "metrics" action
+
+Fed from finished traces (Tracer.add_listener → Metrics.record_trace):
+- request latency per route: local_save / local_retrieve / local_delete / openai
+- call latency of the qwen_generate and openai_call spans
+- cache lookups: "hit" attribute of the cache spans (sql_cache, history_load)
+- rule fast path: rule_parse matches/misses as their own counter (not a cache)
+- prefill tokens: qwen_generate's prompt tokens not served from Ollama's prompt cache
+
+Gauges (in-flight, DB size, RSS, uptime, ...) are callables registered by
+the daemon and read at snapshot time.
+
+Output:
+- snapshot()   → JSON for the "metrics" action / `daemon_manager.py status`
+- prometheus() → text exposition format (AI_CHAT_METRICS_FILE)
+
+Only stdlib imports.
+"""
+
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Log-linear buckets: 16 sub-buckets per power of two → ≤ 6.25% relative error
+SUB_BUCKET_BITS = 4
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+
+# Fixed bucket bounds (seconds) for the Prometheus export
+PROMETHEUS_BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                      1.0, 2.5, 5.0, 10.0, 30.0)
+
+PERCENTILES = (50, 90, 95, 99)
+
+METRIC_PREFIX = 'aichat'
+
+# Trace spans timed as external calls
+CALL_SPANS = {'qwen_generate': 'qwen', 'openai_call': 'openai'}
+
+# Spans whose "hit" attribute is a cache lookup (hit ratio per cache)
+CACHE_SPANS = ('sql_cache', 'history_load')
+
+# Span whose "hit" means the rule parser answered without Qwen
+RULE_SPAN = 'rule_parse'
+
+# Local actions → route ("RETRIEVE_EMPTY" is still a retrieve)
+LOCAL_ROUTES = ('SAVE', 'RETRIEVE', 'DELETE')
+
+
+def route_for(attrs: Dict[str, Any]) -> str:
+    """Route label of a finished send_message trace"""
+    source = attrs.get('source')
+    if source == 'openai':
+        return 'openai'
+    if source == 'local':
+        action = str(attrs.get('action') or '')
+        for route in LOCAL_ROUTES:
+            if action.startswith(route):
+                return f"local_{route.lower()}"
+        return 'local_other'
+    return 'error'
+
+
+def _bucket_index(value_us: int) -> int:
+    shift = max(0, value_us.bit_length() - SUB_BUCKET_BITS - 1)
+    return shift * SUB_BUCKETS + (value_us >> shift)
+
+
+def _bucket_upper_us(index: int) -> int:
+    """Highest value (µs) that falls into bucket index"""
+    if index < 2 * SUB_BUCKETS:
+        return index
+    shift = index // SUB_BUCKETS - 1
+    top = index - shift * SUB_BUCKETS
+    return ((top + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """
+    HDR-style latency histogram (microsecond resolution, bounded relative error)
+
+    Values are recorded in ms. Percentiles come from the log-linear buckets,
+    count/sum/min/max are exact.
+    """
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.fixed_counts = [0] * (len(PROMETHEUS_BUCKETS) + 1)  # last = +Inf
+        self.count = 0
+        self.sum_ms = 0.0
+        self.min_ms: Optional[float] = None
+        self.max_ms = 0.0
+
+    def record(self, value_ms: float):
+        value_ms = max(0.0, float(value_ms))
+        index = _bucket_index(int(value_ms * 1000))
+        self.counts[index] = self.counts.get(index, 0) + 1
+
+        seconds = value_ms / 1000
+        for i, bound in enumerate(PROMETHEUS_BUCKETS):
+            if seconds <= bound:
+                self.fixed_counts[i] += 1
+                break
+        else:
+            self.fixed_counts[-1] += 1
+
+        self.count += 1
+        self.sum_ms += value_ms
+        self.min_ms = value_ms if self.min_ms is None else min(self.min_ms, value_ms)
+        self.max_ms = max(self.max_ms, value_ms)
+
+    def percentile(self, p: float) -> float:
+        """Value (ms) at or below which p percent of the recordings fall"""
+        if not self.count:
+            return 0.0
+        rank = max(1, -(-self.count * p // 100))  # ceil
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(_bucket_upper_us(index) / 1000, self.max_ms)
+        return self.max_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            'count': self.count,
+            'mean_ms': round(self.sum_ms / self.count, 3) if self.count else 0.0,
+            'min_ms': round(self.min_ms or 0.0, 3),
+            'max_ms': round(self.max_ms, 3)
+        }
+        for p in PERCENTILES:
+            data[f"p{p}_ms"] = round(self.percentile(p), 3)
+        return data
+
+
+def _label_key(labels: Dict[str, str]) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _label_text(key: Tuple[Tuple[str, str], ...], extra: str = '') -> str:
+    parts = [f'{k}="{v}"' for k, v in key]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+class Metrics:
+    """Thread-safe registry of histograms, counters and gauges"""
+
+    HISTOGRAM_HELP = {
+        'request_latency': 'send_message latency by route',
+        'call_latency': 'Qwen / OpenAI call latency'
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms: Dict[str, Dict[Tuple, LatencyHistogram]] = {}
+        self.counters: Dict[str, Dict[Tuple, float]] = {}
+        self.gauges: Dict[str, Tuple[Callable[[], float], str]] = {}
+
+    def observe(self, name: str, value_ms: float, **labels):
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            key = _label_key(labels)
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = LatencyHistogram()
+            histogram.record(value_ms)
+
+    def inc(self, name: str, value: float = 1, **labels):
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            key = _label_key(labels)
+            series[key] = series.get(key, 0) + value
+
+    def gauge(self, name: str, read: Callable[[], float], help_text: str = ''):
+        """Register a gauge read at snapshot time"""
+        self.gauges[name] = (read, help_text)
+
+    def record_trace(self, trace: Dict[str, Any]):
+        """Tracer listener: route latency, call latency and cache lookups of one request"""
+        if trace.get('name') != 'send_message':
+            return
+
+        route = route_for(trace.get('attrs') or {})
+        duration = trace.get('duration_ms') or 0.0
+        self.observe('request_latency', duration, route=route)
+        self.inc('requests_total', route=route)
+
+        for span in trace.get('spans', []):
+            call = CALL_SPANS.get(span['name'])
+            if call and span.get('duration_ms') is not None:
+                self.observe('call_latency', span['duration_ms'], call=call)
+            attrs = span.get('attrs') or {}
+            if 'hit' in attrs:
+                result = 'hit' if attrs['hit'] else 'miss'
+                if span['name'] in CACHE_SPANS:
+                    self.inc('cache_lookups_total', cache=span['name'], result=result)
+                elif span['name'] == RULE_SPAN:
+                    self.inc('rule_fastpath_total', result=result)
+            if call and attrs.get('prefill_tokens') is not None:
+                self.inc('prefill_tokens_total', attrs['prefill_tokens'], call=call)
+
+    def _read_gauges(self) -> Dict[str, float]:
+        values = {}
+        for name, (read, _) in self.gauges.items():
+            try:
+                values[name] = read()
+            except Exception:
+                values[name] = None
+        return values
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-friendly view: histograms by label, counters, hit ratios, gauges"""
+        with self._lock:
+            histograms = {
+                name: {','.join(v for _, v in key) or 'all': h.to_dict() for key, h in series.items()}
+                for name, series in self.histograms.items()
+            }
+            counters = {
+                name: {','.join(v for _, v in key) or 'all': value for key, value in series.items()}
+                for name, series in self.counters.items()
+            }
+            lookups = dict(self.counters.get('cache_lookups_total', {}))
+
+        caches: Dict[str, Dict[str, float]] = {}
+        for key, value in lookups.items():
+            labels = dict(key)
+            entry = caches.setdefault(labels['cache'], {'hits': 0, 'misses': 0})
+            entry['hits' if labels['result'] == 'hit' else 'misses'] += value
+        for entry in caches.values():
+            total = entry['hits'] + entry['misses']
+            entry['hit_ratio'] = round(entry['hits'] / total, 4) if total else 0.0
+
+        return {
+            'routes': histograms.get('request_latency', {}),
+            'calls': histograms.get('call_latency', {}),
+            'caches': caches,
+            'counters': counters,
+            'gauges': self._read_gauges()
+        }
+
+    def prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self.histograms.items()):
+                metric = f"{METRIC_PREFIX}_{name}_seconds"
+                lines.append(f"# HELP {metric} {self.HISTOGRAM_HELP.get(name, name)}")
+                lines.append(f"# TYPE {metric} histogram")
+                for key, h in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(PROMETHEUS_BUCKETS, h.fixed_counts):
+                        cumulative += count
+                        le = _label_text(key, 'le="%g"' % bound)
+                        lines.append(f"{metric}_bucket{le} {cumulative}")
+                    le = _label_text(key, 'le="+Inf"')
+                    lines.append(f"{metric}_bucket{le} {h.count}")
+                    lines.append(f"{metric}_sum{_label_text(key)} {h.sum_ms / 1000:.6f}")
+                    lines.append(f"{metric}_count{_label_text(key)} {h.count}")
+
+            for name, series in sorted(self.counters.items()):
+                metric = f"{METRIC_PREFIX}_{name}"
+                lines.append(f"# TYPE {metric} counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{metric}{_label_text(key)} {value:g}")
+
+        for name, value in sorted(self._read_gauges().items()):
+            if value is None:
+                continue
+            metric = f"{METRIC_PREFIX}_{name}"
+            help_text = self.gauges[name][1]
+            if help_text:
+                lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {value:g}")
+
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        """Atomic dump (tmp + rename) for node_exporter's textfile collector"""
+        path = os.path.expanduser(path)
+        tmp_file = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                f.write(self.prometheus())
+            os.replace(tmp_file, path)
+        except OSError:
+            try:
+                os.unlink(tmp_file)
+            except OSError:
+                pass
+            raise
+
+
+def process_rss_bytes() -> Optional[int]:
+    """Resident set size of this process (peak RSS where /proc is missing)"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        import sys
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss if sys.platform == 'darwin' else rss * 1024  # macOS: bytes, Linux: KiB
+    except (ImportError, OSError):
+        return None
+
+
+def db_size_bytes(db_file: str) -> int:
+    """SQLite database size including the WAL file"""
+    total = 0
+    for path in (db_file, f"{db_file}-wal"):
+        try:
+            total += os.path.getsize(path)
+        except OSError:
+            pass
+    return total
+
+
+def format_summary(snapshot: Dict[str, Any]) -> List[str]:
+    """Human-readable lines for `daemon_manager.py status`"""
+    lines = []
+    gauges = snapshot.get('gauges', {})
+
+    uptime = gauges.get('uptime_seconds')
+    if uptime is not None:
+        minutes, seconds = divmod(int(uptime), 60)
+        hours, minutes = divmod(minutes, 60)
+        lines.append(f"Uptime: {hours}h {minutes:02d}m {seconds:02d}s")
+    lines.append(f"In flight: {gauges.get('in_flight', 0):g} "
+                 f"(workers busy {gauges.get('active_workers', 0):g}, queued {gauges.get('queue_depth', 0):g})")
+
+    rss = gauges.get('rss_bytes')
+    if rss:
+        lines.append(f"RSS: {rss / 1024 / 1024:.1f} MB")
+    db_size = gauges.get('db_size_bytes')
+    if db_size is not None:
+        lines.append(f"DB size: {db_size / 1024 / 1024:.2f} MB")
+    openai_requests = gauges.get('openai_requests')
+    if openai_requests:
+        lines.append(f"OpenAI connections: {gauges.get('openai_connections') or 0:g} for {openai_requests:g} requests "
+                     f"(reuse {(gauges.get('openai_reuse_ratio') or 0) * 100:.1f}%)")
+
+    for title, histograms in (('Route', snapshot.get('routes', {})), ('Call', snapshot.get('calls', {}))):
+        for label, h in sorted(histograms.items()):
+            lines.append(f"{title} {label}: n={h['count']} p50={h['p50_ms']:.1f}ms "
+                         f"p95={h['p95_ms']:.1f}ms p99={h['p99_ms']:.1f}ms max={h['max_ms']:.1f}ms")
+
+    calls = snapshot.get('calls', {})
+    for call, tokens in sorted(snapshot.get('counters', {}).get('prefill_tokens_total', {}).items()):
+        count = calls.get(call, {}).get('count') or 0
+        if count:
+            lines.append(f"Prefill {call}: {tokens / count:.0f} tokens/call ({tokens:g} total)")
+
+    fastpath = snapshot.get('counters', {}).get('rule_fastpath_total', {})
+    if fastpath:
+        hits, total = fastpath.get('hit', 0), sum(fastpath.values())
+        lines.append(f"Rule fast path: {hits:g} of {total:g} local requests without Qwen "
+                     f"({hits / total * 100 if total else 0:.1f}%)")
+
+    for cache, entry in sorted(snapshot.get('caches', {}).items()):
+        lines.append(f"Cache {cache}: hit ratio {entry['hit_ratio'] * 100:.1f}% "
+                     f"({entry['hits']:g} hits / {entry['misses']:g} misses)")
+
+    return lines
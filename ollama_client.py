@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ollama HTTP Client
+Persistent keep-alive client for the Ollama REST API (/api/generate, /api/chat)
+
+Replaces spawning `ollama run <model> <prompt>` for every call:
+- One pooled requests.Session → TCP connection is reused between calls
+- keep_alive pinning → model stays loaded in Ollama between calls
+- Streaming → chunks are yielded as they arrive
+- Per-request deadline → total wall-clock budget, not just per-read timeout
+
+Shared by QwenSQLGenerator and ResponseGenerator via get_shared_client().
+"""
+
+import os
+import json
+import time
+import threading
+from typing import Dict, Iterator, List, Optional, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from liveness import normalize_ollama_host
+
+DEFAULT_HOST = "http://127.0.0.1:11434"
+DEFAULT_KEEP_ALIVE = "30m"
+CONNECT_TIMEOUT = 2.0
+READ_CHUNK_SIZE = 1024  # Non-streaming bodies are read in blocks, deadline checked between them
+
+
+class OllamaError(RuntimeError):
+    """Ollama request failed (connection, HTTP status or malformed response)"""
+
+
+class OllamaTimeout(OllamaError):
+    """Ollama request exceeded its deadline"""
+
+
+class OllamaClient:
+    """Keep-alive HTTP client for a local Ollama server"""
+
+    def __init__(self, host: str = None, keep_alive: Union[str, int] = None, pool_size: int = 4):
+        """
+        Initialize client
+
+        Args:
+            host: Ollama base URL (defaults to $OLLAMA_HOST or http://127.0.0.1:11434)
+            keep_alive: How long Ollama keeps the model loaded after a call
+                        ("30m", "1h", -1 = pin forever, 0 = unload immediately)
+            pool_size: Max pooled connections (concurrent daemon threads)
+        """
+        self.host = self._normalize_host(host or os.environ.get('OLLAMA_HOST') or DEFAULT_HOST)
+        self.keep_alive = self._normalize_keep_alive(keep_alive if keep_alive is not None else DEFAULT_KEEP_ALIVE)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    @staticmethod
+    def _normalize_host(host: str) -> str:
+        """Accept OLLAMA_HOST forms like '127.0.0.1:11434' or '0.0.0.0'"""
+        return normalize_ollama_host(host)
+
+    @staticmethod
+    def _normalize_keep_alive(keep_alive: Union[str, int]) -> Union[str, int]:
+        """Config values arrive as strings - Ollama wants bare numbers as ints ("-1" → -1)"""
+        if isinstance(keep_alive, str) and keep_alive.strip().lstrip('-').isdigit():
+            return int(keep_alive)
+        return keep_alive
+
+    def generate(self, model: str, prompt: str, system: str = None, options: Dict = None,
+                 stream: bool = False, timeout: float = 30.0, keep_alive: Union[str, int] = None,
+                 **extra) -> Union[Dict, Iterator[Dict]]:
+        """
+        Call /api/generate
+
+        Args:
+            model: Model name ("qwen2.5-coder:7b", "phi3")
+            prompt: Prompt text
+            system: Optional system prompt (overrides Modelfile SYSTEM)
+            options: Ollama model options (temperature, num_predict, stop, ...)
+            stream: If True, return an iterator of chunk dicts
+            timeout: Total deadline in seconds for the whole request
+            keep_alive: Override default keep_alive for this call
+            **extra: Additional top-level fields (format, raw, ...)
+
+        Returns:
+            Full response dict (non-streaming) or iterator of chunk dicts
+        """
+        payload = {'model': model, 'prompt': prompt, 'stream': stream}
+        if system:
+            payload['system'] = system
+        return self._request('/api/generate', payload, options, stream, timeout, keep_alive, extra)
+
+    def chat(self, model: str, messages: List[Dict], options: Dict = None,
+             stream: bool = False, timeout: float = 30.0, keep_alive: Union[str, int] = None,
+             **extra) -> Union[Dict, Iterator[Dict]]:
+        """
+        Call /api/chat
+
+        Args:
+            model: Model name
+            messages: [{"role": "system|user|assistant", "content": "..."}]
+            options, stream, timeout, keep_alive, **extra: see generate()
+
+        Returns:
+            Full response dict (non-streaming) or iterator of chunk dicts
+        """
+        payload = {'model': model, 'messages': messages, 'stream': stream}
+        return self._request('/api/chat', payload, options, stream, timeout, keep_alive, extra)
+
+    def generate_text(self, model: str, prompt: str, **kwargs) -> str:
+        """Convenience wrapper: /api/generate → stripped response text"""
+        return self.generate(model, prompt, **kwargs).get('response', '').strip()
+
+    def version(self, timeout: float = 1.0) -> Optional[str]:
+        """Return Ollama server version or None if unreachable"""
+        try:
+            response = self.session.get(f"{self.host}/api/version", timeout=(timeout, timeout))
+            if response.status_code == 200:
+                return response.json().get('version')
+        except (requests.RequestException, ValueError):
+            pass
+        return None
+
+    def list_models(self, timeout: float = 5.0) -> List[str]:
+        """
+        List locally installed models (/api/tags)
+
+        Raises:
+            OllamaError: If Ollama is not reachable
+        """
+        try:
+            response = self.session.get(f"{self.host}/api/tags", timeout=(CONNECT_TIMEOUT, timeout))
+            response.raise_for_status()
+            return [m.get('name', '') for m in response.json().get('models', [])]
+        except (requests.RequestException, ValueError) as e:
+            raise OllamaError(f"Ollama not reachable at {self.host}: {e}")
+
+    def close(self):
+        """Close pooled connections"""
+        self.session.close()
+
+    def _request(self, path: str, payload: Dict, options: Optional[Dict], stream: bool,
+                 timeout: float, keep_alive, extra: Dict):
+        """POST to Ollama and return parsed JSON or a chunk iterator"""
+        payload['keep_alive'] = self._normalize_keep_alive(keep_alive) if keep_alive is not None else self.keep_alive
+        if options:
+            payload['options'] = options
+        payload.update(extra)
+
+        # Body always streamed: the read timeout only bounds each socket read,
+        # the deadline bounds the whole call (checked between reads/chunks)
+        deadline = time.monotonic() + timeout
+        try:
+            response = self.session.post(
+                f"{self.host}{path}",
+                json=payload,
+                stream=True,
+                timeout=(min(CONNECT_TIMEOUT, timeout), timeout)
+            )
+        except requests.Timeout:
+            raise OllamaTimeout(f"Ollama {path} timed out after {timeout:.1f}s")
+        except requests.RequestException as e:
+            raise OllamaError(f"Ollama {path} failed: {e}")
+
+        if response.status_code != 200:
+            body = response.text[:200]
+            response.close()
+            raise OllamaError(f"Ollama {path} returned HTTP {response.status_code}: {body}")
+
+        if stream:
+            return self._iter_chunks(response, deadline, path)
+        return self._read_json(response, deadline, path)
+
+    def _read_json(self, response, deadline: float, path: str) -> Dict:
+        """
+        Read a non-streaming body under the deadline
+
+        A slow body (every read within the read timeout) used to run past the
+        deadline; now it is cut off after at most one more blocked read.
+        """
+        body = bytearray()
+        try:
+            for block in response.iter_content(chunk_size=READ_CHUNK_SIZE):
+                body.extend(block)
+                if time.monotonic() > deadline:
+                    raise OllamaTimeout(f"Ollama {path} exceeded deadline")
+        except requests.Timeout:
+            raise OllamaTimeout(f"Ollama {path} timed out")
+        except requests.RequestException as e:
+            raise OllamaError(f"Ollama {path} failed: {e}")
+        finally:
+            response.close()
+
+        try:
+            return json.loads(body)
+        except ValueError as e:
+            raise OllamaError(f"Ollama {path} returned invalid JSON: {e}")
+
+    def _iter_chunks(self, response, deadline: float, path: str) -> Iterator[Dict]:
+        """
+        Yield NDJSON chunks until done, deadline or consumer stops iterating
+
+        Closing the generator (break / .close()) closes the HTTP response,
+        which makes Ollama abort the generation server-side.
+        """
+        try:
+            for line in response.iter_lines():
+                if time.monotonic() > deadline:
+                    raise OllamaTimeout(f"Ollama {path} stream exceeded deadline")
+                if not line:
+                    continue
+                try:
+                    chunk = json.loads(line)
+                except ValueError:
+                    continue
+                if 'error' in chunk:
+                    raise OllamaError(f"Ollama {path} error: {chunk['error']}")
+                yield chunk
+                if chunk.get('done'):
+                    break
+        except requests.Timeout:
+            raise OllamaTimeout(f"Ollama {path} stream timed out")
+        except requests.RequestException as e:
+            raise OllamaError(f"Ollama {path} stream failed: {e}")
+        finally:
+            response.close()
+
+
+_shared_client = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_client(host: str = None, keep_alive: Union[str, int] = None) -> OllamaClient:
+    """
+    Return the process-wide OllamaClient (created on first call)
+
+    Args are only applied when the client is created; later callers share it.
+    """
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = OllamaClient(host=host, keep_alive=keep_alive)
+        return _shared_client
+
+
+# CLI interface for testing
+if __name__ == '__main__':
+    import sys
+
+    client = get_shared_client()
+    print(f"Ollama host: {client.host}")
+    print(f"Ollama version: {client.version() or 'not reachable'}")
+
+    if len(sys.argv) >= 3:
+        start = time.time()
+        for chunk in client.generate(sys.argv[1], sys.argv[2], stream=True, timeout=60):
+            print(chunk.get('response', ''), end='', flush=True)
+        print(f"\n({(time.time() - start) * 1000:.0f}ms)")
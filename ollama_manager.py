@@ -12,14 +12,23 @@ import time
 import signal
 from typing import Optional
 
+from liveness import OLLAMA, LivenessCache, probe_ollama
+
 class OllamaManager:
     """Manages Ollama daemon lifecycle"""
 
-    def __init__(self, config_dir: str = None):
-        """Initialize Ollama manager"""
+    def __init__(self, config_dir: str = None, liveness: LivenessCache = None):
+        """
+        Initialize Ollama manager
+
+        Args:
+            config_dir: Path to .aichat config directory
+            liveness: Shared liveness cache (DaemonManager passes its own)
+        """
         self.config_dir = config_dir or os.path.expanduser("~/.aichat")
         self.pid_file = os.path.join(self.config_dir, "ollama.pid")
         self.always_on = self._get_config_option("OLLAMA_ALWAYS_ON", "false") == "true"
+        self.liveness = liveness or LivenessCache(self.config_dir)
 
     def _get_config_option(self, key: str, default: str = "") -> str:
         """Read config option from config file"""
@@ -42,20 +51,15 @@ class OllamaManager:
         """
         Check if Ollama daemon is running
 
+        Probes GET /api/version (no `ollama list` subprocess) and records
+        the result in the shared liveness cache.
+
         Returns:
             True if Ollama is running and responding
         """
-        try:
-            # Try to list models - if this works, Ollama is running
-            result = subprocess.run(
-                ['ollama', 'list'],
-                capture_output=True,
-                text=True,
-                timeout=2
-            )
-            return result.returncode == 0
-        except (subprocess.TimeoutExpired, FileNotFoundError):
-            return False
+        running = probe_ollama(timeout=1.0) is not None
+        self.liveness.mark(OLLAMA, running)
+        return running
 
     def start_ollama(self) -> bool:
         """
@@ -152,6 +156,7 @@ class OllamaManager:
                         # Process terminated
                         print("✅ Ollama stopped successfully", file=sys.stderr)
                         os.remove(self.pid_file)
+                        self.liveness.invalidate(OLLAMA)
                         return True
 
                 # Still running - force kill
@@ -167,6 +172,7 @@ class OllamaManager:
             if os.path.exists(self.pid_file):
                 os.remove(self.pid_file)
 
+            self.liveness.invalidate(OLLAMA)
             return True
 
         except Exception as e:
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+OpenAI HTTP Client
+Long-lived keep-alive connection pool for chat/completions
+
+Before, every turn called the module-level requests.post → a fresh
+TCP + TLS handshake to api.openai.com (100-300ms) per request.
+
+Now ChatSystem owns one client for the daemon's lifetime:
+- requests.Session with a pooled HTTPAdapter → connections are reused
+- Optional HTTP/2 (AI_CHAT_OPENAI_HTTP2=true, needs `pip install httpx[http2]`)
+- Separate connect / read timeouts
+- warm() opens the connection ahead of time: at daemon start, and when the
+  pool sat idle long enough for the server to drop it (daemon idle loop,
+  start of a turn - overlaps with keyword detection / local checks)
+- stats(): requests, new connections, reuse ratio → daemon metrics
+"""
+
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import httpx  # Optional: HTTP/2 transport
+except ImportError:
+    httpx = None
+
+DEFAULT_API_URL = "https://api.openai.com/v1/chat/completions"
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 30.0
+DEFAULT_POOL_SIZE = 4
+
+# Servers close idle keep-alive connections after roughly a minute → re-warm before that
+KEEPALIVE_REFRESH = 45.0
+
+
+class _HttpxResponse:
+    """httpx response with the requests surface ChatSystem uses (bytes iter_lines)"""
+
+    def __init__(self, response):
+        self._response = response
+        self.status_code = response.status_code
+
+    def json(self):
+        return self._response.json()
+
+    def iter_lines(self):
+        for line in self._response.iter_lines():
+            yield line.encode('utf-8')
+
+    def close(self):
+        self._response.close()
+
+
+class OpenAIClient:
+    """Keep-alive client for OpenAI's HTTP API"""
+
+    def __init__(self, api_key: str, api_url: str = DEFAULT_API_URL,
+                 connect_timeout: float = DEFAULT_CONNECT_TIMEOUT, read_timeout: float = DEFAULT_READ_TIMEOUT,
+                 pool_size: int = DEFAULT_POOL_SIZE, http2: bool = False, verify: Any = True):
+        """
+        Args:
+            api_key: OpenAI API key
+            api_url: chat/completions endpoint
+            connect_timeout: Seconds for TCP + TLS setup
+            read_timeout: Seconds between bytes of the response (per chunk when streaming)
+            pool_size: Pooled connections (concurrent daemon workers)
+            http2: Use HTTP/2 via httpx if installed (falls back to HTTP/1.1 keep-alive)
+            verify: TLS verification (True, or a CA bundle path)
+        """
+        self.api_key = api_key
+        self.api_url = api_url
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.verify = verify
+
+        # Warm-up target: <base>/models next to <base>/chat/completions
+        self.models_url = api_url.rsplit('/chat/completions', 1)[0] + "/models"
+
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._warmups = 0
+        self._streams = set()  # httpx: ids of network streams seen (= connections)
+        self._warming = False
+        self.last_used = 0.0
+
+        self.http2 = False
+        if http2 and httpx is not None:
+            try:
+                self._httpx = httpx.Client(
+                    http2=True, verify=verify,
+                    timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+                    limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+                )
+                self.http2 = True
+            except ImportError:  # httpx without the h2 extra
+                print("⚠️  HTTP/2 needs `pip install httpx[http2]` - using HTTP/1.1 keep-alive", file=sys.stderr)
+        elif http2:
+            print("⚠️  HTTP/2 needs `pip install httpx[http2]` - using HTTP/1.1 keep-alive", file=sys.stderr)
+
+        self.session = requests.Session()
+        self.adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+
+    def post(self, payload: Dict, stream: bool = False, read_timeout: float = None):
+        """
+        POST to the chat/completions endpoint on a pooled connection
+
+        Args:
+            payload: Request JSON
+            stream: Leave the body unread (SSE) - caller must close() the response
+            read_timeout: Override the default read timeout for this call
+
+        Returns:
+            Response with status_code, json(), iter_lines(), close()
+        """
+        read_timeout = read_timeout or self.read_timeout
+        with self._lock:
+            self._requests += 1
+
+        try:
+            if self.http2:
+                request = self._httpx.build_request(
+                    'POST', self.api_url, json=payload, headers=self.headers,
+                    timeout=httpx.Timeout(read_timeout, connect=self.connect_timeout)
+                )
+                response = self._httpx.send(request, stream=stream)
+                self._note_stream(response)
+                return _HttpxResponse(response)
+
+            return self.session.post(
+                self.api_url,
+                headers=self.headers,
+                json=payload,
+                timeout=(self.connect_timeout, read_timeout),
+                stream=stream,
+                verify=self.verify  # Per call: session.verify loses to REQUESTS_CA_BUNDLE
+            )
+        finally:
+            self.last_used = time.time()
+
+    def _note_stream(self, response):
+        stream = response.extensions.get('network_stream')
+        if stream is not None:
+            with self._lock:
+                self._streams.add(id(stream))
+
+    def warm(self) -> bool:
+        """
+        Open (or refresh) a pooled connection without a billable request
+
+        Sends HEAD to <base>/models - any HTTP answer means TCP + TLS are done.
+
+        Returns:
+            True if the server answered
+        """
+        try:
+            if self.http2:
+                response = self._httpx.head(self.models_url, headers=self.headers)
+                self._note_stream(response)
+                response.close()
+            else:
+                self.session.head(self.models_url, headers=self.headers, verify=self.verify,
+                                  timeout=(self.connect_timeout, self.connect_timeout)).close()
+            with self._lock:
+                self._warmups += 1
+            self.last_used = time.time()
+            return True
+        except (requests.RequestException, OSError) as e:
+            print(f"⚠️  OpenAI connection warm-up failed: {e}", file=sys.stderr)
+            return False
+        except Exception as e:  # httpx errors
+            print(f"⚠️  OpenAI connection warm-up failed: {e}", file=sys.stderr)
+            return False
+
+    def warm_async(self):
+        """warm() on a background thread (at most one at a time)"""
+        with self._lock:
+            if self._warming:
+                return
+            self._warming = True
+
+        def run():
+            try:
+                self.warm()
+            finally:
+                with self._lock:
+                    self._warming = False
+
+        threading.Thread(target=run, name="openai-warmup", daemon=True).start()
+
+    def idle_seconds(self) -> float:
+        """Seconds since the last request/warm-up (inf if never used)"""
+        return time.time() - self.last_used if self.last_used else float('inf')
+
+    def warm_if_idle(self, max_idle: float = KEEPALIVE_REFRESH):
+        """Re-warm in the background when the pooled connection may have been dropped"""
+        if self.idle_seconds() > max_idle:
+            self.warm_async()
+
+    def _connections(self) -> Optional[int]:
+        if self.http2:
+            return len(self._streams)
+        pools = getattr(self.adapter.poolmanager, 'pools', None)
+        if pools is None:
+            return None
+        return sum(getattr(pools[key], 'num_connections', 0) for key in list(pools.keys()))
+
+    def stats(self) -> Dict[str, Any]:
+        """Requests sent, connections opened, how many requests reused a connection"""
+        with self._lock:
+            requests_sent = self._requests + self._warmups
+        connections = self._connections()
+        reused = max(0, requests_sent - connections) if connections is not None else None
+        return {
+            'transport': 'http2' if self.http2 else 'http1.1',
+            'requests': requests_sent,
+            'warmups': self._warmups,
+            'connections': connections,
+            'reused': reused,
+            'reuse_ratio': round(reused / requests_sent, 4) if reused is not None and requests_sent else 0.0
+        }
+
+    def close(self):
+        self.session.close()
+        if self.http2:
+            self._httpx.close()
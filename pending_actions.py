@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pending Actions
+Per-session confirmations (DELETE preview → "yes") kept in daemon RAM
+
+Before, a DELETE preview wrote $TMPDIR/aichat_pending_delete.json and every
+send_message did os.path.exists() on it:
+- one file for all sessions/users → concurrent deletes clobbered each other
+- filesystem syscalls on every turn
+- an expired or forgotten file swallowed the next message as "cancel"
+
+Now:
+- dict lookup per turn, keyed by session_id
+- TTL (60s) enforced on confirm and by a timer wheel (1s ticks) that turns
+  expired entries into short-lived tombstones → late "yes" → "expired" message
+- expired/forgotten confirmations no longer swallow unrelated messages
+- optional persistence (AI_CHAT_PENDING_PERSIST=true → ~/.aichat/pending_actions.json,
+  mode 0600) so a daemon restart keeps open confirmations
+"""
+
+import json
+import math
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+DEFAULT_TTL = 60.0
+TICK_SECONDS = 1.0
+WHEEL_SLOTS = 64
+
+PENDING = 'pending'
+EXPIRED = 'expired'
+
+
+class TimerWheel:
+    """
+    Hashed timer wheel: O(1) schedule/cancel, advance() pops due keys
+
+    Slot = deadline tick % slots; deadlines more than one revolution ahead
+    stay in their slot until the wheel comes round to them again.
+    """
+
+    def __init__(self, tick: float = TICK_SECONDS, slots: int = WHEEL_SLOTS, start: float = 0.0):
+        self.tick = tick
+        self.slots: List[Dict[Hashable, float]] = [{} for _ in range(slots)]
+        self._slot_of: Dict[Hashable, int] = {}
+        self._current = int(start // tick)  # Last tick processed
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    def schedule(self, key: Hashable, deadline: float):
+        """(Re)schedule key to fire at deadline"""
+        self.cancel(key)
+        # First tick boundary at/after the deadline → fires on that tick, never early
+        index = math.ceil(deadline / self.tick) % len(self.slots)
+        self.slots[index][key] = deadline
+        self._slot_of[key] = index
+
+    def cancel(self, key: Hashable):
+        index = self._slot_of.pop(key, None)
+        if index is not None:
+            self.slots[index].pop(key, None)
+
+    def advance(self, now: float) -> List[Hashable]:
+        """Process every tick up to now, return keys whose deadline passed"""
+        target = int(now // self.tick)
+        if target <= self._current:
+            return []
+        # More ticks than slots → every slot is visited once
+        ticks = range(self._current + 1, target + 1) if target - self._current < len(self.slots) \
+            else range(target - len(self.slots) + 1, target + 1)
+        self._current = target
+
+        fired = []
+        for tick in ticks:
+            slot = self.slots[tick % len(self.slots)]
+            for key, deadline in list(slot.items()):
+                if deadline <= now:
+                    del slot[key]
+                    del self._slot_of[key]
+                    fired.append(key)
+        return fired
+
+
+class PendingActionStore:
+    """Thread-safe session_id → pending action with TTL"""
+
+    def __init__(self, ttl: float = DEFAULT_TTL, persist_path: str = None,
+                 clock: Callable[[], float] = time.monotonic, ticker: bool = True):
+        """
+        Args:
+            ttl: Seconds a confirmation stays valid (tombstone kept as long again)
+            persist_path: Optional JSON file mirroring open confirmations
+            clock: Monotonic time source (tests)
+            ticker: Start a background thread advancing the wheel every tick
+        """
+        self.ttl = ttl
+        self.persist_path = os.path.expanduser(persist_path) if persist_path else None
+        self._clock = clock
+        self._lock = threading.Lock()
+        # session_id → (state, action, deadline)
+        self._entries: Dict[str, Tuple[str, Dict[str, Any], float]] = {}
+        self._wheel = TimerWheel(start=clock())
+        self._ticker = None
+        self._stop = threading.Event()
+        self.expired_total = 0
+
+        if self.persist_path:
+            self._load()
+        if ticker:
+            self._ticker = threading.Thread(target=self._tick_loop, name="pending-actions", daemon=True)
+            self._ticker.start()
+
+    def put(self, session_id: str, action: Dict[str, Any]):
+        """Open a confirmation for a session (replaces an earlier one)"""
+        with self._lock:
+            now = self._clock()
+            self._expire_locked(now)
+            deadline = now + self.ttl
+            self._entries[session_id] = (PENDING, dict(action), deadline)
+            self._wheel.schedule(session_id, deadline)
+            self._persist_locked()
+
+    def state(self, session_id: str) -> Optional[str]:
+        """PENDING, EXPIRED (tombstone) or None - no I/O, cheap per turn"""
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return None
+            if entry[0] == PENDING and entry[2] <= self._clock():
+                return EXPIRED
+            return entry[0]
+
+    def take(self, session_id: str) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """
+        Remove a session's entry
+
+        Returns:
+            (PENDING, action) if still valid, (EXPIRED, action) if its TTL ran out,
+            (None, None) if there was nothing
+        """
+        with self._lock:
+            entry = self._entries.pop(session_id, None)
+            if entry is None:
+                return None, None
+            self._wheel.cancel(session_id)
+            state, action, deadline = entry
+            if state == PENDING and deadline <= self._clock():
+                state = EXPIRED
+                self.expired_total += 1
+            self._persist_locked()
+            return state, action
+
+    def discard(self, session_id: str):
+        with self._lock:
+            if self._entries.pop(session_id, None) is not None:
+                self._wheel.cancel(session_id)
+                self._persist_locked()
+
+    def clear(self):
+        with self._lock:
+            for session_id in list(self._entries):
+                self._wheel.cancel(session_id)
+            self._entries.clear()
+            self._persist_locked()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(1 for state, _, _ in self._entries.values() if state == PENDING)
+
+    def expire(self) -> int:
+        """Advance the wheel now (ticker thread, tests) → number of entries changed"""
+        with self._lock:
+            return self._expire_locked(self._clock())
+
+    def close(self):
+        self._stop.set()
+
+    def _expire_locked(self, now: float) -> int:
+        changed = 0
+        for session_id in self._wheel.advance(now):
+            entry = self._entries.get(session_id)
+            if entry is None:
+                continue
+            state, action, deadline = entry
+            if state == PENDING:
+                # Keep a tombstone so a late "yes" is told the confirmation expired
+                self._entries[session_id] = (EXPIRED, action, deadline + self.ttl)
+                self._wheel.schedule(session_id, deadline + self.ttl)
+                self.expired_total += 1
+            else:
+                del self._entries[session_id]
+            changed += 1
+        if changed:
+            self._persist_locked()
+        return changed
+
+    def _tick_loop(self):
+        while not self._stop.wait(self._wheel.tick):
+            try:
+                self.expire()
+            except Exception as e:
+                print(f"⚠️  Pending action expiry failed: {e}", file=sys.stderr)
+
+    def _persist_locked(self):
+        """Mirror open confirmations to disk (wall-clock expiry), if enabled"""
+        if not self.persist_path:
+            return
+        now_mono, now_wall = self._clock(), time.time()
+        data = {
+            session_id: {'action': action, 'expires_at': now_wall + (deadline - now_mono)}
+            for session_id, (state, action, deadline) in self._entries.items() if state == PENDING
+        }
+        tmp_path = f"{self.persist_path}.tmp"
+        try:
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.persist_path)
+        except OSError as e:
+            print(f"⚠️  Could not persist pending actions: {e}", file=sys.stderr)
+
+    def _load(self):
+        try:
+            with open(self.persist_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Could not load pending actions: {e}", file=sys.stderr)
+            return
+
+        now_mono, now_wall = self._clock(), time.time()
+        for session_id, item in data.items():
+            remaining = float(item.get('expires_at', 0)) - now_wall
+            if remaining > 0 and isinstance(item.get('action'), dict):
+                deadline = now_mono + remaining
+                self._entries[session_id] = (PENDING, item['action'], deadline)
+                self._wheel.schedule(session_id, deadline)
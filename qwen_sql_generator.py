@@ -1,9 +1,56 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
-Qwen 2.5 Coder SQL Generator (v11.6.2 - Colon Separator Support!)
+Qwen 2.5 Coder SQL Generator (v11.10.0 - Dynamic Few-Shot Examples!)
 Generates SQL directly for mydata table with SPECIALIZED prompts per action
 
+v11.10.0: Nearest Examples Instead of the Full Example Wall
+- Before: every call carried all ~20-30 EN/DE/ES examples of its action,
+  whatever the input's language or shape
+- Now (few_shot=k, ChatSystem: AI_CHAT_QWEN_EXAMPLES=6): system prompt = rules
+  only (still static → prompt cache), the user message starts with the k
+  nearest examples in the detected language (example_index.py, char n-gram
+  TF-IDF) + the closest false positive
+- Examples come from the prompts below (unchanged) and from confirmed
+  requests (values masked) → unusual labels get similar solved examples
+- few_shot=0 keeps the full static prompts
+
+v11.9.0: Streamed Decode, Stopped at the First Complete Answer
+- Before: one blocking /api/chat call, Qwen decoded until EOS or num_predict
+  (explanations, a second statement, runaway whitespace after the JSON)
+  under a hard-coded 15s timeout
+- Now: stream=True + AnswerScanner → the stream is closed as soon as the JSON
+  object closes / the first statement ends / NO_ACTION appears, which makes
+  Ollama abort the rest of the generation
+- Deadline comes from the caller (ChatSystem: AI_CHAT_QWEN_TIMEOUT),
+  QWEN_TIMEOUT only when none is given
+
+v11.8.0: Schema-Constrained JSON Intent Instead of Free-Text SQL
+- Before: Qwen wrote SQL text → markdown fences stripped with regexes, lines
+  scanned for something SQL-like, meta guessed with a VALUES regex; rambling
+  completions cost tokens, and user values ended up spliced into SQL text
+- Now (AI_CHAT_QWEN_OUTPUT=json, default): Ollama `format` = JSON schema →
+  Qwen can only emit {action, label, value, filters} (+ lang for SAVE)
+- One json.loads, then compile_intent() → fixed statements with ? params
+  (same templates as rule_sql_parser.py) - no regex repair, no injection surface
+- Prompt examples unchanged in source, shown to Qwen as the matching JSON
+- num_predict caps generation (128 tokens JSON, 256 SQL) plus one token per
+  input character - the value is echoed back, so an SSH key or an address
+  block is never cut off mid-string
+- An answer cut off by num_predict (done_reason "length", unclosed object),
+  a timeout or an Ollama error → result['failed'] - never a false positive,
+  so ChatSystem keeps a SAVE/DELETE local instead of sending it to OpenAI
+- AI_CHAT_QWEN_OUTPUT=sql keeps the free-text SQL mode
+
+v11.7.0: Static Prompt Prefix for Ollama KV-Cache Reuse
+- Before: one /api/generate prompt per call with the user input in the middle
+  → every call re-prefilled the whole multi-hundred-line prompt
+- Now: /api/chat with a byte-identical system message per action (built once)
+  + a one-line user message ("Now analyze this input: ...")
+- Ollama keeps the prefix in its prompt cache → only the user message is prefilled
+- warm_prompts() prefills all three prefixes at daemon start
+- prefill tokens (prompt_eval_count) reported per call → qwen_generate span
+
 v11.6.2: Colon Separator Examples Added
 - SAVE: Added examples with `:` separator (label: value syntax)
 - Fixes FALSE_POSITIVE for "save my daughters favorite toy: teddy bear"
@@ -25,32 +72,239 @@ v11.5.1: Intent over Pattern Matching (KISS!)
 - "Examples show PATTERNS, not complete list" - works with ANY label!
 """
 
-import subprocess
 import sys
 import re
 import json
+import time
+
+from ollama_client import OllamaError, OllamaTimeout, get_shared_client
+from rule_sql_parser import SQL_DELETE, SQL_SAVE, retrieve_statement
+from example_index import ExampleIndex, parse_prompt_examples, render_example
+
+# Bump with every prompt change - keys the SQL cache (sql_cache.py)
+PROMPT_VERSION = "11.10.0"
+
+ACTIONS = ('SAVE', 'RETRIEVE', 'DELETE')
+
+# Per-request suffix - the only part Ollama has to prefill for a warm prefix
+INPUT_TEMPLATE = 'Now analyze this input:\n"{user_input}"'
+
+# Output modes: "json" = intent object constrained by a JSON schema, "sql" = free-text SQL
+OUTPUT_JSON = 'json'
+OUTPUT_SQL = 'sql'
+
+# Generation caps (num_predict) - an intent object is ~30-60 tokens, a multi-keyword SELECT ~150
+NUM_PREDICT = {OUTPUT_JSON: 128, OUTPUT_SQL: 256}
+NUM_PREDICT_MAX = 4096
+
+# Why generation produced no usable answer (result['failed'])
+FAILED_TRUNCATED = 'truncated'
+FAILED_TIMEOUT = 'timeout'
+FAILED_ERROR = 'error'
+
+# DELETE filters meaning "everything" ("delete all", "borra todo")
+DELETE_ALL = '*'
+
+# Default generation budget when the caller passes no deadline (seconds)
+QWEN_TIMEOUT = 15.0
+
+_EXAMPLE_SQL_RE = re.compile(r"^SQL: (.+)$", re.MULTILINE)
+_SQL_START_RE = re.compile(r"\s*(?:SELECT|INSERT|DELETE|UPDATE)\s", re.IGNORECASE)
+_EXAMPLES_START_RE = re.compile(r"^EXAMPLES\b", re.MULTILINE)
+_SQL_LITERAL_RE = re.compile(r"'((?:[^']|'')*)'")
+
+
+def intent_schema(action: str) -> dict:
+    """
+    JSON schema for Ollama's `format` - the model can only emit this object
+
+    action is limited to the detected action or NO_ACTION; SAVE also names
+    the language of the verb (mydata.lang).
+    """
+    properties = {
+        'action': {'type': 'string', 'enum': [action, 'NO_ACTION']},
+        'label': {'type': 'string'},
+        'value': {'type': 'string'},
+        'filters': {'type': 'array', 'items': {'type': 'string'}}
+    }
+    required = ['action', 'label', 'value', 'filters']
+    if action == 'SAVE':
+        properties['lang'] = {'type': 'string', 'enum': ['en', 'de', 'es']}
+        required.append('lang')
+    return {'type': 'object', 'properties': properties, 'required': required}
+
+
+def sql_example_to_intent(sql: str) -> dict:
+    """Prompt example SQL → the intent object that compiles to it (one source for both modes)"""
+    intent = {'action': 'NO_ACTION', 'label': '', 'value': '', 'filters': []}
+    literals = [literal.replace("''", "'") for literal in _SQL_LITERAL_RE.findall(sql)]
+    upper = sql.upper()
+    if upper.startswith('INSERT'):
+        intent.update(action='SAVE', value=literals[0], label=literals[1], lang=literals[2])
+    elif upper.startswith('SELECT'):
+        keywords = [literal.strip('%') for literal in literals]
+        intent.update(action='RETRIEVE', filters=list(dict.fromkeys(keywords)))
+    elif upper.startswith('DELETE'):
+        intent['action'] = 'DELETE'
+        if re.search(r"content\s*=", sql, re.IGNORECASE):
+            intent['value'] = literals[0]
+        elif literals:
+            intent['label'] = literals[0].strip('%')
+        else:
+            intent['filters'] = [DELETE_ALL]
+    return intent
+
+
+def compile_intent(intent: dict, action_hint: str) -> dict:
+    """
+    Intent object → parameterized statement (model text never becomes SQL text)
+
+    Returns:
+        dict: {'sql', 'params', 'action', 'confidence', 'meta'} - FALSE_POSITIVE
+        when the model said NO_ACTION or left out what the action needs
+    """
+    false_positive = {'sql': 'NO_ACTION', 'action': 'FALSE_POSITIVE', 'confidence': 0.9, 'params': ()}
+    action = intent.get('action')
+    label = str(intent.get('label') or '').strip()
+    value = str(intent.get('value') or '').strip()
+    filters = [str(f).strip() for f in intent.get('filters') or [] if str(f).strip()]
+    if action != action_hint or action not in ACTIONS:
+        return false_positive
+
+    if action == 'SAVE':
+        if not value or not label:
+            return dict(false_positive, confidence=0.7)
+        lang = intent.get('lang') if intent.get('lang') in ('en', 'de', 'es') else 'en'
+        return {'sql': SQL_SAVE, 'params': (value, label, lang), 'action': 'SAVE',
+                'confidence': 0.95, 'meta': label}
+
+    if action == 'RETRIEVE':
+        sql, params = retrieve_statement(filters or label.split())
+        return {'sql': sql, 'params': params, 'action': 'RETRIEVE', 'confidence': 0.95, 'meta': None}
+
+    # DELETE: VALUE is more specific than LABEL; everything only when asked explicitly
+    if value:
+        sql, params = f"{SQL_DELETE} WHERE content = ?", (value,)
+    elif label:
+        sql, params = f"{SQL_DELETE} WHERE meta LIKE ?", (f"%{label}%",)
+    elif filters == [DELETE_ALL]:
+        sql, params = SQL_DELETE, ()
+    else:
+        return dict(false_positive, confidence=0.7)
+    return {'sql': sql, 'params': params, 'action': 'DELETE', 'confidence': 0.95, 'meta': None}
+
+
+def num_predict_for(output: str, user_input: str) -> int:
+    """Generation cap for one input: base cap + room to echo the value (≤ 1 token per character)"""
+    return min(NUM_PREDICT.get(output, NUM_PREDICT[OUTPUT_JSON]) + len(user_input), NUM_PREDICT_MAX)
+
+
+class AnswerScanner:
+    """
+    Incremental end-of-answer detection for streamed Qwen output (v11.9.0)
+
+    json: complete once the top-level object closes (braces outside strings).
+    sql:  complete at the first `;` or line end (outside quotes) of a line
+          starting with SELECT/INSERT/DELETE/UPDATE - the parser only reads
+          that line - or once a non-SQL line says NO_ACTION.
+    """
+
+    def __init__(self, output: str = OUTPUT_JSON):
+        self.output = output
+        self.text = ''
+        self.complete = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._line = ''
+        self._in_sql = False
+
+    def feed(self, piece: str) -> bool:
+        """Add streamed text, return True once a complete answer is in self.text"""
+        for index, ch in enumerate(piece):
+            if self.complete:
+                break
+            if self.output == OUTPUT_JSON:
+                self._feed_json(ch)
+            else:
+                self._feed_sql(ch)
+            if self.complete:
+                self.text += piece[:index + 1]
+                return True
+        self.text += piece
+        return self.complete
+
+    def _feed_json(self, ch: str):
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif ch == '\\':
+                self._escape = True
+            elif ch == '"':
+                self._in_string = False
+        elif ch == '"':
+            self._in_string = True
+        elif ch == '{':
+            self._depth += 1
+        elif ch == '}' and self._depth:
+            self._depth -= 1
+            self.complete = self._depth == 0
+
+    def _feed_sql(self, ch: str):
+        if self._in_sql:
+            if ch == "'":
+                self._in_string = not self._in_string  # '' escapes toggle twice
+            elif not self._in_string and ch in ';\n':
+                self.complete = True
+            return
+        if ch == '\n':
+            self._line = ''
+            return
+        self._line += ch
+        if 'NO_ACTION' in self._line.upper():
+            self.complete = True
+        elif _SQL_START_RE.match(self._line):
+            self._in_sql = True
+            self._in_string = "'" in self._line and self._line.count("'") % 2 == 1
+
 
 class QwenSQLGenerator:
     """Generates SQL queries using Qwen 2.5 Coder 7B - specialized for SQL/code generation"""
 
-    def __init__(self):
-        """Initialize Qwen 2.5 Coder"""
+    def __init__(self, client=None, output: str = OUTPUT_JSON, few_shot: int = 0, example_path: str = None):
+        """
+        Initialize Qwen 2.5 Coder
+
+        Args:
+            client: OllamaClient to use (defaults to the shared keep-alive client)
+            output: "json" (schema-constrained intent → parameterized SQL) or "sql" (free-text SQL)
+            few_shot: Nearest examples per request (0 = all examples in the static prompt)
+            example_path: JSON file for examples learned from confirmed requests
+        """
         self.model = "qwen2.5-coder:7b"
+        self.client = client or get_shared_client()
+        self.output = output if output in NUM_PREDICT else OUTPUT_JSON
+        self.few_shot = max(0, few_shot)
+        self.example_index = None
+        if self.few_shot:
+            bodies = self._prompt_bodies()
+            self.example_index = ExampleIndex(
+                [example for action in ACTIONS for example in parse_prompt_examples(bodies[action], action)],
+                path=example_path
+            )
+        # Built once → byte-identical system message per action → Ollama reuses its KV cache
+        self.system_prompts = {action: self._build_system_prompt(action) for action in ACTIONS}
         self._check_availability()
 
     def _check_availability(self):
-        """Check if Qwen 2.5 Coder is available"""
+        """Check if Qwen 2.5 Coder is available (via Ollama /api/tags)"""
         try:
-            result = subprocess.run(
-                ['ollama', 'list'],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            if 'qwen2.5-coder' not in result.stdout:
-                raise RuntimeError("❌ Qwen 2.5 Coder not installed. Run: ollama pull qwen2.5-coder:7b")
-        except FileNotFoundError:
-            raise RuntimeError("❌ Ollama not installed. Install from: https://ollama.ai")
+            models = self.client.list_models()
+        except OllamaError:
+            raise RuntimeError("❌ Ollama not running. Install from: https://ollama.ai")
+
+        if not any('qwen2.5-coder' in name for name in models):
+            raise RuntimeError("❌ Qwen 2.5 Coder not installed. Run: ollama pull qwen2.5-coder:7b")
 
     def _get_intent_principle(self, operation: str) -> str:
         """
@@ -104,43 +358,180 @@ The examples below show PATTERNS, not a complete list of valid types!
 YOUR JOB: If {operation.lower()} intent detected → Generate SQL
 """
 
-    def generate_sql(self, user_input: str, action_hint: str) -> dict:
+    def _get_answer_steps(self, operation: str) -> str:
+        """
+        Returns the closing "think step-by-step" block for SAVE/RETRIEVE/DELETE (v11.7.0)
+
+        Phrased for an input that follows in the user message, so it can stay
+        in the static system prompt.
+        """
+        steps = {
+            'SAVE': [
+                "What is the VERB and language?",
+                "What is the VALUE (actual data)?",
+                "What is the LABEL (description)?",
+                "Is this a false positive?"
+            ],
+            'RETRIEVE': [
+                "What is the VERB and language?",
+                "What is the SEARCH TERM?",
+                'Is this "show all" (no WHERE) or specific search (with WHERE)?',
+                "Is this a false positive?"
+            ],
+            'DELETE': [
+                "What is the VERB and language?",
+                "Is there a VALUE (specific format) or LABEL (generic category)?",
+                "If BOTH: which is more specific?",
+                "Is this a false positive?",
+                "What SQL to generate?"
+            ]
+        }
+
+        numbered = [f"{i}. {step}" for i, step in enumerate(steps[operation], 1)]
+        examples_note = "It starts with solved EXAMPLES similar to that input.\n" if self.few_shot else ""
+        return f"""
+The user message contains the input to analyze.
+{examples_note}
+Think step-by-step:
+{chr(10).join(numbered)}
+
+{self._get_answer_format(operation)}
+"""
+
+    def _get_answer_format(self, operation: str) -> str:
+        """Closing answer instruction - SQL text or the JSON intent object (v11.8.0)"""
+        if self.output == OUTPUT_SQL:
+            return 'Respond with ONLY the SQL statement or "NO_ACTION". No explanation needed.'
+
+        fields = {
+            'SAVE': 'value = the VALUE, label = the LABEL, lang = language of the verb (en/de/es)',
+            'RETRIEVE': 'filters = the KEYWORDS ([] for "show all")',
+            'DELETE': f'value = the exact VALUE (TYPE A) or label = the LABEL (TYPE B), '
+                      f'filters = ["{DELETE_ALL}"] only for "delete all"'
+        }
+        return (f'Respond with ONLY the JSON object, like the JSON lines in the examples.\n'
+                f'The application builds the SQL from it: {fields[operation]}.\n'
+                f'Unused fields are "" or []. False positive → "action": "NO_ACTION". No explanation needed.')
+
+    def _prompt_bodies(self) -> dict:
+        """Specialist prompt per action (rules + examples)"""
+        return {
+            'SAVE': self._build_prompt_save(),
+            'RETRIEVE': self._build_prompt_retrieve(),
+            'DELETE': self._build_prompt_delete()
+        }
+
+    def _answer_lines(self, text: str) -> str:
+        """JSON mode: example "SQL:" lines answered as the intent object that compiles to that SQL"""
+        if self.output != OUTPUT_JSON:
+            return text
+        return _EXAMPLE_SQL_RE.sub(
+            lambda m: "JSON: " + json.dumps(sql_example_to_intent(m.group(1)), ensure_ascii=False), text)
+
+    def _build_system_prompt(self, action: str) -> str:
+        """Static prompt for an action: specialist body + answer steps (no user input!)"""
+        body = self._prompt_bodies()[action]
+        if self.few_shot:
+            # Examples move to the user message (nearest k per request) - rules stay static
+            match = _EXAMPLES_START_RE.search(body)
+            body = body[:match.start()] if match else body
+        return self._answer_lines(body) + self._get_answer_steps(action)
+
+    def build_messages(self, user_input: str, action_hint: str, lang: str = None) -> list:
+        """
+        Chat messages for one request: static system prefix + short user suffix
+
+        With few_shot the suffix starts with the nearest examples (in `lang`
+        when there are enough). Unknown action hints fall back to the SAVE
+        prompt (as before).
+        """
+        action = action_hint if action_hint in self.system_prompts else 'SAVE'
+        user = INPUT_TEMPLATE.format(user_input=user_input)
+        if self.example_index is not None:
+            examples = self.example_index.nearest(user_input, action, lang, k=self.few_shot)
+            block = "\n\n".join(render_example(example) for example in examples)
+            user = f"EXAMPLES:\n\n{self._answer_lines(block)}\n\n{user}"
+        return [
+            {'role': 'system', 'content': self.system_prompts[action]},
+            {'role': 'user', 'content': user}
+        ]
+
+    def warm_prompts(self, timeout: float = 60.0) -> dict:
+        """
+        Prefill every action's system prompt into Ollama's prompt cache
+
+        Called once at daemon start (background thread) → the first real
+        request per action only prefills its user message.
+
+        Returns:
+            {action: prefill tokens evaluated (None if the call failed)}
+        """
+        prefilled = {}
+        for action in ACTIONS:
+            messages = self.build_messages("", action)
+            try:
+                response = self.client.chat(self.model, messages, options={'num_predict': 1}, timeout=timeout,
+                                            **self._format_for(action))
+                prefilled[action] = response.get('prompt_eval_count')
+            except OllamaError as e:
+                print(f"⚠️  Qwen prompt warm-up failed ({action}): {e}", file=sys.stderr)
+                prefilled[action] = None
+        return prefilled
+
+    def generate_sql(self, user_input: str, action_hint: str, deadline: float = None, lang: str = None) -> dict:
         """
         Generate SQL query from user input (language-agnostic!)
 
         Args:
             user_input: User's raw input ("save my email test@test.com" or "speichere meine Email...")
             action_hint: Detected action (SAVE, RETRIEVE, DELETE)
+            deadline: time.monotonic() by which generation must be over
+                      (default: QWEN_TIMEOUT from now)
+            lang: Detected input language (en/de/es) - picks the few-shot examples
 
         Returns:
             dict: {
                 'sql': 'INSERT INTO mydata...' or 'NO_ACTION',
+                'params': tuple for the ? placeholders (JSON mode),
                 'action': 'SAVE|RETRIEVE|DELETE|FALSE_POSITIVE',
                 'confidence': 0.0-1.0,
-                'meta': extracted meta label (optional)
+                'meta': extracted meta label (optional),
+                'prefill_tokens': prompt tokens Ollama had to evaluate (None if unknown),
+                'early_stop': True if the stream was closed after a complete answer,
+                'failed': None, or why there is no usable answer (truncated/timeout/error) -
+                          action is FALSE_POSITIVE then, but the input was NOT judged
             }
 
         Note: Qwen 2.5 Coder is multilingual! Each action has specialized prompt.
               Language detection happens automatically - mixed inputs work too!
         """
-        # Route to specialized prompt based on action
-        if action_hint == 'SAVE':
-            prompt = self._build_prompt_save(user_input)
-        elif action_hint == 'RETRIEVE':
-            prompt = self._build_prompt_retrieve(user_input)
-        elif action_hint == 'DELETE':
-            prompt = self._build_prompt_delete(user_input)
-        else:
-            # Fallback (shouldn't happen)
-            prompt = self._build_prompt_save(user_input)
+        # Specialized static prompt (system) + user input (user message)
+        messages = self.build_messages(user_input, action_hint, lang)
 
         # Call Qwen
-        result_text = self._call_qwen(prompt)
+        if deadline is None:
+            deadline = time.monotonic() + QWEN_TIMEOUT
+        result_text, prefill_tokens, early_stop, failed = self._call_qwen(
+            messages, action_hint, deadline, num_predict_for(self.output, user_input))
 
         # Parse response
-        return self._parse_qwen_output(result_text, user_input)
+        if failed:
+            result = {'sql': 'NO_ACTION', 'action': 'FALSE_POSITIVE', 'confidence': 0.0, 'params': ()}
+        elif self.output == OUTPUT_JSON:
+            result = self._parse_intent_output(result_text, action_hint)
+            failed = result.pop('failed', None)
+        else:
+            result = self._parse_qwen_output(result_text, user_input)
+        result['prefill_tokens'] = prefill_tokens
+        result['early_stop'] = early_stop
+        result['failed'] = failed
+        return result
 
-    def _build_prompt_save(self, user_input: str) -> str:
+    def _format_for(self, action: str) -> dict:
+        """Top-level `format` field for Ollama (JSON mode only)"""
+        return {'format': intent_schema(action)} if self.output == OUTPUT_JSON else {}
+
+    def _build_prompt_save(self) -> str:
         """Specialized prompt for SAVE - intent-based detection (v11.5.1)"""
         prompt = f"""You are a SQL INSERT specialist for SQLite database 'mydata'.
 
@@ -304,21 +695,10 @@ SQL: NO_ACTION
 Input: "remember to call mom"
 Reason: Todo/reminder, no extractable VALUE
 SQL: NO_ACTION
-
-Now analyze this input:
-"{user_input}"
-
-Think step-by-step:
-1. What is the VERB and language?
-2. What is the VALUE (actual data)?
-3. What is the LABEL (description)?
-4. Is this a false positive?
-
-Respond with ONLY the SQL statement or "NO_ACTION". No explanation needed.
 """
         return prompt
 
-    def _build_prompt_retrieve(self, user_input: str) -> str:
+    def _build_prompt_retrieve(self) -> str:
         """Specialized prompt for RETRIEVE - keyword extraction, multi-keyword OR (v11.6.1)"""
         prompt = f"""You are a SQL SELECT specialist for SQLite database 'mydata'.
 
@@ -463,21 +843,10 @@ SQL: NO_ACTION
 Input: "remember to check email later"
 Reason: Reminder/todo, not retrieval query
 SQL: NO_ACTION
-
-Now analyze this input:
-"{user_input}"
-
-Think step-by-step:
-1. What is the VERB and language?
-2. What is the SEARCH TERM?
-3. Is this "show all" (no WHERE) or specific search (with WHERE)?
-4. Is this a false positive?
-
-Respond with ONLY the SQL statement or "NO_ACTION". No explanation needed.
 """
         return prompt
 
-    def _build_prompt_delete(self, user_input: str) -> str:
+    def _build_prompt_delete(self) -> str:
         """SMART DELETE Prompt - intent-based, VALUE vs LABEL (v11.5.1)"""
         prompt = f"""You are a SMART SQL DELETE specialist for SQLite database 'mydata'.
 
@@ -590,43 +959,85 @@ SQL: NO_ACTION
 
 Input: "remove the background"
 SQL: NO_ACTION
-
-Now analyze this input:
-"{user_input}"
-
-Think step-by-step:
-1. What is the VERB and language?
-2. Is there a VALUE (specific format) or LABEL (generic category)?
-3. If BOTH: which is more specific?
-4. Is this a false positive?
-5. What SQL to generate?
-
-Respond with ONLY the SQL statement or "NO_ACTION". No explanation needed.
 """
         return prompt
 
-    def _call_qwen(self, prompt: str) -> str:
-        """Call Qwen 2.5 Coder via Ollama"""
+    def _call_qwen(self, messages: list, action_hint: str, deadline: float, num_predict: int = None) -> tuple:
+        """
+        Stream Qwen 2.5 Coder via Ollama /api/chat, stop at the first complete answer (v11.9.0)
+
+        Closing the stream makes Ollama abort the generation → explanations,
+        repeated statements or trailing whitespace after the answer are never
+        decoded. prompt_eval_count only arrives with the final chunk, so it is
+        None for early-stopped calls.
+
+        Returns:
+            (response text, prefill tokens, early stop, failed) - prompt_eval_count
+            only counts tokens not served from Ollama's prompt cache; failed is
+            None or FAILED_TRUNCATED / FAILED_TIMEOUT / FAILED_ERROR
+        """
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            print("⚠️  Qwen deadline already passed - no answer", file=sys.stderr)
+            return "NO_ACTION", None, False, FAILED_TIMEOUT
+
+        scanner = AnswerScanner(self.output)
+        prefill_tokens = None
+        stream = None
         try:
-            result = subprocess.run(
-                ['ollama', 'run', self.model, prompt],
-                capture_output=True,
-                text=True,
-                timeout=15  # Qwen might take longer for SQL generation
+            stream = self.client.chat(
+                self.model,
+                messages,
+                options={'num_predict': num_predict or NUM_PREDICT[self.output]},
+                stream=True,
+                timeout=remaining,
+                **self._format_for(action_hint)
             )
+            done_reason = None
+            for chunk in stream:
+                if scanner.feed((chunk.get('message') or {}).get('content', '')):
+                    return scanner.text.strip(), None, True, None
+                if chunk.get('done'):
+                    prefill_tokens = chunk.get('prompt_eval_count')
+                    done_reason = chunk.get('done_reason')
+            if done_reason == 'length':
+                print("⚠️  Qwen answer cut off by num_predict", file=sys.stderr)
+                return scanner.text.strip(), prefill_tokens, False, FAILED_TRUNCATED
+            return scanner.text.strip(), prefill_tokens, False, None
+
+        except OllamaTimeout:
+            print("⚠️  Qwen timeout - no answer", file=sys.stderr)
+            return "NO_ACTION", None, False, FAILED_TIMEOUT
+        except Exception as e:
+            print(f"⚠️  Qwen error: {e}", file=sys.stderr)
+            return "NO_ACTION", None, False, FAILED_ERROR
+        finally:
+            if stream is not None and hasattr(stream, 'close'):
+                stream.close()  # Closes the HTTP response → Ollama stops generating
 
-            if result.returncode != 0:
-                print(f"⚠️  Qwen error: {result.stderr}", file=sys.stderr)
-                return "NO_ACTION"
+    def _parse_intent_output(self, output: str, action_hint: str) -> dict:
+        """
+        Parse the schema-constrained JSON intent and compile it (v11.8.0)
 
-            return result.stdout.strip()
+        Args:
+            output: Qwen's raw output (a JSON object, or "NO_ACTION" after a timeout/error)
+            action_hint: Detected action (SAVE, RETRIEVE, DELETE)
 
-        except subprocess.TimeoutExpired:
-            print("⚠️  Qwen timeout - assuming invalid action", file=sys.stderr)
-            return "NO_ACTION"
-        except Exception as e:
-            print(f"⚠️  Qwen error: {e}", file=sys.stderr)
-            return "NO_ACTION"
+        Returns:
+            dict with sql (? placeholders), params, action, confidence, meta
+            ('failed': FAILED_TRUNCATED for an object that never closed)
+        """
+        try:
+            intent = json.loads(output)
+        except ValueError:
+            intent = None
+        if not isinstance(intent, dict):
+            result = {'sql': 'NO_ACTION', 'action': 'FALSE_POSITIVE', 'confidence': 0.7, 'params': ()}
+            if output.lstrip().startswith('{'):
+                result['failed'] = FAILED_TRUNCATED  # Started an object, never finished it
+            return result
+
+        return compile_intent(intent, action_hint)
 
     def _parse_qwen_output(self, output: str, original_input: str) -> dict:
         """
@@ -8,7 +8,6 @@ import os
 import re
 import sys
 import json
-import subprocess
 from pathlib import Path
 from typing import Dict, List, Optional, Any
 
@@ -18,6 +17,7 @@ class ResponseGenerator:
             config_dir = Path.home() / '.aichat'
 
         self.config_dir = Path(config_dir)
+        self.client = self._get_ollama_client()
         self.phi3_available = self._check_phi3()
 
         # Load configuration
@@ -67,31 +67,23 @@ class ResponseGenerator:
 
         return lang_strings
 
-    def _check_phi3(self) -> bool:
-        """Check if Ollama with Phi-3 is available"""
+    def _get_ollama_client(self):
+        """Get shared keep-alive Ollama client (None if requests unavailable)"""
         try:
-            # Check if ollama command exists
-            result = subprocess.run(
-                ['which', 'ollama'],
-                capture_output=True,
-                text=True,
-                timeout=2
-            )
-
-            if result.returncode != 0:
-                return False
-
-            # Check if phi3 model is available
-            result = subprocess.run(
-                ['ollama', 'list'],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
+            from ollama_client import get_shared_client
+            return get_shared_client()
+        except ImportError:
+            return None
 
-            return 'phi3' in result.stdout.lower()
+    def _check_phi3(self) -> bool:
+        """Check if Ollama with Phi-3 is available"""
+        if not self.client:
+            return False
 
-        except (subprocess.TimeoutExpired, subprocess.SubprocessError, FileNotFoundError):
+        try:
+            models = self.client.list_models(timeout=2)
+            return any('phi3' in name.lower() for name in models)
+        except Exception:
             return False
 
     def _get_templates(self) -> Dict[str, Dict[str, str]]:
@@ -527,23 +519,23 @@ Your SHORT phrase (2-4 words max):"""
         return f"🔍 {phrase}: {content}"
 
     def _call_phi3(self, prompt: str) -> str:
-        """Call Phi-3 model via Ollama"""
+        """Call Phi-3 model via shared Ollama HTTP client"""
+        if not self.client:
+            raise Exception("Failed to call Phi-3: Ollama client not available")
+
         try:
-            result = subprocess.run(
-                ['ollama', 'run', 'phi3'],
-                input=prompt,
-                capture_output=True,
-                text=True,
+            response = self.client.generate_text(
+                'phi3',
+                prompt,
                 timeout=60  # 60 second timeout (first run needs model loading)
             )
 
-            if result.returncode == 0 and result.stdout.strip():
-                response = result.stdout.strip()
+            if response:
                 # Clean up response
                 response = re.sub(r'^(Response:|Assistant:|AI:)\s*', '', response, flags=re.IGNORECASE)
                 return response
 
-            raise Exception(f"Phi-3 returned error: {result.stderr}")
+            raise Exception("Phi-3 returned empty response")
 
         except Exception as e:
             raise Exception(f"Failed to call Phi-3: {e}")
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Rule-Based SQL Parser - deterministic fast path in front of Qwen
+Answers the trivially structured SAVE/RETRIEVE/DELETE requests in microseconds
+
+Handled shapes (verb = first word, from KEYWORDS_* in lang/*.conf):
+- SAVE:     "save my email test@test.com", "save my daughters favorite toy: teddy bear"
+- RETRIEVE: "show my email", "zeig alle Daten", "muestra mi dirección"
+- DELETE:   "delete my wifi password", "borra test@test.com"
+
+Everything else (questions, free-form values, "delete all", ...) returns None
+or a low confidence → ChatSystem falls back to QwenSQLGenerator.
+
+RETRIEVE and DELETE-by-label need a possessive ("my", "meine", "mi") or a
+label already stored in mydata - "tell me a joke" / "check the weather" are
+chat, not lookups, and go to Qwen (→ NO_ACTION → OpenAI). DELETE-by-value
+needs the same, or a value that is clearly data (email, URL, 5+ digit run,
+long mixed token): "delete step 3" / "remove line 42" go to Qwen.
+
+Statements are fixed templates with ? parameters - user text is never
+spliced into SQL, so the output needs no validate_sql pass.
+"""
+
+import re
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# ChatSystem uses the rule result only at or above this confidence
+MIN_CONFIDENCE = 0.85
+
+# Longest label accepted without asking Qwen ("wifi password", "boss email", ...)
+MAX_LABEL_WORDS = 4
+
+# Possessives/articles in front of the label (optional, ignored)
+DETERMINERS = {
+    'my', 'the', 'a', 'an', 'your',
+    'mein', 'meine', 'meinen', 'meinem', 'meiner', 'meines',
+    'die', 'der', 'das', 'den', 'dem', 'des',
+    'mi', 'mis', 'el', 'la', 'los', 'las', 'tu', 'tus',
+}
+
+# Possessives that make "show my X" a lookup of the user's own data
+POSSESSIVES = {
+    'my', 'mein', 'meine', 'meinen', 'meinem', 'meiner', 'meines', 'mi', 'mis',
+}
+
+# Words allowed between verb and label ("merke dir", "guárdame", "please")
+FILLERS = {'dir', 'mir', 'me', 'please', 'bitte'}
+
+# Glue inside a label - kept for SAVE/DELETE labels, skipped as RETRIEVE keywords
+LABEL_LINKS = {'of', 'von', 'vom', 'de', 'del'}
+
+# Words that turn a command into a sentence → not a simple label, ask Qwen
+CONNECTIVES = {
+    'is', 'are', 'was', 'ist', 'sind', 'es', 'son', 'está',
+    'that', 'dass', 'que', 'as', 'als', 'como', 'to', 'zu', 'para', 'for', 'für',
+    'in', 'im', 'en', 'from', 'aus', 'and', 'und', 'y', 'or', 'oder', 'o',
+    'how', 'wie', 'what', 'was', 'qué', 'cómo', 'this', 'dies', 'esto',
+}
+
+# RETRIEVE label meaning "everything"
+ALL_WORDS = {'all', 'everything', 'data', 'alle', 'alles', 'daten', 'todo', 'todos', 'datos'}
+
+_LABEL_WORD_RE = re.compile(r"^[^\W\d_]+(?:['’-][^\W\d_]+)*$")
+_DIGIT_RUN_RE = re.compile(r'\d{5,}')
+_EMAIL_RE = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+_TRAILING_PUNCT = '?!.,; '
+
+SQL_SAVE = "INSERT OR REPLACE INTO mydata (content, meta, lang) VALUES (?, ?, ?)"
+SQL_SELECT = "SELECT id, content, meta, timestamp FROM mydata"
+SQL_DELETE = "DELETE FROM mydata"
+
+
+def retrieve_statement(words: List[str]) -> Tuple[str, Tuple]:
+    """SELECT for keywords, one OR group per keyword ("mothers favorite meal" → mothers | favorite | meal)"""
+    if not words:
+        return f"{SQL_SELECT} ORDER BY timestamp DESC", ()
+    if len(words) == 1:
+        where = "meta LIKE ? OR content LIKE ?"
+    else:
+        where = " OR ".join(["(meta LIKE ? OR content LIKE ?)"] * len(words))
+    params = tuple(pattern for word in words for pattern in (f"%{word}%", f"%{word}%"))
+    return f"{SQL_SELECT} WHERE {where} ORDER BY timestamp DESC", params
+
+
+def looks_like_value(token: str) -> bool:
+    """Data token (email, phone, date, key, URL) as opposed to a label word"""
+    return '@' in token or '://' in token or any(ch.isdigit() for ch in token)
+
+
+def looks_like_data(token: str) -> bool:
+    """Value that is stored data on its own ("5551234", "sk-abc123xyz"), unlike the 42 of "line 42" """
+    return ('@' in token or '://' in token or bool(_DIGIT_RUN_RE.search(token))
+            or (len(token) >= 8 and any(ch.isdigit() for ch in token)))
+
+
+class RuleSQLParser:
+    """Deterministic SAVE/RETRIEVE/DELETE → parameterized SQL"""
+
+    def __init__(self, detector, language: str = 'en',
+                 stored_labels: Optional[Callable[[], Iterable[str]]] = None):
+        """
+        Args:
+            detector: LocalStorageDetector (verb keywords + their languages, already loaded)
+            language: Configured language - preferred when a verb exists in several lang files
+            stored_labels: Optional callable → meta labels in mydata ("show email" without
+                a possessive is only a lookup if "email" is stored)
+        """
+        self.categories = detector.categories
+        self.keyword_langs = getattr(detector, 'keyword_langs', {})
+        self.language = language
+        self.stored_labels = stored_labels
+
+    def parse(self, user_input: str, action_hint: str) -> Optional[Dict]:
+        """
+        Try to turn user input into SQL without the LLM
+
+        Args:
+            user_input: User's raw input
+            action_hint: Detected action (SAVE, RETRIEVE, DELETE)
+
+        Returns:
+            dict: {
+                'sql': statement with ? placeholders,
+                'params': tuple,
+                'action': 'SAVE|RETRIEVE|DELETE',
+                'confidence': 0.0-1.0,
+                'meta': label (SAVE only),
+                'valid': True,
+                'source': 'rules'
+            }
+            or None if the input is not a shape the rules understand
+        """
+        split = self._split_verb(user_input, action_hint)
+        if split is None:
+            return None
+        lang, rest = split
+
+        if action_hint == 'SAVE':
+            parsed = self._parse_save(rest, lang)
+        elif action_hint == 'RETRIEVE':
+            parsed = self._parse_retrieve(rest)
+        elif action_hint == 'DELETE':
+            parsed = self._parse_delete(rest)
+        else:
+            parsed = None
+
+        if parsed is None:
+            return None
+
+        sql, params, confidence, meta = parsed
+        return {
+            'sql': sql,
+            'params': params,
+            'action': action_hint,
+            'confidence': confidence,
+            'meta': meta,
+            'valid': True,
+            'error': None,
+            'source': 'rules'
+        }
+
+    def _split_verb(self, user_input: str, action_hint: str) -> Optional[Tuple[str, str]]:
+        """
+        Strip leading verb (+ fillers) → (lang, remaining text)
+
+        The verb must be the first word and belong to the hinted action.
+        """
+        verbs = self.categories.get(action_hint, set())
+        text = user_input.strip().rstrip(_TRAILING_PUNCT)
+        parts = text.split(None, 1)
+        if len(parts) < 2:
+            return None
+
+        verb = parts[0].lower().rstrip(',')
+        if verb not in verbs:
+            return None
+
+        rest = parts[1]
+        while True:
+            head = rest.split(None, 1)
+            if len(head) == 2 and head[0].lower().rstrip(',') in FILLERS:
+                rest = head[1]
+            else:
+                break
+
+        return self._verb_lang(verb), rest.strip()
+
+    def _verb_lang(self, verb: str) -> str:
+        langs = self.keyword_langs.get(verb) or []
+        if self.language in langs or not langs:
+            return self.language
+        return langs[0]
+
+    @staticmethod
+    def _strip_determiners(tokens: List[str]) -> List[str]:
+        start = 0
+        while start < len(tokens) and tokens[start].lower() in DETERMINERS:
+            start += 1
+        return tokens[start:]
+
+    def _refers_to_data(self, tokens: List[str], label: str) -> bool:
+        """Possessive in front of the label, or the label is already stored"""
+        if tokens and tokens[0].lower() in POSSESSIVES:
+            return True
+        if self.stored_labels is None:
+            return False
+        try:
+            stored = {str(meta).lower() for meta in self.stored_labels() if meta}
+        except Exception:
+            return False
+        return label.lower() in stored
+
+    def _label(self, tokens: List[str]) -> Optional[str]:
+        """Join label words, or None if they do not form a simple label"""
+        words = [token.rstrip(_TRAILING_PUNCT) for token in self._strip_determiners(tokens)]
+        if not words or len(words) > MAX_LABEL_WORDS:
+            return None
+        if words[0].lower() in LABEL_LINKS or words[-1].lower() in LABEL_LINKS:
+            return None
+
+        for word in words:
+            lower = word.lower()
+            if not _LABEL_WORD_RE.match(word) or lower in CONNECTIVES:
+                return None
+            if any(lower in verbs for verbs in self.categories.values()):
+                return None  # second verb → compound request
+
+        return ' '.join(words)
+
+    def _parse_save(self, rest: str, lang: str):
+        # "label: value" (value may contain spaces)
+        if ':' in rest:
+            label_text, value = rest.split(':', 1)
+            label = self._label(label_text.split())
+            value = value.strip()
+            if not label or not value:
+                return None
+            return SQL_SAVE, (value, label, lang), 0.95, label
+
+        # "label value" - exactly one data token, and it comes last
+        tokens = rest.split()
+        value_positions = [i for i, token in enumerate(tokens) if looks_like_value(token)]
+        if value_positions != [len(tokens) - 1]:
+            return None
+
+        value = tokens[-1]
+        label_tokens = self._strip_determiners(tokens[:-1])
+        if not label_tokens:
+            # Bare value - only an email address names its own label
+            if _EMAIL_RE.match(value):
+                return SQL_SAVE, (value, 'email', lang), 0.8, 'email'
+            return None
+
+        label = self._label(label_tokens)
+        if not label:
+            return None
+        return SQL_SAVE, (value, label, lang), 0.9, label
+
+    def _parse_retrieve(self, rest: str):
+        tokens = rest.split()
+        if any(looks_like_value(token) for token in tokens):
+            return None
+
+        label = self._label(tokens)
+        if not label:
+            return None
+
+        words = [word for word in label.split() if word.lower() not in LABEL_LINKS]
+        if all(word.lower() in ALL_WORDS for word in words):
+            words = []
+        elif not self._refers_to_data(tokens, label):
+            return None  # "tell me a joke", "check the weather" → chat, not a lookup
+
+        sql, params = retrieve_statement(words)
+        return sql, params, 0.9, None
+
+    def _parse_delete(self, rest: str):
+        tokens = rest.split()
+        values = [token for token in tokens if looks_like_value(token)]
+
+        # VALUE is more specific than LABEL → delete exactly that row
+        if values:
+            if len(values) != 1 or not looks_like_value(tokens[-1]):
+                return None
+            label_tokens = self._strip_determiners(tokens[:-1])
+            label = self._label(label_tokens) if label_tokens else None
+            if label_tokens and not label:
+                return None
+            confidence = 0.9 if label_tokens else 0.95
+            if not looks_like_data(tokens[-1]) and not (label and self._refers_to_data(tokens[:-1], label)):
+                confidence = 0.7  # "delete step 3", "remove line 42" → Qwen decides
+            return f"{SQL_DELETE} WHERE content = ?", (tokens[-1],), confidence, None
+
+        label = self._label(tokens)
+        if not label:
+            return None
+        if all(word.lower() in ALL_WORDS for word in label.split()):
+            return None  # "delete all" stays with Qwen
+        if not self._refers_to_data(tokens, label):
+            return None
+
+        return f"{SQL_DELETE} WHERE meta LIKE ?", (f"%{label}%",), 0.9, None
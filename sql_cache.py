@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SQL Generation Cache
+Reuses Qwen's SQL for repeated phrasings instead of re-running the 7B model
+
+"show my email", "zeig meine Adresse" come back many times a day and each
+time generate_sql spent ~1s producing the same statement. Now:
+- key = prompt version + action hint + normalized input
+  (case-folded, accents stripped, whitespace collapsed, trailing ?!. dropped)
+- data values in the input (tokens with digits or @: emails, phones, dates,
+  IBANs, ...) become slots → "save my email <v0>" is one template for every
+  address; the cached SQL holds ? placeholders and the values are bound as
+  params on a hit - never spliced into SQL text
+- SAVE / DELETE are only cached when their content is such a slot: plain-word
+  values ("save my mothers name irene") are never written to the cache file
+- LRU (512 entries) + TTL (7 days), persisted to ~/.aichat/sql_cache.json
+  (mode 0600) and reloaded on daemon start; other prompt versions are dropped
+- only valid SAVE / RETRIEVE / DELETE results are cached (a Qwen timeout also
+  looks like NO_ACTION)
+- results that already carry params (structured intent output, v11.8.0):
+  params equal to an input value (or %value%) become slots, the rest (labels,
+  keywords, lang) stay constant bindings; content params must be slots
+"""
+
+import json
+import os
+import re
+import sys
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+MAX_ENTRIES = 512
+DEFAULT_TTL = 7 * 24 * 3600.0
+CACHED_ACTIONS = ('SAVE', 'RETRIEVE', 'DELETE')
+
+# Data-looking tokens: contain a digit or an @ (emails, phones, dates, IBANs, passwords)
+_VALUE_RE = re.compile(r"""[^\s'"]*[\d@][^\s'"]*""")
+_SQL_LITERAL_RE = re.compile(r"'((?:[^']|'')*)'")
+_SAVE_CONTENT_RE = re.compile(r"VALUES\s*\(\s*\?", re.IGNORECASE)
+_CONTENT_LITERAL_RE = re.compile(r"content\s*(?:=|LIKE)\s*'", re.IGNORECASE)
+_CONTENT_PLACEHOLDER_RE = re.compile(r"(?:content\s*(?:=|LIKE)|VALUES\s*\()\s*\?", re.IGNORECASE)
+
+
+def normalize(text: str) -> str:
+    """Case-fold, strip accents, collapse whitespace, drop trailing punctuation"""
+    decomposed = unicodedata.normalize('NFKD', text)
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return ' '.join(stripped.casefold().split()).rstrip('?!.¿¡ ')
+
+
+def extract_values(text: str) -> Tuple[str, List[str]]:
+    """
+    Replace data values with slots
+
+    Returns:
+        (shape, values) - "save my email anna@x.com" → ("save my email <v0>", ["anna@x.com"])
+    """
+    values: List[str] = []
+
+    def slot(match):
+        value = match.group(0).rstrip('.,;?')
+        values.append(value)
+        return f"<v{len(values) - 1}>" + match.group(0)[len(value):]
+
+    return _VALUE_RE.sub(slot, text), values
+
+
+def to_template(sql: str, values: List[str]) -> Optional[Tuple[str, List[List[Any]]]]:
+    """
+    Parameterize the input's values out of generated SQL
+
+    Literals equal to a value → ?, '%value%' → ? bound as %value%.
+    Returns None if a value only appears inside a larger literal or not at
+    all (can't be re-bound safely).
+
+    Returns:
+        (template_sql, bindings) - bindings: [[value index, 'exact'|'like'], ...]
+    """
+    bindings: List[List[Any]] = []
+    used = set()
+    failed = False
+
+    def replace(match):
+        nonlocal failed
+        literal = match.group(1).replace("''", "'")
+        for index, value in enumerate(values):
+            if literal == value:
+                bindings.append([index, 'exact'])
+            elif literal == f"%{value}%":
+                bindings.append([index, 'like'])
+            elif value in literal:
+                failed = True
+                return match.group(0)
+            else:
+                continue
+            used.add(index)
+            return '?'
+        return match.group(0)
+
+    template = _SQL_LITERAL_RE.sub(replace, sql)
+    if failed or len(used) != len(values):
+        return None
+    return template, bindings
+
+
+def bind_params(sql: str, params: List[Any], values: List[str]) -> Optional[List[List[Any]]]:
+    """
+    Bindings for a result that is already parameterized
+
+    Params equal to a value (or %value%) → slot; other params → [param, 'const'].
+    Returns None if a value is hidden inside a larger param, a value is unused,
+    or a content placeholder would be constant (plain-word data).
+
+    Returns:
+        bindings: [[value index, 'exact'|'like'] or [param, 'const'], ...]
+    """
+    bindings: List[List[Any]] = []
+    used = set()
+    for param in params:
+        for index, value in enumerate(values):
+            if param == value:
+                bindings.append([index, 'exact'])
+            elif param == f"%{value}%":
+                bindings.append([index, 'like'])
+            elif isinstance(param, str) and value in param:
+                return None
+            else:
+                continue
+            used.add(index)
+            break
+        else:
+            bindings.append([param, 'const'])
+    if len(used) != len(values):
+        return None
+
+    # Position of each content ? among all placeholders
+    for match in _CONTENT_PLACEHOLDER_RE.finditer(sql):
+        position = sql.count('?', 0, match.end() - 1)
+        if position >= len(bindings) or bindings[position][1] == 'const':
+            return None
+    return bindings
+
+
+class SQLCache:
+    """Thread-safe LRU + TTL cache of generated SQL templates"""
+
+    def __init__(self, prompt_version: str, path: str = None, max_entries: int = MAX_ENTRIES,
+                 ttl: float = DEFAULT_TTL):
+        """
+        Args:
+            prompt_version: Part of every key - changing prompts invalidates old entries
+            path: Optional JSON file the cache is persisted to / loaded from
+            max_entries: LRU capacity
+            ttl: Seconds an entry stays valid
+        """
+        self.prompt_version = prompt_version
+        self.path = os.path.expanduser(path) if path else None
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self._entries: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+
+        if self.path:
+            self._load()
+
+    def key(self, shape: str, action_hint: str) -> str:
+        return f"{self.prompt_version}|{action_hint}|{normalize(shape)}"
+
+    def get(self, user_input: str, action_hint: str) -> Optional[Dict[str, Any]]:
+        """
+        Cached result for an input, values bound from this input
+
+        Returns:
+            {'sql', 'params', 'action', 'confidence', 'cached': True} or None
+        """
+        shape, values = extract_values(user_input)
+        key = self.key(shape, action_hint)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.time() - entry['created'] > self.ttl:
+                if entry is not None:
+                    del self._entries[key]
+                    self._dirty = True
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+        params = []
+        for index, mode in entry['bindings']:
+            if mode == 'const':
+                params.append(index)
+                continue
+            value = values[index]
+            params.append(f"%{value}%" if mode == 'like' else value)
+        return {
+            'sql': entry['sql'],
+            'params': params,
+            'action': entry['action'],
+            'confidence': entry['confidence'],
+            'cached': True
+        }
+
+    def put(self, user_input: str, action_hint: str, result: Dict[str, Any]) -> bool:
+        """
+        Cache a valid generation result as a template
+
+        Returns:
+            True if stored (False: action not cacheable, or values not parameterizable)
+        """
+        if result.get('action') not in CACHED_ACTIONS or not result.get('valid'):
+            return False
+
+        shape, values = extract_values(user_input)
+        if result.get('params'):
+            sql = result['sql']
+            bindings = bind_params(sql, list(result['params']), values)
+            if bindings is None:
+                return False
+            template = (sql, bindings)
+        else:
+            template = to_template(result['sql'], values)
+        if template is None:
+            return False
+        sql, bindings = template
+        # Content still a literal → plain-word data ("irene"), keep it out of the cache file
+        if result['action'] == 'SAVE' and not _SAVE_CONTENT_RE.search(sql):
+            return False
+        if result['action'] == 'DELETE' and _CONTENT_LITERAL_RE.search(sql):
+            return False
+
+        key = self.key(shape, action_hint)
+        with self._lock:
+            self._entries[key] = {
+                'sql': sql,
+                'bindings': bindings,
+                'action': result['action'],
+                'confidence': result.get('confidence', 0.9),
+                'created': time.time()
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._dirty = True
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._dirty = True
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def save(self) -> bool:
+        """Write the cache file if anything changed (daemon idle loop, shutdown)"""
+        if not self.path:
+            return False
+        with self._lock:
+            if not self._dirty:
+                return False
+            data = {'prompt_version': self.prompt_version, 'entries': dict(self._entries)}
+            self._dirty = False
+
+        tmp_path = f"{self.path}.tmp"
+        try:
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            return True
+        except OSError as e:
+            print(f"⚠️  Could not save SQL cache: {e}", file=sys.stderr)
+            with self._lock:
+                self._dirty = True
+            return False
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Could not load SQL cache: {e}", file=sys.stderr)
+            return
+
+        if data.get('prompt_version') != self.prompt_version:
+            self._dirty = True  # Prompts changed - start over
+            return
+        now = time.time()
+        for key, entry in (data.get('entries') or {}).items():
+            if now - entry.get('created', 0) <= self.ttl:
+                self._entries[key] = entry
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
@@ -156,6 +156,38 @@ def memory_system_with_data(memory_system):
     return memory_system
 
 
+@pytest.fixture
+def history_system(temp_db_path):
+    """
+    ChatSystem with only the chat_history parts set up (no API key, no Ollama)
+
+    Args:
+        temp_db_path: Temporary database path fixture
+
+    Returns:
+        ChatSystem with db, context_cache (4 rows) and history_writer
+    """
+    from chat_system import ChatSystem
+    from context_cache import SessionContextCache
+    from db_repository import DatabaseRepository
+    from history_writer import HistoryWriter
+
+    system = ChatSystem.__new__(ChatSystem)
+    system.db = DatabaseRepository(temp_db_path)
+    system.lang_manager = None
+    system.history_rows = 4
+    system.context_cache = SessionContextCache(system.history_rows)
+    system.summarizer = None
+    system.history_writer = HistoryWriter(system.db)
+    system._ensure_chat_history_table()
+
+    yield system
+
+    # Cleanup
+    system.history_writer.close()
+    system.db.close()
+
+
 # ============================================================================
 # FIXTURES: Component Instances
 # ============================================================================
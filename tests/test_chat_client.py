@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the thin chat client (one-shot + coprocess mode)
+"""
+
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from tests.test_daemon_protocol import FakeChatSystem
+
+CLIENT = str(Path(__file__).parent.parent / "chat_client.py")
+
+
+@pytest.fixture
+def daemon_socket(tmp_path):
+    """ChatDaemon with fake ChatSystem, returns its socket path"""
+    import chat_daemon
+
+    socket_path = str(tmp_path / "chat_daemon.sock")
+    with patch.object(chat_daemon, 'ChatSystem', FakeChatSystem):
+        daemon = chat_daemon.ChatDaemon(socket_path=socket_path)
+
+    thread = threading.Thread(target=daemon.start, daemon=True)
+    thread.start()
+    for _ in range(50):
+        if daemon.running:
+            break
+        time.sleep(0.02)
+
+    yield socket_path
+
+    daemon.running = False
+    thread.join(timeout=3)
+
+
+def client_env(socket_path, **extra):
+    env = dict(os.environ, AICHAT_DAEMON_SOCKET=socket_path)
+    env.update(extra)
+    return env
+
+
+class TestThinClient:
+    def test_minimal_imports(self):
+        code = (
+            "import sys; sys.path.insert(0, %r); import chat_client; "
+            "print(','.join(m for m in ('subprocess', 'signal', 'requests', 'daemon_manager', "
+            "'ollama_manager', 'liveness', 'chat_system') if m in sys.modules))"
+        ) % str(Path(CLIENT).parent)
+        result = subprocess.run([sys.executable, "-S", "-c", code], capture_output=True, text=True)
+
+        assert result.returncode == 0
+        assert result.stdout.strip() == ""
+
+    def test_message_mode(self, daemon_socket):
+        result = subprocess.run(
+            [sys.executable, "-S", CLIENT, "message", "s1", "hello world"],
+            capture_output=True, text=True, timeout=10,
+            env=client_env(daemon_socket, AICHAT_STREAM_PREFIX="AI> ")
+        )
+
+        assert result.returncode == 0
+        assert result.stdout == "AI> echo: hello world \n"
+
+    def test_serve_mode_multiple_turns(self, daemon_socket):
+        process = subprocess.Popen(
+            [sys.executable, "-S", CLIENT, "serve"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            env=client_env(daemon_socket)
+        )
+        try:
+            for text in ("first turn", "line one\n\nline two"):
+                request = "\0".join(["s1", text, "system\nprompt", "> "]) + "\0"
+                process.stdin.write(request.encode('utf-8'))
+                process.stdin.flush()
+                assert process.stdout.readline() == b"0\n"
+        finally:
+            process.stdin.close()
+            process.wait(timeout=5)
+
+        # Replies went to stderr (the terminal in zsh)
+        stderr = process.stderr.read().decode('utf-8')
+        assert "> echo: first turn \n" in stderr
+        assert "> echo: line one\n\nline two \n" in stderr
+        assert process.returncode == 0
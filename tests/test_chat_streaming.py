@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for OpenAI SSE stream parsing and block-wise markdown forwarding
+"""
+
+import json
+
+import pytest
+
+pytest.importorskip("requests")
+
+from chat_system import ChatSystem, _MarkdownBlockBuffer
+
+
+class FakeStreamResponse:
+    """Mimics requests.Response.iter_lines() for an SSE body"""
+
+    def __init__(self, lines):
+        self.lines = lines
+        self.closed = False
+
+    def iter_lines(self):
+        for line in self.lines:
+            yield line.encode('utf-8')
+
+    def close(self):
+        self.closed = True
+
+
+def sse(*deltas):
+    """Build SSE lines for the given content deltas"""
+    lines = [f"data: {json.dumps({'choices': [{'delta': {'role': 'assistant'}}]})}", ""]
+    for delta in deltas:
+        lines.append(f"data: {json.dumps({'choices': [{'delta': {'content': delta}}]})}")
+        lines.append("")
+    lines.append("data: [DONE]")
+    return lines
+
+
+class TestSSEParsing:
+    """Test ChatSystem._iter_sse_deltas"""
+
+    def test_deltas_in_order(self):
+        response = FakeStreamResponse(sse("Hel", "lo", " wörld"))
+
+        assert list(ChatSystem._iter_sse_deltas(response)) == ["Hel", "lo", " wörld"]
+        assert response.closed
+
+    def test_ignores_keepalive_and_garbage(self):
+        lines = [": keep-alive", "event: ping", "data: {not json"] + sse("ok")
+        response = FakeStreamResponse(lines)
+
+        assert list(ChatSystem._iter_sse_deltas(response)) == ["ok"]
+
+    def test_stops_at_done(self):
+        lines = sse("a") + [f"data: {json.dumps({'choices': [{'delta': {'content': 'late'}}]})}"]
+
+        assert list(ChatSystem._iter_sse_deltas(FakeStreamResponse(lines))) == ["a"]
+
+
+class TestMarkdownBlockBuffer:
+    """Test block-wise buffering for rendered streaming"""
+
+    def test_releases_complete_paragraphs(self):
+        buffer = _MarkdownBlockBuffer(lambda text: f"<{text}>")
+
+        assert buffer.feed("First para") == []
+        assert buffer.feed("graph.\n\nSecond") == ["<First paragraph.>"]
+        assert buffer.flush() == "\n<Second>"
+
+    def test_code_fence_kept_whole(self):
+        buffer = _MarkdownBlockBuffer(lambda text: f"<{text}>")
+
+        assert buffer.feed("```python\nx = 1\n\ny = 2\n") == []
+        assert buffer.feed("```\n\nAfter") == ["<```python\nx = 1\n\ny = 2\n```>"]
+        assert buffer.flush() == "\n<After>"
+
+    def test_empty_flush(self):
+        buffer = _MarkdownBlockBuffer(lambda text: text)
+
+        assert buffer.flush() == ""
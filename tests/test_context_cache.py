@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for SessionContextCache - per-session chat_history window in RAM
+"""
+
+from context_cache import SessionContextCache
+
+
+class TestSessionContextCache:
+    def test_miss_then_hit(self):
+        cache = SessionContextCache(window=4)
+        assert cache.get('s1') is None
+
+        cache.fill('s1', [{'role': 'user', 'content': 'hi'}, None])
+        assert cache.get('s1') == [{'role': 'user', 'content': 'hi'}]
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_window_bound_counts_private_rows(self):
+        cache = SessionContextCache(window=2)
+        cache.fill('s1', [])
+        cache.append('s1', {'role': 'user', 'content': 'a'})
+        cache.append('s1', None)
+        cache.append('s1', {'role': 'user', 'content': 'b'})
+
+        assert cache.get('s1') == [{'role': 'user', 'content': 'b'}]
+
+    def test_append_to_uncached_session_is_ignored(self):
+        cache = SessionContextCache(window=4)
+        cache.append('s1', {'role': 'user', 'content': 'a'})
+        assert cache.get('s1') is None
+
+    def test_lru_eviction(self):
+        cache = SessionContextCache(window=4, max_sessions=2)
+        cache.fill('s1', [])
+        cache.fill('s2', [])
+        cache.get('s1')
+        cache.fill('s3', [])
+
+        assert cache.get('s2') is None
+        assert cache.get('s1') == []
+
+    def test_invalidate(self):
+        cache = SessionContextCache(window=4)
+        cache.fill('s1', [])
+        cache.fill('s2', [])
+        cache.invalidate('s1')
+        assert cache.get('s1') is None
+        cache.invalidate()
+        assert len(cache) == 0
+
+    def test_returned_messages_are_copies(self):
+        cache = SessionContextCache(window=4)
+        cache.fill('s1', [{'role': 'user', 'content': 'a'}])
+        cache.get('s1')[0]['content'] = 'changed'
+        assert cache.get('s1') == [{'role': 'user', 'content': 'a'}]
+
+
+class TestChatSystemContext:
+    def test_write_through_matches_db(self, history_system):
+        assert history_system.get_chat_history('s1') == []  # miss → cached empty window
+
+        history_system.save_message_to_db('s1', 'user', 'one')
+        history_system.save_message_to_db('s1', 'assistant', 'secret', {'privacy_category': 'email'})
+        for i in range(3):
+            history_system.save_message_to_db('s1', 'user', f"msg {i}")
+
+        cached, hit = history_system._session_context('s1')
+        assert hit is True
+        assert cached == [{'role': 'user', 'content': f"msg {i}"} for i in range(3)]
+        assert cached == history_system.get_chat_history('s1', limit=4)  # same as the DB query
+
+    def test_private_rows_never_returned(self, history_system):
+        history_system.save_message_to_db('s1', 'user', 'my email is a@b.com', {'privacy_category': 'email'})
+        assert history_system.get_chat_history('s1') == []
+
+    def test_delete_all_invalidates(self, history_system):
+        history_system.get_chat_history('s1')
+        history_system.save_message_to_db('s1', 'user', 'hello')
+        history_system.delete_all_chat_history()
+
+        assert history_system.context_cache.get('s1') is None
+        assert history_system.get_chat_history('s1') == []
+
+
+class TestWindowPositions:
+    def test_start_advances_on_eviction(self):
+        cache = SessionContextCache(window=2)
+        cache.fill('s1', [], start=5)
+        for content in ('a', 'b', 'c'):
+            cache.append('s1', {'role': 'user', 'content': content})
+
+        start, entries = cache.snapshot('s1')
+        assert start == 6
+        assert [e['content'] for e in entries] == ['b', 'c']
+
+    def test_fold(self):
+        cache = SessionContextCache(window=4)
+        cache.fill('s1', [{'role': 'user', 'content': c} for c in 'abcd'], start=10)
+        cache.fold('s1', 12)
+
+        assert cache.snapshot('s1') == (12, [{'role': 'user', 'content': 'c'}, {'role': 'user', 'content': 'd'}])
+        cache.fold('s1', 11)  # already folded - no-op
+        assert cache.snapshot('s1')[0] == 12
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for ConversationSummarizer - rolling per-session summaries
+"""
+
+import threading
+
+import pytest
+
+from context_cache import SessionContextCache
+from conversation_summary import SUMMARY_PREFIX, ConversationSummarizer
+from tokenizer import Tokenizer
+
+
+class FakeOllama:
+    """Records chat() calls, answers with a numbered summary"""
+
+    def __init__(self, fail=False):
+        self.calls = []
+        self.fail = fail
+
+    def chat(self, model, messages, **kwargs):
+        self.calls.append(messages)
+        if self.fail:
+            raise ConnectionError("ollama down")
+        return {'message': {'role': 'assistant', 'content': f"summary {len(self.calls)}"}}
+
+
+def turn(i):
+    return [{'role': 'user', 'content': f"question {i} " + "word " * 20},
+            {'role': 'assistant', 'content': f"answer {i} " + "word " * 20}]
+
+
+@pytest.fixture
+def cache():
+    cache = SessionContextCache(window=40)
+    cache.fill('s1', [])
+    return cache
+
+
+def summarizer_for(cache, client, tmp_path, threshold=100):
+    return ConversationSummarizer(cache, Tokenizer(vocab_dir=str(tmp_path)), client=client,
+                                  threshold_tokens=threshold, keep_recent=2)
+
+
+class TestCompaction:
+    def test_below_threshold_does_nothing(self, cache, tmp_path):
+        client = FakeOllama()
+        summarizer = summarizer_for(cache, client, tmp_path, threshold=10_000)
+        for message in turn(1):
+            cache.append('s1', message)
+
+        assert summarizer.compact('s1') is False
+        assert client.calls == []
+
+    def test_folds_oldest_messages(self, cache, tmp_path):
+        client = FakeOllama()
+        summarizer = summarizer_for(cache, client, tmp_path)
+        for i in range(4):
+            for message in turn(i):
+                cache.append('s1', message)
+        cache.append('s1', None)  # private row - never summarized
+
+        assert summarizer.compact('s1') is True
+        assert summarizer.folded('s1') == 7
+        assert summarizer.summary_message('s1') == {'role': 'system', 'content': SUMMARY_PREFIX + "summary 1"}
+
+        prompt = client.calls[0][1]['content']
+        assert "question 0" in prompt and "question 3" in prompt
+        assert "answer 3" not in prompt  # kept verbatim
+
+        start, entries = cache.snapshot('s1')
+        assert start == 7
+        assert entries == [turn(3)[1], None]
+
+    def test_skipped_while_qwen_busy(self, cache, tmp_path):
+        client = FakeOllama()
+        busy = [True]
+        summarizer = ConversationSummarizer(cache, Tokenizer(vocab_dir=str(tmp_path)), client=client,
+                                            threshold_tokens=100, keep_recent=2, busy=lambda: busy[0])
+        for i in range(4):
+            for message in turn(i):
+                cache.append('s1', message)
+
+        assert summarizer.compact('s1') is False
+        assert client.calls == [] and summarizer.skipped_busy == 1
+
+        busy[0] = False
+        assert summarizer.compact('s1') is True
+
+    def test_previous_summary_is_merged(self, cache, tmp_path):
+        client = FakeOllama()
+        summarizer = summarizer_for(cache, client, tmp_path)
+        for i in range(8):
+            for message in turn(i):
+                cache.append('s1', message)
+            summarizer.compact('s1')
+
+        assert "summary 1" in client.calls[1][1]['content']
+        assert summarizer.summary('s1') == f"summary {len(client.calls)}"
+
+    def test_failure_keeps_window(self, cache, tmp_path):
+        summarizer = summarizer_for(cache, FakeOllama(fail=True), tmp_path)
+        for i in range(4):
+            for message in turn(i):
+                cache.append('s1', message)
+
+        assert summarizer.compact('s1') is False
+        assert summarizer.folded('s1') == 0
+        assert len(cache.snapshot('s1')[1]) == 8
+
+    def test_clear_drops_in_flight_result(self, cache, tmp_path):
+        entered, release = threading.Event(), threading.Event()
+
+        class SlowOllama(FakeOllama):
+            def chat(self, *args, **kwargs):
+                entered.set()
+                release.wait(2)
+                return super().chat(*args, **kwargs)
+
+        summarizer = summarizer_for(cache, SlowOllama(), tmp_path)
+        for i in range(4):
+            for message in turn(i):
+                cache.append('s1', message)
+
+        summarizer.schedule('s1')
+        assert entered.wait(2)
+        summarizer.clear()  # chat history deleted while the model is writing
+        release.set()
+        assert summarizer.wait_idle(5)
+
+        assert summarizer.summary('s1') is None
+        assert summarizer.folded('s1') == 0
+
+
+def test_reload_skips_folded_rows(history_system, tmp_path):
+    history_system.summarizer = summarizer_for(history_system.context_cache, FakeOllama(), tmp_path)
+    history_system.get_chat_history('s1')
+    for i in range(3):
+        for message in turn(i):
+            history_system.save_message_to_db('s1', message['role'], message['content'])
+
+    assert history_system.summarizer.compact('s1') is True
+
+    history_system.context_cache.invalidate()  # e.g. evicted → reloaded from the DB
+    assert history_system.get_chat_history('s1') == turn(2)
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for daemon_protocol - length-prefixed frames over Unix sockets
+"""
+
+import socket
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+import daemon_protocol
+from daemon_protocol import FrameReader, ProtocolError, encode_frame, send_frame
+
+
+@pytest.fixture
+def socket_pair():
+    """Connected pair of Unix stream sockets"""
+    left, right = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+    yield left, right
+    left.close()
+    right.close()
+
+
+class TestFraming:
+    """Test frame encoding/decoding"""
+
+    def test_roundtrip(self, socket_pair):
+        left, right = socket_pair
+        send_frame(left, {'action': 'ping'})
+
+        assert FrameReader(right).read_frame() == {'action': 'ping'}
+
+    def test_blank_line_in_payload(self, socket_pair):
+        """Old protocol cut messages at the first blank line"""
+        left, right = socket_pair
+        message = {'action': 'send_message', 'message': "line one\n\nline two\n\n"}
+        send_frame(left, message)
+
+        assert FrameReader(right).read_frame() == message
+
+    def test_large_payload_grows_buffer(self, socket_pair):
+        left, right = socket_pair
+        message = {'message': 'ü' * 200_000}
+        reader = FrameReader(right, initial_size=16)
+
+        sender = threading.Thread(target=send_frame, args=(left, message))
+        sender.start()
+        result = reader.read_frame()
+        sender.join()
+
+        assert result == message
+
+    def test_multiple_frames_same_connection(self, socket_pair):
+        left, right = socket_pair
+        left.sendall(encode_frame({'n': 1}) + encode_frame({'n': 2}))
+        reader = FrameReader(right)
+
+        assert reader.read_frame() == {'n': 1}
+        assert reader.read_frame() == {'n': 2}
+
+    def test_clean_eof_returns_none(self, socket_pair):
+        left, right = socket_pair
+        left.close()
+
+        assert FrameReader(right).read_frame() is None
+
+    def test_truncated_frame_raises(self, socket_pair):
+        left, right = socket_pair
+        left.sendall(encode_frame({'action': 'ping'})[:-2])
+        left.close()
+
+        with pytest.raises(ConnectionError):
+            FrameReader(right).read_frame()
+
+    def test_oversized_header_rejected(self, socket_pair):
+        left, right = socket_pair
+        left.sendall((daemon_protocol.MAX_FRAME_SIZE + 1).to_bytes(4, 'big'))
+
+        with pytest.raises(ProtocolError):
+            FrameReader(right).read_frame()
+
+
+class FakeChatSystem:
+    """Stands in for ChatSystem (no API key, no Ollama)"""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def send_message(self, session_id, user_input, system_prompt="", on_chunk=None):
+        reply = f"echo: {user_input}"
+        if on_chunk:
+            for word in reply.split(' '):
+                on_chunk(word + ' ')
+        return reply, {'error': False, 'source': 'test', 'streamed': on_chunk is not None}
+
+    def delete_all_chat_history(self):
+        pass
+
+
+@pytest.fixture
+def running_daemon(tmp_path):
+    """ChatDaemon with fake ChatSystem listening on a temp Unix socket"""
+    import chat_daemon
+
+    socket_path = str(tmp_path / "chat_daemon.sock")
+    with patch.object(chat_daemon, 'ChatSystem', FakeChatSystem):
+        daemon = chat_daemon.ChatDaemon(socket_path=socket_path)
+
+    thread = threading.Thread(target=daemon.start, daemon=True)
+    thread.start()
+    for _ in range(50):
+        if daemon.running:
+            break
+        time.sleep(0.02)
+
+    yield daemon
+
+    daemon.running = False
+    thread.join(timeout=3)
+
+
+class TestDaemonTransport:
+    """Test ChatDaemon over the Unix socket"""
+
+    def test_ping(self, running_daemon):
+        response = daemon_protocol.request(running_daemon.socket_path, {'action': 'ping'}, timeout=2)
+
+        assert response == {'success': True, 'response': 'pong'}
+
+    def test_message_with_blank_lines(self, running_daemon):
+        message = "first paragraph\n\nsecond paragraph"
+        response = daemon_protocol.request(running_daemon.socket_path, {
+            'action': 'send_message',
+            'session_id': 'test',
+            'message': message
+        }, timeout=2)
+
+        assert response['success'] is True
+        assert response['response'] == f"echo: {message}"
+
+    def test_streamed_message(self, running_daemon):
+        sock = daemon_protocol.connect(running_daemon.socket_path, timeout=2)
+        send_frame(sock, {'action': 'send_message', 'message': 'a b c', 'stream': True})
+        reader = FrameReader(sock)
+
+        frames = []
+        while True:
+            frame = reader.read_frame()
+            frames.append(frame)
+            if frame.get('type') != 'chunk':
+                break
+        sock.close()
+
+        chunks = [f['text'] for f in frames[:-1]]
+        assert ''.join(chunks) == "echo: a b c "
+        assert frames[-1]['success'] is True
+        assert frames[-1]['metadata']['streamed'] is True
+
+    def test_missing_action(self, running_daemon):
+        response = daemon_protocol.request(running_daemon.socket_path, {'foo': 'bar'}, timeout=2)
+
+        assert response['success'] is False
+
+    def test_socket_owner_only(self, running_daemon):
+        import os
+        import stat
+
+        mode = stat.S_IMODE(os.stat(running_daemon.socket_path).st_mode)
+        assert mode & 0o077 == 0
+
+    def test_socket_removed_on_shutdown(self, tmp_path):
+        import os
+        import chat_daemon
+
+        socket_path = str(tmp_path / "chat_daemon.sock")
+        with patch.object(chat_daemon, 'ChatSystem', FakeChatSystem):
+            daemon = chat_daemon.ChatDaemon(socket_path=socket_path)
+        thread = threading.Thread(target=daemon.start, daemon=True)
+        thread.start()
+        for _ in range(50):
+            if os.path.exists(socket_path):
+                break
+            time.sleep(0.02)
+
+        daemon_protocol.request(socket_path, {'action': 'shutdown'}, timeout=2)
+        thread.join(timeout=5)
+
+        assert not os.path.exists(socket_path)
+
+
+class BlockingChatSystem(FakeChatSystem):
+    """Fake ChatSystem whose replies wait for a release event, records call order"""
+
+    def __init__(self, *args, **kwargs):
+        self.release = threading.Event()
+        self.calls = []
+        self.started = threading.Semaphore(0)
+
+    def send_message(self, session_id, user_input, system_prompt="", on_chunk=None):
+        self.calls.append((session_id, user_input))
+        self.started.release()
+        self.release.wait(timeout=5)
+        return super().send_message(session_id, user_input, system_prompt, on_chunk)
+
+
+def start_daemon(tmp_path, chat_system_cls, **kwargs):
+    import chat_daemon
+
+    socket_path = str(tmp_path / "chat_daemon.sock")
+    with patch.object(chat_daemon, 'ChatSystem', chat_system_cls):
+        daemon = chat_daemon.ChatDaemon(socket_path=socket_path, **kwargs)
+
+    thread = threading.Thread(target=daemon.start, daemon=True)
+    thread.start()
+    for _ in range(50):
+        if daemon.running:
+            break
+        time.sleep(0.02)
+    return daemon, thread
+
+
+def send_async(socket_path, session_id, message, results):
+    def run():
+        results.append(daemon_protocol.request(socket_path, {
+            'action': 'send_message',
+            'session_id': session_id,
+            'message': message
+        }, timeout=5))
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+class TestWorkerPool:
+    """Bounded worker pool, busy rejection, per-session ordering"""
+
+    def test_busy_when_queue_full(self, tmp_path):
+        daemon, thread = start_daemon(tmp_path, BlockingChatSystem, workers=1, max_queue=1)
+        chat = daemon.chat_system
+        results = []
+        try:
+            first = send_async(daemon.socket_path, 'a', 'one', results)
+            assert chat.started.acquire(timeout=2)   # worker busy with 'one'
+            second = send_async(daemon.socket_path, 'b', 'two', results)
+            for _ in range(50):
+                if daemon.connection_queue.qsize() == 1:
+                    break
+                time.sleep(0.02)
+
+            # Worker busy + queue full → rejected without waiting
+            response = daemon_protocol.request(daemon.socket_path, {'action': 'ping'}, timeout=2)
+            assert response['success'] is False
+            assert response['busy'] is True
+
+            chat.release.set()
+            first.join(timeout=5)
+            second.join(timeout=5)
+            assert all(r['success'] for r in results)
+            assert all('queue_wait_ms' in r for r in results)
+
+            status = daemon_protocol.request(daemon.socket_path, {'action': 'status'}, timeout=2)['response']
+            assert status['rejected_busy'] == 1
+            assert status['workers'] == 1
+            assert status['max_queue'] == 1
+        finally:
+            chat.release.set()
+            daemon.running = False
+            thread.join(timeout=3)
+
+    def test_silent_rejected_client_does_not_block_accept(self, tmp_path):
+        daemon, thread = start_daemon(tmp_path, BlockingChatSystem, workers=1, max_queue=1)
+        chat = daemon.chat_system
+        results = []
+        silent = []
+        try:
+            first = send_async(daemon.socket_path, 'a', 'one', results)
+            assert chat.started.acquire(timeout=2)
+            second = send_async(daemon.socket_path, 'b', 'two', results)
+            for _ in range(50):
+                if daemon.connection_queue.qsize() == 1:
+                    break
+                time.sleep(0.02)
+
+            # Clients that connect but never send a frame are rejected off the accept thread
+            for _ in range(3):
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                sock.connect(daemon.socket_path)
+                silent.append(sock)
+
+            start = time.monotonic()
+            response = daemon_protocol.request(daemon.socket_path, {'action': 'ping'}, timeout=2)
+            assert response['busy'] is True
+            assert time.monotonic() - start < 0.4  # Not behind 3 × 0.5s drains
+
+            chat.release.set()
+            first.join(timeout=5)
+            second.join(timeout=5)
+        finally:
+            for sock in silent:
+                sock.close()
+            chat.release.set()
+            daemon.running = False
+            thread.join(timeout=3)
+
+    def test_sessions_parallel_and_ordered(self, tmp_path):
+        daemon, thread = start_daemon(tmp_path, BlockingChatSystem, workers=4, max_queue=8)
+        chat = daemon.chat_system
+        results = []
+        threads = []
+        try:
+            threads.append(send_async(daemon.socket_path, 'a', 'a1', results))
+            assert chat.started.acquire(timeout=2)
+            threads.append(send_async(daemon.socket_path, 'a', 'a2', results))
+            time.sleep(0.1)
+            threads.append(send_async(daemon.socket_path, 'a', 'a3', results))
+
+            # Other session is not blocked by session 'a'
+            threads.append(send_async(daemon.socket_path, 'b', 'b1', results))
+            assert chat.started.acquire(timeout=2)
+            assert chat.calls == [('a', 'a1'), ('b', 'b1')]
+
+            chat.release.set()
+            for t in threads:
+                t.join(timeout=5)
+
+            assert [c for c in chat.calls if c[0] == 'a'] == [('a', 'a1'), ('a', 'a2'), ('a', 'a3')]
+            assert len(results) == 4
+
+            # Locks of finished sessions are dropped, not kept for the daemon's lifetime
+            for _ in range(50):
+                if not daemon._session_locks:
+                    break
+                time.sleep(0.02)
+            assert daemon._session_locks == {}
+        finally:
+            chat.release.set()
+            daemon.running = False
+            thread.join(timeout=3)
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for DatabaseRepository - pooled connections to memory.db
+"""
+
+import threading
+
+import pytest
+
+import db_repository
+from db_repository import DatabaseRepository, get_repository, release_repository
+
+
+@pytest.fixture
+def repo(temp_db_path):
+    repo = DatabaseRepository(temp_db_path, read_pool_size=2)
+    repo.executescript("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)")
+    yield repo
+    repo.close()
+
+
+class TestRepository:
+    """Test writer, readers and transactions"""
+
+    def test_write_then_read(self, repo):
+        result = repo.execute("INSERT INTO items (name) VALUES (?)", ("a",))
+
+        assert result.lastrowid == 1
+        assert repo.query("SELECT name FROM items") == [("a",)]
+        assert repo.query_one("SELECT COUNT(*) FROM items") == (1,)
+
+    def test_executemany(self, repo):
+        repo.executemany("INSERT INTO items (name) VALUES (?)", [("a",), ("b",), ("c",)])
+
+        assert repo.query_one("SELECT COUNT(*) FROM items") == (3,)
+
+    def test_transaction_rollback(self, repo):
+        with pytest.raises(RuntimeError):
+            with repo.transaction() as conn:
+                conn.execute("INSERT INTO items (name) VALUES ('x')")
+                raise RuntimeError("boom")
+
+        assert repo.query_one("SELECT COUNT(*) FROM items") == (0,)
+
+    def test_readers_are_reused(self, repo):
+        for _ in range(20):
+            repo.query("SELECT * FROM items")
+
+        assert repo._readers_opened == 1
+
+    def test_reader_pool_bounded(self, repo):
+        errors = []
+
+        def worker(n):
+            try:
+                for i in range(20):
+                    repo.execute("INSERT INTO items (name) VALUES (?)", (f"{n}-{i}",))
+                    repo.query("SELECT COUNT(*) FROM items")
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert errors == []
+        assert repo._readers_opened <= 2
+        assert repo.query_one("SELECT COUNT(*) FROM items") == (120,)
+
+    def test_table_exists(self, repo):
+        assert repo.table_exists('items')
+        assert not repo.table_exists('missing')
+
+    def test_in_memory_database(self):
+        repo = DatabaseRepository(':memory:')
+        repo.execute("CREATE TABLE t (x)")
+        repo.execute("INSERT INTO t VALUES (1)")
+
+        assert repo.query("SELECT x FROM t") == [(1,)]
+        repo.close()
+
+
+class TestSharedRepository:
+    """Test process-wide sharing between ChatSystem and ChatMemorySystem"""
+
+    def test_same_instance_per_file(self, temp_db_path):
+        first = get_repository(temp_db_path)
+        second = get_repository(str(temp_db_path))
+
+        assert first is second
+        first.close()
+
+    def test_closed_repository_replaced(self, temp_db_path):
+        first = get_repository(temp_db_path)
+        first.close()
+        second = get_repository(temp_db_path)
+
+        assert second is not first
+        assert not second.closed
+        second.close()
+
+    def test_memory_system_uses_shared_repository(self, temp_db_path):
+        from memory_system import ChatMemorySystem
+
+        repo = get_repository(temp_db_path)
+        memory = ChatMemorySystem(db_path=temp_db_path)
+
+        assert memory.repo is repo
+        memory.save_data("test@test.com", "email")
+        assert repo.query_one("SELECT content FROM mydata") == ("test@test.com",)
+        memory.close()
+
+        # Other users of the shared repository keep working
+        assert not repo.closed
+        assert repo.query_one("SELECT content FROM mydata") == ("test@test.com",)
+        repo.close()
+
+    def test_last_release_closes(self, temp_db_path):
+        first = get_repository(temp_db_path)
+        second = get_repository(temp_db_path)
+
+        release_repository(first)
+        assert not second.closed
+        release_repository(second)
+        assert second.closed
+
+    @pytest.mark.skipif(not db_repository.USE_SQLCIPHER, reason="sqlcipher3 not installed")
+    def test_encrypted_readers_use_key(self, temp_db_path, mock_encryption_key):
+        repo = DatabaseRepository(temp_db_path, encryption_key=mock_encryption_key)
+        repo.execute("CREATE TABLE t (x)")
+        repo.execute("INSERT INTO t VALUES (1)")
+
+        assert repo.query("SELECT x FROM t") == [(1,)]
+        repo.close()
+
+
+class TestProfiles:
+    """Test pragma profiles and WAL checkpoints"""
+
+    def test_performance_profile_uses_wal(self, temp_db_path):
+        repo = DatabaseRepository(temp_db_path, profile='performance')
+
+        assert repo.query_one("PRAGMA journal_mode") == ('wal',)
+        assert repo.query_one("PRAGMA synchronous") == (1,)   # NORMAL
+        assert repo.query_one("PRAGMA temp_store") == (2,)    # MEMORY
+        assert repo.query_one("PRAGMA cache_size") == (-64 * 1024,)
+        repo.close()
+
+    def test_legacy_profile_keeps_defaults(self, temp_db_path):
+        repo = DatabaseRepository(temp_db_path, profile='legacy')
+
+        assert repo.query_one("PRAGMA journal_mode") == ('delete',)
+        assert repo.checkpoint() is None
+        repo.close()
+
+    def test_unknown_profile_falls_back(self, temp_db_path):
+        repo = DatabaseRepository(temp_db_path, profile='turbo')
+
+        assert repo.profile == db_repository.DEFAULT_PROFILE
+        repo.close()
+
+    def test_passive_checkpoint(self, temp_db_path):
+        repo = DatabaseRepository(temp_db_path, profile='balanced')
+        repo.execute("CREATE TABLE t (x)")
+        repo.executemany("INSERT INTO t VALUES (?)", [(i,) for i in range(100)])
+
+        busy, wal_frames, checkpointed = repo.checkpoint('PASSIVE')
+
+        assert busy == 0
+        assert checkpointed == wal_frames
+        repo.close()
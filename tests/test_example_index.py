@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for ExampleIndex - nearest few-shot examples per Qwen request
+"""
+
+import json
+import os
+import stat
+
+from example_index import ExampleIndex, char_ngrams, mask_value, parse_prompt_examples
+from qwen_sql_generator import QwenSQLGenerator
+
+
+class FakeClient:
+    """Ollama stand-in for building prompts (Qwen installed, never called)"""
+
+    def list_models(self):
+        return ["qwen2.5-coder:7b"]
+
+
+PROMPT = '''
+- English verbs: delete, remove
+- German: lösche, entferne
+
+EXAMPLES:
+
+Input: "delete 669686832"
+SQL: DELETE FROM mydata WHERE content = '669686832';
+
+Input: "lösche meine Telefonnummer"
+SQL: DELETE FROM mydata WHERE meta LIKE '%Telefonnummer%';
+
+Input: "remove my wifi password"
+Analysis: Verb=remove (EN), LABEL=wifi password
+SQL: DELETE FROM mydata WHERE meta LIKE '%wifi password%';
+
+Input: "how do I delete a record?"
+SQL: NO_ACTION
+'''
+
+
+def example(text, sql, lang='en', action='DELETE'):
+    return {'input': text, 'sql': sql, 'note': None, 'action': action, 'lang': lang, 'source': 'prompt'}
+
+
+class TestParsing:
+
+    def test_blocks_and_languages(self):
+        examples = parse_prompt_examples(PROMPT, 'DELETE')
+        assert [e['lang'] for e in examples] == ['en', 'de', 'en', 'en']
+        assert examples[2]['note'].startswith("Analysis: ")
+        assert examples[3]['sql'] == 'NO_ACTION'
+
+    def test_values_reduced_to_shape(self):
+        assert char_ngrams("delete 5551234") == char_ngrams("delete 6660000")
+
+    def test_mask_keeps_shape(self):
+        assert mask_value("Anna@x.com") == "Abcd@e.fgh"
+        assert mask_value("669686832") == "123456789"
+
+
+class TestNearest:
+
+    def test_language_first_false_positive_last(self):
+        index = ExampleIndex(parse_prompt_examples(PROMPT, 'DELETE'))
+        chosen = index.nearest("lösche meine E-Mail", 'DELETE', 'de', k=2)
+        assert [e['lang'] for e in chosen[:2]] == ['en', 'de']  # Other language fills up, nearest last
+        assert chosen[-1]['sql'] == 'NO_ACTION'
+        assert len(chosen) == 3
+
+    def test_only_requested_action(self):
+        index = ExampleIndex([example("save my pin 1234", "NO_ACTION", action='SAVE'),
+                              example("delete 1234", "DELETE FROM mydata WHERE content = '1234';")])
+        assert [e['input'] for e in index.nearest("delete 99", 'DELETE', 'en', false_positives=0)] == ["delete 1234"]
+
+
+class TestLearning:
+
+    def test_learn_masks_value(self):
+        index = ExampleIndex()
+        assert index.learn("delete 555-1234 please", 'DELETE', 'en',
+                           "DELETE FROM mydata WHERE content = ?", ('555-1234',))
+        learned = index.nearest("delete 555-9999", 'DELETE', 'en')[0]
+        assert learned['input'] == "delete 123-4567 please"
+        assert learned['sql'] == "DELETE FROM mydata WHERE content = '123-4567';"
+        assert "555" not in json.dumps(learned)
+
+    def test_retrieve_like_values_masked(self):
+        index = ExampleIndex()
+        assert index.learn("who has phone 669686832", 'RETRIEVE', 'en',
+                           "SELECT * FROM mydata WHERE meta LIKE ? OR content LIKE ?",
+                           ('%669686832%', '%669686832%'))
+        learned = index.nearest("who has phone 1", 'RETRIEVE', 'en')[0]
+        assert learned['input'] == "who has phone 123456789"
+        assert learned['sql'].count("'%123456789%'") == 2
+        assert "669686832" not in json.dumps(learned)
+
+    def test_value_tokens_in_input_masked(self):
+        index = ExampleIndex()
+        assert index.learn("show my email, I used anna@x.com", 'RETRIEVE', 'en',
+                           "SELECT * FROM mydata WHERE meta LIKE ? OR content LIKE ?", ('%email%', '%email%'))
+        learned = index.nearest("show my email", 'RETRIEVE', 'en')[0]
+        assert "anna@x.com" not in json.dumps(learned)
+        assert learned['sql'].count("'%email%'") == 2  # Labels stay readable
+
+    def test_value_not_in_input_not_learned(self):
+        index = ExampleIndex()
+        assert not index.learn("save it", 'SAVE', 'en',
+                               "INSERT OR REPLACE INTO mydata (content, meta, lang) VALUES (?, ?, ?)",
+                               ('secret', 'pin', 'en'))
+        assert index.learned == 0
+
+    def test_same_shape_replaces_and_max_learned(self):
+        index = ExampleIndex(max_learned=2)
+        sql = "SELECT * FROM mydata WHERE meta LIKE ? OR content LIKE ?"
+        index.learn("show my wifi", 'RETRIEVE', 'en', sql, ('%wifi%', '%wifi%'))
+        index.learn("show my WIFI", 'RETRIEVE', 'en', sql, ('%wifi%', '%wifi%'))
+        assert index.learned == 1
+        index.learn("show my pin", 'RETRIEVE', 'en', sql, ('%pin%', '%pin%'))
+        index.learn("show my email", 'RETRIEVE', 'en', sql, ('%email%', '%email%'))
+        assert index.learned == 2 and len(index) == 2
+
+    def test_save_load_round_trip(self, temp_config_dir):
+        path = os.path.join(temp_config_dir, "qwen_examples.json")
+        index = ExampleIndex(path=path)
+        index.learn("delete 669686832", 'DELETE', 'es', "DELETE FROM mydata WHERE content = '669686832';")
+        assert index.save() and not index.save()  # Nothing new → no write
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+        loaded = ExampleIndex(path=path)
+        assert loaded.learned == 1
+        assert loaded.nearest("delete 1", 'DELETE', 'es')[0]['input'] == "delete 123456789"
+
+
+class TestGeneratorFewShot:
+
+    def test_examples_move_to_user_message(self):
+        static = QwenSQLGenerator(client=FakeClient())
+        generator = QwenSQLGenerator(client=FakeClient(), few_shot=3)
+        system, user = generator.build_messages("lösche meine PIN", 'DELETE', 'de')
+        assert "Input: " not in system['content']
+        assert len(system['content']) < len(static.system_prompts['DELETE'])
+        assert user['content'].startswith("EXAMPLES:")
+        assert user['content'].count('Input: "') == 3 + 1  # k + closest false positive
+        assert user['content'].rstrip().endswith(static.build_messages("lösche meine PIN", 'DELETE')[1]['content'].rstrip())
+
+    def test_system_prompt_static_across_inputs(self):
+        generator = QwenSQLGenerator(client=FakeClient(), few_shot=3)
+        first = generator.build_messages("save my pin 1234", 'SAVE', 'en')[0]
+        second = generator.build_messages("guarda mi correo a@b.es", 'SAVE', 'es')[0]
+        assert first == second
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for HistoryWriter - write-behind queue for chat_history
+"""
+
+import threading
+
+import pytest
+
+from db_repository import DatabaseRepository
+from history_writer import HistoryWriter
+
+
+@pytest.fixture
+def repo(temp_db_path):
+    repo = DatabaseRepository(temp_db_path)
+    repo.execute("""
+        CREATE TABLE chat_history (
+            id INTEGER PRIMARY KEY,
+            session_id TEXT NOT NULL,
+            role TEXT NOT NULL,
+            content TEXT NOT NULL,
+            timestamp INTEGER NOT NULL,
+            metadata TEXT
+        )
+    """)
+    yield repo
+    repo.close()
+
+
+def row(i):
+    return ('s1', 'user', f"msg {i}", 1700000000, None)
+
+
+def contents(repo):
+    return [r[0] for r in repo.query("SELECT content FROM chat_history ORDER BY id")]
+
+
+class TestHistoryWriter:
+    def test_flush_gives_read_your_writes(self, repo):
+        writer = HistoryWriter(repo)
+        for i in range(10):
+            writer.submit(row(i))
+
+        assert writer.flush() is True
+        assert writer.pending() == 0
+        assert contents(repo) == [f"msg {i}" for i in range(10)]
+        writer.close()
+
+    def test_queued_rows_are_batched(self, repo):
+        writer = HistoryWriter(repo, batch_size=50)
+        gate = threading.Event()
+        original = repo.executemany
+
+        def slow_executemany(sql, rows):
+            gate.wait(2)
+            return original(sql, rows)
+
+        repo.executemany = slow_executemany
+        for i in range(20):
+            writer.submit(row(i))
+        gate.set()
+        writer.flush()
+
+        # First row alone, the rest queued behind it in one transaction
+        assert writer.batches <= 2
+        assert len(contents(repo)) == 20
+        writer.close()
+
+    def test_close_flushes(self, repo):
+        writer = HistoryWriter(repo)
+        writer.submit(row(1))
+        writer.close()
+
+        assert contents(repo) == ["msg 1"]
+        writer.submit(row(2))  # After close: written directly
+        assert contents(repo) == ["msg 1", "msg 2"]
+
+    def test_failed_batch_reports_error(self, repo):
+        errors = []
+        writer = HistoryWriter(repo, on_error=errors.append)
+        writer.submit(('s1', 'user', None, 1700000000, None))  # content NOT NULL
+
+        assert writer.flush() is True
+        assert writer.failed == 1
+        assert len(errors) == 1
+        writer.close()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for LivenessCache / probe_ollama - cached health checks for per-message sends
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+
+from liveness import CHAT_DAEMON, OLLAMA, LivenessCache, normalize_ollama_host, probe_ollama
+
+
+class VersionHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        body = json.dumps({'version': '0.0.test'}).encode('utf-8')
+        self.send_response(200 if self.path == '/api/version' else 404)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def fake_ollama():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), VersionHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+class TestProbe:
+    def test_version_probe(self, fake_ollama):
+        assert probe_ollama(fake_ollama) == '0.0.test'
+
+    def test_unreachable(self):
+        import socket
+
+        sock = socket.socket()
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+        sock.close()  # Nothing listens on port now
+
+        assert probe_ollama(f"127.0.0.1:{port}", timeout=0.5) is None
+
+    def test_normalize_host(self):
+        assert normalize_ollama_host("0.0.0.0") == "http://127.0.0.1:11434"
+        assert normalize_ollama_host("http://host:1234/") == "http://host:1234"
+
+
+class TestLivenessCache:
+    def test_unknown_is_unhealthy(self, tmp_path):
+        assert LivenessCache(str(tmp_path)).is_healthy(OLLAMA) is False
+
+    def test_shared_between_instances(self, tmp_path):
+        LivenessCache(str(tmp_path)).mark(CHAT_DAEMON, True)
+
+        other = LivenessCache(str(tmp_path))
+        assert other.is_healthy(CHAT_DAEMON) is True
+        assert other.is_healthy(OLLAMA) is False
+
+    def test_failure_not_cached_as_healthy(self, tmp_path):
+        cache = LivenessCache(str(tmp_path))
+        cache.mark(OLLAMA, False)
+
+        assert cache.is_healthy(OLLAMA) is False
+
+    def test_ttl_expiry(self, tmp_path):
+        cache = LivenessCache(str(tmp_path), ttl=10)
+        cache.mark(OLLAMA, True)
+
+        with patch('liveness.time.time', return_value=time.time() + 11):
+            assert cache.is_healthy(OLLAMA) is False
+
+    def test_fresh_unchanged_mark_does_not_write(self, tmp_path):
+        cache = LivenessCache(str(tmp_path), ttl=10)
+        cache.mark(CHAT_DAEMON, True)
+
+        with patch.object(cache, '_save') as save:
+            cache.mark(CHAT_DAEMON, True)
+            save.assert_not_called()
+
+            cache.mark(CHAT_DAEMON, False)  # State changed
+            assert save.call_count == 1
+
+    def test_expired_mark_rewrites(self, tmp_path):
+        cache = LivenessCache(str(tmp_path), ttl=10)
+        cache.mark(CHAT_DAEMON, True)
+
+        with patch('liveness.time.time', return_value=time.time() + 11):
+            cache.mark(CHAT_DAEMON, True)
+            assert LivenessCache(str(tmp_path), ttl=10).is_healthy(CHAT_DAEMON) is True
+
+    def test_invalidate(self, tmp_path):
+        cache = LivenessCache(str(tmp_path))
+        cache.mark(OLLAMA, True)
+        cache.mark(CHAT_DAEMON, True)
+        cache.invalidate()
+
+        assert LivenessCache(str(tmp_path)).is_healthy(OLLAMA) is False
+        assert LivenessCache(str(tmp_path)).is_healthy(CHAT_DAEMON) is False
+
+    def test_corrupt_state_file(self, tmp_path):
+        (tmp_path / "liveness.json").write_text("{not json")
+
+        assert LivenessCache(str(tmp_path)).is_healthy(OLLAMA) is False
+
+
+class TestDaemonManagerChecks:
+    """ensure_daemons_running trusts fresh cache entries"""
+
+    def test_no_probes_when_cached_healthy(self, tmp_path):
+        from daemon_manager import DaemonManager
+
+        manager = DaemonManager(str(tmp_path))
+        manager.liveness.mark(CHAT_DAEMON, True)
+        manager.liveness.mark(OLLAMA, True)
+
+        with patch.object(manager, 'is_chat_daemon_running') as ping, \
+                patch.object(manager.ollama_manager, 'is_ollama_running') as probe:
+            assert manager.ensure_daemons_running() is True
+
+        ping.assert_not_called()
+        probe.assert_not_called()
+
+    def test_probes_when_stale(self, tmp_path):
+        from daemon_manager import DaemonManager
+
+        manager = DaemonManager(str(tmp_path))
+
+        with patch.object(manager, 'is_chat_daemon_running', return_value=True) as ping, \
+                patch.object(manager.ollama_manager, 'is_ollama_running', return_value=True) as probe:
+            assert manager.ensure_daemons_running() is True
+
+        ping.assert_called_once()
+        probe.assert_called_once()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for LocalStorageDetector - compiled single-pass keyword matching
+"""
+
+import re
+
+import pytest
+
+from local_storage_detector import KeywordMatcher, LocalStorageDetector
+
+
+@pytest.fixture
+def detector(temp_config_dir):
+    return LocalStorageDetector(str(temp_config_dir))
+
+
+def legacy_match(keywords, text):
+    """Per-keyword re.search loop of the previous detector (reference result)"""
+    text_lower = text.lower()
+    matched = set()
+    for keyword in keywords:
+        pattern = re.escape(keyword).replace(r'\{x\}', r'\w+').replace(r'\{\*\}', r'.+?')
+        if re.search(r'\b' + pattern + r'\b', text_lower):
+            matched.add(keyword)
+    return matched
+
+
+class TestKeywordMatcher:
+    """Test the compiled trie matcher"""
+
+    def test_word_boundaries(self):
+        matcher = KeywordMatcher({'save'})
+
+        assert matcher.find_all("Please SAVE this") == ['save']
+        assert matcher.find_all("I saved it") == []
+
+    def test_phrase(self):
+        matcher = KeywordMatcher({'base de datos'})
+
+        assert matcher.find_all("guarda en la base de datos") == ['base de datos']
+        assert matcher.find_all("base datos") == []
+
+    def test_word_placeholder(self):
+        matcher = KeywordMatcher({'my {x} is'})
+
+        assert matcher.find_all("my email is test@test.com") == ['my {x} is']
+        assert matcher.find_all("my is") == []
+        assert matcher.find_all("what is my email") == []
+
+    def test_text_placeholder(self):
+        matcher = KeywordMatcher({'remember {*} please'})
+
+        assert matcher.find_all("remember my new phone number please") == ['remember {*} please']
+        assert matcher.find_all("remember please") == []
+
+    def test_overlapping_matches_all_reported(self):
+        matcher = KeywordMatcher({'my', 'my {x} is', 'is'})
+
+        assert sorted(matcher.find_all("my email is x")) == ['is', 'my', 'my {x} is']
+
+    def test_no_duplicates(self):
+        matcher = KeywordMatcher({'show'})
+
+        assert matcher.find_all("show show show") == ['show']
+
+    def test_unicode_keywords(self):
+        matcher = KeywordMatcher({'lösche', 'añade', 'données'})
+
+        assert sorted(matcher.find_all("Lösche das und añade données")) == ['añade', 'données', 'lösche']
+
+
+class TestLocalStorageDetector:
+    """Test detector loaded from lang/*.conf"""
+
+    def test_categories_loaded(self, detector):
+        assert 'save' in detector.categories['SAVE']
+        assert 'lösche' in detector.categories['DELETE']
+        assert 'muestra' in detector.categories['RETRIEVE']
+
+    @pytest.mark.parametrize("text", [
+        "merke dir meine Email ist test@test.com",
+        "zeig mir was in der db gespeichert ist",
+        "guarda mi correo test@test.es en la base de datos",
+        "delete my phone number",
+        "Wie ist das Wetter heute?",
+        "Tell me a joke",
+    ])
+    def test_same_result_as_legacy_loop(self, detector, text):
+        detected, matched = detector.detect_db_intent(text)
+
+        assert set(matched) == legacy_match(detector.keywords, text)
+        assert detected == bool(matched)
+
+    def test_no_keyword(self, detector):
+        assert detector.detect_db_intent("Wie ist das Wetter heute?") == (False, [])
+
+    @pytest.mark.parametrize("text,action", [
+        ("delete my email", 'DELETE'),
+        ("save my email test@test.com", 'SAVE'),
+        ("borra y guarda", 'DELETE'),
+        ("show my data", 'RETRIEVE'),
+        ("my data", 'RETRIEVE'),
+    ])
+    def test_action_hint(self, detector, text, action):
+        _, matched = detector.detect_db_intent(text)
+
+        assert detector.action_hint(matched) == action
+
+    @pytest.mark.parametrize("text,lang", [
+        ("guarda mi correo test@test.es", 'es'),
+        ("lösche meine Telefonnummer", 'de'),
+        ("delete my phone number", 'en'),
+    ])
+    def test_language_of(self, detector, text, lang):
+        _, matched = detector.detect_db_intent(text)
+
+        assert detector.language_of(matched, default='en') == lang
+
+    def test_language_of_unknown_is_default(self, detector):
+        assert detector.language_of([], default='de') == 'de'
+
+    def test_fallback_without_lang_dir(self, tmp_path):
+        detector = LocalStorageDetector(str(tmp_path))
+
+        assert detector.detect_db_intent("save this")[0] is True
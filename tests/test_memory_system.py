@@ -6,7 +6,7 @@ Tests for ChatMemorySystem - Database Operations
 
 import pytest
 import time
-from memory_system import ChatMemorySystem
+from memory_system import ChatMemorySystem, rewrite_like_to_match, FTS_PREDICATE
 
 
 class TestDatabaseCreation:
@@ -310,6 +310,11 @@ class TestExecuteSQL:
         results = memory_system_with_data.search_data("test@test.com")
         assert len(results) == 0
 
+    def test_execute_delete_returns_rowcount(self, memory_system_with_data):
+        """DELETE returns changed rows, not the last insert id"""
+        assert memory_system_with_data.execute_sql("DELETE FROM mydata WHERE content = 'nothing-here'") == 0
+        assert memory_system_with_data.execute_sql("DELETE FROM mydata WHERE content = 'test@test.com'") == 1
+
     def test_execute_with_params(self, memory_system):
         """Test executing SQL with parameters"""
         sql = "INSERT INTO mydata (content, meta, lang) VALUES (?, ?, ?)"
@@ -325,8 +330,8 @@ class TestExecuteSQL:
 
         result = memory_system.execute_sql(sql, fetch=False)
 
-        # Should return 0 or None on error
-        assert result == 0 or result is None
+        # None on error (0 would read as "0 rows deleted")
+        assert result is None
 
 
 class TestDatabaseStats:
@@ -474,3 +479,98 @@ class TestDatabaseCleanup:
             memory.save_data("test@test.com", "email", "en")
         except:
             pass  # Expected to fail
+
+
+class TestFullTextSearch:
+    """Test FTS5 trigram index and LIKE → MATCH rewriting"""
+
+    def test_fts_index_created(self, memory_system):
+        assert memory_system.fts_enabled
+        assert memory_system.repo.table_exists('mydata_fts')
+
+    def test_substring_search_uses_index(self, memory_system):
+        memory_system.save_data("mschenk@example.com", "work email", "en")
+
+        results = memory_system.search_data("chenk@exa")
+
+        assert len(results) == 1
+        assert results[0]['meta'] == "work email"
+
+    def test_search_case_insensitive(self, memory_system):
+        memory_system.save_data("test@test.com", "Email", "en")
+
+        assert len(memory_system.search_data("EMAIL")) == 1
+
+    def test_short_term_falls_back_to_like(self, memory_system):
+        memory_system.save_data("ab", "x", "en")
+
+        assert len(memory_system.search_data("ab")) == 1
+
+    def test_index_follows_replace_and_delete(self, memory_system):
+        memory_system.execute_sql("INSERT OR REPLACE INTO mydata (content, meta) VALUES ('blue', 'color')")
+        memory_system.execute_sql("INSERT OR REPLACE INTO mydata (content, meta) VALUES ('blue', 'color')")
+
+        assert len(memory_system.search_data("blue")) == 1
+
+        assert memory_system.delete_data("blue") == 1
+        assert memory_system.search_data("blue") == []
+        # Shadow table must be consistent with mydata
+        memory_system.repo.execute("INSERT INTO mydata_fts(mydata_fts, rank) VALUES ('integrity-check', 1)")
+
+    def test_existing_rows_backfilled(self, temp_db_path):
+        import sqlite3
+        conn = sqlite3.connect(str(temp_db_path))
+        conn.execute("CREATE TABLE mydata (id INTEGER PRIMARY KEY, content TEXT NOT NULL, meta TEXT, "
+                     "lang TEXT DEFAULT 'en', timestamp INTEGER DEFAULT (strftime('%s','now')), "
+                     "UNIQUE(content, meta))")
+        conn.execute("INSERT INTO mydata (content, meta) VALUES ('old@test.com', 'email')")
+        conn.commit()
+        conn.close()
+
+        memory = ChatMemorySystem(db_path=temp_db_path)
+
+        assert len(memory.search_data("old@test")) == 1
+        memory.close()
+
+    def test_generated_retrieve_sql_rewritten(self, memory_system_with_data):
+        sql = ("SELECT id, content, meta, timestamp FROM mydata "
+               "WHERE meta LIKE '%email%' OR content LIKE '%email%' ORDER BY timestamp DESC;")
+
+        rewritten, params = rewrite_like_to_match(sql)
+        results = memory_system_with_data.execute_sql(sql, fetch=True)
+
+        assert 'LIKE' not in rewritten
+        assert params == ['meta : "email"', 'content : "email"']
+        assert results == memory_system_with_data.repo.query(sql)
+
+
+class TestLikeRewriter:
+    """Test rewrite_like_to_match edge cases"""
+
+    def test_parameterized_like(self):
+        sql, params = rewrite_like_to_match(
+            "SELECT * FROM mydata WHERE lang = ? AND meta LIKE ? LIMIT ?", ('en', '%phone%', 5))
+
+        assert sql == f"SELECT * FROM mydata WHERE lang = ? AND {FTS_PREDICATE} LIMIT ?"
+        assert params == ['en', 'meta : "phone"', 5]
+
+    def test_quotes_escaped(self):
+        sql, params = rewrite_like_to_match("""DELETE FROM mydata WHERE content LIKE '%o''brien "x"%'""")
+
+        assert params == ['content : "o\'brien ""x"""']
+
+    @pytest.mark.parametrize("sql", [
+        "SELECT * FROM mydata WHERE meta LIKE 'email%'",          # prefix only
+        "SELECT * FROM mydata WHERE meta LIKE '%e_mail%'",        # _ wildcard
+        "SELECT * FROM mydata WHERE meta LIKE '%ab%'",            # too short for trigram
+        "SELECT * FROM mydata WHERE meta NOT LIKE '%email%'",
+        "SELECT * FROM mydata WHERE meta LIKE '%x!%%' ESCAPE '!'",
+        "SELECT * FROM chat_history WHERE content LIKE '%email%'",
+    ])
+    def test_left_unchanged(self, sql):
+        assert rewrite_like_to_match(sql) == (sql, [])
+
+    def test_like_inside_literal_ignored(self):
+        sql = "SELECT * FROM mydata WHERE content = 'meta LIKE ''%email%'''"
+
+        assert rewrite_like_to_match(sql) == (sql, [])
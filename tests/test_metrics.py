@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for daemon metrics - histograms, trace listener, Prometheus export
+"""
+
+import threading
+import time
+from unittest.mock import patch
+
+import daemon_protocol
+from metrics import LatencyHistogram, Metrics, format_summary, route_for
+from tracing import Tracer
+from tests.test_tracing import TracedChatSystem
+
+
+class TestLatencyHistogram:
+    def test_percentiles_within_bucket_error(self):
+        histogram = LatencyHistogram()
+        for value in range(1, 1001):  # 1..1000 ms
+            histogram.record(value)
+
+        assert histogram.count == 1000
+        assert histogram.min_ms == 1
+        assert histogram.max_ms == 1000
+        for p, expected in ((50, 500), (95, 950), (99, 990)):
+            assert abs(histogram.percentile(p) - expected) <= expected * 0.0625
+
+    def test_small_values_are_exact(self):
+        histogram = LatencyHistogram()
+        histogram.record(0.005)  # 5µs
+        assert histogram.percentile(50) == 0.005
+
+    def test_empty(self):
+        assert LatencyHistogram().to_dict()['p99_ms'] == 0.0
+
+
+class TestRoutes:
+    def test_route_for(self):
+        assert route_for({'source': 'openai', 'action': None}) == 'openai'
+        assert route_for({'source': 'local', 'action': 'SAVE'}) == 'local_save'
+        assert route_for({'source': 'local', 'action': 'RETRIEVE_EMPTY'}) == 'local_retrieve'
+        assert route_for({'source': 'local', 'action': 'DELETE_PENDING'}) == 'local_delete'
+        assert route_for({}) == 'error'
+
+
+def traced_request(tracer, source, action, hit=None, rule_hit=None):
+    with tracer.trace('send_message') as trace:
+        with tracer.span('rule_parse') as span:
+            if rule_hit is not None:
+                span.set(hit=rule_hit)
+        with tracer.span('sql_cache') as span:
+            if hit is not None:
+                span.set(hit=hit)
+        if source == 'openai':
+            with tracer.span('openai_call'):
+                pass
+        else:
+            with tracer.span('qwen_generate'):
+                pass
+        trace.set(source=source, action=action)
+
+
+class TestMetrics:
+    def setup_method(self):
+        self.tracer = Tracer()
+        self.metrics = Metrics()
+        self.tracer.add_listener(self.metrics.record_trace)
+
+    def test_record_trace(self):
+        traced_request(self.tracer, 'local', 'SAVE', hit=True)
+        traced_request(self.tracer, 'local', 'RETRIEVE', hit=False)
+        traced_request(self.tracer, 'openai', None)
+
+        snapshot = self.metrics.snapshot()
+        assert set(snapshot['routes']) == {'local_save', 'local_retrieve', 'openai'}
+        assert snapshot['calls']['qwen']['count'] == 2
+        assert snapshot['calls']['openai']['count'] == 1
+        assert snapshot['caches']['sql_cache'] == {'hits': 1, 'misses': 1, 'hit_ratio': 0.5}
+
+    def test_rule_fastpath_not_a_cache(self):
+        traced_request(self.tracer, 'local', 'SAVE', rule_hit=True)
+        traced_request(self.tracer, 'local', 'SAVE', rule_hit=False, hit=True)
+
+        snapshot = self.metrics.snapshot()
+        assert 'rule_parse' not in snapshot['caches']
+        assert snapshot['caches']['sql_cache'] == {'hits': 1, 'misses': 0, 'hit_ratio': 1.0}
+        assert snapshot['counters']['rule_fastpath_total'] == {'hit': 1, 'miss': 1}
+        assert "Rule fast path: 1 of 2 local requests without Qwen (50.0%)" in format_summary(snapshot)
+        assert 'aichat_rule_fastpath_total{result="hit"} 1' in self.metrics.prometheus()
+
+    def test_prefill_tokens_counted(self):
+        for tokens in (2400, 15):
+            with self.tracer.trace('send_message') as trace:
+                with self.tracer.span('qwen_generate') as span:
+                    span.set(prefill_tokens=tokens)
+                trace.set(source='local', action='SAVE')
+
+        snapshot = self.metrics.snapshot()
+        assert snapshot['counters']['prefill_tokens_total'] == {'qwen': 2415}
+        assert "Prefill qwen: 1208 tokens/call (2415 total)" in format_summary(snapshot)
+
+    def test_gauges(self):
+        self.metrics.gauge('in_flight', lambda: 3)
+        self.metrics.gauge('broken', lambda: 1 / 0)
+        gauges = self.metrics.snapshot()['gauges']
+        assert gauges == {'in_flight': 3, 'broken': None}
+
+    def test_prometheus_text(self, tmp_path):
+        traced_request(self.tracer, 'local', 'DELETE', hit=True)
+        self.metrics.gauge('uptime_seconds', lambda: 12.5, 'Daemon uptime')
+
+        text = self.metrics.prometheus()
+        assert '# TYPE aichat_request_latency_seconds histogram' in text
+        assert 'aichat_request_latency_seconds_bucket{route="local_delete",le="+Inf"} 1' in text
+        assert 'aichat_request_latency_seconds_count{route="local_delete"} 1' in text
+        assert 'aichat_cache_lookups_total{cache="sql_cache",result="hit"} 1' in text
+        assert 'aichat_uptime_seconds 12.5' in text
+
+        path = tmp_path / "metrics.prom"
+        self.metrics.write_prometheus(str(path))
+        assert path.read_text() == text
+
+    def test_format_summary(self):
+        traced_request(self.tracer, 'openai', None)
+        self.metrics.gauge('uptime_seconds', lambda: 3725)
+        lines = format_summary(self.metrics.snapshot())
+        assert lines[0] == "Uptime: 1h 02m 05s"
+        assert any(line.startswith("Route openai: n=1") for line in lines)
+
+
+def test_daemon_metrics_action(tmp_path):
+    import chat_daemon
+
+    socket_path = str(tmp_path / "chat_daemon.sock")
+    with patch.object(chat_daemon, 'ChatSystem', TracedChatSystem):
+        daemon = chat_daemon.ChatDaemon(socket_path=socket_path)
+    thread = threading.Thread(target=daemon.start, daemon=True)
+    thread.start()
+    try:
+        for _ in range(50):
+            if daemon.running:
+                break
+            time.sleep(0.02)
+
+        daemon_protocol.request(socket_path, {'action': 'send_message', 'session_id': 's1', 'message': 'hi'}, timeout=2)
+        response = daemon_protocol.request(socket_path, {'action': 'metrics'}, timeout=2)
+
+        assert response['success'] is True
+        snapshot = response['response']
+        assert snapshot['routes']['error']['count'] == 1  # fake reply has source "test"
+        assert snapshot['gauges']['in_flight'] == 0
+        assert snapshot['gauges']['uptime_seconds'] >= 0
+
+        response = daemon_protocol.request(socket_path, {'action': 'metrics', 'format': 'prometheus'}, timeout=2)
+        assert 'aichat_in_flight 0' in response['response']
+    finally:
+        daemon.running = False
+        thread.join(timeout=3)
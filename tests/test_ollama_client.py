@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for OllamaClient - keep-alive HTTP transport to Ollama
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("requests")
+
+from ollama_client import OllamaClient, OllamaError, OllamaTimeout
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    """Minimal Ollama API: /api/generate, /api/chat, /api/tags, /api/version"""
+
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def log_message(self, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def _send_json(self, data, status=200):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/api/version':
+            self._send_json({'version': '0.0.test'})
+        elif self.path == '/api/tags':
+            self._send_json({'models': [{'name': 'qwen2.5-coder:7b'}, {'name': 'phi3:latest'}]})
+        else:
+            self._send_json({'error': 'not found'}, status=404)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length))
+        self.server.payloads.append(payload)
+
+        if payload.get('model') == 'slow':
+            time.sleep(0.5)
+
+        if self.path == '/api/generate':
+            text = f"echo: {payload['prompt']}"
+            key = 'response'
+        elif self.path == '/api/chat':
+            text = f"echo: {payload['messages'][-1]['content']}"
+            key = 'message'
+        else:
+            self._send_json({'error': 'not found'}, status=404)
+            return
+
+        def wrap(piece, done):
+            if key == 'message':
+                return {'message': {'role': 'assistant', 'content': piece}, 'done': done}
+            return {'response': piece, 'done': done}
+
+        if payload.get('model') == 'trickle':
+            # Whole body within the deadline per read, but not in total
+            body = json.dumps(wrap(text + ' ' * 4096, True)).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            for i in range(0, len(body), 512):
+                self.wfile.write(body[i:i + 512])
+                self.wfile.flush()
+                time.sleep(0.1)
+            return
+
+        if not payload.get('stream'):
+            self._send_json(wrap(text, True))
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for piece in text.split(' '):
+            line = (json.dumps(wrap(piece + ' ', False)) + '\n').encode('utf-8')
+            self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+            self.wfile.flush()
+        line = (json.dumps(wrap('', True)) + '\n').encode('utf-8')
+        self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n0\r\n\r\n")
+
+
+@pytest.fixture
+def fake_ollama():
+    """Run fake Ollama server on a random port"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeOllamaHandler)
+    server.connections = 0
+    server.payloads = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(fake_ollama):
+    host, port = fake_ollama.server_address
+    client = OllamaClient(host=f"http://{host}:{port}", keep_alive="10m")
+    yield client
+    client.close()
+
+
+class TestHostNormalization:
+    """Test OLLAMA_HOST parsing"""
+
+    def test_bare_host_port(self):
+        assert OllamaClient._normalize_host("127.0.0.1:11434") == "http://127.0.0.1:11434"
+
+    def test_wildcard_host(self):
+        assert OllamaClient._normalize_host("0.0.0.0") == "http://127.0.0.1:11434"
+
+    def test_keep_alive_numeric_string(self):
+        assert OllamaClient(host="localhost", keep_alive="-1").keep_alive == -1
+
+
+class TestGenerate:
+    """Test /api/generate and /api/chat"""
+
+    def test_generate_non_streaming(self, client, fake_ollama):
+        result = client.generate("qwen2.5-coder:7b", "hello")
+
+        assert result['response'] == "echo: hello"
+        assert fake_ollama.payloads[0]['keep_alive'] == "10m"
+        assert fake_ollama.payloads[0]['stream'] is False
+
+    def test_generate_streaming(self, client):
+        chunks = list(client.generate("qwen2.5-coder:7b", "a b c", stream=True))
+
+        text = ''.join(c.get('response', '') for c in chunks)
+        assert text.strip() == "echo: a b c"
+        assert chunks[-1]['done'] is True
+
+    def test_chat(self, client, fake_ollama):
+        result = client.chat("qwen2.5-coder:7b", [{'role': 'user', 'content': 'hi'}],
+                             options={'num_predict': 10}, keep_alive=-1)
+
+        assert result['message']['content'] == "echo: hi"
+        assert fake_ollama.payloads[0]['keep_alive'] == -1
+        assert fake_ollama.payloads[0]['options'] == {'num_predict': 10}
+
+    def test_connection_reused(self, client, fake_ollama):
+        """Keep-alive: many calls, one TCP connection"""
+        for i in range(5):
+            client.generate_text("qwen2.5-coder:7b", f"call {i}")
+
+        assert fake_ollama.connections == 1
+
+
+class TestErrors:
+    """Test deadlines and unreachable server"""
+
+    def test_deadline_exceeded(self, client):
+        with pytest.raises(OllamaTimeout):
+            client.generate("slow", "hello", timeout=0.1)
+
+    def test_deadline_is_wall_clock_for_slow_body(self, client):
+        start = time.monotonic()
+        with pytest.raises(OllamaTimeout):
+            client.generate("trickle", "hello", timeout=0.3)
+        assert time.monotonic() - start < 0.7  # Full body takes ~0.9s
+
+    def test_unreachable_server(self):
+        client = OllamaClient(host="http://127.0.0.1:1")
+
+        assert client.version() is None
+        with pytest.raises(OllamaError):
+            client.list_models(timeout=0.5)
+
+    def test_list_models(self, client):
+        assert 'qwen2.5-coder:7b' in client.list_models()
+        assert client.version() == '0.0.test'
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for OpenAIClient - keep-alive connection pool against a local HTTPS stub
+"""
+
+import json
+import shutil
+import ssl
+import subprocess
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("requests")
+
+from chat_system import ChatSystem
+from openai_client import OpenAIClient
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """chat/completions stub: JSON reply, SSE when the payload asks for stream"""
+
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def log_message(self, *args):
+        pass
+
+    def do_HEAD(self):
+        self.server.heads += 1
+        self.send_response(401)  # Like the real API without a valid key: handshake done anyway
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.server.auth.append(self.headers.get('Authorization'))
+        self.server.ports.add(self.client_address[1])
+
+        if payload.get('stream'):
+            chunks = [f"data: {json.dumps({'choices': [{'delta': {'content': c}}]})}\n\n" for c in ("Hel", "lo")]
+            body = ("".join(chunks) + "data: [DONE]\n\n").encode()
+            content_type = "text/event-stream"
+        else:
+            body = json.dumps({'choices': [{'message': {'content': f"echo {len(payload['messages'])}"}}]}).encode()
+            content_type = "application/json"
+
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture(scope="module")
+def certificate(tmp_path_factory):
+    if not shutil.which("openssl"):
+        pytest.skip("openssl CLI not available")
+    directory = tmp_path_factory.mktemp("tls")
+    cert, key = directory / "cert.pem", directory / "key.pem"
+    result = subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-subj", "/CN=localhost", "-addext", "subjectAltName=DNS:localhost,IP:127.0.0.1",
+         "-keyout", str(key), "-out", str(cert)],
+        capture_output=True
+    )
+    if result.returncode != 0:
+        pytest.skip("openssl could not create a test certificate")
+    return str(cert), str(key)
+
+
+@pytest.fixture
+def https_stub(certificate):
+    cert, key = certificate
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    server.heads = 0
+    server.auth = []
+    server.ports = set()
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, f"https://127.0.0.1:{server.server_address[1]}/v1/chat/completions", cert
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(https_stub):
+    _, url, cert = https_stub
+    client = OpenAIClient("sk-test", url, connect_timeout=2, read_timeout=5, verify=cert)
+    yield client
+    client.close()
+
+
+def payload(**extra):
+    return {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": "hi"}], **extra}
+
+
+class TestConnectionReuse:
+
+    def test_posts_share_one_connection(self, https_stub, client):
+        server = https_stub[0]
+        for _ in range(3):
+            response = client.post(payload())
+            assert response.status_code == 200
+            assert response.json()['choices'][0]['message']['content'] == "echo 1"
+
+        assert len(server.ports) == 1
+        stats = client.stats()
+        assert stats['requests'] == 3
+        assert stats['connections'] == 1
+        assert stats['reused'] == 2
+        assert stats['reuse_ratio'] == pytest.approx(2 / 3, abs=1e-3)
+        assert server.auth == ["Bearer sk-test"] * 3
+
+    def test_warm_opens_connection_used_by_first_post(self, https_stub, client):
+        server = https_stub[0]
+        assert client.idle_seconds() == float('inf')
+        assert client.warm() is True
+        assert server.heads == 1
+        assert client.idle_seconds() < 1
+
+        client.post(payload())
+        stats = client.stats()
+        assert stats['warmups'] == 1
+        assert stats['connections'] == 1
+        assert stats['reused'] == 1
+
+    def test_warm_if_idle_skips_recently_used(self, https_stub, client):
+        client.post(payload())
+        client.warm_if_idle(max_idle=60)
+        assert client.stats()['warmups'] == 0
+
+    def test_warm_failure_returns_false(self, certificate):
+        client = OpenAIClient("sk-test", "https://127.0.0.1:9/v1/chat/completions",
+                              connect_timeout=0.5, verify=certificate[0])
+        assert client.warm() is False
+        client.close()
+
+    def test_untrusted_certificate_rejected(self, https_stub):
+        _, url, _ = https_stub
+        client = OpenAIClient("sk-test", url, connect_timeout=2, read_timeout=5)
+        with pytest.raises(Exception):
+            client.post(payload())
+        client.close()
+
+
+class TestStreaming:
+
+    def test_stream_then_reuse(self, https_stub, client):
+        server = https_stub[0]
+        response = client.post(payload(stream=True), stream=True)
+        assert response.status_code == 200
+        assert list(ChatSystem._iter_sse_deltas(response)) == ["Hel", "lo"]
+
+        # Fully read stream → connection back in the pool
+        client.post(payload())
+        assert len(server.ports) == 1
+        assert client.stats()['connections'] == 1
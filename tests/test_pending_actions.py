@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for PendingActionStore / TimerWheel - per-session DELETE confirmations
+"""
+
+import json
+import os
+
+import pytest
+
+from pending_actions import EXPIRED, PENDING, PendingActionStore, TimerWheel
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def store(clock):
+    return PendingActionStore(ttl=60, clock=clock, ticker=False)
+
+
+class TestTimerWheel:
+
+    def test_fires_at_deadline(self):
+        wheel = TimerWheel(tick=1.0, slots=8, start=0.0)
+        wheel.schedule('a', 3.5)
+        wheel.schedule('b', 5.0)
+        assert wheel.advance(3.0) == []
+        assert wheel.advance(4.0) == ['a']
+        assert wheel.advance(5.0) == ['b']
+        assert len(wheel) == 0
+
+    def test_deadline_beyond_one_revolution(self):
+        wheel = TimerWheel(tick=1.0, slots=4, start=0.0)
+        wheel.schedule('late', 10.0)
+        assert wheel.advance(3.0) == []
+        assert wheel.advance(9.0) == []
+        assert wheel.advance(10.0) == ['late']
+
+    def test_large_jump_visits_every_slot(self):
+        wheel = TimerWheel(tick=1.0, slots=4, start=0.0)
+        for i, deadline in enumerate((1.0, 2.0, 3.0, 4.0)):
+            wheel.schedule(i, deadline)
+        assert sorted(wheel.advance(100.0)) == [0, 1, 2, 3]
+
+    def test_cancel_and_reschedule(self):
+        wheel = TimerWheel(tick=1.0, slots=8, start=0.0)
+        wheel.schedule('a', 2.0)
+        wheel.cancel('a')
+        assert wheel.advance(3.0) == []
+        wheel.schedule('b', 4.0)
+        wheel.schedule('b', 6.0)
+        assert wheel.advance(5.0) == []
+        assert wheel.advance(6.0) == ['b']
+
+
+class TestPendingActionStore:
+
+    def test_sessions_are_independent(self, store):
+        store.put('s1', {'sql': 'DELETE 1'})
+        store.put('s2', {'sql': 'DELETE 2'})
+        assert store.take('s1') == (PENDING, {'sql': 'DELETE 1'})
+        assert store.state('s1') is None
+        assert store.take('s2') == (PENDING, {'sql': 'DELETE 2'})
+        assert store.take('s2') == (None, None)
+
+    def test_expired_on_take_without_tick(self, store, clock):
+        store.put('s1', {'sql': 'x'})
+        clock.now += 61
+        assert store.state('s1') == EXPIRED
+        assert store.take('s1')[0] == EXPIRED
+
+    def test_wheel_turns_entry_into_tombstone_then_drops_it(self, store, clock):
+        store.put('s1', {'sql': 'x'})
+        assert len(store) == 1
+        clock.now += 61
+        assert store.expire() == 1
+        assert store.state('s1') == EXPIRED
+        assert len(store) == 0
+        clock.now += 61
+        store.expire()
+        assert store.state('s1') is None
+        assert store.expired_total == 1
+
+    def test_put_replaces_and_extends(self, store, clock):
+        store.put('s1', {'sql': 'old'})
+        clock.now += 50
+        store.put('s1', {'sql': 'new'})
+        clock.now += 50
+        store.expire()
+        assert store.take('s1') == (PENDING, {'sql': 'new'})
+
+    def test_persistence_round_trip(self, tmp_path, clock):
+        path = tmp_path / "pending_actions.json"
+        first = PendingActionStore(ttl=60, persist_path=str(path), clock=clock, ticker=False)
+        first.put('s1', {'sql': 'DELETE FROM mydata WHERE id = ?', 'params': [3]})
+        assert oct(os.stat(path).st_mode & 0o777) == '0o600'
+
+        second = PendingActionStore(ttl=60, persist_path=str(path), clock=clock, ticker=False)
+        assert second.take('s1') == (PENDING, {'sql': 'DELETE FROM mydata WHERE id = ?', 'params': [3]})
+        assert json.loads(path.read_text()) == {}
+
+    def test_persisted_expired_entries_not_loaded(self, tmp_path, clock):
+        path = tmp_path / "pending_actions.json"
+        path.write_text(json.dumps({'s1': {'action': {'sql': 'x'}, 'expires_at': 1.0}}))
+        store = PendingActionStore(ttl=60, persist_path=str(path), clock=clock, ticker=False)
+        assert store.state('s1') is None
+
+
+class TestChatSystemConfirmations:
+
+    @pytest.fixture
+    def chat(self, temp_config_dir, monkeypatch, clock):
+        pytest.importorskip("requests")
+        monkeypatch.setenv('OLLAMA_HOST', '127.0.0.1:9')
+        (temp_config_dir / ".env").write_text("OPENAI_API_KEY=sk-test\n")
+        (temp_config_dir / "config").write_text('AI_CHAT_SUMMARY="false"\n'
+                                                'AI_CHAT_OPENAI_BASE_URL="http://127.0.0.1:9/v1"\n')
+
+        from chat_system import ChatSystem
+        chat = ChatSystem(str(temp_config_dir))
+        if chat.memory is None:
+            pytest.skip("memory system unavailable")
+        chat.pending_actions = PendingActionStore(ttl=60, clock=clock, ticker=False)
+        yield chat
+        chat.history_writer.close()
+
+    def test_concurrent_sessions_confirm_their_own_delete(self, chat):
+        assert chat.send_message('s1', "save my email anna@example.com")[1]['action'] == 'SAVE'
+        assert chat.send_message('s1', "save my phone 5551234")[1]['action'] == 'SAVE'
+
+        assert chat.send_message('a', "delete my email")[1]['action'] == 'DELETE_PENDING'
+        assert chat.send_message('b', "delete my phone")[1]['action'] == 'DELETE_PENDING'
+
+        # b cancels, a confirms - neither clobbers the other
+        assert chat.send_message('b', "n")[1]['action'] == 'DELETE_CANCELLED'
+        assert chat.send_message('a', "y")[1]['deleted_count'] == 1
+
+        rows = chat._execute_sql("SELECT content FROM mydata", fetch=True)
+        assert [r[0] for r in rows] == ["5551234"]
+
+    def test_deleted_count_is_rows_changed(self, chat):
+        chat.send_message('s1', "save my email anna@example.com")
+        assert chat.send_message('a', "delete my email")[1]['action'] == 'DELETE_PENDING'
+        assert chat.send_message('c', "delete my email")[1]['action'] == 'DELETE_PENDING'
+
+        assert chat.send_message('a', "y")[1]['deleted_count'] == 1
+        assert chat.send_message('c', "y")[1]['deleted_count'] == 0  # Already gone, not the last insert id
+
+    def test_late_yes_reports_expired(self, chat, clock):
+        chat.send_message('s1', "save my email anna@example.com")
+        assert chat.send_message('a', "delete my email")[1]['action'] == 'DELETE_PENDING'
+        clock.now += 61
+        chat.pending_actions.expire()
+        assert chat.send_message('a', "ja")[1]['action'] == 'DELETE_EXPIRED'
+        rows = chat._execute_sql("SELECT content FROM mydata", fetch=True)
+        assert len(rows) == 1
+
+    def test_stored_labels_cached_until_write(self, chat):
+        chat.send_message('s1', "save my email anna@example.com")
+        assert chat._stored_labels() == ['email']
+
+        calls = []
+        execute_sql = chat.memory.execute_sql
+        chat.memory.execute_sql = lambda *args, **kwargs: calls.append(args) or execute_sql(*args, **kwargs)
+        assert chat._stored_labels() == ['email'] and calls == []  # Served from cache
+
+        chat.send_message('s1', "save my phone 5551234")
+        assert sorted(chat._stored_labels()) == ['email', 'phone']
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for QwenSQLGenerator structured output - JSON intent → parameterized SQL
+"""
+
+import json
+import re
+import time
+
+import pytest
+
+from ollama_client import OllamaTimeout
+from qwen_sql_generator import (FAILED_TIMEOUT, FAILED_TRUNCATED, NUM_PREDICT, AnswerScanner, QwenSQLGenerator,
+                                compile_intent, intent_schema, num_predict_for, sql_example_to_intent)
+from rule_sql_parser import SQL_SAVE
+
+
+class FakeClient:
+    """Records chat payloads, streams a fixed text word by word"""
+
+    def __init__(self, content, done_reason='stop'):
+        self.content = content
+        self.done_reason = done_reason
+        self.calls = []
+        self.streamed = []
+        self.closed = False
+
+    def list_models(self):
+        return ["qwen2.5-coder:7b"]
+
+    def chat(self, model, messages, options=None, stream=False, timeout=30, **extra):
+        self.calls.append({'messages': messages, 'options': options, 'timeout': timeout, **extra})
+        if not stream:
+            return {'message': {'content': self.content}, 'prompt_eval_count': 12}
+        return self._chunks()
+
+    def _chunks(self):
+        try:
+            for piece in re.findall(r"\S+\s*|\s", self.content):
+                self.streamed.append(piece)
+                yield {'message': {'content': piece}, 'done': False}
+            yield {'message': {'content': ''}, 'done': True, 'prompt_eval_count': 12,
+                   'done_reason': self.done_reason}
+        finally:
+            self.closed = True
+
+
+def intent(action, label='', value='', filters=None, **extra):
+    return dict({'action': action, 'label': label, 'value': value, 'filters': filters or []}, **extra)
+
+
+class TestIntentSchema:
+
+    def test_action_limited_to_hint(self):
+        schema = intent_schema('RETRIEVE')
+        assert schema['properties']['action']['enum'] == ['RETRIEVE', 'NO_ACTION']
+        assert 'lang' not in schema['required']
+
+    def test_save_requires_lang(self):
+        assert intent_schema('SAVE')['properties']['lang']['enum'] == ['en', 'de', 'es']
+        assert 'lang' in intent_schema('SAVE')['required']
+
+
+class TestCompileIntent:
+
+    def test_save(self):
+        result = compile_intent(intent('SAVE', 'wifi password', "Luna'77", lang='es'), 'SAVE')
+        assert result['sql'] == SQL_SAVE
+        assert result['params'] == ("Luna'77", 'wifi password', 'es')
+        assert result['meta'] == 'wifi password'
+
+    def test_save_without_value_is_false_positive(self):
+        assert compile_intent(intent('SAVE', 'email', lang='en'), 'SAVE')['action'] == 'FALSE_POSITIVE'
+
+    def test_retrieve_keywords_and_show_all(self):
+        result = compile_intent(intent('RETRIEVE', filters=['boss', 'email']), 'RETRIEVE')
+        assert result['params'] == ('%boss%', '%boss%', '%email%', '%email%')
+        assert 'WHERE' not in compile_intent(intent('RETRIEVE'), 'RETRIEVE')['sql']
+
+    def test_delete_value_label_all(self):
+        by_value = compile_intent(intent('DELETE', 'email', 'a@b.com'), 'DELETE')
+        assert by_value['sql'].endswith("WHERE content = ?") and by_value['params'] == ('a@b.com',)
+        by_label = compile_intent(intent('DELETE', 'phone'), 'DELETE')
+        assert by_label['sql'].endswith("WHERE meta LIKE ?") and by_label['params'] == ('%phone%',)
+        assert compile_intent(intent('DELETE', filters=['*']), 'DELETE')['sql'] == "DELETE FROM mydata"
+
+    def test_delete_without_target_never_deletes_all(self):
+        assert compile_intent(intent('DELETE'), 'DELETE')['action'] == 'FALSE_POSITIVE'
+
+    @pytest.mark.parametrize("data", [intent('NO_ACTION'), intent('DELETE', value='x')])
+    def test_no_action_or_other_action(self, data):
+        assert compile_intent(data, 'SAVE')['action'] == 'FALSE_POSITIVE'
+
+
+class TestExamples:
+
+    @pytest.mark.parametrize("sql, expected", [
+        ("INSERT OR REPLACE INTO mydata (content, meta, lang) VALUES ('O''Brien', 'name', 'en');",
+         intent('SAVE', 'name', "O'Brien", lang='en')),
+        ("SELECT * FROM mydata WHERE meta LIKE '%wifi%' OR content LIKE '%wifi%';",
+         intent('RETRIEVE', filters=['wifi'])),
+        ("DELETE FROM mydata WHERE content = '669686832';", intent('DELETE', value='669686832')),
+        ("DELETE FROM mydata WHERE meta LIKE '%phone%';", intent('DELETE', label='phone')),
+        ("DELETE FROM mydata;", intent('DELETE', filters=['*'])),
+        ("NO_ACTION", intent('NO_ACTION')),
+    ])
+    def test_sql_example_to_intent(self, sql, expected):
+        assert sql_example_to_intent(sql) == expected
+
+    def test_json_prompts_show_json_examples(self):
+        generator = QwenSQLGenerator(client=FakeClient(""))
+        for prompt in generator.system_prompts.values():
+            assert "\nSQL: " not in prompt
+            for line in prompt.splitlines():
+                if line.startswith("JSON: "):
+                    json.loads(line[len("JSON: "):])
+
+    def test_sql_mode_keeps_sql_examples(self):
+        generator = QwenSQLGenerator(client=FakeClient(""), output='sql')
+        assert "\nSQL: INSERT" in generator.system_prompts['SAVE']
+
+
+class TestGenerateSQL:
+
+    def test_json_request_and_result(self):
+        client = FakeClient(json.dumps(intent('SAVE', 'email', 'a@b.com', lang='en')))
+        result = QwenSQLGenerator(client=client).generate_sql("save my email a@b.com", "SAVE")
+        assert result['params'] == ('a@b.com', 'email', 'en')
+        call = client.calls[0]
+        assert call['format'] == intent_schema('SAVE')
+        assert call['options'] == {'num_predict': NUM_PREDICT['json'] + len("save my email a@b.com")}
+
+    def test_unparseable_output_is_false_positive(self):
+        result = QwenSQLGenerator(client=FakeClient("NO_ACTION")).generate_sql("save the planet", "SAVE")
+        assert result['action'] == 'FALSE_POSITIVE' and result['params'] == ()
+
+    def test_sql_mode_sends_no_format(self):
+        client = FakeClient("SELECT * FROM mydata;")
+        result = QwenSQLGenerator(client=client, output='sql').generate_sql("show all", "RETRIEVE")
+        assert result['action'] == 'RETRIEVE'
+        assert 'format' not in client.calls[0]
+        assert client.calls[0]['options'] == {'num_predict': NUM_PREDICT['sql'] + len("show all")}
+
+    def test_num_predict_grows_with_input(self):
+        key = "ssh-ed25519 " + "A" * 3000
+        assert num_predict_for('json', f"save my ssh key {key}") > len(key)
+        assert num_predict_for('json', "x" * 100_000) == 4096
+
+    def test_truncated_answer_is_failure_not_false_positive(self):
+        truncated = '{"action": "SAVE", "label": "ssh key", "value": "ssh-ed25519 AAAAC3Nza'
+        result = QwenSQLGenerator(client=FakeClient(truncated, done_reason='length')).generate_sql(
+            "save my ssh key ssh-ed25519 AAAAC3NzaC1lZDI1NTE5AAAA", "SAVE")
+        assert result['failed'] == FAILED_TRUNCATED and result['params'] == ()
+
+        # Unclosed object without done_reason (stream just ended) → same
+        result = QwenSQLGenerator(client=FakeClient(truncated)).generate_sql("save my ssh key ...", "SAVE")
+        assert result['failed'] == FAILED_TRUNCATED
+
+    def test_no_action_is_verdict_not_failure(self):
+        result = QwenSQLGenerator(client=FakeClient(json.dumps(intent('NO_ACTION')))).generate_sql(
+            "save the planet", "SAVE")
+        assert result['action'] == 'FALSE_POSITIVE' and result['failed'] is None
+
+
+class TestEarlyStop:
+
+    @pytest.mark.parametrize("output, text, answer", [
+        ('json', '{"action": "SAVE", "value": "a}\\"{b", "filters": []}\n\n\n', '{"action": "SAVE", "value": "a}\\"{b", "filters": []}'),
+        ('sql', "```sql\nINSERT INTO mydata VALUES ('a;b', 'it''s');\n```", "```sql\nINSERT INTO mydata VALUES ('a;b', 'it''s');"),
+        ('sql', "Sure:\nSELECT * FROM mydata\nThis query returns", "Sure:\nSELECT * FROM mydata\n"),
+        ('sql', "NO_ACTION - this is a question", "NO_ACTION"),
+    ])
+    def test_scanner_stops_after_answer(self, output, text, answer):
+        scanner = AnswerScanner(output)
+        done = False
+        for index in range(0, len(text), 3):
+            done = scanner.feed(text[index:index + 3])
+            if done:
+                break
+        assert done and scanner.text == answer
+
+    def test_incomplete_answer_not_complete(self):
+        scanner = AnswerScanner('sql')
+        assert not scanner.feed("SELECT * FROM mydata WHERE meta LIKE '%a;")
+
+    def test_stream_closed_after_statement(self):
+        client = FakeClient("DELETE FROM mydata WHERE content = '5551234'; This deletes every row that")
+        result = QwenSQLGenerator(client=client, output='sql').generate_sql("delete 5551234", "DELETE")
+        assert result['action'] == 'DELETE' and result['early_stop'] is True
+        assert client.closed and "This " not in client.streamed
+        assert result['prefill_tokens'] is None  # Only the final chunk carries it
+
+    def test_natural_end_keeps_prefill(self):
+        client = FakeClient("SELECT * FROM mydata")
+        result = QwenSQLGenerator(client=client, output='sql').generate_sql("show all", "RETRIEVE")
+        assert result['early_stop'] is False and result['prefill_tokens'] == 12
+
+    def test_deadline_from_caller(self):
+        client = FakeClient("SELECT * FROM mydata;")
+        generator = QwenSQLGenerator(client=client, output='sql')
+        generator.generate_sql("show all", "RETRIEVE", deadline=time.monotonic() + 3)
+        assert 0 < client.calls[0]['timeout'] <= 3
+
+        result = generator.generate_sql("show all", "RETRIEVE", deadline=time.monotonic() - 1)
+        assert result['action'] == 'FALSE_POSITIVE' and len(client.calls) == 1
+
+    def test_stream_timeout_is_no_action(self):
+        class SlowClient(FakeClient):
+            def _chunks(self):
+                yield {'message': {'content': 'SELECT * '}, 'done': False}
+                raise OllamaTimeout("stream exceeded deadline")
+
+        result = QwenSQLGenerator(client=SlowClient(""), output='sql').generate_sql("show all", "RETRIEVE")
+        assert result['action'] == 'FALSE_POSITIVE' and result['failed'] == FAILED_TIMEOUT
+
+
+class TestChatSystemFailedGeneration:
+    """A SAVE/DELETE without a usable Qwen answer stays local"""
+
+    def test_truncated_save_not_sent_to_openai(self, temp_config_dir, monkeypatch):
+        pytest.importorskip("requests")
+        monkeypatch.setenv('OLLAMA_HOST', '127.0.0.1:9')
+        (temp_config_dir / ".env").write_text("OPENAI_API_KEY=sk-test\n")
+        (temp_config_dir / "config").write_text('AI_CHAT_SUMMARY="false"\n'
+                                                'AI_CHAT_OPENAI_BASE_URL="http://127.0.0.1:9/v1"\n')
+
+        from chat_system import ChatSystem
+        chat = ChatSystem(str(temp_config_dir))
+        if chat.memory is None:
+            pytest.skip("memory system unavailable")
+        try:
+            truncated = '{"action": "SAVE", "label": "server key", "value": "ssh-ed25519 AAAAC3Nza'
+            chat.qwen = QwenSQLGenerator(client=FakeClient(truncated, done_reason='length'))
+            chat.sql_cache = None
+            monkeypatch.setattr(chat.openai_client, 'post', lambda *a, **k: pytest.fail("private input sent to OpenAI"))
+
+            response, meta = chat.send_message('s1', "save that my server key is ssh-ed25519 AAAAC3NzaC1lZDI1NTE5")
+            assert meta['action'] == 'SAVE_FAILED' and meta['source'] == 'local'
+            assert "OpenAI" in response
+        finally:
+            chat.history_writer.close()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for RuleSQLParser - deterministic SQL fast path in front of Qwen
+"""
+
+import pytest
+
+from local_storage_detector import LocalStorageDetector
+from rule_sql_parser import RuleSQLParser, MIN_CONFIDENCE
+
+
+@pytest.fixture
+def parser(temp_config_dir):
+    return RuleSQLParser(LocalStorageDetector(str(temp_config_dir)), 'en')
+
+
+class TestSave:
+    """label value / label: value"""
+
+    def test_label_value(self, parser):
+        result = parser.parse("save my email test@test.com", 'SAVE')
+
+        assert result['action'] == 'SAVE'
+        assert result['sql'] == "INSERT OR REPLACE INTO mydata (content, meta, lang) VALUES (?, ?, ?)"
+        assert result['params'] == ('test@test.com', 'email', 'en')
+        assert result['confidence'] >= MIN_CONFIDENCE
+
+    def test_multi_word_label(self, parser):
+        result = parser.parse("note my wifi password MyWifi123", 'SAVE')
+
+        assert result['params'] == ('MyWifi123', 'wifi password', 'en')
+
+    def test_colon_separator(self, parser):
+        result = parser.parse("save my daughters favorite toy: teddy bear", 'SAVE')
+
+        assert result['params'] == ('teddy bear', 'daughters favorite toy', 'en')
+        assert result['meta'] == 'daughters favorite toy'
+
+    def test_language_from_verb(self, parser):
+        assert parser.parse("speichere meine Email test@test.de", 'SAVE')['params'] == ('test@test.de', 'Email', 'de')
+        assert parser.parse("guarda mi email x@y.es", 'SAVE')['params'] == ('x@y.es', 'email', 'es')
+
+    def test_filler_after_verb(self, parser):
+        result = parser.parse("merke dir meine Telefonnummer 669686832", 'SAVE')
+
+        assert result['params'] == ('669686832', 'Telefonnummer', 'de')
+
+    def test_bare_email_below_threshold(self, parser):
+        result = parser.parse("save test@test.com", 'SAVE')
+
+        assert result['params'] == ('test@test.com', 'email', 'en')
+        assert result['confidence'] < MIN_CONFIDENCE
+
+    @pytest.mark.parametrize("text", [
+        "save my mothers name irene",           # value without data format
+        "save my address Hiruela 3, 7-5",       # several data tokens
+        "save that my email is test@test.com",  # sentence, not a label
+        "how do I save a file in Python?",      # verb not first
+        "save",
+    ])
+    def test_ambiguous_falls_back(self, parser, text):
+        assert parser.parse(text, 'SAVE') is None
+
+
+class TestRetrieve:
+    """Label search and "show all" """
+
+    def test_single_label(self, parser):
+        result = parser.parse("show my email", 'RETRIEVE')
+
+        assert result['sql'] == "SELECT id, content, meta, timestamp FROM mydata WHERE meta LIKE ? OR content LIKE ? ORDER BY timestamp DESC"
+        assert result['params'] == ('%email%', '%email%')
+
+    def test_keywords_or_query(self, parser):
+        result = parser.parse("show my mothers favorite meal?", 'RETRIEVE')
+
+        assert result['sql'].count("(meta LIKE ? OR content LIKE ?)") == 3
+        assert result['params'][::2] == ('%mothers%', '%favorite%', '%meal%')
+
+    def test_show_all(self, parser):
+        result = parser.parse("zeig alle Daten", 'RETRIEVE')
+
+        assert result['sql'] == "SELECT id, content, meta, timestamp FROM mydata ORDER BY timestamp DESC"
+        assert result['params'] == ()
+
+    @pytest.mark.parametrize("text", [
+        "what is my email?",
+        "show me how to save a file",
+        "show",
+    ])
+    def test_ambiguous_falls_back(self, parser, text):
+        assert parser.parse(text, 'RETRIEVE') is None
+
+    @pytest.mark.parametrize("text", [
+        "tell me a joke",
+        "check the weather",
+        "list prime numbers",
+        "get rich quick",
+        "see you later",
+        "tell me about Paris",
+        "zeig mir das Wetter",
+        "dime un chiste",
+    ])
+    def test_generic_chat_goes_to_llm(self, parser, text):
+        assert parser.parse(text, 'RETRIEVE') is None
+
+    def test_stored_label_without_possessive(self, temp_config_dir):
+        parser = RuleSQLParser(LocalStorageDetector(str(temp_config_dir)), 'en',
+                               stored_labels=lambda: ['Email', 'wifi password'])
+
+        assert parser.parse("show email", 'RETRIEVE')['params'] == ('%email%', '%email%')
+        assert parser.parse("delete wifi password", 'DELETE')['params'] == ('%wifi password%',)
+        assert parser.parse("tell me a joke", 'RETRIEVE') is None
+
+
+class TestDelete:
+    """VALUE beats LABEL, "delete all" stays with Qwen"""
+
+    def test_by_label(self, parser):
+        result = parser.parse("delete my wifi password", 'DELETE')
+
+        assert result['sql'] == "DELETE FROM mydata WHERE meta LIKE ?"
+        assert result['params'] == ('%wifi password%',)
+
+    def test_by_value(self, parser):
+        result = parser.parse("borra mi email test@test.com", 'DELETE')
+
+        assert result['sql'] == "DELETE FROM mydata WHERE content = ?"
+        assert result['params'] == ('test@test.com',)
+
+    def test_delete_all_falls_back(self, parser):
+        assert parser.parse("lösche alle Daten", 'DELETE') is None
+
+    @pytest.mark.parametrize("text", ["remove the background", "delete that file", "borra el historial"])
+    def test_generic_chat_goes_to_llm(self, parser, text):
+        assert parser.parse(text, 'DELETE') is None
+
+    @pytest.mark.parametrize("text", ["remove line 42", "delete version 2", "delete step 3"])
+    def test_short_number_without_possessive_goes_to_llm(self, parser, text):
+        result = parser.parse(text, 'DELETE')
+        assert result is None or result['confidence'] < MIN_CONFIDENCE
+
+    @pytest.mark.parametrize("text", ["delete 669686832", "delete my pin 1234", "remove sk-abc123xyz"])
+    def test_data_value_or_possessive_stays_fast(self, parser, text):
+        assert parser.parse(text, 'DELETE')['confidence'] >= MIN_CONFIDENCE
+
+
+class TestAgainstDatabase:
+    """Generated statements run through ChatMemorySystem.execute_sql"""
+
+    def test_save_retrieve_delete(self, parser, memory_system):
+        save = parser.parse("save my email o'brien@test.com", 'SAVE')
+        memory_system.execute_sql(save['sql'], save['params'])
+
+        found = parser.parse("show my email", 'RETRIEVE')
+        rows = memory_system.execute_sql(found['sql'], found['params'], fetch=True)
+        assert [row[1] for row in rows] == ["o'brien@test.com"]
+
+        delete = parser.parse("delete my email", 'DELETE')
+        memory_system.execute_sql(delete['sql'], delete['params'])
+        assert memory_system.execute_sql(found['sql'], found['params'], fetch=True) == []
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for SQLCache - Qwen SQL reused per normalized input, values as params
+"""
+
+import os
+import time
+
+import pytest
+
+from rule_sql_parser import SQL_SAVE
+from sql_cache import SQLCache, bind_params, extract_values, normalize, to_template
+
+
+def qwen_result(sql, action):
+    return {'sql': sql, 'action': action, 'confidence': 0.95, 'valid': True, 'error': None}
+
+
+@pytest.fixture
+def cache():
+    return SQLCache("test-v1")
+
+
+class TestNormalize:
+
+    def test_case_accents_whitespace_punctuation(self):
+        assert normalize("  Zeig   MEINE Télefon-Nummer?! ") == "zeig meine telefon-nummer"
+        assert normalize("muéstrame mi email") == normalize("Muestrame  mi EMAIL.")
+
+    def test_values_become_slots(self):
+        shape, values = extract_values("save my email anna@example.com, phone 5551234.")
+        assert shape == "save my email <v0>, phone <v1>."
+        assert values == ["anna@example.com", "5551234"]
+
+    def test_template_exact_and_like(self):
+        sql = "DELETE FROM mydata WHERE content = '5551234' OR content LIKE '%anna@x.com%';"
+        assert to_template(sql, ["anna@x.com", "5551234"]) == (
+            "DELETE FROM mydata WHERE content = ? OR content LIKE ?;", [[1, 'exact'], [0, 'like']])
+
+    def test_value_inside_larger_literal_rejected(self):
+        assert to_template("INSERT INTO mydata (content) VALUES ('Hiruela 3, 7-5');", ["3", "7-5"]) is None
+
+    def test_unused_value_rejected(self):
+        assert to_template("SELECT * FROM mydata;", ["5551234"]) is None
+
+
+class TestSQLCache:
+
+    def test_save_template_rebinds_new_value(self, cache):
+        sql = "INSERT OR REPLACE INTO mydata (content, meta, lang) VALUES ('anna@example.com', 'email', 'en');"
+        assert cache.put("save my email anna@example.com", "SAVE", qwen_result(sql, 'SAVE'))
+
+        hit = cache.get("Save  my EMAIL bob@example.org", "SAVE")
+        assert hit['sql'] == "INSERT OR REPLACE INTO mydata (content, meta, lang) VALUES (?, 'email', 'en');"
+        assert hit['params'] == ["bob@example.org"]
+        assert hit['action'] == 'SAVE' and hit['cached'] is True
+
+    def test_key_includes_action_hint(self, cache):
+        cache.put("show my email", "RETRIEVE", qwen_result("SELECT * FROM mydata WHERE meta LIKE '%email%';", 'RETRIEVE'))
+        assert cache.get("show my email", "DELETE") is None
+        assert cache.get("Show my émail?", "RETRIEVE")['sql'] == "SELECT * FROM mydata WHERE meta LIKE '%email%';"
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_plain_word_data_never_cached(self, cache):
+        save = "INSERT OR REPLACE INTO mydata (content, meta, lang) VALUES ('irene', 'mothers name', 'en');"
+        delete = "DELETE FROM mydata WHERE content = 'irene';"
+        assert not cache.put("save my mothers name irene", "SAVE", qwen_result(save, 'SAVE'))
+        assert not cache.put("delete irene", "DELETE", qwen_result(delete, 'DELETE'))
+        assert len(cache) == 0
+
+    def test_false_positive_and_invalid_not_cached(self, cache):
+        assert not cache.put("save the planet", "SAVE", qwen_result("NO_ACTION", 'FALSE_POSITIVE'))
+        invalid = dict(qwen_result("SELECT 1;", 'RETRIEVE'), valid=False)
+        assert not cache.put("show x", "RETRIEVE", invalid)
+
+    def test_lru_evicts_oldest(self):
+        cache = SQLCache("v", max_entries=2)
+        for label in ("email", "phone", "pin"):
+            cache.put(f"show my {label}", "RETRIEVE",
+                      qwen_result(f"SELECT * FROM mydata WHERE meta LIKE '%{label}%';", 'RETRIEVE'))
+        assert len(cache) == 2
+        assert cache.get("show my email", "RETRIEVE") is None
+        assert cache.get("show my pin", "RETRIEVE") is not None
+
+    def test_ttl_expires(self, monkeypatch):
+        cache = SQLCache("v", ttl=10)
+        cache.put("show my email", "RETRIEVE", qwen_result("SELECT * FROM mydata WHERE meta LIKE '%email%';", 'RETRIEVE'))
+        now = time.time()
+        monkeypatch.setattr('sql_cache.time.time', lambda: now + 11)
+        assert cache.get("show my email", "RETRIEVE") is None
+        assert len(cache) == 0
+
+    def test_persistence_round_trip(self, tmp_path):
+        path = tmp_path / "sql_cache.json"
+        first = SQLCache("v1", path=str(path))
+        sql = "DELETE FROM mydata WHERE content = '5551234';"
+        first.put("delete 5551234", "DELETE", qwen_result(sql, 'DELETE'))
+        assert first.save() is True
+        assert first.save() is False  # Nothing changed since
+        assert oct(os.stat(path).st_mode & 0o777) == '0o600'
+        assert "5551234" not in path.read_text()
+
+        second = SQLCache("v1", path=str(path))
+        assert second.get("delete 6660000", "DELETE")['params'] == ["6660000"]
+
+        # New prompt version → old templates dropped
+        assert len(SQLCache("v2", path=str(path))) == 0
+
+    def test_parameterized_result_slots_and_constants(self, cache):
+        save = dict(qwen_result(SQL_SAVE, 'SAVE'), params=("anna@example.com", "email", "en"))
+        assert cache.put("save my email anna@example.com", "SAVE", save)
+        hit = cache.get("save my email bob@example.org", "SAVE")
+        assert hit['sql'] == SQL_SAVE
+        assert hit['params'] == ["bob@example.org", "email", "en"]
+
+        delete = dict(qwen_result("DELETE FROM mydata WHERE meta LIKE ?", 'DELETE'), params=("%phone%",))
+        assert cache.put("delete my phone", "DELETE", delete)
+        assert cache.get("delete my phone", "DELETE")['params'] == ["%phone%"]
+
+    def test_parameterized_plain_word_content_not_cached(self, cache):
+        save = dict(qwen_result(SQL_SAVE, 'SAVE'), params=("irene", "mothers name", "en"))
+        delete = dict(qwen_result("DELETE FROM mydata WHERE content = ?", 'DELETE'), params=("irene",))
+        assert not cache.put("save my mothers name irene", "SAVE", save)
+        assert not cache.put("delete irene", "DELETE", delete)
+        assert bind_params(SQL_SAVE, ["Hiruela 3, 7-5", "address", "en"], ["3,", "7-5"]) is None
+
+    def test_corrupt_file_ignored(self, tmp_path, capsys):
+        path = tmp_path / "sql_cache.json"
+        path.write_text("{not json")
+        assert len(SQLCache("v1", path=str(path))) == 0
+        assert "Could not load SQL cache" in capsys.readouterr().err
+
+
+class FakeQwen:
+    def __init__(self):
+        self.calls = 0
+
+    def generate_sql(self, user_input, action_hint, deadline=None, lang=None):
+        self.calls += 1
+        value = user_input.split()[-1]
+        return {'sql': f"DELETE FROM mydata WHERE content = '{value}';", 'action': 'DELETE', 'confidence': 0.9}
+
+    def validate_sql(self, sql):
+        return True, None
+
+
+class TestChatSystemIntegration:
+
+    def test_second_phrasing_skips_qwen(self, temp_config_dir, monkeypatch):
+        pytest.importorskip("requests")
+        monkeypatch.setenv('OLLAMA_HOST', '127.0.0.1:9')
+        (temp_config_dir / ".env").write_text("OPENAI_API_KEY=sk-test\n")
+        (temp_config_dir / "config").write_text('AI_CHAT_SUMMARY="false"\n'
+                                                'AI_CHAT_OPENAI_BASE_URL="http://127.0.0.1:9/v1"\n')
+
+        from chat_system import ChatSystem
+        chat = ChatSystem(str(temp_config_dir))
+        try:
+            chat.qwen = FakeQwen()
+            with chat.tracer.trace('send_message'):
+                first = chat._call_qwen_sql("please remove 5551234", ['remove'], 'DELETE')
+            with chat.tracer.trace('send_message'):
+                second = chat._call_qwen_sql("Please  remove 6660000", ['remove'], 'DELETE')
+            assert chat.qwen.calls == 1
+            assert 'cached' not in first
+            assert second['cached'] is True and second['valid'] is True
+            assert second['sql'] == "DELETE FROM mydata WHERE content = ?;"
+            assert second['params'] == ["6660000"]
+
+            hits = [span['attrs']['hit'] for trace in reversed(chat.tracer.recent())
+                    for span in trace['spans'] if span['name'] == 'sql_cache']
+            assert hits == [False, True]
+        finally:
+            chat.history_writer.close()
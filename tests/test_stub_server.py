@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the benchmark stub server (OpenAI + Ollama) and the daemon benchmark runner
+"""
+
+import random
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("requests")
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'benchmarks'))
+
+from bench_daemon import build_workload, load_keywords, parse_mix, percentiles, run_benchmark
+from chat_system import ChatSystem
+from ollama_client import OllamaClient
+from openai_client import OpenAIClient
+from qwen_sql_generator import QwenSQLGenerator
+from stub_server import LatencyModel, PromptCache, StubServer, derive_sql, render_prompt
+
+ROOT = Path(__file__).parent.parent
+
+
+@pytest.fixture
+def stub():
+    server = StubServer(canned_sql=[{'pattern': r'canned', 'sql': "SELECT 1;"}]).start()
+    yield server
+    server.stop()
+
+
+class TestLatencyModel:
+
+    @pytest.mark.parametrize("spec", ["0", "25", "fixed:25", "uniform:10:20", "normal:50:5", "lognormal:100:0.3"])
+    def test_specs_sample_non_negative(self, spec):
+        model = LatencyModel(spec, random.Random(1))
+        assert all(model.sample() >= 0 for _ in range(50))
+
+    def test_seeded_sequence_repeats(self):
+        a = LatencyModel("lognormal:100:0.3", random.Random(7))
+        b = LatencyModel("lognormal:100:0.3", random.Random(7))
+        assert [a.sample() for _ in range(5)] == [b.sample() for _ in range(5)]
+
+    def test_uniform_bounds(self):
+        model = LatencyModel("uniform:10:20", random.Random(3))
+        assert all(10 <= model.sample() <= 20 for _ in range(100))
+
+    @pytest.mark.parametrize("spec", ["gamma:1:2", "uniform:10", "fixed:x"])
+    def test_invalid_specs(self, spec):
+        with pytest.raises(ValueError):
+            LatencyModel(spec)
+
+
+class TestOpenAIEndpoint:
+
+    def test_completion(self, stub):
+        client = OpenAIClient("sk-test", stub.openai_base_url + "/chat/completions")
+        response = client.post({"model": "gpt-4o-mini", "messages": [{"role": "user", "content": "hi"}]})
+        assert response.status_code == 200
+        assert response.json()['choices'][0]['message']['content'] == stub.reply_text
+        client.close()
+
+    def test_stream(self, stub):
+        client = OpenAIClient("sk-test", stub.openai_base_url + "/chat/completions")
+        response = client.post({"model": "gpt-4o-mini", "messages": [], "stream": True}, stream=True)
+        deltas = list(ChatSystem._iter_sse_deltas(response))
+        assert len(deltas) > 5
+        assert "".join(deltas) == stub.reply_text
+        client.close()
+
+    def test_warm_hits_models(self, stub):
+        client = OpenAIClient("sk-test", stub.openai_base_url + "/chat/completions")
+        assert client.warm() is True
+        assert stub.counts['HEAD /v1/models'] == 1
+        client.close()
+
+    def test_missing_key_rejected(self, stub):
+        client = OpenAIClient("sk-test", stub.openai_base_url + "/chat/completions")
+        response = client.session.post(client.api_url, json={"messages": []})  # No Authorization header
+        assert response.status_code == 401
+        client.close()
+
+
+class TestOllamaEndpoints:
+
+    def test_version_tags_ps(self, stub):
+        client = OllamaClient(host=stub.ollama_host)
+        assert client.version() == "0.0.0-stub"
+        assert any('qwen2.5-coder' in name for name in client.list_models())
+        assert client.session.get(f"{client.host}/api/ps").json()['models']
+        client.close()
+
+    def test_qwen_generator_gets_sql(self, stub):
+        generator = QwenSQLGenerator(client=OllamaClient(host=stub.ollama_host))
+        result = generator.generate_sql("save my email anna@example.com", "SAVE")
+        assert result['action'] == 'SAVE'
+        assert "anna@example.com" not in result['sql']
+        assert result['params'] == ("anna@example.com", "email", "en")
+
+        result = generator.generate_sql("zeig meine Telefon", "RETRIEVE")
+        assert result['action'] == 'RETRIEVE'
+        assert result['params'] == ("%Telefon%", "%Telefon%")
+
+    def test_qwen_generator_sql_mode(self, stub):
+        generator = QwenSQLGenerator(client=OllamaClient(host=stub.ollama_host), output='sql')
+        result = generator.generate_sql("save my email anna@example.com", "SAVE")
+        assert result['action'] == 'SAVE'
+        assert "anna@example.com" in result['sql']
+
+    def test_canned_sql_wins(self, stub):
+        assert stub.sql_for('Now analyze this input:\n"canned request"') == "SELECT 1;"
+
+    def test_chat_and_stream(self, stub):
+        client = OllamaClient(host=stub.ollama_host)
+        reply = client.chat("qwen2.5-coder:7b", [{"role": "user", "content": "summarize"}])
+        assert reply['message']['content']
+        chunks = list(client.generate("phi3", "hello", stream=True))
+        assert chunks[-1]['done'] is True
+        client.close()
+
+    def test_qwen_prefix_reused_after_warmup(self, stub):
+        generator = QwenSQLGenerator(client=OllamaClient(host=stub.ollama_host))
+        messages = generator.build_messages("save my email anna@example.com", "SAVE")
+        assert messages[0]['content'] == generator.build_messages("note phone 5551234", "SAVE")[0]['content']
+        assert "anna@example.com" not in messages[0]['content']
+
+        warmed = generator.warm_prompts()
+        assert set(warmed) == {'SAVE', 'RETRIEVE', 'DELETE'} and all(warmed.values())
+
+        for action, text in (("SAVE", "save my email anna@example.com"), ("RETRIEVE", "show my email"),
+                             ("DELETE", "delete my phone")):
+            result = generator.generate_sql(text, action)
+            assert result['action'] == action
+            assert stub.prefill_tokens[-1] < warmed[action] / 20
+
+    @pytest.mark.parametrize("output", ['json', 'sql'])
+    def test_verbose_answer_stream_stopped_early(self, output):
+        with StubServer(token_latency="fixed:5", qwen_tail=60) as server:
+            generator = QwenSQLGenerator(client=OllamaClient(host=server.ollama_host), output=output)
+            result = generator.generate_sql("delete my phone", "DELETE")
+            assert result['action'] == 'DELETE' and result['early_stop'] is True
+
+            blocking = generator.client.chat(generator.model, generator.build_messages("delete my phone", "DELETE"),
+                                             **generator._format_for('DELETE'))
+            assert blocking['eval_count'] == max(server.decoded_tokens)
+            assert min(server.decoded_tokens) < blocking['eval_count'] - 40
+
+    def test_prompt_cache_keeps_diverging_prefix(self):
+        cache = PromptCache(slots=2)
+        save = render_prompt({'messages': [{'role': 'system', 'content': 'save rules ' * 50},
+                                           {'role': 'user', 'content': 'a'}]})
+        retrieve = render_prompt({'messages': [{'role': 'system', 'content': 'retrieve rules ' * 50},
+                                               {'role': 'user', 'content': 'b'}]})
+        assert cache.prefill(save) > 100
+        assert cache.prefill(retrieve) > 100
+        assert cache.prefill(save.replace("\na<", "\nc<")) < 20
+        assert cache.prefill(retrieve) == 1  # Identical prompt still cached
+
+    def test_derive_sql_escapes_quotes(self):
+        assert "'O''Brien'" in derive_sql('SAVE', "save my name O'Brien")
+        assert derive_sql('DELETE', "").startswith("NO_ACTION")
+
+
+class TestBenchmarkRunner:
+
+    def test_percentiles_nearest_rank(self):
+        stats = percentiles([float(v) for v in range(1, 101)])
+        assert stats['count'] == 100
+        assert (stats['p50_ms'], stats['p95_ms'], stats['p99_ms']) == (50.0, 95.0, 99.0)
+        assert percentiles([]) == {'count': 0}
+
+    def test_workload_is_seeded_and_multilingual(self):
+        keywords = {lang: load_keywords(ROOT / "lang", lang) for lang in ('en', 'de', 'es')}
+        mix = parse_mix("chat=0.5,save=0.2,retrieve=0.2,delete=0.1")
+        a = build_workload(random.Random(5), 60, mix, ['en', 'de', 'es'], keywords, 0.5)
+        b = build_workload(random.Random(5), 60, mix, ['en', 'de', 'es'], keywords, 0.5)
+        assert a == b
+        assert {m['lang'] for m in a} == {'en', 'de', 'es'}
+        assert {m['kind'] for m in a} == {'chat', 'save', 'retrieve', 'delete'}
+
+    def test_unknown_mix_kind(self):
+        with pytest.raises(ValueError):
+            parse_mix("chat=1,update=1")
+
+    def test_end_to_end_offline(self):
+        args = SimpleNamespace(clients=2, requests=6, mix="chat=0.5,save=0.25,retrieve=0.25", langs="en,de,es",
+                               stream_ratio=0.5, openai_latency="0", chunk_latency="0", qwen_latency="0",
+                               ollama_latency="0", sql_file=None, seed=1, timeout=20.0, keep_home=False,
+                               output=None, compare=None)
+        result = run_benchmark(args)
+        assert result['schema'] == 1
+        assert result['client']['total']['count'] >= 12
+        assert result['client']['errors'] == 0
+        assert 'keyword_detection' in result['phases']
+        assert result['stub_requests'].get('POST /v1/chat/completions', 0) > 0
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the offline BPE tokenizer and the token-budget context assembler
+"""
+
+import base64
+import random
+
+import pytest
+
+from context_budget import (MAX_HISTORY_ROWS, MESSAGE_OVERHEAD, MIN_MESSAGE_TOKENS, REPLY_PRIMING,
+                            TRUNCATION_MARKER, ContextAssembler)
+from tokenizer import MappedVocab, Tokenizer, compile_vocab, encoding_for_model
+
+MERGES = [b"he", b"ll", b"hell", b" w", b"or", b" wor", b"ld", b" world", b"lo"]
+
+
+@pytest.fixture
+def vocab_dir(tmp_path):
+    """Tiny cl100k_base stand-in: 256 single bytes + a few merges (rank 300 left as a gap)"""
+    tokens = [bytes([i]) for i in range(256)] + MERGES
+    ranks = list(range(256 + len(MERGES)))
+    ranks[-1] = 300  # b"lo" after a gap
+    lines = [f"{base64.b64encode(t).decode()} {r}" for t, r in zip(tokens, ranks)]
+    (tmp_path / "cl100k_base.tiktoken").write_text("\n".join(lines) + "\n")
+    return tmp_path
+
+
+def reference_bpe(piece: bytes, ranks: dict) -> list:
+    """Plain full-rescan merge (what tiktoken does) for comparison"""
+    parts = [piece[i:i + 1] for i in range(len(piece))]
+    while True:
+        pairs = [(ranks.get(parts[i] + parts[i + 1]), i) for i in range(len(parts) - 1)]
+        pairs = [p for p in pairs if p[0] is not None]
+        if not pairs:
+            return [ranks[p] for p in parts]
+        _, i = min(pairs)
+        parts[i:i + 2] = [parts[i] + parts[i + 1]]
+
+
+class TestVocab:
+    def test_compile_and_lookup(self, vocab_dir):
+        path = compile_vocab(str(vocab_dir / "cl100k_base.tiktoken"))
+        vocab = MappedVocab(path)
+
+        assert vocab.rank(b"a") == 97
+        assert vocab.rank(b" world") == 263
+        assert vocab.rank(b"lo") == 300
+        assert vocab.rank(b"xyz") is None
+        assert vocab.rank(b"") is None  # gap entries never match
+        vocab.close()
+
+    def test_not_a_vocab(self, tmp_path):
+        path = tmp_path / "bad.bpe"
+        path.write_bytes(b"\0" * 64)
+        with pytest.raises(ValueError):
+            MappedVocab(str(path))
+
+
+class TestTokenizer:
+    def test_merges(self, vocab_dir):
+        tokenizer = Tokenizer('cl100k_base', vocab_dir=str(vocab_dir))
+
+        assert tokenizer.exact is True
+        assert tokenizer.encode("hello world") == [258, ord("o"), 263]
+        assert tokenizer.count("hello world") == 3
+        assert (vocab_dir / "cl100k_base.bpe").exists()  # compiled on first use
+
+    def test_matches_reference_merge(self, vocab_dir):
+        tokenizer = Tokenizer('cl100k_base', vocab_dir=str(vocab_dir))
+        ranks = {bytes([i]): i for i in range(256)}
+        ranks.update({t: 256 + i for i, t in enumerate(MERGES)})
+        ranks[b"lo"] = 300
+
+        rng = random.Random(7)
+        for _ in range(200):
+            piece = bytes(rng.choice(b"helowrd ") for _ in range(rng.randint(1, 24)))
+            assert tokenizer._merge(piece) == reference_bpe(piece, ranks)
+
+    def test_estimate_without_vocab(self, tmp_path):
+        tokenizer = Tokenizer('o200k_base', vocab_dir=str(tmp_path))
+
+        assert tokenizer.exact is False
+        assert tokenizer.count("") == 0
+        assert tokenizer.count("hi there") == 3  # "hi" + " there" (6 bytes → 2), rounded up
+        assert tokenizer.count("x" * 400) == 100
+        with pytest.raises(RuntimeError):
+            tokenizer.encode("hi")
+
+    def test_encoding_for_model(self):
+        assert encoding_for_model("gpt-4o-mini") == "o200k_base"
+        assert encoding_for_model("gpt-4-turbo") == "cl100k_base"
+        assert encoding_for_model("gpt-3.5-turbo") == "cl100k_base"
+        assert encoding_for_model("something-new") == "o200k_base"
+
+
+class WordTokenizer:
+    """One token per word - keeps budget arithmetic readable"""
+    exact = False
+
+    def count(self, text):
+        return len(text.split())
+
+
+class TestContextAssembler:
+    def message(self, role, words):
+        return {"role": role, "content": " ".join(["w"] * words)}
+
+    def test_newest_history_that_fits(self):
+        per_message = MESSAGE_OVERHEAD + 1 + 10
+        system = [self.message("system", 10)]
+        user = self.message("user", 10)
+        history = [self.message("user", 10) for _ in range(10)]
+        budget = REPLY_PRIMING + 100 + 2 * per_message + 3 * per_message + 5
+
+        assembler = ContextAssembler(WordTokenizer(), budget=budget, max_tokens=100)
+        messages, stats = assembler.assemble(system, history, user)
+
+        assert stats['history_kept'] == 3
+        assert stats['history_dropped'] == 7
+        assert messages == system + history[-3:] + [user]
+        assert stats['prompt_tokens'] == REPLY_PRIMING + 5 * per_message
+
+    def test_oversized_message_stops_packing(self):
+        history = [self.message("user", 1), self.message("assistant", 500), self.message("user", 1)]
+        assembler = ContextAssembler(WordTokenizer(), budget=200, max_tokens=50)
+        messages, stats = assembler.assemble([], history, self.message("user", 1))
+
+        # The 500-word message does not fit → nothing older is sent either
+        assert messages == history[-1:] + [self.message("user", 1)]
+        assert stats['history_kept'] == 1
+
+    def test_user_message_always_sent(self):
+        assembler = ContextAssembler(WordTokenizer(), budget=160, max_tokens=50)
+        messages, stats = assembler.assemble([], [self.message("user", 1)], self.message("user", 100))
+
+        assert messages == [self.message("user", 100)]
+        assert stats['history_dropped'] == 1 and not stats['user_truncated']
+
+    def test_oversized_user_message_truncated_to_budget(self):
+        assembler = ContextAssembler(WordTokenizer(), budget=100, max_tokens=50)
+        messages, stats = assembler.assemble([self.message("system", 10)], [], self.message("user", 500))
+
+        assert stats['user_truncated'] is True
+        assert messages[-1]['content'].endswith(TRUNCATION_MARKER)
+        assert stats['prompt_tokens'] + assembler.max_tokens <= assembler.budget
+        assert stats['prompt_tokens'] + assembler.max_tokens == assembler.budget  # Longest prefix that fits
+
+    def test_no_room_for_user_message_rejected(self):
+        assembler = ContextAssembler(WordTokenizer(), budget=60, max_tokens=50)
+        with pytest.raises(ValueError):
+            assembler.assemble([], [], self.message("user", 100))
+
+    def test_history_rows_follow_budget(self):
+        assert ContextAssembler(WordTokenizer(), budget=20 * MIN_MESSAGE_TOKENS).history_rows() == 20
+        assert ContextAssembler(WordTokenizer(), budget=10 ** 6).history_rows() == MAX_HISTORY_ROWS
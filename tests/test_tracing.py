@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for Tracer - nested per-phase request spans
+"""
+
+import json
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+import daemon_protocol
+from tracing import Tracer
+from tests.test_daemon_protocol import FakeChatSystem
+
+
+class TestTracer:
+    def test_nested_spans(self):
+        tracer = Tracer()
+
+        with tracer.trace('send_message', session_id='s1') as trace:
+            with tracer.span('keyword_detection') as span:
+                span.set(detected=True)
+            with tracer.span('openai_call'):
+                with tracer.span('markdown_render'):
+                    pass
+            trace.set(source='openai')
+
+        [data] = tracer.recent()
+        assert data['name'] == 'send_message'
+        assert data['attrs'] == {'session_id': 's1', 'source': 'openai'}
+        assert [(s['name'], s['depth'], s['parent']) for s in data['spans']] == [
+            ('keyword_detection', 1, 'send_message'),
+            ('openai_call', 1, 'send_message'),
+            ('markdown_render', 2, 'openai_call'),
+        ]
+        assert data['spans'][0]['attrs'] == {'detected': True}
+        assert all(s['duration_ms'] >= 0 for s in data['spans'])
+
+    def test_span_without_trace_is_noop(self):
+        tracer = Tracer()
+
+        with tracer.span('orphan') as span:
+            span.set(x=1)
+
+        assert tracer.recent() == []
+
+    def test_exception_recorded(self):
+        tracer = Tracer()
+
+        with pytest.raises(ValueError):
+            with tracer.trace('send_message'):
+                with tracer.span('sql_execute'):
+                    raise ValueError("boom")
+
+        [data] = tracer.recent()
+        assert data['attrs']['error'] == 'ValueError'
+        assert data['spans'][0]['attrs']['error'] == 'ValueError'
+
+    def test_ring_buffer_and_filters(self):
+        tracer = Tracer(ring_size=3)
+        for i in range(5):
+            with tracer.trace('send_message', n=i):
+                pass
+        with tracer.trace('other'):
+            time.sleep(0.01)
+
+        assert [t['attrs']['n'] for t in tracer.recent(name='send_message')] == [4, 3]
+        assert [t['name'] for t in tracer.recent(min_duration_ms=5)] == ['other']
+        assert len(tracer.recent(limit=1)) == 1
+
+    def test_jsonl_file(self, tmp_path):
+        trace_file = tmp_path / "trace.jsonl"
+        tracer = Tracer(trace_file=str(trace_file))
+        for _ in range(2):
+            with tracer.trace('send_message'):
+                with tracer.span('history_load'):
+                    pass
+
+        lines = trace_file.read_text().splitlines()
+        assert len(lines) == 2
+        assert json.loads(lines[0])['spans'][0]['name'] == 'history_load'
+
+    def test_threads_have_separate_traces(self):
+        tracer = Tracer()
+
+        def run(name):
+            with tracer.trace(name):
+                with tracer.span(f"{name}_span"):
+                    time.sleep(0.01)
+
+        threads = [threading.Thread(target=run, args=(f"t{i}",)) for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        for data in tracer.recent():
+            assert [s['name'] for s in data['spans']] == [f"{data['name']}_span"]
+
+
+class TracedChatSystem(FakeChatSystem):
+    def __init__(self, *args, **kwargs):
+        self.tracer = Tracer()
+
+    def send_message(self, session_id, user_input, system_prompt="", on_chunk=None):
+        with self.tracer.trace('send_message', session_id=session_id):
+            with self.tracer.span('keyword_detection'):
+                pass
+            return super().send_message(session_id, user_input, system_prompt, on_chunk)
+
+
+def test_daemon_trace_action(tmp_path):
+    import chat_daemon
+
+    socket_path = str(tmp_path / "chat_daemon.sock")
+    with patch.object(chat_daemon, 'ChatSystem', TracedChatSystem):
+        daemon = chat_daemon.ChatDaemon(socket_path=socket_path)
+    thread = threading.Thread(target=daemon.start, daemon=True)
+    thread.start()
+    try:
+        for _ in range(50):
+            if daemon.running:
+                break
+            time.sleep(0.02)
+
+        daemon_protocol.request(socket_path, {'action': 'send_message', 'session_id': 's1', 'message': 'hi'}, timeout=2)
+        response = daemon_protocol.request(socket_path, {'action': 'trace', 'limit': 5}, timeout=2)
+
+        assert response['success'] is True
+        assert response['response'][0]['attrs']['session_id'] == 's1'
+        assert response['response'][0]['spans'][0]['name'] == 'keyword_detection'
+    finally:
+        daemon.running = False
+        thread.join(timeout=3)
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Offline BPE Tokenizer
+Counts tokens the way the configured OpenAI model does - no network, no tiktoken
+
+Vocabulary:
+- OpenAI's public <encoding>.tiktoken files (base64 token + rank per line)
+- Compiled once into <encoding>.bpe: offsets + open-addressing hash table + token bytes
+- The .bpe file is memory-mapped - no 200k-entry dict built at daemon start,
+  pages are shared and loaded on demand
+
+    python3 tokenizer.py compile ~/.aichat/tokenizers/o200k_base.tiktoken
+
+Counting:
+- Pre-tokenizer regex per encoding (exact with the `regex` package,
+  close stdlib approximation without it)
+- Byte pair merge per piece (lowest rank first, same as tiktoken)
+- LRU caches for pieces and whole strings → history messages are
+  counted once, not on every turn
+
+No vocabulary installed → estimate (~4 bytes per token per piece, rounded up),
+Tokenizer.exact tells which one is in use.
+"""
+
+import base64
+import mmap
+import os
+import struct
+import sys
+import threading
+import zlib
+from collections import OrderedDict
+from typing import List, Optional
+
+try:
+    import regex as _regex  # \p{L} classes → exact pre-tokenization
+except ImportError:
+    _regex = None
+import re
+
+MAGIC = b'AICBPE1\0'
+HEADER = struct.Struct('<8sIII')  # magic, tokens, slots, data bytes
+EMPTY_SLOT = 0xFFFFFFFF
+NO_RANK = 1 << 32
+
+DEFAULT_ENCODING = 'o200k_base'
+DEFAULT_CACHE_SIZE = 4096
+
+PATTERNS = {
+    'cl100k_base': r"""'(?i:[sdmt]|ll|ve|re)|[^\r\n\p{L}\p{N}]?+\p{L}+|\p{N}{1,3}| ?[^\s\p{L}\p{N}]++[\r\n]*|\s*[\r\n]|\s+(?!\S)|\s+""",
+    'o200k_base': '|'.join([
+        r"""[^\r\n\p{L}\p{N}]?[\p{Lu}\p{Lt}\p{Lm}\p{Lo}\p{M}]*[\p{Ll}\p{Lm}\p{Lo}\p{M}]+(?i:'s|'t|'re|'ve|'m|'ll|'d)?""",
+        r"""[^\r\n\p{L}\p{N}]?[\p{Lu}\p{Lt}\p{Lm}\p{Lo}\p{M}]+[\p{Ll}\p{Lm}\p{Lo}\p{M}]*(?i:'s|'t|'re|'ve|'m|'ll|'d)?""",
+        r"""\p{N}{1,3}""",
+        r""" ?[^\s\p{L}\p{N}]+[\r\n/]*""",
+        r"""\s*[\r\n]+""",
+        r"""\s+(?!\S)""",
+        r"""\s+""",
+    ]),
+}
+
+# stdlib re has no \p{L}: letters = [^\W\d_], "other" = [^\s\w] plus "_"
+FALLBACK_PATTERN = r"""'(?i:[sdmt]|ll|ve|re)|(?:[^\r\n\w]|_)?[^\W\d_]+|\d{1,3}| ?(?:[^\s\w]|_)+[\r\n]*|\s*[\r\n]|\s+(?!\S)|\s+"""
+
+# Model name prefix → encoding (first match wins)
+MODEL_ENCODINGS = (
+    ('gpt-4o', 'o200k_base'),
+    ('gpt-4.1', 'o200k_base'),
+    ('gpt-4.5', 'o200k_base'),
+    ('gpt-5', 'o200k_base'),
+    ('o1', 'o200k_base'),
+    ('o3', 'o200k_base'),
+    ('o4', 'o200k_base'),
+    ('gpt-4', 'cl100k_base'),
+    ('gpt-3.5', 'cl100k_base'),
+)
+
+
+def encoding_for_model(model: str) -> str:
+    """Encoding name used by an OpenAI chat model (unknown → o200k_base)"""
+    model = (model or '').lower()
+    for prefix, encoding in MODEL_ENCODINGS:
+        if model.startswith(prefix):
+            return encoding
+    return DEFAULT_ENCODING
+
+
+def _slot(token: bytes, mask: int) -> int:
+    return zlib.crc32(token) & mask
+
+
+def compile_vocab(source: str, target: str = None) -> str:
+    """
+    Compile a .tiktoken file into the memory-mappable .bpe format
+
+    Layout (little endian):
+        header | offsets[tokens + 1] (u32) | slots[slots] (u32 rank) | token bytes
+
+    Returns:
+        Path of the written .bpe file
+    """
+    target = target or os.path.splitext(source)[0] + '.bpe'
+    ranks = {}
+    with open(source, 'rb') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            token, rank = line.split()
+            ranks[int(rank)] = base64.b64decode(token)
+
+    n_tokens = max(ranks) + 1 if ranks else 0
+    n_slots = 1
+    while n_slots < 2 * max(n_tokens, 1):
+        n_slots <<= 1
+    mask = n_slots - 1
+
+    offsets = [0] * (n_tokens + 1)
+    data = bytearray()
+    slots = [EMPTY_SLOT] * n_slots
+    for rank in range(n_tokens):
+        offsets[rank] = len(data)
+        token = ranks.get(rank)
+        if token is None:
+            continue  # Gap in the rank list - zero-length entry, never matches
+        data += token
+        slot = _slot(token, mask)
+        while slots[slot] != EMPTY_SLOT:
+            slot = (slot + 1) & mask
+        slots[slot] = rank
+    offsets[n_tokens] = len(data)
+
+    tmp_file = f"{target}.{os.getpid()}.tmp"
+    with open(tmp_file, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, n_tokens, n_slots, len(data)))
+        f.write(struct.pack(f'<{n_tokens + 1}I', *offsets))
+        f.write(struct.pack(f'<{n_slots}I', *slots))
+        f.write(bytes(data))
+    os.replace(tmp_file, target)
+    return target
+
+
+class MappedVocab:
+    """Token bytes → rank lookups straight from a memory-mapped .bpe file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.n_tokens, self.n_slots, data_len = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"Not a compiled BPE vocabulary: {path}")
+
+        offsets_start = HEADER.size
+        slots_start = offsets_start + 4 * (self.n_tokens + 1)
+        self._data_start = slots_start + 4 * self.n_slots
+        self._mask = self.n_slots - 1
+
+        view = memoryview(self._map)
+        if sys.byteorder == 'little':
+            self._offsets = view[offsets_start:slots_start].cast('I')
+            self._slots = view[slots_start:self._data_start].cast('I')
+        else:  # Rare: big endian host - decode once
+            self._offsets = struct.unpack_from(f'<{self.n_tokens + 1}I', self._map, offsets_start)
+            self._slots = struct.unpack_from(f'<{self.n_slots}I', self._map, slots_start)
+
+    def rank(self, token: bytes) -> Optional[int]:
+        slots, offsets, data = self._slots, self._offsets, self._map
+        base = self._data_start
+        size = len(token)
+        slot = _slot(token, self._mask)
+        while True:
+            rank = slots[slot]
+            if rank == EMPTY_SLOT:
+                return None
+            start = offsets[rank]
+            if offsets[rank + 1] - start == size and data[base + start:base + start + size] == token:
+                return rank
+            slot = (slot + 1) & self._mask
+
+    def close(self):
+        for name in ('_offsets', '_slots'):
+            view = getattr(self, name, None)
+            if isinstance(view, memoryview):
+                view.release()
+        if getattr(self, '_map', None) is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+
+class _LRU:
+    """Small thread-safe LRU dict (daemon workers share one Tokenizer)"""
+
+    def __init__(self, size: int):
+        self.size = max(1, size)
+        self._data: 'OrderedDict' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            if len(self._data) > self.size:
+                self._data.popitem(last=False)
+
+
+class Tokenizer:
+    """Token counter for one encoding (exact with a vocabulary, estimate without)"""
+
+    def __init__(self, encoding: str = DEFAULT_ENCODING, vocab_dir: str = None,
+                 cache_size: int = DEFAULT_CACHE_SIZE):
+        """
+        Args:
+            encoding: o200k_base, cl100k_base, ...
+            vocab_dir: Directory with <encoding>.bpe (or .tiktoken, compiled on first use)
+            cache_size: Entries in the piece and string caches
+        """
+        self.encoding = encoding
+        self.vocab = self._open_vocab(encoding, vocab_dir)
+
+        if _regex is not None and encoding in PATTERNS:
+            self._pattern = _regex.compile(PATTERNS[encoding])
+        else:
+            self._pattern = re.compile(FALLBACK_PATTERN)
+
+        self._piece_cache = _LRU(cache_size)
+        self._text_cache = _LRU(cache_size)
+
+    @staticmethod
+    def _open_vocab(encoding: str, vocab_dir: str = None) -> Optional[MappedVocab]:
+        vocab_dir = vocab_dir or os.path.expanduser("~/.aichat/tokenizers")
+        compiled = os.path.join(vocab_dir, f"{encoding}.bpe")
+        source = os.path.join(vocab_dir, f"{encoding}.tiktoken")
+        try:
+            if not os.path.exists(compiled) and os.path.exists(source):
+                compile_vocab(source, compiled)
+            if os.path.exists(compiled):
+                return MappedVocab(compiled)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Could not load {encoding} vocabulary: {e}", file=sys.stderr)
+        return None
+
+    @property
+    def exact(self) -> bool:
+        return self.vocab is not None
+
+    def _merge(self, piece: bytes) -> List[int]:
+        """Byte pair merge: repeatedly join the adjacent pair with the lowest rank"""
+        rank = self.vocab.rank
+        whole = rank(piece)
+        if whole is not None:
+            return [whole]
+
+        parts = [piece[i:i + 1] for i in range(len(piece))]
+        pair_ranks = [rank(parts[i] + parts[i + 1]) for i in range(len(parts) - 1)]
+        pair_ranks = [NO_RANK if r is None else r for r in pair_ranks]
+
+        while pair_ranks:
+            best = min(pair_ranks)
+            if best == NO_RANK:
+                break
+            i = pair_ranks.index(best)
+            parts[i:i + 2] = [parts[i] + parts[i + 1]]
+            del pair_ranks[i]
+            if i > 0:
+                r = rank(parts[i - 1] + parts[i])
+                pair_ranks[i - 1] = NO_RANK if r is None else r
+            if i < len(pair_ranks):
+                r = rank(parts[i] + parts[i + 1])
+                pair_ranks[i] = NO_RANK if r is None else r
+
+        return [rank(part) for part in parts]
+
+    def _piece_tokens(self, piece: str) -> List[int]:
+        tokens = self._piece_cache.get(piece)
+        if tokens is None:
+            tokens = self._merge(piece.encode('utf-8'))
+            self._piece_cache.put(piece, tokens)
+        return tokens
+
+    def encode(self, text: str) -> List[int]:
+        """
+        Token ids of text
+
+        Raises:
+            RuntimeError: If no vocabulary is installed
+        """
+        if self.vocab is None:
+            raise RuntimeError(f"No {self.encoding} vocabulary installed")
+        tokens = []
+        for piece in self._pattern.findall(text):
+            tokens.extend(self._piece_tokens(piece))
+        return tokens
+
+    def count(self, text: str) -> int:
+        """Token count of text (cached per string)"""
+        if not text:
+            return 0
+        count = self._text_cache.get(text)
+        if count is not None:
+            return count
+
+        if self.vocab is None:
+            count = sum(max(1, (len(piece.encode('utf-8')) + 3) // 4)
+                        for piece in self._pattern.findall(text))
+        else:
+            count = sum(len(self._piece_tokens(piece)) for piece in self._pattern.findall(text))
+
+        self._text_cache.put(text, count)
+        return count
+
+
+def main() -> int:
+    if len(sys.argv) >= 3 and sys.argv[1] == 'compile':
+        target = compile_vocab(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else None)
+        print(f"✓ {target}")
+        return 0
+
+    if len(sys.argv) >= 3 and sys.argv[1] == 'count':
+        tokenizer = Tokenizer(encoding_for_model(sys.argv[3]) if len(sys.argv) > 3 else DEFAULT_ENCODING)
+        print(f"{tokenizer.count(sys.argv[2])} tokens ({'exact' if tokenizer.exact else 'estimate'})")
+        return 0
+
+    print("Usage: tokenizer.py [compile <file.tiktoken> [out.bpe] | count <text> [model]]")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Request Tracing
+Nested per-phase timings for ChatSystem.send_message
+
+    with tracer.trace('send_message', session_id=sid):
+        with tracer.span('keyword_detection'):
+            ...
+        with tracer.span('openai_call'):
+            with tracer.span('markdown_render'):
+                ...
+
+Finished traces go to:
+- a ring buffer (last N requests) → daemon "trace" action
+- an optional JSONL file (AI_CHAT_TRACE_FILE), one trace per line
+- listeners (add_listener) → daemon metrics (metrics.py)
+
+The daemon runs with stderr → /dev/null, so the old "Keyword check (x ms)"
+prints never reached anyone. Spans outside a trace are no-ops.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+DEFAULT_RING_SIZE = 200
+
+
+class Span:
+    """One timed phase (offsets/durations in ms relative to the trace start)"""
+
+    __slots__ = ('name', 'depth', 'parent', 'start_ms', 'duration_ms', 'attrs', '_start')
+
+    def __init__(self, name: str, depth: int, parent: Optional[str], trace_start: float, attrs: Dict):
+        self.name = name
+        self.depth = depth
+        self.parent = parent
+        self._start = time.perf_counter()
+        self.start_ms = (self._start - trace_start) * 1000
+        self.duration_ms = None
+        self.attrs = attrs
+
+    def set(self, **attrs):
+        """Attach attributes (action, row counts, status codes, ...)"""
+        self.attrs.update(attrs)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'depth': self.depth,
+            'parent': self.parent,
+            'start_ms': round(self.start_ms, 3),
+            'duration_ms': round(self.duration_ms, 3) if self.duration_ms is not None else None,
+            'attrs': self.attrs
+        }
+
+
+class Trace(Span):
+    """Root span of one request, collects its child spans"""
+
+    __slots__ = ('trace_id', 'started_at', 'spans', 'stack')
+
+    def __init__(self, name: str, attrs: Dict):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.started_at = time.time()
+        start = time.perf_counter()
+        super().__init__(name, 0, None, start, attrs)
+        self.spans: List[Span] = []
+        self.stack: List[Span] = [self]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'trace_id': self.trace_id,
+            'name': self.name,
+            'timestamp': self.started_at,
+            'duration_ms': round(self.duration_ms, 3) if self.duration_ms is not None else None,
+            'attrs': self.attrs,
+            'spans': [span.to_dict() for span in self.spans]
+        }
+
+
+class _NoopSpan:
+    """Returned by span() when no trace is active"""
+
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class _SpanContext:
+    def __init__(self, tracer: 'Tracer', trace: Trace, name: str, attrs: Dict):
+        self.tracer = tracer
+        self.trace = trace
+        self.name = name
+        self.attrs = attrs
+        self.span = None
+
+    def __enter__(self) -> Span:
+        parent = self.trace.stack[-1]
+        self.span = Span(self.name, len(self.trace.stack), parent.name, self.trace._start, self.attrs)
+        self.trace.spans.append(self.span)
+        self.trace.stack.append(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        self.span.duration_ms = (time.perf_counter() - self.span._start) * 1000
+        if exc_type is not None:
+            self.span.attrs['error'] = exc_type.__name__
+        self.trace.stack.pop()
+        return False
+
+
+class _TraceContext:
+    def __init__(self, tracer: 'Tracer', name: str, attrs: Dict):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.trace = None
+
+    def __enter__(self) -> Trace:
+        self.trace = Trace(self.name, self.attrs)
+        self.tracer._local.trace = self.trace
+        return self.trace
+
+    def __exit__(self, exc_type, exc, tb):
+        self.trace.duration_ms = (time.perf_counter() - self.trace._start) * 1000
+        if exc_type is not None:
+            self.trace.attrs['error'] = exc_type.__name__
+        self.tracer._local.trace = None
+        self.tracer._record(self.trace)
+        return False
+
+
+class Tracer:
+    """Thread-aware tracer: one active trace per thread (daemon worker)"""
+
+    def __init__(self, ring_size: int = DEFAULT_RING_SIZE, trace_file: str = None):
+        """
+        Args:
+            ring_size: Finished traces kept in memory
+            trace_file: Optional JSONL file every finished trace is appended to
+        """
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._ring = deque(maxlen=max(1, ring_size))
+        self.trace_file = os.path.expanduser(trace_file) if trace_file else None
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+
+    def add_listener(self, listener: Callable[[Dict[str, Any]], None]):
+        """Call listener(trace_dict) for every finished trace (on the request thread)"""
+        self._listeners.append(listener)
+
+    def trace(self, name: str, **attrs) -> _TraceContext:
+        """Start a request trace on this thread"""
+        return _TraceContext(self, name, attrs)
+
+    def span(self, name: str, **attrs):
+        """Time a phase of the current trace (no-op without one)"""
+        trace = getattr(self._local, 'trace', None)
+        if trace is None:
+            return _NOOP
+        return _SpanContext(self, trace, name, attrs)
+
+    def current(self) -> Optional[Trace]:
+        return getattr(self._local, 'trace', None)
+
+    def _record(self, trace: Trace):
+        data = trace.to_dict()
+        with self._lock:
+            self._ring.append(data)
+            if self.trace_file:
+                try:
+                    with open(self.trace_file, 'a', encoding='utf-8') as f:
+                        f.write(json.dumps(data, ensure_ascii=False) + "\n")
+                except OSError as e:
+                    print(f"⚠️  Could not write trace file: {e}", file=sys.stderr)
+
+        for listener in self._listeners:
+            try:
+                listener(data)
+            except Exception as e:
+                print(f"⚠️  Trace listener failed: {e}", file=sys.stderr)
+
+    def recent(self, limit: int = 20, name: str = None, min_duration_ms: float = 0.0) -> List[Dict[str, Any]]:
+        """
+        Finished traces, newest first
+
+        Args:
+            limit: Max traces returned
+            name: Only traces with this root name
+            min_duration_ms: Only traces at least this slow (find the p99 outliers)
+        """
+        with self._lock:
+            traces = list(self._ring)
+        result = []
+        for data in reversed(traces):
+            if name and data['name'] != name:
+                continue
+            if (data['duration_ms'] or 0.0) < min_duration_ms:
+                continue
+            result.append(data)
+            if len(result) >= limit:
+                break
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._ring.clear()
+